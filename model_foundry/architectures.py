@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Adaptateurs d'architecture
+Noms de tenseurs de chaque famille → schéma canonique (tour, pile, couche, rôle)
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+# Tours d'un modèle multimodal, repérées par un segment du nom de tenseur.
+# Tout le reste appartient au modèle de langue.
+COMPONENT_SEGMENTS = {
+    'vision_tower': 'vision',
+    'vision_model': 'vision',
+    'vision_encoder': 'vision',
+    'image_encoder': 'vision',
+    'visual': 'vision',
+    'multi_modal_projector': 'vision',
+    'mm_projector': 'vision',
+    'audio_tower': 'audio',
+    'audio_encoder': 'audio',
+}
+
+# Projecteurs entre une tour et le modèle de langue
+PROJECTOR_SEGMENTS = ('multi_modal_projector', 'mm_projector')
+
+# Rôles canoniques d'un tenseur, quelle que soit la famille
+ROLES = (
+    'embed', 'pos_embed', 'patch_embed', 'embed_norm',
+    'attn_norm', 'attn_q', 'attn_k', 'attn_v', 'attn_qkv', 'attn_out',
+    'attn_q_norm', 'attn_k_norm', 'attn_post_norm',
+    'mlp_norm', 'mlp_gate', 'mlp_up', 'mlp_gate_up', 'mlp_down', 'mlp_post_norm',
+    'final_norm', 'lm_head', 'projector', 'other',
+)
+
+# Rôles lus avant la première couche (début des courbes de fusion, tête du premier shard)
+PRE_LAYER_ROLES = ('embed', 'pos_embed', 'patch_embed', 'embed_norm')
+
+
+class CanonicalTensor(NamedTuple):
+    """
+    Position d'un tenseur dans le schéma canonique.
+
+    `stack` est le préfixe qui précède le numéro de couche: les couches
+    `vision_tower.encoder.layers.3` et `model.layers.3` (ou encore
+    `model.encoder.layers.3` et `model.decoder.layers.3`) ne se confondent pas.
+    `module` est le chemin relatif à la couche (au modèle hors couches).
+    """
+    component: str
+    stack: Optional[str]
+    layer: Optional[int]
+    role: str
+    module: str
+    param: str
+
+
+class ArchitectureAdapter:
+    """
+    Correspondance noms → rôles d'une famille de modèles.
+
+    Les rôles sont indexés par chemin de module: `layer_roles` relatif à la
+    couche (`self_attn.q_proj`), `global_roles` pour les tenseurs hors couches
+    (`embed_tokens`, `lm_head`), comparé aux suffixes du nom. Les tables sont
+    construites une fois; `locate` ne fait que des lectures de dictionnaire.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model_types: Sequence[str],
+        layer_segments: Sequence[str],
+        layer_roles: Dict[str, str],
+        global_roles: Dict[str, str]
+    ):
+        unknown = set(layer_roles.values()) | set(global_roles.values())
+        unknown -= set(ROLES)
+        if unknown:
+            raise ValueError(f"{name}: rôles inconnus {sorted(unknown)}")
+        self.name = name
+        self.model_types = tuple(model_types)
+        self.layer_segments = frozenset(layer_segments)
+        self.layer_roles = dict(layer_roles)
+        self.global_roles = dict(global_roles)
+        self._layer_depth = max((k.count('.') + 1 for k in self.layer_roles), default=0)
+        self._global_depth = max((k.count('.') + 1 for k in self.global_roles), default=0)
+
+    def __repr__(self) -> str:
+        return f"ArchitectureAdapter({self.name!r})"
+
+    @staticmethod
+    def _lookup(table: Dict[str, str], parts: List[str], depth: int) -> str:
+        # Suffixe le plus long d'abord: `attention.output.dense` avant `output.dense`
+        for k in range(min(depth, len(parts)), 0, -1):
+            role = table.get('.'.join(parts[-k:]))
+            if role is not None:
+                return role
+        return 'other'
+
+    def locate(self, name: str) -> CanonicalTensor:
+        """Situe un tenseur: tour, pile, couche, rôle."""
+        parts = name.split('.')
+        param, path = parts[-1], parts[:-1]
+        component = next(
+            (COMPONENT_SEGMENTS[part] for part in path if part in COMPONENT_SEGMENTS), 'language'
+        )
+
+        for i, part in enumerate(path[:-1]):
+            if part in self.layer_segments and path[i + 1].isdigit():
+                module = path[i + 2:]
+                return CanonicalTensor(
+                    component, '.'.join(path[:i + 1]), int(path[i + 1]),
+                    self._lookup(self.layer_roles, module, self._layer_depth),
+                    '.'.join(module), param
+                )
+
+        role = self._lookup(self.global_roles, path, self._global_depth)
+        if role == 'other' and any(part in PROJECTOR_SEGMENTS for part in path):
+            role = 'projector'
+        return CanonicalTensor(component, None, None, role, '.'.join(path), param)
+
+
+# --- Familles prises en charge -------------------------------------------
+
+LLAMA_LAYER_ROLES = {
+    'input_layernorm': 'attn_norm',
+    'self_attn.q_proj': 'attn_q',
+    'self_attn.k_proj': 'attn_k',
+    'self_attn.v_proj': 'attn_v',
+    'self_attn.o_proj': 'attn_out',
+    'self_attn.q_norm': 'attn_q_norm',
+    'self_attn.k_norm': 'attn_k_norm',
+    'post_attention_layernorm': 'mlp_norm',
+    'mlp.gate_proj': 'mlp_gate',
+    'mlp.up_proj': 'mlp_up',
+    'mlp.down_proj': 'mlp_down',
+}
+
+LLAMA_GLOBAL_ROLES = {
+    'embed_tokens': 'embed',
+    'norm': 'final_norm',
+    'lm_head': 'lm_head',
+}
+
+# Gemma 2/3: normes avant et après l'attention et le MLP
+GEMMA2_LAYER_ROLES = {
+    **LLAMA_LAYER_ROLES,
+    'post_attention_layernorm': 'attn_post_norm',
+    'pre_feedforward_layernorm': 'mlp_norm',
+    'post_feedforward_layernorm': 'mlp_post_norm',
+}
+
+PHI3_LAYER_ROLES = {
+    **LLAMA_LAYER_ROLES,
+    'self_attn.qkv_proj': 'attn_qkv',
+    'mlp.gate_up_proj': 'mlp_gate_up',
+}
+
+GPT2_LAYER_ROLES = {
+    'ln_1': 'attn_norm',
+    'attn.c_attn': 'attn_qkv',
+    'attn.c_proj': 'attn_out',
+    'ln_2': 'mlp_norm',
+    'mlp.c_fc': 'mlp_up',
+    'mlp.c_proj': 'mlp_down',
+}
+
+GPT2_GLOBAL_ROLES = {
+    'wte': 'embed',
+    'wpe': 'pos_embed',
+    'ln_f': 'final_norm',
+    'lm_head': 'lm_head',
+}
+
+GPT_NEOX_LAYER_ROLES = {
+    'input_layernorm': 'attn_norm',
+    'attention.query_key_value': 'attn_qkv',
+    'attention.dense': 'attn_out',
+    'post_attention_layernorm': 'mlp_norm',
+    'mlp.dense_h_to_4h': 'mlp_up',
+    'mlp.dense_4h_to_h': 'mlp_down',
+}
+
+GPT_NEOX_GLOBAL_ROLES = {
+    'embed_in': 'embed',
+    'final_layer_norm': 'final_norm',
+    'embed_out': 'lm_head',
+}
+
+# Encodeurs post-norm (BERT, RoBERTa...)
+BERT_LAYER_ROLES = {
+    'attention.self.query': 'attn_q',
+    'attention.self.key': 'attn_k',
+    'attention.self.value': 'attn_v',
+    'attention.output.dense': 'attn_out',
+    'attention.output.LayerNorm': 'attn_post_norm',
+    'intermediate.dense': 'mlp_up',
+    'output.dense': 'mlp_down',
+    'output.LayerNorm': 'mlp_post_norm',
+}
+
+BERT_GLOBAL_ROLES = {
+    'embeddings.word_embeddings': 'embed',
+    'embeddings.position_embeddings': 'pos_embed',
+    'embeddings.LayerNorm': 'embed_norm',
+}
+
+# Tours de vision CLIP / SigLIP
+CLIP_LAYER_ROLES = {
+    'layer_norm1': 'attn_norm',
+    'self_attn.q_proj': 'attn_q',
+    'self_attn.k_proj': 'attn_k',
+    'self_attn.v_proj': 'attn_v',
+    'self_attn.out_proj': 'attn_out',
+    'layer_norm2': 'mlp_norm',
+    'mlp.fc1': 'mlp_up',
+    'mlp.fc2': 'mlp_down',
+}
+
+CLIP_GLOBAL_ROLES = {
+    'embeddings.patch_embedding': 'patch_embed',
+    'embeddings.position_embedding': 'pos_embed',
+    'embeddings.class_embedding': 'embed',
+    'pre_layrnorm': 'embed_norm',
+    'post_layernorm': 'final_norm',
+}
+
+T5_LAYER_ROLES = {
+    'SelfAttention.q': 'attn_q',
+    'SelfAttention.k': 'attn_k',
+    'SelfAttention.v': 'attn_v',
+    'SelfAttention.o': 'attn_out',
+    'layer.0.layer_norm': 'attn_norm',
+    'DenseReluDense.wi': 'mlp_up',
+    'DenseReluDense.wi_0': 'mlp_gate',
+    'DenseReluDense.wi_1': 'mlp_up',
+    'DenseReluDense.wo': 'mlp_down',
+}
+
+T5_GLOBAL_ROLES = {
+    'shared': 'embed',
+    'final_layer_norm': 'final_norm',
+    'lm_head': 'lm_head',
+}
+
+ARCHITECTURES: Dict[str, ArchitectureAdapter] = {}
+
+
+def register_architecture(adapter: ArchitectureAdapter) -> ArchitectureAdapter:
+    """Ajoute (ou remplace) une famille dans le registre."""
+    ARCHITECTURES[adapter.name] = adapter
+    _generic_adapter.cache_clear()
+    canonical_name.cache_clear()
+    return adapter
+
+
+for _adapter in (
+    ArchitectureAdapter(
+        'llama', ('llama', 'mistral', 'mixtral', 'qwen2', 'qwen3', 'gemma'),
+        ('layers',), LLAMA_LAYER_ROLES, LLAMA_GLOBAL_ROLES
+    ),
+    ArchitectureAdapter(
+        'gemma2', ('gemma2', 'gemma3', 'gemma3_text'),
+        ('layers',), GEMMA2_LAYER_ROLES, LLAMA_GLOBAL_ROLES
+    ),
+    ArchitectureAdapter('phi3', ('phi3',), ('layers',), PHI3_LAYER_ROLES, LLAMA_GLOBAL_ROLES),
+    ArchitectureAdapter('gpt2', ('gpt2',), ('h',), GPT2_LAYER_ROLES, GPT2_GLOBAL_ROLES),
+    ArchitectureAdapter(
+        'gpt_neox', ('gpt_neox',),
+        ('layers',), GPT_NEOX_LAYER_ROLES, GPT_NEOX_GLOBAL_ROLES
+    ),
+    ArchitectureAdapter(
+        'bert', ('bert', 'roberta', 'xlm-roberta'),
+        ('layer',), BERT_LAYER_ROLES, BERT_GLOBAL_ROLES
+    ),
+    ArchitectureAdapter(
+        'clip', ('clip_vision_model', 'siglip_vision_model'),
+        ('layers',), CLIP_LAYER_ROLES, CLIP_GLOBAL_ROLES
+    ),
+    ArchitectureAdapter('t5', ('t5', 'mt5'), ('block',), T5_LAYER_ROLES, T5_GLOBAL_ROLES),
+    # Décodeur Llama + tour CLIP: la tour est distinguée par son segment (COMPONENT_SEGMENTS)
+    ArchitectureAdapter(
+        'llava', ('llava', 'llava_next'),
+        ('layers',),
+        {**CLIP_LAYER_ROLES, **LLAMA_LAYER_ROLES},
+        {**CLIP_GLOBAL_ROLES, **LLAMA_GLOBAL_ROLES}
+    ),
+):
+    ARCHITECTURES[_adapter.name] = _adapter
+
+
+@lru_cache(maxsize=None)
+def _generic_adapter() -> ArchitectureAdapter:
+    """Union de toutes les familles, pour les noms dont le modèle est inconnu."""
+    layer_roles: Dict[str, str] = {}
+    global_roles: Dict[str, str] = {}
+    segments = set()
+    for adapter in reversed(list(ARCHITECTURES.values())):
+        layer_roles.update(adapter.layer_roles)
+        global_roles.update(adapter.global_roles)
+        segments |= adapter.layer_segments
+    return ArchitectureAdapter('generic', (), sorted(segments), layer_roles, global_roles)
+
+
+@lru_cache(maxsize=None)
+def canonical_name(name: str) -> CanonicalTensor:
+    """Situe un tenseur sans connaître sa famille (union des adaptateurs, mis en cache)."""
+    return _generic_adapter().locate(name)
+
+
+def detect_architecture(names: Iterable[str], config: Optional[dict] = None) -> ArchitectureAdapter:
+    """
+    Famille d'un modèle: `model_type` de config.json s'il est connu, sinon
+    celle qui attribue un rôle au plus grand nombre de tenseurs.
+    """
+    config = config or {}
+    text_config = config.get('text_config') or {}
+    for model_type in (config.get('model_type'), text_config.get('model_type')):
+        for adapter in ARCHITECTURES.values():
+            if model_type in adapter.model_types:
+                return adapter
+
+    names = list(names)
+    best, best_score = _generic_adapter(), 0
+    for adapter in ARCHITECTURES.values():
+        score = sum(adapter.locate(name).role != 'other' for name in names)
+        if score > best_score:
+            best, best_score = adapter, score
+    return best
+
+
+class TensorMap:
+    """
+    Tables précompilées des tenseurs d'un modèle: position canonique de chaque
+    nom, nom de chaque clé canonique et profondeur de chaque pile.
+
+    La clé canonique ne dépend pas des conventions de nommage: (tour, rang de
+    la pile dans la tour, couche, rôle, paramètre). Les tenseurs hors couches
+    de même rôle (normes finales d'un encodeur et d'un décodeur) sont
+    distingués par leur ordre d'apparition; ceux sans rôle, par leur chemin.
+    """
+
+    def __init__(self, names: Iterable[str], adapter: ArchitectureAdapter):
+        self.adapter = adapter
+        self.locations: Dict[str, CanonicalTensor] = {name: adapter.locate(name) for name in names}
+        self.keys: Dict[str, Tuple] = {}
+        self.by_key: Dict[Tuple, str] = {}
+        self.by_role: Dict[Tuple, str] = {}
+        self.depth: Dict[str, int] = {}
+
+        stacks: Dict[str, Dict[str, int]] = {}
+        occurrences: Dict[Tuple, int] = {}
+        for name, location in self.locations.items():
+            role = location.role if location.role != 'other' else f'other:{location.module}'
+            if location.layer is not None:
+                ranks = stacks.setdefault(location.component, {})
+                rank = ranks.setdefault(location.stack, len(ranks))
+                depth = self.depth.get(location.stack, 0)
+                self.depth[location.stack] = max(depth, location.layer + 1)
+            else:
+                slot = (location.component, role, location.param)
+                rank = occurrences[slot] = occurrences.get(slot, -1) + 1
+            key = (location.component, rank, location.layer, role, location.param)
+            self.keys[name] = key
+            self.by_key.setdefault(key, name)
+            self.by_role.setdefault(
+                (location.component, location.layer, location.role, location.param), name
+            )
+
+    def locate(self, name: str) -> CanonicalTensor:
+        location = self.locations.get(name)
+        return location if location is not None else self.adapter.locate(name)
+
+    def find(
+        self,
+        role: str,
+        layer: Optional[int] = None,
+        component: str = 'language',
+        param: str = 'weight'
+    ) -> Optional[str]:
+        """Nom du tenseur d'un rôle donné (première pile de la tour), ou None."""
+        return self.by_role.get((component, layer, role, param))
+
+    def position(self, name: str) -> float:
+        """
+        Position relative (0 → 1) dans la pile de couches: couche i sur n à
+        i / (n - 1); avant les couches (embeddings) 0, après (norme finale,
+        lm_head) 1.
+        """
+        location = self.locate(name)
+        if location.layer is None:
+            return 0.0 if location.role in PRE_LAYER_ROLES else 1.0
+        layers = self.depth.get(location.stack, location.layer + 1)
+        return location.layer / (layers - 1) if layers > 1 else 0.0
+
+    def match(self, other: 'TensorMap') -> Dict[str, str]:
+        """
+        Correspondance des noms de ce modèle vers ceux d'un autre: même nom
+        d'abord, sinon même clé canonique (familles aux conventions différentes).
+        """
+        matched = {}
+        for name, key in self.keys.items():
+            if name in other.locations:
+                matched[name] = name
+            elif key in other.by_key:
+                matched[name] = other.by_key[key]
+        return matched
+
+
+def tensor_map(names: Iterable[str], config: Optional[dict] = None) -> TensorMap:
+    """Tables d'un modèle, famille détectée d'après config.json ou les noms."""
+    names = list(names)
+    return TensorMap(names, detect_architecture(names, config))
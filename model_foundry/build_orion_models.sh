@@ -50,21 +50,50 @@ check_requirements() {
     success "Prérequis OK"
 }
 
-# Afficher l'espace disque
-check_disk_space() {
-    log "Vérification de l'espace disque..."
-    df -h /workspace | grep -v Filesystem
-    
-    AVAILABLE=$(df /workspace | awk 'NR==2 {print $4}')
-    if [ "$AVAILABLE" -lt 10485760 ]; then  # 10 GB en KB
-        warning "Moins de 10 Go disponibles. Continuez-vous ? (y/n)"
-        read -r response
-        if [ "$response" != "y" ]; then
-            exit 1
+# Planifier tous les builds demandés en un seul appel (en-têtes seulement):
+# le disque est cumulé sur les builds enchaînés, le script refuse de démarrer s'il manque
+# Arguments: nom recette, répétés pour chaque build
+plan_builds() {
+    local args=() first=1
+    while [ "$#" -gt 0 ]; do
+        local name="$1" recipe="$2"
+        shift 2
+        if [ "$first" -eq 1 ]; then
+            args+=("merged_models/$name" "/workspace/public/models/$name-q4" --recipe "recipes/$recipe")
+            first=0
+        else
+            args+=(--target "merged_models/$name" "/workspace/public/models/$name-q4" "recipes/$recipe")
         fi
+    done
+    
+    log "Planification des builds..."
+    python3 optimize_pipeline.py "${args[@]}" --plan -q q4 2>&1 | tee -a "$LOG_FILE"
+    if [ "${PIPESTATUS[0]}" -ne 0 ]; then
+        error "Ressources insuffisantes (voir le plan ci-dessus)"
+        exit 1
     fi
 }
 
+check_resources() {
+    cd /workspace/model_foundry
+    
+    local builds=()
+    case "$1" in
+        code-logic|all)
+            builds+=(ORION-Code-Logic-v1 orion-code-logic-v1.yml)
+            ;;&
+        creative|all)
+            builds+=(ORION-Creative-Multilingual-v1 orion-creative-multilingual-v1.yml)
+            ;;&
+        vision|all)
+            builds+=(ORION-Vision-Logic-v1 orion-vision-logic-v1.yml)
+            ;;
+    esac
+    [ "${#builds[@]}" -gt 0 ] && plan_builds "${builds[@]}"
+    
+    success "Ressources suffisantes"
+}
+
 # Créer ORION Code & Logic
 build_code_logic() {
     log ""
@@ -144,11 +173,11 @@ log "━━━━━━━━━━━━━━━━━━━━━━━━━
 log "🚀 ORION Model Foundry - Build Script"
 log "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 
-check_requirements
-check_disk_space
-
 TARGET="${1:-all}"
 
+check_requirements
+check_resources "$TARGET"
+
 case "$TARGET" in
     code-logic)
         build_code_logic
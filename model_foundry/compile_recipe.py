@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Compilation des recettes de fusion
+Valide une recette (schéma, parents, formes) sur les en-têtes et produit un plan par tenseur
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from fetch_models import DEFAULT_ENDPOINT, HUB_URL_TEMPLATE, FetchError, model_config, model_headers
+from merge_tensors import (
+    FLAG_PARAMETERS,
+    PLAN_VERSION,
+    RECIPE_DTYPES,
+    MergeError,
+    compile_plan,
+    parent_errors,
+)
+from safetensors_io import SafetensorsError
+from sync_registry import validate
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Méthodes de fusion de mergekit
+MERGE_METHODS = (
+    'linear', 'slerp', 'nuslerp', 'task_arithmetic', 'ties', 'dare_ties', 'dare_linear',
+    'breadcrumbs', 'breadcrumbs_ties', 'della', 'della_linear', 'model_stock', 'passthrough'
+)
+
+# Méthodes à vecteurs de tâche: écarts calculés par rapport à `base_model`
+BASE_MODEL_METHODS = (
+    'task_arithmetic', 'ties', 'dare_ties', 'dare_linear',
+    'breadcrumbs', 'breadcrumbs_ties', 'della', 'della_linear', 'model_stock'
+)
+
+# Paramètres bornés à [0, 1]
+UNIT_PARAMETERS = ('t', 'density')
+
+# Plans compilés, à côté des recettes
+PLANS_DIRNAME = '.plans'
+
+# Sous-ensemble JSON Schema d'une recette (validé par sync_registry.validate)
+RECIPE_SCHEMA = {
+    'type': 'object',
+    'required': ['models', 'merge_method', 'parameters', 'dtype'],
+    'properties': {
+        'models': {'type': 'array', 'items': {'$ref': '#/definitions/model'}},
+        'merge_method': {'type': 'string', 'enum': list(MERGE_METHODS)},
+        'base_model': {'type': 'string'},
+        'parameters': {'type': 'object'},
+        'dtype': {'type': 'string', 'enum': list(RECIPE_DTYPES)},
+        'metadata': {'type': 'object', 'properties': {'name': {'type': 'string'}}},
+    },
+    'definitions': {
+        'model': {
+            'type': 'object',
+            'required': ['model'],
+            'properties': {
+                'model': {'type': 'string'},
+                'parameters': {'type': 'object'},
+            },
+        },
+    },
+}
+
+
+class RecipeError(MergeError):
+    """Recette invalide; `errors` contient toutes les erreurs trouvées."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def setting_errors(setting, path: str, name: str) -> List[str]:
+    """Erreurs d'une valeur de paramètre (scalaire, courbe ou règles {filter, value})."""
+    if isinstance(setting, bool):
+        return [] if name in FLAG_PARAMETERS else [f"{path}: booléen inattendu pour '{name}'"]
+    if isinstance(setting, (int, float)):
+        if name in UNIT_PARAMETERS and not 0.0 <= setting <= 1.0:
+            return [f"{path}: {setting} hors de [0, 1]"]
+        return []
+    if not isinstance(setting, list) or not setting:
+        return [f"{path}: nombre, courbe [v0, ..., vk] ou règles {{filter, value}} attendus"]
+
+    errors = []
+    for i, item in enumerate(setting):
+        if isinstance(item, dict):
+            if 'value' not in item:
+                errors.append(f"{path}[{i}]: champ requis manquant 'value'")
+                continue
+            if 'filter' in item and not isinstance(item['filter'], str):
+                errors.append(f"{path}[{i}].filter: chaîne attendue")
+            errors.extend(setting_errors(item['value'], f"{path}[{i}].value", name))
+        elif isinstance(item, (int, float)) and not isinstance(item, bool):
+            errors.extend(setting_errors(item, f"{path}[{i}]", name))
+        else:
+            errors.append(f"{path}[{i}]: nombre ou règle {{filter, value}} attendu")
+    return errors
+
+
+def recipe_errors(recipe) -> List[str]:
+    """
+    Erreurs d'une recette sans accès aux parents: schéma, nombre de modèles
+    selon la méthode, paramètres requis et syntaxe des courbes.
+    """
+    if not isinstance(recipe, dict):
+        return ["$: la recette doit être un objet YAML"]
+    errors = validate(recipe, RECIPE_SCHEMA, RECIPE_SCHEMA)
+    if errors:
+        return errors
+
+    method = recipe['merge_method']
+    models = recipe['models']
+    parameters = recipe['parameters'] or {}
+    if method != 'passthrough' and len(models) < 2:
+        errors.append("$.models: au moins 2 modèles sont requis pour la fusion")
+    if method in ('slerp', 'nuslerp') and len(models) != 2:
+        errors.append(f"$.models: {method} fusionne exactement 2 modèles ({len(models)} fournis)")
+    if method == 'slerp' and 't' not in parameters:
+        errors.append("$.parameters: champ requis manquant 't' (slerp)")
+    if method in BASE_MODEL_METHODS and 'base_model' not in recipe:
+        errors.append(f"$: champ requis manquant 'base_model' ({method})")
+
+    for name, setting in parameters.items():
+        errors.extend(setting_errors(setting, f"$.parameters.{name}", name))
+    for i, entry in enumerate(models):
+        for name, setting in (entry.get('parameters') or {}).items():
+            errors.extend(setting_errors(setting, f"$.models[{i}].parameters.{name}", name))
+    return errors
+
+
+def recipe_sha256(recipe_path: Path) -> str:
+    """Empreinte du fichier de recette (toute modification invalide le plan)."""
+    return hashlib.sha256(Path(recipe_path).read_bytes()).hexdigest()
+
+
+def default_plan_path(recipe_path: Path) -> Path:
+    """Emplacement du plan compilé d'une recette: recipes/.plans/<recette>.plan.json."""
+    recipe_path = Path(recipe_path)
+    return recipe_path.parent / PLANS_DIRNAME / f"{recipe_path.stem}.plan.json"
+
+
+def local_stamp(models: List[str]) -> Dict[str, List[list]]:
+    """Taille et date des safetensors des parents locaux (distants vérifiés à l'exécution)."""
+    stamp = {}
+    for model in models:
+        path = Path(model)
+        if path.is_dir():
+            stamp[model] = [
+                [file.name, file.stat().st_size, file.stat().st_mtime_ns]
+                for file in sorted(path.glob('*.safetensors'))
+            ]
+    return stamp
+
+
+def compile_recipe(
+    recipe_path: Path,
+    store: Optional[Path] = None,
+    endpoint: str = DEFAULT_ENDPOINT,
+    url_template: str = HUB_URL_TEMPLATE
+) -> dict:
+    """
+    Compile une recette en plan de fusion, sans lire aucun poids.
+
+    Les en-têtes des parents viennent d'un dossier local, du magasin ou du hub
+    (requêtes Range), avec leur config.json. Toutes les erreurs (schéma,
+    parents introuvables, tenseurs absents ou en trop, formes ou architectures
+    différentes) sont levées ensemble.
+
+    Raises:
+        RecipeError: si la recette ne peut pas être fusionnée
+    """
+    with open(recipe_path, 'r', encoding='utf-8') as f:
+        recipe = yaml.safe_load(f)
+
+    errors = recipe_errors(recipe)
+    if errors:
+        raise RecipeError(errors)
+
+    models = [entry['model'] for entry in recipe['models']]
+    checked = models + [m for m in [recipe.get('base_model')] if m and m not in models]
+    parents = []
+    configs = []
+    for model in checked:
+        try:
+            source = {'store': store, 'endpoint': endpoint, 'url_template': url_template}
+            tensors, _ = model_headers(model, **source)
+            config = model_config(model, **source)
+        except (FetchError, SafetensorsError, OSError, json.JSONDecodeError) as e:
+            errors.append(f"{model}: en-têtes inaccessibles ({e})")
+            tensors = config = None
+        parents.append(tensors)
+        configs.append(config)
+    if errors:
+        raise RecipeError(errors)
+
+    errors = parent_errors(checked, parents, configs)
+    if errors:
+        raise RecipeError(errors)
+
+    try:
+        plan = compile_plan(recipe, parents[:len(models)])
+    except MergeError as e:
+        raise RecipeError([str(e)]) from e
+    plan['recipe_sha256'] = recipe_sha256(recipe_path)
+    plan['stamp'] = local_stamp(models)
+    return plan
+
+
+def load_or_compile(
+    recipe_path: Path,
+    plan_path: Optional[Path] = None,
+    store: Optional[Path] = None,
+    force: bool = False,
+    endpoint: str = DEFAULT_ENDPOINT,
+    url_template: str = HUB_URL_TEMPLATE
+) -> Tuple[dict, bool]:
+    """
+    Plan compilé d'une recette, relu s'il est à jour.
+
+    Un plan est réutilisé tant que la recette est identique octet pour octet
+    et que les fichiers des parents locaux n'ont pas changé: les builds
+    suivants ne relisent ni en-têtes ni courbes.
+
+    Returns:
+        (plan, True si le plan existant a été réutilisé)
+    """
+    plan_path = Path(plan_path or default_plan_path(recipe_path))
+    if not force and plan_path.exists():
+        try:
+            with open(plan_path, 'r', encoding='utf-8') as f:
+                plan = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            plan = {}
+        if (
+            plan.get('format_version') == PLAN_VERSION
+            and plan.get('recipe_sha256') == recipe_sha256(recipe_path)
+            and plan.get('stamp') == local_stamp(plan.get('models', []))
+        ):
+            return plan, True
+
+    plan = compile_recipe(recipe_path, store=store, endpoint=endpoint, url_template=url_template)
+    plan_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(plan_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, separators=(',', ':'))
+    return plan, False
+
+
+def format_plan(plan: dict) -> List[str]:
+    """Résumé d'un plan compilé pour le terminal."""
+    tensors = plan['tensors']
+    params = sum(math.prod(entry['shape']) for entry in tensors)
+    lines = [
+        f"  - Méthode: {plan['merge_method']} → {plan['dtype']}",
+        f"  - Tenseurs: {len(tensors)} ({params / 1e9:.2f} G paramètres)",
+    ]
+    for i, model in enumerate(plan['models'], 1):
+        lines.append(f"    {i}. {model} ({len(plan['files'][i - 1])} fichier(s))")
+
+    keys = dict.fromkeys(key for entry in tensors for key in entry['parameters'])
+    for key in keys:
+        values = [entry['parameters'][key] for entry in tensors if key in entry['parameters']]
+        low, high = min(values), max(values)
+        span = f"{low:.3f}" if low == high else f"{low:.3f} → {high:.3f}"
+        lines.append(f"  - {key}: {span} ({len(values)} tenseurs)")
+    return lines
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Compilation des recettes de fusion",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Valider une recette et écrire son plan (recipes/.plans/dev-polyglot-v1.plan.json)
+  python compile_recipe.py recipes/dev-polyglot-v1.yml
+
+  # Vérifier toutes les recettes sans écrire de plan
+  python compile_recipe.py recipes/*.yml --check
+
+  # Recompiler même si le plan existant est à jour
+  python compile_recipe.py recipes/dev-polyglot-v1.yml --force
+        """
+    )
+
+    parser.add_argument(
+        'recipes',
+        type=Path,
+        nargs='+',
+        help="Recette(s) de fusion (YAML)"
+    )
+
+    parser.add_argument(
+        '--output',
+        '-o',
+        type=Path,
+        help="Fichier du plan (une seule recette; défaut: recipes/.plans/<recette>.plan.json)"
+    )
+
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help="Valider seulement, sans écrire de plan"
+    )
+
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help="Recompiler même si le plan existant est à jour"
+    )
+
+    parser.add_argument(
+        '--store',
+        type=Path,
+        help="Magasin partagé des modèles parents"
+    )
+
+    parser.add_argument(
+        '--endpoint',
+        default=DEFAULT_ENDPOINT,
+        help=f"Hub ou miroir des modèles distants (défaut: {DEFAULT_ENDPOINT})"
+    )
+
+    parser.add_argument(
+        '--verbose',
+        '-v',
+        action='store_true',
+        help="Mode verbose"
+    )
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    if args.output and len(args.recipes) > 1:
+        parser.error("--output n'accepte qu'une seule recette")
+
+    failures = 0
+    for recipe_path in args.recipes:
+        try:
+            if args.check:
+                plan = compile_recipe(recipe_path, store=args.store, endpoint=args.endpoint)
+                reused = False
+            else:
+                plan, reused = load_or_compile(
+                    recipe_path, args.output,
+                    store=args.store, force=args.force, endpoint=args.endpoint
+                )
+        except RecipeError as e:
+            failures += 1
+            logger.error(f"❌ {recipe_path}: {len(e.errors)} erreur(s)")
+            for error in e.errors:
+                logger.error(f"    {error}")
+            continue
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            failures += 1
+            logger.error(f"❌ {recipe_path}: {e}")
+            continue
+
+        if args.check:
+            status = "valide"
+        elif reused:
+            status = "plan à jour, réutilisé"
+        else:
+            status = f"plan écrit dans {args.output or default_plan_path(recipe_path)}"
+        logger.info(f"✅ {recipe_path}: {status}")
+        for line in format_plan(plan):
+            logger.info(line)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Précompilation du tokenizer
+Compile tokenizer.json en un binaire compact (vocabulaire interné, merges
+en tableaux d'entiers, trie de recherche précalculé) que le navigateur lit
+sans parser de JSON, avec vérification d'équivalence aller-retour.
+"""
+
+import argparse
+import json
+import struct
+import sys
+from collections import deque
+from pathlib import Path
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+TOKENIZER_FILENAME = 'tokenizer.json'
+COMPILED_FILENAME = 'tokenizer.bin'
+
+MAGIC = b'OTOK'
+FORMAT_VERSION = 1
+SECTION_ALIGNMENT = 8
+NO_VALUE = -1
+
+# En-tête: magic, version, nombre de sections;
+# puis (tag, dtype numpy, offset, longueur) par section
+HEADER = struct.Struct('<4sHH')
+SECTION = struct.Struct('<4s4sQQ')
+
+# Modèles dont le vocabulaire est un dict token → id
+DICT_VOCAB_MODELS = ('BPE', 'WordPiece', 'WordLevel')
+
+MISSING_TOKENIZERS = (
+    "bibliothèque tokenizers absente: encodage non vérifiable (pip install tokenizers)"
+)
+
+# Corpus de vérification par défaut: documentation et recettes (français, anglais, YAML)
+DEFAULT_CORPUS = (Path(__file__).parent / 'README.md',) + tuple(
+    sorted((Path(__file__).parent / 'recipes').glob('*.yml'))
+)
+
+
+class TokenizerCompileError(ValueError):
+    """Tokenizer non pris en charge ou binaire invalide."""
+
+
+def build_trie(keys: List[bytes], values: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Construit un trie d'octets en largeur d'abord.
+
+    Les enfants d'un nœud sont contigus et triés par octet; l'arête k mène
+    au nœud k + 1, donc seuls le premier enfant de chaque nœud, l'étiquette
+    de chaque arête et la valeur de chaque nœud sont stockés.
+
+    Returns:
+        (first_child uint32[N+1], labels uint8[N-1], values int32[N])
+    """
+    children: List[Dict[int, int]] = [{}]
+    node_values = [NO_VALUE]
+    for key, value in zip(keys, values):
+        node = 0
+        for byte in key:
+            child = children[node].get(byte)
+            if child is None:
+                child = len(children)
+                children[node][byte] = child
+                children.append({})
+                node_values.append(NO_VALUE)
+            node = child
+        node_values[node] = value
+
+    # Renumérotation en largeur d'abord
+    first_child = np.zeros(len(children) + 1, dtype=np.uint32)
+    labels = np.zeros(max(len(children) - 1, 0), dtype=np.uint8)
+    values = np.full(len(children), NO_VALUE, dtype=np.int32)
+
+    queue = deque([0])
+    next_id = 1
+    bfs_id = 0
+    while queue:
+        node = queue.popleft()
+        values[bfs_id] = node_values[node]
+        first_child[bfs_id] = next_id - 1
+        for byte in sorted(children[node]):
+            labels[next_id - 1] = byte
+            queue.append(children[node][byte])
+            next_id += 1
+        bfs_id += 1
+    first_child[len(children)] = next_id - 1
+
+    return first_child, labels, values
+
+
+def trie_child(first_child: np.ndarray, labels: np.ndarray, node: int, byte: int) -> int:
+    """Nœud atteint depuis `node` par l'arête `byte`, ou NO_VALUE."""
+    begin, end = int(first_child[node]), int(first_child[node + 1])
+    edge = begin + int(np.searchsorted(labels[begin:end], byte))
+    if edge >= end or labels[edge] != byte:
+        return NO_VALUE
+    return edge + 1
+
+
+def trie_lookup(first_child: np.ndarray, labels: np.ndarray, values: np.ndarray, key: bytes) -> int:
+    """Valeur associée à `key` dans le trie, ou NO_VALUE."""
+    node = 0
+    for byte in key:
+        node = trie_child(first_child, labels, node, byte)
+        if node == NO_VALUE:
+            return NO_VALUE
+    return int(values[node])
+
+
+def trie_longest(
+    first_child: np.ndarray,
+    labels: np.ndarray,
+    values: np.ndarray,
+    data: bytes,
+    start: int,
+    node: int = 0
+) -> Tuple[int, int]:
+    """
+    Plus longue clé du trie préfixe de `data[start:]`, depuis `node`.
+
+    Returns:
+        (fin dans `data`, valeur), ou (start, NO_VALUE) sans correspondance
+    """
+    match = (start, NO_VALUE)
+    for position in range(start, len(data)):
+        node = trie_child(first_child, labels, node, data[position])
+        if node == NO_VALUE:
+            break
+        if values[node] != NO_VALUE:
+            match = (position + 1, int(values[node]))
+    return match
+
+
+def _pack_strings(strings: List[str]) -> Tuple[bytes, np.ndarray]:
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return b''.join(encoded), offsets
+
+
+def _narrow(values: np.ndarray) -> np.ndarray:
+    """Plus petit type entier (little-endian) qui contient toutes les valeurs."""
+    low, high = (int(values.min()), int(values.max())) if values.size else (0, 0)
+    for dtype in ('<u2', '<u4') if low >= 0 else ('<i2', '<i4'):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    raise TokenizerCompileError("valeurs hors de l'intervalle 32 bits")
+
+
+def _json_section(value) -> np.ndarray:
+    text = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return np.frombuffer(text.encode('utf-8'), dtype='u1')
+
+
+def compile_tokenizer(tokenizer: dict) -> bytes:
+    """
+    Compile le contenu d'un tokenizer.json.
+
+    Sections:
+        CONF  JSON du tokenizer sans vocabulaire, merges ni tokens ajoutés
+        VSTR  octets UTF-8 des tokens, concaténés par id
+        VOFF  offsets[n+1] dans VSTR
+        VSCR  float64[n] scores (Unigram)
+        MRGS  [m, 3] (gauche, droite, résultat ou -1) par rang de merge
+        TFCH  trie du vocabulaire: premier enfant (TFCH), octets (TLBL), id (TVAL)
+        ADDT  JSON des tokens ajoutés; leur trie dans AFCH/ALBL/AVAL
+
+    Les tableaux d'entiers prennent le plus petit type qui convient (16 ou
+    32 bits), indiqué dans la table des sections.
+    """
+    model = tokenizer.get('model') or {}
+    model_type = model.get('type')
+    config = json.loads(json.dumps(tokenizer))
+    config_model = config['model']
+    added = config.pop('added_tokens', None)
+
+    sections: Dict[bytes, np.ndarray] = {}
+
+    if model_type in DICT_VOCAB_MODELS:
+        vocab: Dict[str, int] = config_model.pop('vocab')
+        tokens = sorted(vocab, key=vocab.__getitem__)
+        if [vocab[t] for t in tokens] != list(range(len(tokens))):
+            raise TokenizerCompileError("ids du vocabulaire non contigus")
+        config_model['vocab'] = None
+    elif model_type == 'Unigram':
+        pieces = config_model.pop('vocab')
+        tokens = [piece for piece, _ in pieces]
+        sections[b'VSCR'] = np.asarray([score for _, score in pieces], dtype='<f8')
+        config_model['vocab'] = None
+    else:
+        raise TokenizerCompileError(f"modèle de tokenizer non pris en charge: {model_type}")
+
+    strings, offsets = _pack_strings(tokens)
+    sections[b'VSTR'] = np.frombuffer(strings, dtype='u1')
+    sections[b'VOFF'] = _narrow(offsets)
+
+    if model_type == 'BPE':
+        merges = config_model.pop('merges')
+        ids = {token: idx for idx, token in enumerate(tokens)}
+        as_strings = bool(merges) and isinstance(merges[0], str)
+        # Comme `tokenizers`: le préfixe de continuation du second terme disparaît à la fusion
+        prefix = config_model.get('continuing_subword_prefix') or ''
+        triples = np.zeros((len(merges), 3), dtype=np.int64)
+        for rank, merge in enumerate(merges):
+            left, right = merge.split(' ', 1) if as_strings else merge
+            merged = left + (right[len(prefix):] if prefix and right.startswith(prefix) else right)
+            triples[rank] = (ids[left], ids[right], ids.get(merged, NO_VALUE))
+        sections[b'MRGS'] = _narrow(triples)
+        config_model['merges'] = 'string' if as_strings else 'pair'
+
+    first_child, labels, values = build_trie(
+        [t.encode('utf-8') for t in tokens], list(range(len(tokens)))
+    )
+    sections[b'TFCH'] = _narrow(first_child)
+    sections[b'TLBL'] = labels
+    sections[b'TVAL'] = _narrow(values)
+
+    if added is not None:
+        sections[b'ADDT'] = _json_section(added)
+        first_child, labels, values = build_trie(
+            [token['content'].encode('utf-8') for token in added],
+            [token['id'] for token in added]
+        )
+        sections[b'AFCH'] = _narrow(first_child)
+        sections[b'ALBL'] = labels
+        sections[b'AVAL'] = _narrow(values)
+
+    sections = {b'CONF': _json_section(config), **sections}
+
+    table_size = HEADER.size + SECTION.size * len(sections)
+    offset = -(-table_size // SECTION_ALIGNMENT) * SECTION_ALIGNMENT
+    table = [HEADER.pack(MAGIC, FORMAT_VERSION, len(sections))]
+    body = []
+    for tag, array in sections.items():
+        data = array.tobytes()
+        table.append(SECTION.pack(tag, array.dtype.str.encode('ascii'), offset, len(data)))
+        padding = -len(data) % SECTION_ALIGNMENT
+        body.append(data + b'\0' * padding)
+        offset += len(data) + padding
+
+    head = b''.join(table)
+    head += b'\0' * (-len(head) % SECTION_ALIGNMENT)
+    return head + b''.join(body)
+
+
+class CompiledTokenizer:
+    """Lecture d'un tokenizer compilé, sans copie (vues numpy sur le binaire)."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        magic, version, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise TokenizerCompileError("signature OTOK absente")
+        if version != FORMAT_VERSION:
+            raise TokenizerCompileError(f"version de format {version} non prise en charge")
+
+        self.sections: Dict[str, np.ndarray] = {}
+        for idx in range(count):
+            tag, dtype, offset, length = SECTION.unpack_from(data, HEADER.size + idx * SECTION.size)
+            if offset + length > len(data):
+                raise TokenizerCompileError(f"section {tag.decode()} hors du fichier")
+            dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+            self.sections[tag.decode('ascii')] = np.frombuffer(
+                data, dtype=dtype, count=length // dtype.itemsize, offset=offset
+            )
+
+        self.config = json.loads(self.sections['CONF'].tobytes())
+        self.strings = self.sections['VSTR']
+        self.offsets = self.sections['VOFF']
+        self.trie = (self.sections['TFCH'], self.sections['TLBL'], self.sections['TVAL'])
+        self.merges = self.sections['MRGS'].reshape(-1, 3) if 'MRGS' in self.sections else None
+        self.scores = self.sections.get('VSCR')
+        self.added_tokens = (
+            json.loads(self.sections['ADDT'].tobytes()) if 'ADDT' in self.sections else None
+        )
+        self.added_trie = (
+            (self.sections['AFCH'], self.sections['ALBL'], self.sections['AVAL'])
+            if self.added_tokens is not None else None
+        )
+        self._merge_ranks: Optional[Dict[Tuple[int, int], Tuple[int, int]]] = None
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'CompiledTokenizer':
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    @property
+    def vocab_size(self) -> int:
+        return len(self.offsets) - 1
+
+    def token(self, token_id: int) -> str:
+        begin, end = int(self.offsets[token_id]), int(self.offsets[token_id + 1])
+        return self.strings[begin:end].tobytes().decode('utf-8')
+
+    def lookup(self, token: str) -> Optional[int]:
+        """Id d'un token du vocabulaire via le trie, ou None."""
+        value = trie_lookup(*self.trie, token.encode('utf-8'))
+        return None if value == NO_VALUE else value
+
+    # --- Encodeur de référence: vocabulaire par le trie, merges par MRGS ---
+
+    def merge_ranks(self) -> Dict[Tuple[int, int], Tuple[int, int]]:
+        """(gauche, droite) → (rang, résultat) des merges BPE, construit une fois."""
+        if self._merge_ranks is None:
+            self._merge_ranks = {}
+            for rank, (left, right, result) in enumerate(self.merges.tolist()):
+                if result != NO_VALUE:
+                    self._merge_ranks.setdefault((left, right), (rank, result))
+        return self._merge_ranks
+
+    def _unknown(self) -> Optional[int]:
+        unk = self.config['model'].get('unk_token')
+        return self.lookup(unk) if unk is not None else None
+
+    def _bpe_symbols(self, word: str) -> List[int]:
+        """Ids initiaux d'un mot: un par caractère (préfixe, suffixe, octets ou inconnu)."""
+        model = self.config['model']
+        prefix = model.get('continuing_subword_prefix') or ''
+        suffix = model.get('end_of_word_suffix') or ''
+        unk = self._unknown()
+        symbols: List[int] = []
+        previous_unknown = False
+        for index, char in enumerate(word):
+            piece = (prefix if index else '') + char + (suffix if index == len(word) - 1 else '')
+            token_id = self.lookup(piece)
+            if token_id is None and model.get('byte_fallback'):
+                bytes_ids = [self.lookup(f'<0x{byte:02X}>') for byte in char.encode('utf-8')]
+                if None not in bytes_ids:
+                    symbols.extend(bytes_ids)
+                    previous_unknown = False
+                    continue
+            if token_id is None:
+                if unk is not None and not (model.get('fuse_unk') and previous_unknown):
+                    symbols.append(unk)
+                previous_unknown = unk is not None
+                continue
+            symbols.append(token_id)
+            previous_unknown = False
+        return symbols
+
+    def _encode_bpe(self, word: str) -> List[int]:
+        """Merges par rang croissant (le plus à gauche à rang égal), comme `tokenizers`."""
+        if self.config['model'].get('ignore_merges'):
+            token_id = self.lookup(word)
+            if token_id is not None:
+                return [token_id]
+        ranks = self.merge_ranks()
+        symbols = self._bpe_symbols(word)
+        while len(symbols) > 1:
+            best = None
+            for position in range(len(symbols) - 1):
+                merge = ranks.get((symbols[position], symbols[position + 1]))
+                if merge is not None and (best is None or merge[0] < best[0]):
+                    best = (merge[0], merge[1], position)
+            if best is None:
+                break
+            _, result, position = best
+            symbols[position:position + 2] = [result]
+        return symbols
+
+    def _encode_wordpiece(self, word: str) -> List[int]:
+        """Plus long préfixe du vocabulaire à chaque position, lu dans le trie."""
+        model = self.config['model']
+        unk = self._unknown()
+        if len(word) > model.get('max_input_chars_per_word', 100):
+            return [unk]
+        data = word.encode('utf-8')
+        first_child, labels, values = self.trie
+        continuation = 0
+        for byte in model.get('continuing_subword_prefix', '##').encode('utf-8'):
+            continuation = trie_child(first_child, labels, continuation, byte)
+            if continuation == NO_VALUE:
+                break
+
+        ids, start = [], 0
+        while start < len(data):
+            node = continuation if start else 0
+            end, token_id = trie_longest(first_child, labels, values, data, start, node) \
+                if node != NO_VALUE else (start, NO_VALUE)
+            if token_id == NO_VALUE:
+                return [unk]
+            ids.append(token_id)
+            start = end
+        return ids
+
+    def encode_word(self, word: str) -> List[int]:
+        """Ids d'un mot pré-tokenisé, calculés depuis les tableaux du binaire."""
+        model_type = self.config['model'].get('type')
+        if model_type == 'BPE':
+            return self._encode_bpe(word)
+        if model_type == 'WordPiece':
+            return self._encode_wordpiece(word)
+        if model_type == 'WordLevel':
+            token_id = self.lookup(word)
+            return [token_id if token_id is not None else self._unknown()]
+        raise TokenizerCompileError(
+            f"encodeur de référence: modèle {model_type} non pris en charge"
+        )
+
+    def split_added(self, text: str) -> List[Tuple[str, Optional[int]]]:
+        """Découpe le texte sur les tokens ajoutés (plus longue correspondance, trie ADDT)."""
+        if self.added_trie is None:
+            return [(text, None)]
+        flags = {token['id']: token for token in self.added_tokens}
+        data = text.encode('utf-8')
+        segments: List[Tuple[str, Optional[int]]] = []
+        start = position = 0
+        while position < len(data):
+            end, token_id = trie_longest(*self.added_trie, data, position)
+            if token_id == NO_VALUE:
+                position += 1
+                continue
+            before = data[start:position].decode('utf-8')
+            if flags[token_id].get('lstrip'):
+                before = before.rstrip()
+            if before:
+                segments.append((before, None))
+            segments.append((flags[token_id]['content'], token_id))
+            if flags[token_id].get('rstrip'):
+                while end < len(data) and data[end:end + 1].isspace():
+                    end += 1
+            start = position = end
+        if start < len(data):
+            segments.append((data[start:].decode('utf-8'), None))
+        return segments
+
+    def encode(
+        self,
+        text: str,
+        normalize: Optional[Callable[[str], str]] = None,
+        pre_tokenize: Optional[Callable[[str], List[str]]] = None
+    ) -> List[int]:
+        """
+        Encode un texte sans tokens spéciaux de post-traitement.
+
+        Normalisation et pré-tokenisation (configuration, section CONF) sont
+        fournies par l'appelant; tokens ajoutés, vocabulaire et merges sont
+        lus dans le binaire.
+        """
+        ids: List[int] = []
+        for segment, added_id in self.split_added(text):
+            if added_id is not None:
+                ids.append(added_id)
+                continue
+            segment = normalize(segment) if normalize else segment
+            for word in (pre_tokenize(segment) if pre_tokenize else [segment]):
+                ids.extend(self.encode_word(word))
+        return ids
+
+    def to_json(self) -> dict:
+        """Reconstitue le contenu de tokenizer.json."""
+        tokenizer = json.loads(json.dumps(self.config))
+        model = tokenizer['model']
+        tokens = [self.token(idx) for idx in range(self.vocab_size)]
+
+        if self.scores is not None:
+            model['vocab'] = [[token, float(score)] for token, score in zip(tokens, self.scores)]
+        else:
+            model['vocab'] = {token: idx for idx, token in enumerate(tokens)}
+
+        if self.merges is not None:
+            pairs = [(tokens[left], tokens[right]) for left, right, _ in self.merges.tolist()]
+            model['merges'] = [f'{left} {right}' for left, right in pairs] \
+                if model['merges'] == 'string' else [list(pair) for pair in pairs]
+
+        if self.added_tokens is not None:
+            tokenizer = {'added_tokens': self.added_tokens, **tokenizer}
+        return tokenizer
+
+
+def load_corpus(paths: List[Path]) -> List[str]:
+    """Lignes non vides des fichiers du corpus de vérification."""
+    lines = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines.extend(line.rstrip('\n') for line in f if line.strip())
+    return lines
+
+
+def check_equivalence(
+    original: dict,
+    compiled: CompiledTokenizer,
+    corpus: List[str],
+    require_encoding: bool = False
+) -> List[str]:
+    """
+    Vérifie l'équivalence aller-retour du binaire avec le tokenizer d'origine.
+
+    Contrôle structurel (JSON reconstitué identique, chaque token retrouvé
+    par le trie), puis, si la bibliothèque `tokenizers` est disponible,
+    chaque ligne du corpus encodée depuis le binaire (`CompiledTokenizer.encode`:
+    trie, rangs des merges) doit donner les ids de `tokenizers` sur le JSON
+    d'origine. Avec `require_encoding`, l'absence de `tokenizers`, d'un corpus
+    ou d'encodeur de référence pour le modèle est une erreur.
+    """
+    errors = []
+    rebuilt = compiled.to_json()
+    for key in sorted(set(original) | set(rebuilt)):
+        if original.get(key) != rebuilt.get(key):
+            errors.append(f"section '{key}' différente après reconstitution")
+
+    for token_id in range(compiled.vocab_size):
+        token = compiled.token(token_id)
+        found = compiled.lookup(token)
+        if found != token_id:
+            errors.append(f"trie: {token!r} → {found}, id attendu {token_id}")
+            break
+
+    if require_encoding and not corpus:
+        raise TokenizerCompileError("corpus de vérification vide: encodage non vérifiable")
+
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        if require_encoding:
+            raise TokenizerCompileError(MISSING_TOKENIZERS)
+        logger.warning(
+            "⚠️  Bibliothèque tokenizers absente: corpus non ré-encodé "
+            "(contrôle structurel seul)"
+        )
+        return errors
+
+    model_type = original.get('model', {}).get('type')
+    if model_type not in DICT_VOCAB_MODELS:
+        if require_encoding:
+            raise TokenizerCompileError(
+                f"encodeur de référence: modèle {model_type} non pris en charge"
+            )
+        logger.warning(
+            f"⚠️  Modèle {model_type}: corpus non ré-encodé depuis le binaire "
+            "(contrôle structurel seul)"
+        )
+        return errors
+
+    # Normalisation et pré-tokenisation depuis la configuration du binaire;
+    # vocabulaire, merges et tokens ajoutés depuis ses tableaux
+    reference = Tokenizer.from_str(json.dumps(original))
+    pipeline = Tokenizer.from_str(json.dumps(rebuilt))
+    normalize = pipeline.normalizer.normalize_str if pipeline.normalizer else None
+    pre_tokenize = (
+        (lambda text: [word for word, _ in pipeline.pre_tokenizer.pre_tokenize_str(text)])
+        if pipeline.pre_tokenizer else None
+    )
+    for line in corpus:
+        expected = reference.encode(line, add_special_tokens=False).ids
+        actual = compiled.encode(line, normalize, pre_tokenize)
+        if expected != actual:
+            errors.append(f"encodage différent pour: {line[:60]!r}")
+        if len(errors) > 20:
+            break
+
+    return errors
+
+
+def compile_tokenizer_file(
+    source: Path,
+    output: Optional[Path] = None,
+    corpus: Optional[List[Path]] = None,
+    check: bool = True,
+    require_encoding: bool = False
+) -> Tuple[Path, List[str]]:
+    """
+    Compile un tokenizer.json (ou le tokenizer d'un dossier de modèle).
+
+    Avec `require_encoding`, la vérification réencode obligatoirement le
+    corpus (TokenizerCompileError si `tokenizers` est absent), avant toute écriture.
+
+    Returns:
+        (chemin du binaire, erreurs de vérification)
+    """
+    source = source / TOKENIZER_FILENAME if source.is_dir() else source
+    output = output or source.with_name(COMPILED_FILENAME)
+
+    with open(source, 'r', encoding='utf-8') as f:
+        original = json.load(f)
+
+    if require_encoding and check:
+        try:
+            import tokenizers  # noqa: F401
+        except ImportError:
+            raise TokenizerCompileError(MISSING_TOKENIZERS)
+
+    data = compile_tokenizer(original)
+    with open(output, 'wb') as f:
+        f.write(data)
+
+    logger.info(
+        f"🔤 {source.name}: {source.stat().st_size / 1024:.0f} Ko → "
+        f"{output.name}: {len(data) / 1024:.0f} Ko"
+    )
+
+    errors: List[str] = []
+    if check:
+        lines = load_corpus(list(corpus or [p for p in DEFAULT_CORPUS if p.exists()]))
+        errors = check_equivalence(original, CompiledTokenizer(data), lines, require_encoding)
+
+    return output, errors
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Précompilation du tokenizer",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Compiler le tokenizer d'un modèle (écrit tokenizer.bin à côté)
+  python compile_tokenizer.py ../public/models/ORION-Dev-Polyglot-v1-q4
+
+  # Vérifier sur un corpus local
+  python compile_tokenizer.py my-model/tokenizer.json \\
+      --corpus corpus/fr.txt --corpus corpus/code.txt
+
+  # Exiger le réencodage du corpus (échoue sans la bibliothèque tokenizers)
+  python compile_tokenizer.py my-model --verify --corpus corpus/fr.txt
+        """
+    )
+
+    parser.add_argument(
+        'source',
+        type=Path,
+        help="tokenizer.json ou dossier de modèle"
+    )
+
+    parser.add_argument(
+        '--output',
+        '-o',
+        type=Path,
+        help=f"Fichier de sortie (défaut: {COMPILED_FILENAME} à côté de la source)"
+    )
+
+    parser.add_argument(
+        '--corpus',
+        type=Path,
+        action='append',
+        help="Fichier texte de vérification (répétable, défaut: README et recettes)"
+    )
+
+    parser.add_argument(
+        '--no-check',
+        action='store_true',
+        help="Ne pas vérifier l'équivalence aller-retour"
+    )
+
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help="Exiger l'encodage identique sur le corpus (erreur si tokenizers est absent)"
+    )
+
+    args = parser.parse_args()
+    if args.verify and args.no_check:
+        parser.error("--verify et --no-check sont incompatibles")
+
+    try:
+        output, errors = compile_tokenizer_file(
+            args.source, args.output, args.corpus, not args.no_check, args.verify
+        )
+    except (OSError, KeyError, TokenizerCompileError) as e:
+        logger.error(f"❌ Compilation impossible: {e}")
+        sys.exit(1)
+
+    if errors:
+        logger.error(f"❌ {output}: {len(errors)} écart(s) avec le tokenizer d'origine")
+        for error in errors:
+            logger.error(f"    - {error}")
+        sys.exit(1)
+
+    logger.info(f"✅ Tokenizer compilé: {output}")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Déduplication des tenseurs entre modèles déployés
+Repère les tenseurs identiques (nom, dtype, forme, octets) dans plusieurs
+modèles shardés, les regroupe une seule fois dans des chunks partagés et
+réécrit shards, index et manifestes pour y pointer.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import logging
+from typing import Dict, List, Tuple
+
+from safetensors_io import (
+    INDEX_FILENAME,
+    SafetensorsWriter,
+    TensorInfo,
+    iter_tensor_chunks,
+    list_tensors,
+)
+from shard_model import (
+    MANIFEST_FILENAME,
+    _layer_range,
+    components_summary,
+    locate_tensor,
+    shard_component,
+)
+from verify_model import DEFAULT_CHUNK_MB, hash_file
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Dossier des chunks partagés, à côté des dossiers de modèles
+SHARED_DIRNAME = 'shared'
+DEFAULT_MIN_TENSOR_KB = 1024
+DEFAULT_CHUNK_SIZE_MB = 100
+
+# (nom, dtype, forme, sha256): deux tenseurs de même clé sont interchangeables
+TensorKey = Tuple[str, str, Tuple[int, ...], str]
+
+
+def hash_tensors(path: Path) -> Dict[str, str]:
+    """SHA-256 des octets de chaque tenseur d'un fichier safetensors."""
+    hashes = {}
+    with open(path, 'rb') as handle:
+        for tensor in list_tensors(path):
+            sha256 = hashlib.sha256()
+            for chunk in iter_tensor_chunks(handle, tensor):
+                sha256.update(chunk)
+            hashes[tensor.name] = sha256.hexdigest()
+    return hashes
+
+
+class ModelEntry:
+    """Un modèle shardé: manifeste, index et tenseurs avec leur fichier relatif."""
+
+    def __init__(self, model_dir: Path):
+        self.dir = model_dir
+        with open(model_dir / MANIFEST_FILENAME, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        with open(model_dir / INDEX_FILENAME, 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+
+        self.loading_order: List[str] = self.manifest.get('loading_order') or [
+            shard['filename'] for shard in self.manifest['shards']
+        ]
+        self.shard_entries = {shard['filename']: shard for shard in self.manifest['shards']}
+
+        # Tenseurs par fichier, dans l'ordre de chargement puis des données
+        self.files: Dict[str, List[TensorInfo]] = {
+            filename: list_tensors(model_dir / filename) for filename in self.loading_order
+        }
+        self.keys: Dict[str, TensorKey] = {}
+
+    @property
+    def name(self) -> str:
+        return self.dir.name
+
+    def tensors(self) -> List[Tuple[str, TensorInfo]]:
+        return [(filename, t) for filename, tensors in self.files.items() for t in tensors]
+
+
+def find_models(root: Path) -> List[Path]:
+    """Dossiers de modèles shardés (avec manifeste et index) sous `root`."""
+    return sorted(
+        path for path in root.iterdir()
+        if path.is_dir()
+        and (path / MANIFEST_FILENAME).exists()
+        and (path / INDEX_FILENAME).exists()
+    )
+
+
+def chunk_filename(keys: List[TensorKey]) -> str:
+    """Nom adressé par contenu: un même groupe de tenseurs donne le même fichier."""
+    digest = hashlib.sha256('\n'.join(f'{k[0]}:{k[3]}' for k in keys).encode('utf-8')).hexdigest()
+    return f'chunk_{digest[:16]}.safetensors'
+
+
+def plan_chunks(
+    models: List[ModelEntry],
+    min_bytes: int,
+    chunk_size_bytes: int
+) -> Dict[str, List[Tuple[TensorKey, TensorInfo]]]:
+    """
+    Regroupe les tenseurs partagés en chunks.
+
+    Un chunk ne contient que des tenseurs utilisés par exactement le même
+    ensemble de modèles: chaque modèle qui y pointe en utilise tout le
+    contenu. L'ordre suit le chargement du premier modèle utilisateur.
+    """
+    users: Dict[TensorKey, List[int]] = {}
+    sources: Dict[TensorKey, TensorInfo] = {}
+    position: Dict[TensorKey, Tuple[int, int]] = {}
+
+    for model_idx, model in enumerate(models):
+        for rank, (filename, tensor) in enumerate(model.tensors()):
+            key = model.keys[tensor.name]
+            users.setdefault(key, []).append(model_idx)
+            sources.setdefault(key, tensor)
+            position.setdefault(key, (model_idx, rank))
+
+    # Un chunk ne mélange pas non plus deux tours d'un modèle multimodal
+    groups: Dict[Tuple[str, Tuple[int, ...]], List[TensorKey]] = {}
+    for key, owners in users.items():
+        if len(owners) > 1 and sources[key].nbytes >= min_bytes:
+            groups.setdefault((locate_tensor(key[0]).component, tuple(owners)), []).append(key)
+
+    chunks: Dict[str, List[Tuple[TensorKey, TensorInfo]]] = {}
+    for keys in groups.values():
+        keys.sort(key=position.__getitem__)
+        current: List[TensorKey] = []
+        current_bytes = 0
+        for key in keys:
+            nbytes = sources[key].nbytes
+            if current and current_bytes + nbytes > chunk_size_bytes:
+                chunks[chunk_filename(current)] = [(k, sources[k]) for k in current]
+                current, current_bytes = [], 0
+            current.append(key)
+            current_bytes += nbytes
+        if current:
+            chunks[chunk_filename(current)] = [(k, sources[k]) for k in current]
+
+    return chunks
+
+
+def copy_tensors(path: Path, tensors: List[TensorInfo]) -> SafetensorsWriter:
+    """Écrit un fichier safetensors en copiant les tenseurs par blocs depuis leurs fichiers."""
+    entries = [(t.name, t.dtype, t.shape, t.nbytes) for t in tensors]
+    handles = {}
+    try:
+        with SafetensorsWriter(path, entries, {'format': 'pt'}) as writer:
+            for tensor in tensors:
+                handle = handles.get(tensor.file)
+                if handle is None:
+                    handle = handles[tensor.file] = open(tensor.file, 'rb')
+                for chunk in iter_tensor_chunks(handle, tensor):
+                    writer.write(chunk)
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return writer
+
+
+def _shard_entry(filename: str, tensors: List[TensorInfo], size_bytes: int, sha256: str) -> dict:
+    return {
+        'filename': filename,
+        'num_tensors': len(tensors),
+        'size_mb': round(size_bytes / (1024 * 1024), 2),
+        'size_bytes': size_bytes,
+        'sha256': sha256,
+        'layer_range': _layer_range(tensors),
+        'component': shard_component(tensors),
+    }
+
+
+def rewrite_model(
+    model: ModelEntry,
+    chunk_of: Dict[TensorKey, str],
+    chunk_entries: Dict[str, dict],
+    chunk_tensors: Dict[str, List[TensorInfo]]
+) -> None:
+    """
+    Réécrit les shards locaux d'un modèle sans les tenseurs partagés, puis
+    son index et son manifeste.
+
+    Les shards inchangés ne sont pas touchés. Les tenseurs qui sortent d'un
+    ancien chunk (plus partagés) sont regroupés dans un nouveau shard local.
+    """
+    shared_prefix = f'../{SHARED_DIRNAME}/'
+    weight_map: Dict[str, str] = {}
+    # Fichier d'origine → fichiers qui reprennent ses tenseurs (ordre de chargement)
+    successors: Dict[str, List[str]] = {filename: [] for filename in model.loading_order}
+    kept: Dict[str, List[TensorInfo]] = {}
+    returned: List[TensorInfo] = []
+    returned_from: List[str] = []
+
+    for filename, tensor in model.tensors():
+        key = model.keys[tensor.name]
+        if key in chunk_of:
+            target = shared_prefix + chunk_of[key]
+        elif filename.startswith(shared_prefix):
+            target = None
+            returned.append(tensor)
+            returned_from.append(filename)
+        else:
+            target = filename
+            kept.setdefault(filename, []).append(tensor)
+        if target is not None:
+            weight_map[tensor.name] = target
+            if target not in successors[filename]:
+                successors[filename].append(target)
+
+    if returned:
+        shard_idx = 0
+        while f"shard_{shard_idx:02d}.safetensors" in model.files:
+            shard_idx += 1
+        filename = f"shard_{shard_idx:02d}.safetensors"
+        for tensor in returned:
+            weight_map[tensor.name] = filename
+        for source in dict.fromkeys(returned_from):
+            successors[source].append(filename)
+        kept[filename] = returned
+
+    shards: Dict[str, dict] = {}
+    for filename, tensors in kept.items():
+        if not filename.startswith(shared_prefix) and tensors == model.files.get(filename):
+            shards[filename] = model.shard_entries[filename]
+            continue
+        path = model.dir / filename
+        tmp = path.with_name(path.name + '.tmp')
+        writer = copy_tensors(tmp, tensors)
+        os.replace(tmp, path)
+        shards[filename] = _shard_entry(filename, tensors, writer.size_bytes, writer.sha256)
+
+    for filename in model.loading_order:
+        if not filename.startswith(shared_prefix) and filename not in kept:
+            (model.dir / filename).unlink()
+
+    for filename, entry in chunk_entries.items():
+        shards[shared_prefix + filename] = dict(
+            _shard_entry(
+                shared_prefix + filename, chunk_tensors[filename],
+                entry['size_bytes'], entry['sha256']
+            ),
+            shared=True
+        )
+
+    loading_order = list(dict.fromkeys(
+        target for filename in model.loading_order for target in successors[filename]
+    ))
+
+    sizes = {t.name: t.nbytes for _, t in model.tensors()}
+    model.index['metadata'] = dict(model.index.get('metadata', {}), total_size=sum(sizes.values()))
+    model.index['weight_map'] = weight_map
+    with open(model.dir / INDEX_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(model.index, f, indent=2)
+
+    manifest_shards = []
+    for shard_id, filename in enumerate(loading_order):
+        entry = dict(shards[filename])
+        entry.pop('shard_id', None)
+        manifest_shards.append({'shard_id': shard_id, **entry})
+
+    total_bytes = sum(shard['size_bytes'] for shard in manifest_shards)
+    model.manifest.update({
+        'total_shards': len(manifest_shards),
+        'total_size_mb': round(total_bytes / (1024 * 1024), 2),
+        'total_size_bytes': total_bytes,
+        'shards': manifest_shards,
+        'loading_order': loading_order,
+        'components': components_summary(manifest_shards),
+        'shared_bytes': sum(s['size_bytes'] for s in manifest_shards if s.get('shared')),
+    })
+    with open(model.dir / MANIFEST_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(model.manifest, f, indent=2)
+
+
+def _disk_bytes(models: List[ModelEntry]) -> int:
+    """Octets des fichiers de poids distincts référencés par les modèles."""
+    files = {
+        (model.dir / filename).resolve()
+        for model in models for filename in model.loading_order
+    }
+    return sum(path.stat().st_size for path in files)
+
+
+def dedup_store(
+    root: Path,
+    min_tensor_bytes: int = DEFAULT_MIN_TENSOR_KB * 1024,
+    chunk_size_bytes: int = DEFAULT_CHUNK_SIZE_MB * 1024 * 1024,
+    workers: int = 4,
+    dry_run: bool = False
+) -> dict:
+    """
+    Déduplique les tenseurs de tous les modèles shardés d'un dossier.
+
+    Passe idempotente: les chunks sont nommés d'après leur contenu, les
+    groupes inchangés ne sont pas réécrits et les chunks qui ne sont plus
+    référencés sont supprimés.
+
+    Returns:
+        Rapport {models, chunks, shared_tensors, bytes_before, bytes_after, seconds}
+    """
+    start = time.perf_counter()
+    models = [ModelEntry(path) for path in find_models(root)]
+    logger.info(f"🔎 {len(models)} modèles dans {root}")
+
+    # Un fichier (chunk partagé compris) n'est hashé qu'une fois
+    paths = list(dict.fromkeys(
+        (model.dir / filename).resolve() for model in models for filename in model.loading_order
+    ))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        file_hashes = dict(zip(paths, executor.map(hash_tensors, paths)))
+
+    for model in models:
+        for filename, tensor in model.tensors():
+            sha256 = file_hashes[(model.dir / filename).resolve()][tensor.name]
+            model.keys[tensor.name] = (tensor.name, tensor.dtype, tensor.shape, sha256)
+
+    chunks = plan_chunks(models, min_tensor_bytes, chunk_size_bytes)
+    chunk_of = {key: filename for filename, members in chunks.items() for key, _ in members}
+    bytes_before = _disk_bytes(models) if models else 0
+    copies = Counter(key for model in models for key in model.keys.values())
+    saved = sum(
+        tensor.nbytes * (copies[key] - 1)
+        for members in chunks.values() for key, tensor in members
+    )
+
+    report = {
+        'models': [model.name for model in models],
+        'chunks': len(chunks),
+        'shared_tensors': len(chunk_of),
+        'bytes_before': bytes_before,
+        'bytes_after': None,
+        'seconds': None,
+    }
+
+    if dry_run:
+        report['bytes_saved_estimate'] = saved
+        report['seconds'] = round(time.perf_counter() - start, 3)
+        return report
+
+    shared_dir = root / SHARED_DIRNAME
+    shared_dir.mkdir(exist_ok=True)
+
+    chunk_info: Dict[str, dict] = {}
+    for filename, members in chunks.items():
+        path = shared_dir / filename
+        tensors = [tensor for _, tensor in members]
+        if path.exists() and [t.name for t in list_tensors(path)] == [t.name for t in tensors]:
+            chunk_info[filename] = {
+                'size_bytes': path.stat().st_size,
+                'sha256': hash_file(path, DEFAULT_CHUNK_MB * 1024 * 1024),
+            }
+            continue
+        tmp = path.with_name(path.name + '.tmp')
+        writer = copy_tensors(tmp, tensors)
+        os.replace(tmp, path)
+        chunk_info[filename] = {'size_bytes': writer.size_bytes, 'sha256': writer.sha256}
+        logger.info(
+            f"  🧩 {filename}: {len(tensors)} tenseurs, "
+            f"{writer.size_bytes / (1024 * 1024):.1f} Mo"
+        )
+
+    chunk_tensors = {filename: list_tensors(shared_dir / filename) for filename in chunks}
+
+    for model in models:
+        used = {chunk_of[key] for key in model.keys.values() if key in chunk_of}
+        rewrite_model(
+            model,
+            chunk_of,
+            {filename: chunk_info[filename] for filename in chunks if filename in used},
+            chunk_tensors
+        )
+
+    for path in shared_dir.glob('chunk_*.safetensors'):
+        if path.name not in chunks:
+            path.unlink()
+            logger.info(f"  🗑️  {path.name}: plus référencé")
+    if not any(shared_dir.iterdir()):
+        shared_dir.rmdir()
+
+    report['bytes_after'] = _disk_bytes([ModelEntry(model.dir) for model in models])
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Déduplication des tenseurs entre modèles",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Dédupliquer tous les modèles déployés
+  python dedup_models.py ../public/models
+
+  # Estimer le gain sans rien réécrire
+  python dedup_models.py ../public/models --dry-run
+
+  # Ne partager que les tenseurs d'au moins 4 Mo
+  python dedup_models.py ../public/models --min-tensor-size 4096
+        """
+    )
+
+    parser.add_argument(
+        'root',
+        type=Path,
+        help="Dossier contenant les modèles shardés (ex: ../public/models)"
+    )
+
+    parser.add_argument(
+        '--min-tensor-size',
+        type=int,
+        default=DEFAULT_MIN_TENSOR_KB,
+        help=f"Taille minimale d'un tenseur partagé en Ko (défaut: {DEFAULT_MIN_TENSOR_KB})"
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE_MB,
+        help=f"Taille maximale d'un chunk partagé en Mo (défaut: {DEFAULT_CHUNK_SIZE_MB})"
+    )
+
+    parser.add_argument(
+        '--workers',
+        '-j',
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Fichiers hashés en parallèle"
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="Afficher le gain estimé sans modifier les modèles"
+    )
+
+    args = parser.parse_args()
+
+    if not args.root.is_dir():
+        logger.error(f"❌ Dossier introuvable: {args.root}")
+        sys.exit(1)
+
+    report = dedup_store(
+        args.root,
+        min_tensor_bytes=args.min_tensor_size * 1024,
+        chunk_size_bytes=args.chunk_size * 1024 * 1024,
+        workers=args.workers,
+        dry_run=args.dry_run
+    )
+
+    mb = 1024 * 1024
+    logger.info(
+        f"📊 {report['shared_tensors']} tenseurs partagés dans {report['chunks']} chunks"
+    )
+    if args.dry_run:
+        logger.info(
+            f"  Gain estimé: {report['bytes_saved_estimate'] / mb:.1f} Mo "
+            f"sur {report['bytes_before'] / mb:.1f} Mo"
+        )
+    else:
+        logger.info(
+            f"  Poids sur disque: {report['bytes_before'] / mb:.1f} Mo → "
+            f"{report['bytes_after'] / mb:.1f} Mo "
+            f"({report['seconds']}s)"
+        )
+        logger.info("  Relancez verify_model.py puis sync_registry.py sur les modèles modifiés")
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
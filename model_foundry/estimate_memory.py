@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Estimation de la mémoire d'inférence
+Calcule le pic mémoire (poids, cache KV, activations) par niveau de
+quantification et longueur de contexte pour renseigner min_ram_gb
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from quantize_layers import DEFAULT_GROUP_SIZE
+from quantize_model import QUANTIZATION_LEVELS
+from safetensors_io import list_model_tensors
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Chaque groupe de poids quantifiés porte une échelle fp16 et un zéro
+# empaqueté sur autant de bits qu'un code (format de quantize_layers.py)
+SCALE_BITS = 16
+
+# Précision du cache KV et des activations dans les runtimes web (fp16)
+KV_CACHE_BYTES = 2
+ACTIVATION_BYTES = 2
+
+# Taille des blocs de prefill (WebLLM découpe le prompt par blocs)
+DEFAULT_PREFILL_CHUNK = 2048
+
+# Moteur, buffers WebGPU/WASM et tokenizer, hors poids et cache
+DEFAULT_RUNTIME_OVERHEAD_MB = 300
+
+RAM_STEP_GB = 0.5
+
+
+def load_model_config(model_dir: Path) -> dict:
+    """
+    Lit config.json et normalise les dimensions utiles à l'estimation.
+
+    Gère les configurations imbriquées (`text_config` des modèles vision).
+    """
+    with open(Path(model_dir) / 'config.json', 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+
+    config = dict(raw)
+    config.update(raw.get('text_config', {}))
+
+    hidden = config.get('hidden_size') or config.get('n_embd') or config['d_model']
+    heads = config.get('num_attention_heads') or config.get('n_head')
+    layers = config.get('num_hidden_layers') or config.get('n_layer')
+
+    return {
+        'num_layers': layers,
+        'hidden_size': hidden,
+        'num_heads': heads,
+        'num_kv_heads': config.get('num_key_value_heads') or heads,
+        'head_dim': config.get('head_dim') or hidden // heads,
+        'intermediate_size': config.get('intermediate_size') or 4 * hidden,
+        'vocab_size': config.get('vocab_size', 32000),
+        'max_position_embeddings': config.get('max_position_embeddings', 4096),
+        'tie_word_embeddings': config.get('tie_word_embeddings', False),
+    }
+
+
+def count_parameters(model_dir: Path, config: dict) -> Tuple[int, int]:
+    """
+    Compte les paramètres quantifiables (matrices) et les autres (vecteurs).
+
+    Lit les en-têtes safetensors s'ils existent, sinon déduit les comptes
+    des dimensions de la configuration.
+    """
+    tensors = list_model_tensors(model_dir)
+    if tensors:
+        matrix = sum(t.numel for t in tensors if len(t.shape) >= 2)
+        vector = sum(t.numel for t in tensors if len(t.shape) < 2)
+        return matrix, vector
+
+    hidden = config['hidden_size']
+    q_dim = config['num_heads'] * config['head_dim']
+    kv_dim = config['num_kv_heads'] * config['head_dim']
+    per_layer = hidden * (2 * q_dim + 2 * kv_dim) + 3 * hidden * config['intermediate_size']
+    embeddings = config['vocab_size'] * hidden * (1 if config['tie_word_embeddings'] else 2)
+
+    matrix = config['num_layers'] * per_layer + embeddings
+    vector = (2 * config['num_layers'] + 1) * hidden
+    return matrix, vector
+
+
+def weight_bytes(
+    matrix_params: int,
+    vector_params: int,
+    quantization: str,
+    group_size: int = DEFAULT_GROUP_SIZE
+) -> int:
+    """Taille des poids pour un niveau de quantification (échelles et zéros de groupe inclus)."""
+    bits = QUANTIZATION_LEVELS[quantization]['bits']
+    if quantization != 'fp16':
+        bits += (SCALE_BITS + bits) / group_size
+    return int(matrix_params * bits / 8 + vector_params * 2)
+
+
+def kv_cache_bytes(config: dict, max_tokens: int) -> int:
+    """Cache clés/valeurs pour `max_tokens` positions, toutes couches."""
+    return (
+        2 * config['num_layers'] * config['num_kv_heads'] * config['head_dim']
+        * max_tokens * KV_CACHE_BYTES
+    )
+
+
+def activation_bytes(config: dict, max_tokens: int, prefill_chunk: int) -> int:
+    """
+    Espace de travail au pic du prefill d'un bloc.
+
+    États cachés et projections QKV, sorties intermédiaires du MLP, scores
+    d'attention fp32 du bloc contre tout le contexte, et logits fp32.
+    """
+    chunk = min(prefill_chunk, max_tokens)
+    hidden = config['hidden_size']
+    qkv = (config['num_heads'] + 2 * config['num_kv_heads']) * config['head_dim']
+
+    hidden_states = chunk * (2 * hidden + qkv) * ACTIVATION_BYTES
+    mlp = chunk * 2 * config['intermediate_size'] * ACTIVATION_BYTES
+    scores = config['num_heads'] * chunk * max_tokens * 4
+    logits = config['vocab_size'] * 4
+    return hidden_states + mlp + scores + logits
+
+
+def round_up_gb(nbytes: int) -> float:
+    """Arrondit au demi-Go supérieur."""
+    return max(RAM_STEP_GB, math.ceil(nbytes / 1024 ** 3 / RAM_STEP_GB) * RAM_STEP_GB)
+
+
+def estimate_peak_memory(
+    config: dict,
+    weights: int,
+    max_tokens: int,
+    prefill_chunk: int = DEFAULT_PREFILL_CHUNK,
+    runtime_overhead_mb: int = DEFAULT_RUNTIME_OVERHEAD_MB
+) -> dict:
+    """
+    Décompose le pic mémoire d'inférence.
+
+    Args:
+        config: Configuration normalisée (`load_model_config`)
+        weights: Taille des poids en octets
+        max_tokens: Longueur de contexte configurée
+        prefill_chunk: Taille des blocs de prefill
+        runtime_overhead_mb: Surcoût fixe du moteur
+
+    Returns:
+        {weights, kv_cache, activations, runtime, total} en octets et min_ram_gb
+    """
+    breakdown = {
+        'weights': weights,
+        'kv_cache': kv_cache_bytes(config, max_tokens),
+        'activations': activation_bytes(config, max_tokens, prefill_chunk),
+        'runtime': runtime_overhead_mb * 1024 * 1024,
+    }
+    breakdown['total'] = sum(breakdown.values())
+    breakdown['min_ram_gb'] = round_up_gb(breakdown['total'])
+    return breakdown
+
+
+def estimate_all_quantizations(
+    model_dir: Path,
+    max_tokens: Optional[int] = None,
+    prefill_chunk: int = DEFAULT_PREFILL_CHUNK,
+    runtime_overhead_mb: int = DEFAULT_RUNTIME_OVERHEAD_MB,
+    quantizations: Optional[List[str]] = None
+) -> Dict[str, dict]:
+    """Estime le pic mémoire de chaque niveau de quantification d'un modèle."""
+    config = load_model_config(model_dir)
+    max_tokens = max_tokens or config['max_position_embeddings']
+    matrix, vector = count_parameters(model_dir, config)
+
+    return {
+        quantization: {
+            'max_tokens': max_tokens,
+            **estimate_peak_memory(
+                config,
+                weight_bytes(matrix, vector, quantization),
+                max_tokens,
+                prefill_chunk,
+                runtime_overhead_mb
+            ),
+        }
+        for quantization in (quantizations or QUANTIZATION_LEVELS)
+    }
+
+
+def format_estimates(estimates: Dict[str, dict]) -> str:
+    """Formate les estimations sous forme de tableau (Mo)."""
+    lines = [
+        f"{'Quant.':<8} {'Contexte':>8} {'Poids':>9} {'Cache KV':>9} {'Activ.':>9} "
+        f"{'Runtime':>8} {'Total':>9} {'min_ram_gb':>11}",
+        '-' * 78,
+    ]
+    for quantization, row in estimates.items():
+        mb = {
+            key: row[key] / (1024 * 1024)
+            for key in ('weights', 'kv_cache', 'activations', 'runtime', 'total')
+        }
+        lines.append(
+            f"{quantization:<8} {row['max_tokens']:>8} {mb['weights']:>9.0f} "
+            f"{mb['kv_cache']:>9.0f} {mb['activations']:>9.0f} {mb['runtime']:>8.0f} "
+            f"{mb['total']:>9.0f} {row['min_ram_gb']:>11}"
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Estimation de la mémoire d'inférence",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Tous les niveaux de quantification, contexte maximal du modèle
+  python estimate_memory.py merged_models/ORION-Dev-Polyglot-v1
+
+  # Contexte configuré dans models.json (config.max_tokens)
+  python estimate_memory.py merged_models/ORION-Dev-Polyglot-v1 --max-tokens 6144
+
+  # Sortie JSON
+  python estimate_memory.py merged_models/ORION-Dev-Polyglot-v1 --json
+        """
+    )
+
+    parser.add_argument(
+        'model',
+        type=Path,
+        help="Dossier du modèle (config.json, poids safetensors optionnels)"
+    )
+
+    parser.add_argument(
+        '--max-tokens',
+        type=int,
+        help="Longueur de contexte (défaut: max_position_embeddings)"
+    )
+
+    parser.add_argument(
+        '--quantization',
+        '-q',
+        action='append',
+        choices=QUANTIZATION_LEVELS.keys(),
+        help="Niveau(x) de quantification à estimer (défaut: tous)"
+    )
+
+    parser.add_argument(
+        '--prefill-chunk',
+        type=int,
+        default=DEFAULT_PREFILL_CHUNK,
+        help=f"Taille des blocs de prefill (défaut: {DEFAULT_PREFILL_CHUNK})"
+    )
+
+    parser.add_argument(
+        '--runtime-overhead',
+        type=int,
+        default=DEFAULT_RUNTIME_OVERHEAD_MB,
+        help=f"Surcoût fixe du moteur en Mo (défaut: {DEFAULT_RUNTIME_OVERHEAD_MB})"
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help="Afficher le résultat en JSON"
+    )
+
+    args = parser.parse_args()
+
+    if not (args.model / 'config.json').exists():
+        logger.error(f"❌ config.json introuvable dans {args.model}")
+        sys.exit(1)
+
+    estimates = estimate_all_quantizations(
+        args.model,
+        max_tokens=args.max_tokens,
+        prefill_chunk=args.prefill_chunk,
+        runtime_overhead_mb=args.runtime_overhead,
+        quantizations=args.quantization
+    )
+
+    if args.json:
+        print(json.dumps(estimates, indent=2))
+    else:
+        logger.info(
+            f"🧮 Mémoire d'inférence estimée (Mo) pour {args.model}:\n"
+            + format_estimates(estimates)
+        )
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Extraction d'adaptateurs LoRA
+Approximation de rang faible de (fusionné - base) par projection, SVD aléatoire sur CPU
+"""
+
+import argparse
+import json
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from quantize_layers import FLOAT_DTYPES, LINEAR_MODULES, read_tensor
+from safetensors_io import SafetensorsError, SafetensorsWriter, TensorInfo, list_model_tensors
+from task_vectors import encode_float, raw_bits
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+ADAPTER_FILENAME = 'adapter_model.safetensors'
+ADAPTER_CONFIG_FILENAME = 'adapter_config.json'
+VECTORS_FILENAME = 'adapter_vectors.safetensors'
+REPORT_FILENAME = 'lora_report.json'
+
+# Préfixe des clés PEFT (modèle causal)
+PEFT_PREFIX = 'base_model.model.'
+
+DEFAULT_RANK = 16
+DEFAULT_OVERSAMPLE = 8
+DEFAULT_POWER_ITERATIONS = 2
+DEFAULT_SEED = 0
+
+ADAPTER_DTYPES = {'f16': 'F16', 'bf16': 'BF16', 'f32': 'F32'}
+DEFAULT_ADAPTER_DTYPE = 'f16'
+
+
+class LoraError(ValueError):
+    """Modèle fusionné et base incompatibles."""
+
+
+def randomized_svd(
+    matrix: np.ndarray,
+    rank: int,
+    oversample: int = DEFAULT_OVERSAMPLE,
+    power_iterations: int = DEFAULT_POWER_ITERATIONS,
+    rng: Optional[np.random.Generator] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    SVD tronquée par projection aléatoire (Halko, Martinsson, Tropp).
+
+    L'espace image est capturé par `rank + oversample` directions aléatoires,
+    affiné par itérations de puissance (réorthonormalisées par QR), puis la
+    petite matrice projetée est décomposée exactement.
+
+    Returns:
+        U [m, k], S [k], Vt [k, n] avec k = min(rank, m, n)
+    """
+    rng = rng or np.random.default_rng(DEFAULT_SEED)
+    m, n = matrix.shape
+    k = min(rank, m, n)
+    width = min(k + oversample, m, n)
+
+    sketch = matrix @ rng.standard_normal((n, width), dtype=np.float32)
+    basis, _ = np.linalg.qr(sketch)
+    for _ in range(power_iterations):
+        basis, _ = np.linalg.qr(matrix.T @ basis)
+        basis, _ = np.linalg.qr(matrix @ basis)
+
+    small = basis.T @ matrix
+    u, s, vt = np.linalg.svd(small, full_matrices=False)
+    left = (basis @ u[:, :k]).astype(np.float32)
+    return left, s[:k].astype(np.float32), vt[:k].astype(np.float32)
+
+
+def choose_rank(singular: np.ndarray, total_energy: float, energy: float) -> int:
+    """Plus petit rang dont les valeurs singulières captent `energy` de ||ΔW||²."""
+    captured = np.cumsum(singular.astype(np.float64) ** 2)
+    reached = np.flatnonzero(captured >= energy * total_energy)
+    return int(reached[0]) + 1 if reached.size else len(singular)
+
+
+def low_rank_error(delta: np.ndarray, lora_b: np.ndarray, lora_a: np.ndarray) -> float:
+    """||ΔW - B·A||² sans former B·A (produits de taille m·r et r·r)."""
+    cross = float(np.sum((delta @ lora_a.T) * lora_b, dtype=np.float64))
+    gram = float(np.sum((lora_b.T @ lora_b) * (lora_a @ lora_a.T), dtype=np.float64))
+    return max(0.0, float(np.sum(delta.astype(np.float64) ** 2)) - 2 * cross + gram)
+
+
+def is_target(info: TensorInfo) -> bool:
+    """Projection linéaire d'une couche (q/k/v/o, gate/up/down)."""
+    return (
+        len(info.shape) == 2
+        and info.dtype in FLOAT_DTYPES
+        and any(info.name.endswith(f'.{module}.weight') for module in LINEAR_MODULES)
+    )
+
+
+def extract_lora(
+    merged_dir: Path,
+    base_dir: Path,
+    output_dir: Path,
+    rank: int = DEFAULT_RANK,
+    energy: Optional[float] = None,
+    oversample: int = DEFAULT_OVERSAMPLE,
+    power_iterations: int = DEFAULT_POWER_ITERATIONS,
+    dtype: str = DEFAULT_ADAPTER_DTYPE,
+    base_name: Optional[str] = None,
+    seed: int = DEFAULT_SEED
+) -> dict:
+    """
+    Écrit un adaptateur LoRA (format PEFT) approchant un modèle fusionné à partir de sa base.
+
+    Une projection à la fois est chargée: ΔW = fusionné - base, SVD aléatoire,
+    B = U·√S, A = √S·Vt (lora_alpha = r: échelle 1). Les vecteurs modifiés
+    (normes, biais), petits, sont copiés en entier dans adapter_vectors.safetensors;
+    les autres matrices modifiées (embeddings, lm_head) sont signalées dans le
+    rapport comme non couvertes.
+
+    Args:
+        merged_dir: Modèle fusionné (safetensors)
+        base_dir: Modèle de base
+        output_dir: Dossier de l'adaptateur
+        rank: Rang (maximal si `energy` est donné)
+        energy: Fraction de ||ΔW||² à capter, rang choisi par projection
+        oversample: Directions aléatoires supplémentaires
+        power_iterations: Itérations de puissance
+        dtype: dtype des matrices A et B (f16, bf16, f32)
+        base_name: Identifiant de la base (base_model_name_or_path)
+        seed: Graine des projections aléatoires
+
+    Returns:
+        Rapport d'erreur de reconstruction
+    """
+    if dtype not in ADAPTER_DTYPES:
+        raise LoraError(f"dtype inconnu: {dtype} ({', '.join(ADAPTER_DTYPES)})")
+    out_dtype = ADAPTER_DTYPES[dtype]
+
+    merged = list_model_tensors(merged_dir)
+    base = {t.name: t for t in list_model_tensors(base_dir)}
+    if not merged or not base:
+        raise LoraError("aucun fichier safetensors dans le modèle fusionné ou la base")
+
+    rng = np.random.default_rng(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    spill_path = output_dir / f'{ADAPTER_FILENAME}.tmp'
+    entries: List[Tuple[str, str, Tuple[int, ...], int]] = []
+    modules: Dict[str, dict] = {}
+    vectors: List[TensorInfo] = []
+    uncovered: Dict[str, float] = {}
+    delta_sq = error_sq = 0.0
+    started = time.perf_counter()
+
+    with open(spill_path, 'wb') as spill:
+        for info in merged:
+            reference = base.get(info.name)
+            if reference is None or reference.shape != info.shape:
+                raise LoraError(f"{info.name}: absent de la base ou de forme différente")
+            if info.dtype not in FLOAT_DTYPES:
+                continue
+            if np.array_equal(raw_bits(reference), raw_bits(info)):
+                continue
+
+            delta = read_tensor(info) - read_tensor(reference)
+            norm_sq = float(np.sum(delta.astype(np.float64) ** 2))
+            delta_sq += norm_sq
+
+            if not is_target(info):
+                if len(info.shape) <= 1:
+                    vectors.append(info)
+                else:
+                    uncovered[info.name] = norm_sq
+                    error_sq += norm_sq
+                continue
+
+            u, s, vt = randomized_svd(delta, rank, oversample, power_iterations, rng)
+            r = choose_rank(s, norm_sq, energy) if energy is not None else len(s)
+            root = np.sqrt(s[:r])
+            lora_b = u[:, :r] * root
+            lora_a = root[:, None] * vt[:r]
+            error = low_rank_error(delta, lora_b, lora_a)
+            error_sq += error
+
+            module = info.name[:-len('.weight')]
+            key = PEFT_PREFIX + module
+            for suffix, matrix in (('lora_A', lora_a), ('lora_B', lora_b)):
+                data = encode_float(np.ascontiguousarray(matrix), out_dtype)
+                spill.write(data)
+                entries.append((f'{key}.{suffix}.weight', out_dtype, matrix.shape, len(data)))
+
+            modules[module] = {
+                'rank': r,
+                'relative_error': math.sqrt(error / norm_sq) if norm_sq else 0.0,
+                'delta_norm': math.sqrt(norm_sq),
+            }
+            logger.debug(
+                f"  {info.name}: rang {r}, erreur relative {modules[module]['relative_error']:.3f}"
+            )
+            del delta
+
+    adapter_path = output_dir / ADAPTER_FILENAME
+    with SafetensorsWriter(adapter_path, entries, {'format': 'pt'}) as writer:
+        with open(spill_path, 'rb') as spill:
+            for chunk in iter(lambda: spill.read(1 << 24), b''):
+                writer.write(chunk)
+    spill_path.unlink()
+    adapter_bytes = writer.size_bytes
+
+    if vectors:
+        vector_entries = [(t.name, t.dtype, t.shape, t.nbytes) for t in vectors]
+        vectors_path = output_dir / VECTORS_FILENAME
+        with SafetensorsWriter(vectors_path, vector_entries, {'format': 'pt'}) as vector_writer:
+            for info in vectors:
+                vector_writer.write(raw_bits(info).tobytes())
+        adapter_bytes += vector_writer.size_bytes
+
+    ranks = {name: entry['rank'] for name, entry in modules.items()}
+    target_modules = sorted({
+        module.split('.')[-1] for module in LINEAR_MODULES
+        if any(n.endswith(module) for n in modules)
+    })
+    config = {
+        'peft_type': 'LORA',
+        'task_type': 'CAUSAL_LM',
+        'base_model_name_or_path': base_name or Path(base_dir).resolve().name,
+        'r': rank,
+        'lora_alpha': rank,
+        'lora_dropout': 0.0,
+        'bias': 'none',
+        'fan_in_fan_out': False,
+        'inference_mode': True,
+        'target_modules': target_modules,
+        # Rangs adaptatifs: alpha suit le rang pour garder une échelle de 1
+        'rank_pattern': {name: r for name, r in ranks.items() if r != rank},
+        'alpha_pattern': {name: r for name, r in ranks.items() if r != rank},
+    }
+    with open(output_dir / ADAPTER_CONFIG_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    by_type: Dict[str, List[float]] = {}
+    for name, entry in modules.items():
+        by_type.setdefault(name.split('.')[-1], []).append(entry['relative_error'])
+
+    report = {
+        'base_model': config['base_model_name_or_path'],
+        'rank': rank,
+        'energy': energy,
+        'modules': len(modules),
+        'mean_rank': float(np.mean(list(ranks.values()))) if ranks else 0.0,
+        'relative_error': math.sqrt(error_sq / delta_sq) if delta_sq else 0.0,
+        'relative_error_by_type': {
+            name: float(np.mean(errors)) for name, errors in sorted(by_type.items())
+        },
+        'vectors_copied': [t.name for t in vectors],
+        'uncovered': {name: math.sqrt(norm_sq / delta_sq) for name, norm_sq in uncovered.items()},
+        'adapter_bytes': adapter_bytes,
+        'full_model_bytes': sum(t.nbytes for t in merged),
+        'seconds': time.perf_counter() - started,
+        'per_module': modules,
+    }
+    with open(output_dir / REPORT_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def format_report(report: dict) -> str:
+    adapter = report['adapter_bytes'] / (1024 * 1024)
+    full = report['full_model_bytes'] / (1024 * 1024)
+    lines = [
+        f"  - Projections: {report['modules']}, rang moyen {report['mean_rank']:.1f}",
+        f"  - Erreur relative globale ||ΔW - BA|| / ||ΔW||: {report['relative_error']:.3f}",
+    ]
+    for name, error in report['relative_error_by_type'].items():
+        lines.append(f"      {name:<10} {error:.3f}")
+    if report['vectors_copied']:
+        lines.append(f"  - Vecteurs copiés en entier: {len(report['vectors_copied'])}")
+    if report['uncovered']:
+        share = math.sqrt(sum(v * v for v in report['uncovered'].values()))
+        lines.append(
+            f"  - ⚠️  Matrices non couvertes: {', '.join(report['uncovered'])} "
+            f"({share:.1%} de ||Δ||)"
+        )
+    lines.append(
+        f"  - Taille: {adapter:.1f} Mo au lieu de {full:.1f} Mo ({adapter / full:.2%}), "
+        f"{report['seconds']:.1f} s"
+    )
+    return '\n'.join(lines)
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Extraction d'adaptateurs LoRA",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Adaptateur de rang 16 d'une spécialisation par rapport à sa base
+  python extract_lora.py merged_models/ORION-Code-Logic-v1 --base models/Llama-3.2-3B-Instruct \\
+      -o optimized_models/ORION-Code-Logic-v1-lora
+
+  # Rang adaptatif: 90 % de l'énergie de chaque ΔW, rang 64 au plus
+  python extract_lora.py merged_models/ORION-Code-Logic-v1 --base models/Llama-3.2-3B-Instruct \\
+      -o lora/ --rank 64 --energy 0.9
+        """
+    )
+
+    parser.add_argument(
+        'merged',
+        type=Path,
+        help="Modèle fusionné (safetensors)"
+    )
+
+    parser.add_argument(
+        '--base',
+        type=Path,
+        required=True,
+        help="Modèle de base, déjà en cache chez l'utilisateur"
+    )
+
+    parser.add_argument(
+        '--output',
+        '-o',
+        type=Path,
+        required=True,
+        help="Dossier de l'adaptateur"
+    )
+
+    parser.add_argument(
+        '--rank',
+        '-r',
+        type=int,
+        default=DEFAULT_RANK,
+        help=f"Rang des adaptateurs, maximal avec --energy (défaut: {DEFAULT_RANK})"
+    )
+
+    parser.add_argument(
+        '--energy',
+        type=float,
+        help="Fraction de ||ΔW||² à capter par projection (rang adaptatif)"
+    )
+
+    parser.add_argument(
+        '--oversample',
+        type=int,
+        default=DEFAULT_OVERSAMPLE,
+        help=f"Directions aléatoires supplémentaires (défaut: {DEFAULT_OVERSAMPLE})"
+    )
+
+    parser.add_argument(
+        '--power-iterations',
+        type=int,
+        default=DEFAULT_POWER_ITERATIONS,
+        help=f"Itérations de puissance de la SVD aléatoire (défaut: {DEFAULT_POWER_ITERATIONS})"
+    )
+
+    parser.add_argument(
+        '--dtype',
+        choices=ADAPTER_DTYPES.keys(),
+        default=DEFAULT_ADAPTER_DTYPE,
+        help=f"dtype des matrices A et B (défaut: {DEFAULT_ADAPTER_DTYPE})"
+    )
+
+    parser.add_argument(
+        '--base-name',
+        help="Identifiant de la base dans adapter_config.json (défaut: nom du dossier)"
+    )
+
+    parser.add_argument(
+        '--verbose',
+        '-v',
+        action='store_true',
+        help="Mode verbose"
+    )
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    if args.rank < 1:
+        parser.error("--rank doit être ≥ 1")
+    if args.energy is not None and not 0 < args.energy <= 1:
+        parser.error("--energy doit être dans ]0, 1]")
+
+    logger.info(f"🧬 Adaptateur LoRA: {args.merged} - {args.base}")
+    try:
+        report = extract_lora(
+            args.merged, args.base, args.output,
+            rank=args.rank,
+            energy=args.energy,
+            oversample=args.oversample,
+            power_iterations=args.power_iterations,
+            dtype=args.dtype,
+            base_name=args.base_name
+        )
+    except (LoraError, SafetensorsError, FileNotFoundError) as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+    logger.info(f"✅ Adaptateur écrit dans {args.output}:\n" + format_report(report))
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
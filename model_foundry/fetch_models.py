@@ -0,0 +1,798 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Téléchargement des modèles sources
+Récupère les checkpoints par requêtes Range parallèles, reprend les
+téléchargements interrompus, vérifie les SHA-256 et déduplique les fichiers
+dans un magasin de blobs adressé par contenu, partagé par toutes les étapes.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urljoin, urlsplit
+
+from safetensors_io import (
+    INDEX_FILENAME, MAX_HEADER_SIZE, SafetensorsError, TensorInfo, list_model_tensors, parse_header
+)
+from verify_model import hash_file
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ENDPOINT = os.environ.get('HF_ENDPOINT', 'https://huggingface.co')
+DEFAULT_STORE = Path(os.environ.get('ORION_FOUNDRY_STORE', '~/.cache/orion-foundry')).expanduser()
+
+# Hub Hugging Face et miroir local (serve_models.py)
+HUB_URL_TEMPLATE = '{endpoint}/{repo}/resolve/{revision}/{file}'
+MIRROR_URL_TEMPLATE = '{endpoint}/{repo}/{file}'
+
+# Fichiers annexes récupérés s'ils existent (404 ignoré)
+AUXILIARY_FILES = (
+    'config.json',
+    'generation_config.json',
+    'tokenizer.json',
+    'tokenizer_config.json',
+    'special_tokens_map.json',
+    'tokenizer.model',
+)
+SINGLE_WEIGHT_FILE = 'model.safetensors'
+CONFIG_FILENAME = 'config.json'
+SNAPSHOT_FILENAME = 'snapshot.json'
+
+DEFAULT_CONNECTIONS = 4
+DEFAULT_SEGMENT_MB = 32
+READ_SIZE = 1024 * 1024
+MAX_RETRIES = 3
+MAX_REDIRECTS = 5
+STATE_FLUSH_SECONDS = 1.0
+
+SHA256_RE = re.compile(r'^(?:W/)?"?(?:sha256-)?([0-9a-f]{64})"?$')
+
+
+class FetchError(RuntimeError):
+    """Téléchargement impossible ou contenu non conforme."""
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def _open(url: str, headers: Dict[str, str], method: str = 'GET', timeout: float = 60):
+    """
+    Ouvre une URL en suivant les redirections à la main.
+
+    Les en-têtes de la première réponse sont conservés: le hub place le
+    SHA-256 des fichiers LFS (`X-Linked-Etag`) sur la redirection vers le CDN.
+    Le jeton n'est pas transmis à un autre hôte.
+    """
+    first_headers = None
+    origin = urlsplit(url).netloc
+    for _ in range(MAX_REDIRECTS + 1):
+        sent = dict(headers)
+        if urlsplit(url).netloc != origin:
+            sent.pop('Authorization', None)
+        request = urllib.request.Request(url, headers=sent, method=method)
+        try:
+            response = _opener.open(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            if e.code in (301, 302, 303, 307, 308) and e.headers.get('Location'):
+                first_headers = first_headers or e.headers
+                url = urljoin(url, e.headers['Location'])
+                e.close()
+                continue
+            raise
+        return response, first_headers or response.headers
+    raise FetchError(f"trop de redirections: {url}")
+
+
+def _expected_sha256(headers) -> Optional[str]:
+    """SHA-256 annoncé par le serveur (X-Linked-Etag du hub, ETag du miroir)."""
+    for key in ('X-Linked-Etag', 'ETag'):
+        match = SHA256_RE.match((headers.get(key) or '').strip())
+        if match:
+            return match.group(1)
+    return None
+
+
+class BlobStore:
+    """
+    Magasin de fichiers adressé par SHA-256.
+
+    blobs/sha256/ab/abcdef...      contenu, stocké une seule fois
+    incomplete/<clé>.part(.json)   téléchargements en cours et leur état
+    models/<org>--<nom>/<rév>/     instantanés: liens vers les blobs
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / 'blobs' / 'sha256' / sha256[:2] / sha256
+
+    def has(self, sha256: Optional[str]) -> bool:
+        return bool(sha256) and self.blob_path(sha256).is_file()
+
+    def incomplete_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.root / 'incomplete' / f'{key}.part'
+
+    def snapshot_dir(self, repo: str, revision: str) -> Path:
+        return self.root / 'models' / repo.replace('/', '--') / revision
+
+    def add(self, part: Path, sha256: str) -> Path:
+        """Déplace un fichier complet dans le magasin (ou l'abandonne s'il y est déjà)."""
+        blob = self.blob_path(sha256)
+        if blob.exists():
+            part.unlink()
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part, blob)
+        return blob
+
+    def link(self, sha256: str, destination: Path) -> None:
+        """Expose un blob sous son nom de fichier: lien physique, symbolique ou copie."""
+        blob = self.blob_path(sha256)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if destination.is_symlink() or destination.exists():
+            destination.unlink()
+        try:
+            os.link(blob, destination)
+        except OSError:
+            try:
+                destination.symlink_to(os.path.relpath(blob, destination.parent))
+            except OSError:
+                shutil.copyfile(blob, destination)
+
+
+class RangeDownloader:
+    """
+    Télécharge un fichier par segments Range en parallèle, avec reprise.
+
+    L'état (octets reçus par segment) est écrit à côté du fichier partiel;
+    il n'est réutilisé que si l'URL, la taille et l'ETag n'ont pas changé.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        part: Path,
+        size: int,
+        etag: Optional[str],
+        headers: Dict[str, str],
+        connections: int,
+        segment_size: int
+    ):
+        self.url = url
+        self.part = part
+        self.state_path = part.with_name(part.name + '.json')
+        self.size = size
+        self.etag = etag
+        self.headers = headers
+        self.connections = connections
+        self.segment_size = segment_size
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+        self.received = 0
+
+        starts = range(0, size, segment_size)
+        self.done = {start: 0 for start in starts}
+
+    def _load_state(self) -> None:
+        if not (self.part.exists() and self.state_path.exists()):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if (state.get('url'), state.get('size'), state.get('etag'), state.get('segment_size')) != \
+                (self.url, self.size, self.etag, self.segment_size):
+            return
+        for start, written in state.get('done', {}).items():
+            if int(start) in self.done:
+                self.done[int(start)] = int(written)
+
+    def _save_state(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self.last_flush < STATE_FLUSH_SECONDS:
+            return
+        self.last_flush = now
+        state = {
+            'url': self.url,
+            'size': self.size,
+            'etag': self.etag,
+            'segment_size': self.segment_size,
+            'done': {str(start): written for start, written in self.done.items()},
+        }
+        tmp = self.state_path.with_name(self.state_path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def _fetch_segment(self, fd: int, start: int) -> None:
+        end = min(start + self.segment_size, self.size)
+        buffer = bytearray(READ_SIZE)
+        view = memoryview(buffer)
+
+        for attempt in range(MAX_RETRIES + 1):
+            offset = start + self.done[start]
+            if offset >= end:
+                return
+            headers = dict(self.headers, Range=f'bytes={offset}-{end - 1}')
+            if self.etag and not self.etag.startswith('W/'):
+                headers['If-Range'] = self.etag
+            try:
+                response, _ = _open(self.url, headers)
+                with response:
+                    if response.status != 206:
+                        raise FetchError(
+                            f"{self.url}: le contenu a changé pendant le téléchargement"
+                        )
+                    while offset < end:
+                        read = response.readinto(buffer)
+                        if not read:
+                            break
+                        read = min(read, end - offset)
+                        os.pwrite(fd, view[:read], offset)
+                        offset += read
+                        with self.lock:
+                            self.done[start] = offset - start
+                            self.received += read
+                            self._save_state()
+                if offset >= end:
+                    return
+            except (OSError, urllib.error.URLError) as e:
+                if attempt == MAX_RETRIES:
+                    raise FetchError(
+                        f"{self.url}: segment {start}-{end - 1} en échec ({e})"
+                    ) from e
+                logger.debug(f"  ↻ {self.url} segment {start}: nouvel essai ({e})")
+                time.sleep(0.5 * (attempt + 1))
+        raise FetchError(f"{self.url}: segment {start}-{end - 1} incomplet")
+
+    def run(self) -> int:
+        """Télécharge les segments manquants. Retourne les octets reçus."""
+        self.part.parent.mkdir(parents=True, exist_ok=True)
+        self._load_state()
+        resumed = sum(self.done.values())
+        if resumed:
+            logger.info(f"  ⏯️  Reprise à {resumed / (1024 * 1024):.1f} Mo")
+
+        fd = os.open(self.part, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, self.size)
+            pending = [start for start, written in self.done.items()
+                       if start + written < min(start + self.segment_size, self.size)]
+            with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                futures = [executor.submit(self._fetch_segment, fd, start) for start in pending]
+                for future in futures:
+                    future.result()
+        finally:
+            os.close(fd)
+            with self.lock:
+                self._save_state(force=True)
+
+        return self.received
+
+
+def _stream_download(url: str, part: Path, headers: Dict[str, str]) -> int:
+    """Téléchargement en un seul flux pour les serveurs sans Range."""
+    part.parent.mkdir(parents=True, exist_ok=True)
+    received = 0
+    response, _ = _open(url, headers)
+    with response, open(part, 'wb') as f:
+        while True:
+            chunk = response.read(READ_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+            received += len(chunk)
+    return received
+
+
+class ModelFetcher:
+    """Télécharge les fichiers d'un dépôt de modèle dans un BlobStore."""
+
+    def __init__(
+        self,
+        store: BlobStore,
+        endpoint: str = DEFAULT_ENDPOINT,
+        url_template: str = HUB_URL_TEMPLATE,
+        connections: int = DEFAULT_CONNECTIONS,
+        segment_size: int = DEFAULT_SEGMENT_MB * 1024 * 1024,
+        token: Optional[str] = None
+    ):
+        self.store = store
+        self.endpoint = endpoint.rstrip('/')
+        self.url_template = url_template
+        self.connections = connections
+        self.segment_size = segment_size
+        self.headers = {'User-Agent': 'orion-model-foundry', 'Accept-Encoding': 'identity'}
+        if token:
+            self.headers['Authorization'] = f'Bearer {token}'
+        self.bytes_downloaded = 0
+
+    def url(self, repo: str, revision: str, filename: str) -> str:
+        return self.url_template.format(
+            endpoint=self.endpoint,
+            repo=repo,
+            revision=quote(revision, safe=''),
+            file=quote(filename)
+        )
+
+    def probe(self, url: str) -> Optional[dict]:
+        """HEAD: taille, ETag, SHA-256 attendu et support de Range. None si absent."""
+        try:
+            response, headers = _open(url, self.headers, method='HEAD')
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise FetchError(f"{url}: HTTP {e.code}") from e
+        except urllib.error.URLError as e:
+            raise FetchError(f"{url}: {e.reason}") from e
+        with response:
+            size = response.headers.get('Content-Length')
+            return {
+                'size': int(size) if size is not None else None,
+                'etag': response.headers.get('ETag'),
+                'sha256': _expected_sha256(headers),
+                'ranges': response.headers.get('Accept-Ranges', '').lower() == 'bytes',
+            }
+
+    def fetch_file(self, url: str, info: dict) -> Tuple[str, int]:
+        """
+        Télécharge un fichier dans le magasin (sauf s'il y est déjà).
+
+        Returns:
+            (sha256, taille)
+        """
+        expected = info['sha256']
+        if self.store.has(expected):
+            logger.info(f"  ♻️  {url.rsplit('/', 1)[-1]}: déjà dans le magasin")
+            return expected, self.store.blob_path(expected).stat().st_size
+
+        part = self.store.incomplete_path(url)
+        state_path = part.with_name(part.name + '.json')
+        start = time.perf_counter()
+
+        if info['ranges'] and info['size']:
+            downloader = RangeDownloader(
+                url, part, info['size'], info['etag'], self.headers,
+                self.connections, self.segment_size
+            )
+            received = downloader.run()
+        else:
+            received = _stream_download(url, part, self.headers)
+        self.bytes_downloaded += received
+
+        size = part.stat().st_size
+        if info['size'] is not None and size != info['size']:
+            raise FetchError(f"{url}: {size} octets reçus, {info['size']} attendus")
+
+        sha256 = hash_file(part, READ_SIZE * 16)
+        if expected and sha256 != expected:
+            part.unlink()
+            state_path.unlink(missing_ok=True)
+            raise FetchError(f"{url}: SHA-256 différent de celui annoncé par le serveur")
+
+        self.store.add(part, sha256)
+        state_path.unlink(missing_ok=True)
+
+        elapsed = time.perf_counter() - start
+        rate = received / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"  ✅ {url.rsplit('/', 1)[-1]}: {size / (1024 * 1024):.1f} Mo "
+            f"({rate:.1f} Mo/s){'' if expected else ' - hash non annoncé, calculé localement'}"
+        )
+        return sha256, size
+
+    def _read_blob_json(self, sha256: str) -> dict:
+        with open(self.store.blob_path(sha256), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def fetch_model(
+        self,
+        repo: str,
+        revision: str = 'main',
+        files: Optional[List[str]] = None
+    ) -> Path:
+        """
+        Télécharge un modèle et retourne son dossier d'instantané local.
+
+        Sans liste explicite, récupère l'index safetensors et les fichiers de
+        poids qu'il référence (ou `model.safetensors`), plus les fichiers de
+        configuration et de tokenizer présents.
+        """
+        snapshot = self.store.snapshot_dir(repo, revision)
+        recorded = load_snapshot(snapshot, complete=False)
+        if recorded is not None and not recorded.get('partial') and files is None:
+            logger.info(f"📦 {repo}@{revision}: instantané complet dans {snapshot}")
+            return snapshot
+
+        logger.info(f"📥 {repo}@{revision} ({self.endpoint})")
+        fetched: Dict[str, dict] = {}
+
+        def fetch(filename: str, required: bool) -> Optional[str]:
+            url = self.url(repo, revision, filename)
+            info = self.probe(url)
+            if info is None:
+                if required:
+                    raise FetchError(f"{repo}: fichier {filename} introuvable ({url})")
+                return None
+            sha256, size = self.fetch_file(url, info)
+            self.store.link(sha256, snapshot / filename)
+            fetched[filename] = {'sha256': sha256, 'size_bytes': size}
+            return sha256
+
+        if files is not None:
+            for filename in files:
+                fetch(filename, required=True)
+        else:
+            index_sha = fetch(INDEX_FILENAME, required=False)
+            if index_sha is not None:
+                weight_map = self._read_blob_json(index_sha).get('weight_map', {})
+                weight_files = list(dict.fromkeys(weight_map.values()))
+            else:
+                weight_files = [SINGLE_WEIGHT_FILE]
+            for filename in weight_files:
+                fetch(filename, required=True)
+            for filename in AUXILIARY_FILES:
+                fetch(filename, required=False)
+
+        # Une récupération partielle (`files`) complète l'instantané sans le
+        # rendre complet: sans poids, il ne doit pas servir aux autres étapes
+        partial = files is not None and (recorded is None or bool(recorded.get('partial')))
+        if files is not None and recorded is not None:
+            fetched = {**recorded.get('files', {}), **fetched}
+
+        with open(snapshot / SNAPSHOT_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump({
+                'repo': repo,
+                'revision': revision,
+                'endpoint': self.endpoint,
+                'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'partial': partial,
+                'files': fetched,
+            }, f, indent=2)
+
+        return snapshot
+
+    def _read_range(self, url: str, start: int, end: int) -> Tuple[bytes, Optional[int]]:
+        """Octets [start, end] d'un fichier distant et taille totale (Content-Range)."""
+        headers = {**self.headers, 'Range': f'bytes={start}-{end}'}
+        try:
+            response, _ = _open(url, headers)
+        except urllib.error.HTTPError as e:
+            raise FetchError(f"{url}: HTTP {e.code}") from e
+        except urllib.error.URLError as e:
+            raise FetchError(f"{url}: {e.reason}") from e
+        with response:
+            if response.status != 206:
+                raise FetchError(f"{url}: requêtes Range non prises en charge")
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            return response.read(), int(total) if total.isdigit() else None
+
+    def remote_config(self, repo: str, revision: str = 'main') -> Optional[dict]:
+        """config.json d'un modèle distant (lu hors du magasin), None s'il est absent."""
+        url = self.url(repo, revision, CONFIG_FILENAME)
+        try:
+            response, _ = _open(url, self.headers)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise FetchError(f"{url}: HTTP {e.code}") from e
+        except urllib.error.URLError as e:
+            raise FetchError(f"{url}: {e.reason}") from e
+        with response:
+            try:
+                return json.load(response)
+            except json.JSONDecodeError as e:
+                raise FetchError(f"{url}: JSON invalide ({e})") from e
+
+    def remote_tensors(self, repo: str, revision: str = 'main') -> List[TensorInfo]:
+        """
+        Tenseurs d'un modèle distant d'après ses seuls en-têtes safetensors.
+
+        Deux requêtes Range par fichier de poids (longueur, puis JSON): rien
+        n'est écrit dans le magasin. `TensorInfo.file` est le nom du fichier
+        dans le dépôt.
+        """
+        index_url = self.url(repo, revision, INDEX_FILENAME)
+        if self.probe(index_url) is not None:
+            try:
+                response, _ = _open(index_url, self.headers)
+            except urllib.error.URLError as e:
+                raise FetchError(f"{index_url}: {e}") from e
+            with response:
+                weight_map = json.load(response).get('weight_map', {})
+            filenames = list(dict.fromkeys(weight_map.values()))
+        else:
+            filenames = [SINGLE_WEIGHT_FILE]
+
+        tensors: List[TensorInfo] = []
+        for filename in filenames:
+            url = self.url(repo, revision, filename)
+            raw_length, file_size = self._read_range(url, 0, 7)
+            (header_length,) = struct.unpack('<Q', raw_length[:8])
+            if header_length > MAX_HEADER_SIZE or file_size is None:
+                raise FetchError(f"{url}: en-tête safetensors invalide")
+            payload, _ = self._read_range(url, 8, 8 + header_length - 1)
+            data_offset = 8 + header_length
+            try:
+                header, _ = parse_header(payload, file_size - data_offset, filename)
+            except SafetensorsError as e:
+                raise FetchError(f"{repo}: {e}") from e
+            tensors.extend(
+                TensorInfo(
+                    name=name,
+                    dtype=entry['dtype'],
+                    shape=tuple(entry['shape']),
+                    file=Path(filename),
+                    data_start=data_offset + entry['data_offsets'][0],
+                    nbytes=entry['data_offsets'][1] - entry['data_offsets'][0],
+                )
+                for name, entry in header.items()
+            )
+        return tensors
+
+
+def load_snapshot(snapshot: Path, complete: bool = True) -> Optional[dict]:
+    """
+    Relit un instantané; None s'il est absent ou si un fichier manque.
+
+    Avec `complete`, un instantané partiel (`--file`) compte comme absent.
+    """
+    try:
+        with open(snapshot / SNAPSHOT_FILENAME, 'r', encoding='utf-8') as f:
+            recorded = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if complete and recorded.get('partial'):
+        return None
+    for filename, entry in recorded.get('files', {}).items():
+        path = snapshot / filename
+        if not path.exists() or path.stat().st_size != entry['size_bytes']:
+            return None
+    return recorded
+
+
+def resolve_model(
+    model: str,
+    revision: str = 'main',
+    store: Optional[Path] = None,
+    endpoint: str = DEFAULT_ENDPOINT,
+    url_template: str = HUB_URL_TEMPLATE
+) -> str:
+    """
+    Chemin local d'un modèle: dossier existant tel quel, sinon instantané
+    du magasin partagé (téléchargé au besoin).
+    """
+    if Path(model).exists():
+        return model
+    fetcher = ModelFetcher(
+        BlobStore(store or DEFAULT_STORE),
+        endpoint=endpoint,
+        url_template=url_template,
+        token=os.environ.get('HF_TOKEN')
+    )
+    return str(fetcher.fetch_model(model, revision))
+
+
+def model_headers(
+    model: str,
+    revision: str = 'main',
+    store: Optional[Path] = None,
+    endpoint: str = DEFAULT_ENDPOINT,
+    url_template: str = HUB_URL_TEMPLATE
+) -> Tuple[List[TensorInfo], bool]:
+    """
+    Tenseurs d'un modèle sans en lire les poids: dossier local, instantané
+    du magasin, sinon hub (requêtes Range sur les en-têtes seulement).
+
+    Returns:
+        (tenseurs, True si lus à distance)
+    """
+    if Path(model).exists():
+        return list_model_tensors(Path(model)), False
+
+    blob_store = BlobStore(store or DEFAULT_STORE)
+    snapshot = blob_store.snapshot_dir(model, revision)
+    if load_snapshot(snapshot) is not None:
+        return list_model_tensors(snapshot), False
+
+    fetcher = ModelFetcher(
+        blob_store,
+        endpoint=endpoint,
+        url_template=url_template,
+        token=os.environ.get('HF_TOKEN')
+    )
+    return fetcher.remote_tensors(model, revision), True
+
+
+def model_config(
+    model: str,
+    revision: str = 'main',
+    store: Optional[Path] = None,
+    endpoint: str = DEFAULT_ENDPOINT,
+    url_template: str = HUB_URL_TEMPLATE
+) -> Optional[dict]:
+    """
+    config.json d'un modèle, cherché comme ses en-têtes (`model_headers`):
+    dossier local, instantané du magasin, sinon hub. None s'il n'existe pas.
+    """
+    if Path(model).exists():
+        directory = Path(model)
+    else:
+        blob_store = BlobStore(store or DEFAULT_STORE)
+        directory = blob_store.snapshot_dir(model, revision)
+        if load_snapshot(directory) is None:
+            fetcher = ModelFetcher(
+                blob_store,
+                endpoint=endpoint,
+                url_template=url_template,
+                token=os.environ.get('HF_TOKEN')
+            )
+            return fetcher.remote_config(model, revision)
+
+    path = directory / CONFIG_FILENAME
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def recipe_parents(recipe_path: Path) -> List[str]:
+    """Modèles parents d'une recette de fusion."""
+    import yaml
+
+    with open(recipe_path, 'r', encoding='utf-8') as f:
+        recipe = yaml.safe_load(f)
+    return [entry['model'] for entry in recipe.get('models', [])]
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Téléchargement des modèles sources",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Télécharger un modèle du hub dans le magasin partagé
+  python fetch_models.py Qwen/Qwen2-1.5B-Instruct
+
+  # Tous les parents d'une recette, 8 connexions
+  python fetch_models.py --recipe recipes/dev-polyglot-v1.yml -c 8
+
+  # Depuis le miroir local (serve_models.py)
+  python fetch_models.py my-org/my-model --mirror http://127.0.0.1:8765
+        """
+    )
+
+    parser.add_argument(
+        'models',
+        nargs='*',
+        help="Dépôts à télécharger (org/nom)"
+    )
+
+    parser.add_argument(
+        '--recipe',
+        type=Path,
+        action='append',
+        default=[],
+        help="Recette YAML dont télécharger les modèles parents (répétable)"
+    )
+
+    parser.add_argument(
+        '--revision',
+        default='main',
+        help="Révision (branche, tag ou commit, défaut: main)"
+    )
+
+    parser.add_argument(
+        '--file',
+        action='append',
+        dest='files',
+        help="Fichier précis à télécharger (répétable, défaut: poids + configuration)"
+    )
+
+    parser.add_argument(
+        '--store',
+        type=Path,
+        default=DEFAULT_STORE,
+        help=f"Magasin de blobs partagé (défaut: {DEFAULT_STORE}, ou ORION_FOUNDRY_STORE)"
+    )
+
+    parser.add_argument(
+        '--endpoint',
+        default=DEFAULT_ENDPOINT,
+        help="URL du hub (défaut: HF_ENDPOINT ou https://huggingface.co)"
+    )
+
+    parser.add_argument(
+        '--mirror',
+        help="URL d'un miroir servant <org>/<nom>/<fichier> (remplace --endpoint)"
+    )
+
+    parser.add_argument(
+        '--connections',
+        '-c',
+        type=int,
+        default=DEFAULT_CONNECTIONS,
+        help=f"Requêtes Range parallèles par fichier (défaut: {DEFAULT_CONNECTIONS})"
+    )
+
+    parser.add_argument(
+        '--segment-size',
+        type=int,
+        default=DEFAULT_SEGMENT_MB,
+        help=f"Taille des segments Range en Mo (défaut: {DEFAULT_SEGMENT_MB})"
+    )
+
+    parser.add_argument(
+        '--verbose',
+        '-v',
+        action='store_true',
+        help="Mode verbeux"
+    )
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
+
+    models = list(args.models)
+    for recipe in args.recipe:
+        models.extend(recipe_parents(recipe))
+    models = list(dict.fromkeys(models))
+    if not models:
+        parser.error("aucun modèle à télécharger")
+
+    fetcher = ModelFetcher(
+        BlobStore(args.store),
+        endpoint=args.mirror or args.endpoint,
+        url_template=MIRROR_URL_TEMPLATE if args.mirror else HUB_URL_TEMPLATE,
+        connections=args.connections,
+        segment_size=args.segment_size * 1024 * 1024,
+        token=os.environ.get('HF_TOKEN')
+    )
+
+    start = time.perf_counter()
+    failed = False
+    for model in models:
+        try:
+            snapshot = fetcher.fetch_model(model, args.revision, args.files)
+            print(f"{model}\t{snapshot}")
+        except FetchError as e:
+            logger.error(f"❌ {model}: {e}")
+            failed = True
+
+    logger.info(
+        f"📊 {fetcher.bytes_downloaded / (1024 * 1024):.1f} Mo téléchargés "
+        f"en {time.perf_counter() - start:.1f}s"
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
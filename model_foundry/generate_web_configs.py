@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Génération des configurations web en lot
+Parcourt un dossier de modèles construits, déduit le format de prompt du
+chat template de chaque tokenizer et le contexte de config.json, puis écrit
+tous les web_config.json et un index consolidé en une passe.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+import logging
+from typing import Dict, List, Optional
+
+from estimate_memory import estimate_peak_memory, load_model_config
+from safetensors_io import find_weight_files
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+WEB_CONFIG_FILENAME = 'web_config.json'
+INDEX_FILENAME = 'web_configs.json'
+DEFAULT_MAX_TOKENS = 4096
+DEFAULT_CAPABILITIES = ['chat']
+GENERATION_DEFAULTS = {'temperature': 0.5, 'top_p': 0.9}
+
+# Contenus sentinelles: retrouvés dans le rendu pour découper les préfixes
+SENTINELS = {'system': '\x02SYSTEM\x03', 'user': '\x02USER\x03', 'assistant': '\x02ASSISTANT\x03'}
+
+# Formats connus, repérés par un marqueur du template (sans jinja2 ou si le rendu échoue)
+KNOWN_FORMATS = (
+    ('<|start_header_id|>', {
+        'system_prefix': '<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\n',
+        'user_prefix': '<|start_header_id|>user<|end_header_id|>\n\n',
+        'assistant_prefix': '<|start_header_id|>assistant<|end_header_id|>\n\n',
+        'eos_token': '<|eot_id|>',
+    }),
+    ('<|im_start|>', {
+        'system_prefix': '<|im_start|>system\n',
+        'user_prefix': '<|im_start|>user\n',
+        'assistant_prefix': '<|im_start|>assistant\n',
+        'eos_token': '<|im_end|>',
+    }),
+    ('<start_of_turn>', {
+        'system_prefix': '<start_of_turn>user\n',
+        'user_prefix': '<start_of_turn>user\n',
+        'assistant_prefix': '<start_of_turn>model\n',
+        'eos_token': '<end_of_turn>',
+    }),
+    ('<|assistant|>', {
+        'system_prefix': '<|system|>\n',
+        'user_prefix': '<|user|>\n',
+        'assistant_prefix': '<|assistant|>\n',
+        'eos_token': '<|end|>',
+    }),
+    ('[INST]', {
+        'system_prefix': '[INST] ',
+        'user_prefix': '[INST] ',
+        'assistant_prefix': ' [/INST]',
+        'eos_token': '</s>',
+    }),
+)
+
+
+def _token_text(token) -> Optional[str]:
+    """Texte d'un token de tokenizer_config.json (chaîne ou AddedToken sérialisé)."""
+    if isinstance(token, dict):
+        return token.get('content')
+    return token
+
+
+def load_chat_template(model_dir: Path) -> Optional[str]:
+    """Chat template: tokenizer_config.json, chat_template.jinja ou chat_template.json."""
+    jinja_path = model_dir / 'chat_template.jinja'
+    if jinja_path.exists():
+        return jinja_path.read_text(encoding='utf-8')
+
+    for filename in ('chat_template.json', 'tokenizer_config.json'):
+        path = model_dir / filename
+        if not path.exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            template = json.load(f).get('chat_template')
+        if isinstance(template, list):
+            named = {item.get('name'): item.get('template') for item in template}
+            template = named.get('default') or next(iter(named.values()), None)
+        if template:
+            return template
+    return None
+
+
+def _renderer(template: str, special_tokens: Dict[str, str]):
+    """Rendu du template comme transformers (environnement jinja2 isolé)."""
+    from jinja2.exceptions import TemplateError
+    from jinja2.sandbox import ImmutableSandboxedEnvironment
+
+    def raise_exception(message):
+        raise TemplateError(message)
+
+    env = ImmutableSandboxedEnvironment(trim_blocks=True, lstrip_blocks=True)
+    env.globals['raise_exception'] = raise_exception
+    compiled = env.from_string(template)
+
+    def render(messages: List[dict], add_generation_prompt: bool = False) -> str:
+        return compiled.render(
+            messages=messages,
+            add_generation_prompt=add_generation_prompt,
+            **special_tokens
+        )
+    return render
+
+
+def _message(role: str) -> dict:
+    return {'role': role, 'content': SENTINELS[role]}
+
+
+def derive_prompt_format(template: str, special_tokens: Dict[str, str]) -> dict:
+    """
+    Déduit préfixes et fin de tour en rendant le template sur des messages sentinelles.
+
+    - fin de tour: ce qui suit la réponse de l'assistant
+    - préfixe utilisateur: entre deux tours, après la fin de tour
+    - préfixe assistant: invite de génération après un message utilisateur
+    - préfixe système: tout ce qui précède le message système (BOS compris);
+      à défaut de rôle système, le préfixe du premier message utilisateur
+    """
+    render = _renderer(template, special_tokens)
+    user, assistant, system = SENTINELS['user'], SENTINELS['assistant'], SENTINELS['system']
+
+    text = render([_message('user'), _message('assistant')])
+    turn_end = text[text.index(assistant) + len(assistant):]
+
+    def after_turn_end(segment: str) -> str:
+        return segment[len(turn_end):] if turn_end and segment.startswith(turn_end) else segment
+
+    second = {'role': 'user', 'content': user + '2'}
+    text = render([_message('user'), _message('assistant'), second])
+    segment = text[text.index(assistant) + len(assistant):text.index(second['content'])]
+    user_prefix = after_turn_end(segment)
+
+    text = render([_message('user')], add_generation_prompt=True)
+    assistant_prefix = after_turn_end(text[text.index(user) + len(user):])
+
+    try:
+        text = render([_message('system'), _message('user')])
+        system_prefix = text[:text.index(system)]
+    except Exception:
+        text = render([_message('user')])
+        system_prefix = text[:text.index(user)]
+
+    return {
+        'system_prefix': system_prefix,
+        'user_prefix': user_prefix,
+        'assistant_prefix': assistant_prefix,
+        'eos_token': turn_end.strip() or special_tokens.get('eos_token') or '',
+    }
+
+
+def known_prompt_format(template: str) -> Optional[dict]:
+    """Format connu d'après les marqueurs du template."""
+    for marker, prompt_format in KNOWN_FORMATS:
+        if marker in template:
+            return dict(prompt_format)
+    return None
+
+
+def model_prompt_format(model_dir: Path) -> Optional[dict]:
+    """Format de prompt d'un modèle, ou None s'il n'a pas de chat template."""
+    template = load_chat_template(model_dir)
+    if template is None:
+        return None
+
+    special_tokens = {}
+    tokenizer_config_path = model_dir / 'tokenizer_config.json'
+    if tokenizer_config_path.exists():
+        with open(tokenizer_config_path, 'r', encoding='utf-8') as f:
+            tokenizer_config = json.load(f)
+        for key in ('bos_token', 'eos_token', 'unk_token', 'pad_token'):
+            text = _token_text(tokenizer_config.get(key))
+            if text is not None:
+                special_tokens[key] = text
+
+    try:
+        return derive_prompt_format(template, special_tokens)
+    except ImportError:
+        logger.debug(f"{model_dir.name}: jinja2 absent, format déduit des marqueurs du template")
+    except Exception as e:
+        logger.warning(
+            f"⚠️  {model_dir.name}: rendu du chat template impossible ({e}), "
+            "format déduit des marqueurs"
+        )
+    return known_prompt_format(template)
+
+
+def model_type(model_dir: Path) -> str:
+    """Type du registre d'après config.json."""
+    with open(model_dir / 'config.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if 'vision_config' in config:
+        return 'vision-language'
+    if config.get('model_type') == 'whisper':
+        return 'speech-recognition'
+    return 'causal-lm'
+
+
+def context_length(model_dir: Path, config: dict) -> int:
+    """Contexte du modèle: max_position_embeddings, borné par model_max_length du tokenizer."""
+    length = config['max_position_embeddings']
+    tokenizer_config_path = model_dir / 'tokenizer_config.json'
+    if tokenizer_config_path.exists():
+        with open(tokenizer_config_path, 'r', encoding='utf-8') as f:
+            model_max_length = json.load(f).get('model_max_length')
+        # transformers écrit un entier géant quand la limite n'est pas renseignée
+        if isinstance(model_max_length, int) and 0 < model_max_length < 10 ** 7:
+            length = min(length, model_max_length)
+    return length
+
+
+def build_web_config(
+    model_dir: Path,
+    model_name: Optional[str] = None,
+    capabilities: Optional[List[str]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    base_path: str = '/models'
+) -> dict:
+    """
+    Construit le web_config.json d'un modèle construit.
+
+    Conserve les capacités et paramètres de génération d'un web_config
+    existant; `config.max_tokens` est le contexte du modèle borné par
+    `max_tokens`, et min_ram_gb est estimé à ce contexte.
+    """
+    model_name = model_name or model_dir.name
+    existing = {}
+    existing_path = model_dir / WEB_CONFIG_FILENAME
+    if existing_path.exists():
+        with open(existing_path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+
+    config = load_model_config(model_dir)
+    context = context_length(model_dir, config)
+    tokens = min(context, max_tokens)
+    weights_bytes = sum(
+        path.stat().st_size for path in find_weight_files(model_dir) if path.exists()
+    )
+    memory = estimate_peak_memory(config, weights_bytes, tokens)
+
+    generation = dict(GENERATION_DEFAULTS)
+    generation.update({k: v for k, v in existing.get('config', {}).items() if k != 'max_tokens'})
+
+    return {
+        'model_id': model_name,
+        'name': existing.get('name') or model_name.replace('-', ' '),
+        'type': model_type(model_dir),
+        'path': f"{base_path.rstrip('/')}/{model_name}/",
+        'capabilities': capabilities or existing.get('capabilities') or list(DEFAULT_CAPABILITIES),
+        'min_ram_gb': memory['min_ram_gb'],
+        'size_mb': round(weights_bytes / (1024 * 1024), 1),
+        'context_length': context,
+        'prompt_format': model_prompt_format(model_dir),
+        'config': {'max_tokens': tokens, **generation},
+    }
+
+
+def find_model_dirs(root: Path) -> List[Path]:
+    """Dossiers de modèles construits sous `root` (config.json et poids safetensors)."""
+    return sorted(
+        path.parent for path in root.rglob('config.json')
+        if any(path.parent.glob('*.safetensors'))
+    )
+
+
+def generate_web_configs(
+    root: Path,
+    workers: int,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    capabilities: Optional[List[str]] = None,
+    base_path: str = '/models',
+    dry_run: bool = False
+) -> dict:
+    """
+    Écrit le web_config.json de chaque modèle sous `root` et l'index consolidé.
+
+    Returns:
+        Index {generated, root, models, errors}
+    """
+    model_dirs = find_model_dirs(root)
+
+    def build(model_dir: Path):
+        try:
+            return model_dir, build_web_config(
+                model_dir,
+                capabilities=capabilities,
+                max_tokens=max_tokens,
+                base_path=base_path
+            ), None
+        except (OSError, KeyError, ValueError, TypeError) as e:
+            return model_dir, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(build, model_dirs))
+
+    index = {'generated': date.today().isoformat(), 'root': str(root), 'models': {}, 'errors': {}}
+    for model_dir, web_config, error in results:
+        relative = model_dir.relative_to(root).as_posix()
+        if error is not None:
+            index['errors'][relative] = error
+            continue
+
+        if not dry_run:
+            with open(model_dir / WEB_CONFIG_FILENAME, 'w', encoding='utf-8') as f:
+                json.dump(web_config, f, indent=2, ensure_ascii=False)
+
+        index['models'][web_config['model_id']] = {
+            'web_config': f"{relative}/{WEB_CONFIG_FILENAME}",
+            'type': web_config['type'],
+            'size_mb': web_config['size_mb'],
+            'min_ram_gb': web_config['min_ram_gb'],
+            'context_length': web_config['context_length'],
+            'max_tokens': web_config['config']['max_tokens'],
+            'prompt_format': web_config['prompt_format'],
+        }
+
+    if not dry_run:
+        with open(root / INDEX_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+
+    return index
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Génération des configurations web en lot",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Tous les modèles construits
+  python generate_web_configs.py ../public/models
+
+  # Contexte plafonné à 8192 tokens, sans écrire
+  python generate_web_configs.py optimized_models --max-tokens 8192 --dry-run
+        """
+    )
+
+    parser.add_argument(
+        'root',
+        type=Path,
+        help="Dossier contenant les modèles construits (parcouru récursivement)"
+    )
+
+    parser.add_argument(
+        '--max-tokens',
+        type=int,
+        default=DEFAULT_MAX_TOKENS,
+        help=f"Plafond de config.max_tokens (défaut: {DEFAULT_MAX_TOKENS})"
+    )
+
+    parser.add_argument(
+        '--capability',
+        action='append',
+        dest='capabilities',
+        help="Capacité à déclarer (répétable; défaut: celles du web_config existant ou chat)"
+    )
+
+    parser.add_argument(
+        '--base-path',
+        default='/models',
+        help="Chemin web des modèles (défaut: /models)"
+    )
+
+    parser.add_argument(
+        '--workers',
+        '-j',
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Modèles traités en parallèle"
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="Afficher les configurations sans les écrire"
+    )
+
+    args = parser.parse_args()
+
+    if not args.root.is_dir():
+        logger.error(f"❌ Dossier introuvable: {args.root}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    index = generate_web_configs(
+        args.root,
+        workers=args.workers,
+        max_tokens=args.max_tokens,
+        capabilities=args.capabilities,
+        base_path=args.base_path,
+        dry_run=args.dry_run
+    )
+
+    for model_id, entry in index['models'].items():
+        prompt = entry['prompt_format']
+        logger.info(
+            f"📝 {model_id}: {entry['type']}, contexte {entry['context_length']} "
+            f"(max_tokens {entry['max_tokens']}), min_ram_gb={entry['min_ram_gb']}, "
+            f"prompt {'eos ' + repr(prompt['eos_token']) if prompt else 'aucun'}"
+        )
+    for model_dir, error in index['errors'].items():
+        logger.error(f"❌ {model_dir}: {error}")
+
+    if args.dry_run:
+        print(json.dumps(index, indent=2, ensure_ascii=False))
+    else:
+        logger.info(
+            f"✅ {len(index['models'])} configurations et {args.root / INDEX_FILENAME} "
+            f"écrits en {time.perf_counter() - start:.1f}s"
+        )
+    sys.exit(1 if index['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
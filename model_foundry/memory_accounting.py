@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Comptabilité mémoire des étapes
+Suit les octets de tenseurs détenus par le pipeline et la RSS du processus,
+par étape et par tenseur, avec un plafond optionnel
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from profiling import current_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCeilingExceeded(RuntimeError):
+    """Le plafond mémoire configuré a été dépassé en mode strict."""
+
+
+def _mb(nbytes: int) -> float:
+    return nbytes / (1024 * 1024)
+
+
+class MemoryAccountant:
+    """
+    Comptabilise les tenseurs résidents et la RSS par étape.
+
+    Chaque buffer détenu par le pipeline est déclaré via `resident()`. Quand
+    la RSS ou le total des résidents dépasse `ceiling_bytes`, la liste des
+    `top_n` plus gros résidents est journalisée (une fois par dépassement);
+    en mode `strict`, une `MemoryCeilingExceeded` est levée.
+
+    Un comptable désactivé (`enabled=False`) ne fait rien.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ceiling_bytes: Optional[int] = None,
+        top_n: int = 10,
+        strict: bool = False
+    ):
+        self.enabled = enabled
+        self.ceiling_bytes = ceiling_bytes
+        self.top_n = top_n
+        self.strict = strict
+        self.live_bytes = 0
+        self.peak_live_bytes = 0
+        self.peak_rss_bytes = 0
+        self.stages: Dict[str, dict] = {}
+        self.tensors: List[dict] = []
+        self.ceiling_breaches = 0
+        self._residents: Dict[str, dict] = {}
+        self._stage_stack: List[str] = []
+        self._over_ceiling = False
+        self._lock = threading.Lock()
+
+    @property
+    def current_stage(self) -> str:
+        return self._stage_stack[-1] if self._stage_stack else 'global'
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Attribue les mesures du bloc à l'étape `name`."""
+        if not self.enabled:
+            yield
+            return
+
+        self.stages.setdefault(name, {
+            'stage': name,
+            'peak_live_bytes': 0,
+            'peak_rss_bytes': 0,
+            'tensors': 0,
+        })
+        self._stage_stack.append(name)
+        try:
+            self.sample()
+            yield
+        finally:
+            self.sample()
+            self._stage_stack.pop()
+
+    @contextmanager
+    def resident(self, name: str, nbytes: int) -> Iterator[None]:
+        """Déclare un buffer de `nbytes` détenu pendant la durée du bloc."""
+        if not self.enabled:
+            yield
+            return
+
+        self.acquire(name, nbytes)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def acquire(self, name: str, nbytes: int) -> None:
+        """Déclare un buffer comme résident."""
+        if not self.enabled:
+            return
+
+        stage = self.current_stage
+        with self._lock:
+            self._residents[name] = {'name': name, 'nbytes': nbytes, 'stage': stage}
+            self.live_bytes += nbytes
+            stats = self.stages.get(stage)
+            if stats is not None:
+                stats['tensors'] += 1
+
+        rss = self.sample()
+        self.tensors.append({
+            'name': name,
+            'stage': stage,
+            'nbytes': nbytes,
+            'live_bytes': self.live_bytes,
+            'rss_bytes': rss,
+        })
+
+    def release(self, name: str) -> None:
+        """Retire un buffer des résidents."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            entry = self._residents.pop(name, None)
+            if entry is not None:
+                self.live_bytes -= entry['nbytes']
+
+    def sample(self) -> int:
+        """Mesure la RSS, met à jour les pics et vérifie le plafond."""
+        if not self.enabled:
+            return 0
+
+        rss = current_rss_bytes()
+        with self._lock:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+            self.peak_live_bytes = max(self.peak_live_bytes, self.live_bytes)
+            for stage in self._stage_stack:
+                stats = self.stages[stage]
+                stats['peak_rss_bytes'] = max(stats['peak_rss_bytes'], rss)
+                stats['peak_live_bytes'] = max(stats['peak_live_bytes'], self.live_bytes)
+
+        self._check_ceiling(rss)
+        return rss
+
+    def top_residents(self, n: Optional[int] = None) -> List[dict]:
+        """Retourne les plus gros buffers actuellement résidents."""
+        with self._lock:
+            residents = sorted(self._residents.values(), key=lambda r: r['nbytes'], reverse=True)
+        return residents[:n or self.top_n]
+
+    def _check_ceiling(self, rss: int) -> None:
+        if self.ceiling_bytes is None:
+            return
+
+        usage = max(rss, self.live_bytes)
+        if usage <= self.ceiling_bytes:
+            self._over_ceiling = False
+            return
+        if self._over_ceiling:
+            return
+
+        self._over_ceiling = True
+        self.ceiling_breaches += 1
+        logger.warning(
+            f"⚠️  Plafond mémoire dépassé pendant '{self.current_stage}': "
+            f"RSS {_mb(rss):.1f} Mo, résidents {_mb(self.live_bytes):.1f} Mo "
+            f"(plafond {_mb(self.ceiling_bytes):.1f} Mo)"
+        )
+        for resident in self.top_residents():
+            logger.warning(
+                f"    {_mb(resident['nbytes']):>10.1f} Mo  [{resident['stage']}] {resident['name']}"
+            )
+
+        if self.strict:
+            raise MemoryCeilingExceeded(
+                f"plafond de {_mb(self.ceiling_bytes):.1f} Mo dépassé "
+                f"pendant '{self.current_stage}'"
+            )
+
+    def format_report(self) -> str:
+        """Formate le rapport mémoire par étape et les plus gros tenseurs."""
+        lines = [
+            f"{'Étape':<20} {'Tenseurs':>9} {'Pic résidents (Mo)':>19} {'Pic RSS (Mo)':>13}",
+            '-' * 64,
+        ]
+        for stats in self.stages.values():
+            lines.append(
+                f"{stats['stage']:<20} {stats['tensors']:>9} "
+                f"{_mb(stats['peak_live_bytes']):>19.1f} {_mb(stats['peak_rss_bytes']):>13.1f}"
+            )
+        lines.append('-' * 64)
+        lines.append(
+            f"Pic résidents: {_mb(self.peak_live_bytes):.1f} Mo, "
+            f"pic RSS: {_mb(self.peak_rss_bytes):.1f} Mo"
+        )
+        if self.ceiling_bytes is not None:
+            lines.append(
+                f"Plafond: {_mb(self.ceiling_bytes):.1f} Mo, dépassements: {self.ceiling_breaches}"
+            )
+
+        largest = sorted(self.tensors, key=lambda t: t['nbytes'], reverse=True)[:self.top_n]
+        if largest:
+            lines.append(f"Top {len(largest)} tenseurs résidents:")
+            for tensor in largest:
+                lines.append(
+                    f"  {_mb(tensor['nbytes']):>10.1f} Mo  "
+                    f"RSS {_mb(tensor['rss_bytes']):>8.1f} Mo  "
+                    f"[{tensor['stage']}] {tensor['name']}"
+                )
+        return '\n'.join(lines)
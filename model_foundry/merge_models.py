@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
 """
 ORION Model Foundry - Fusion de modèles
-Utilise mergekit pour combiner deux modèles ou plus
+Exécute le plan compilé pour les fusions linear/slerp; mergekit pour les autres méthodes
 """
 
 import argparse
+import json
 import sys
 from pathlib import Path
 import yaml
 import logging
 
+from compile_recipe import RecipeError, default_plan_path, load_or_compile, recipe_errors
+from merge_tensors import MergeError, RecipeMerger
+from quantize_layers import FLOAT_DTYPES
+from safetensors_io import DTYPE_SIZES, SafetensorsWriter, read_tensor_bytes
+from shard_model import copy_model_files
+from task_vectors import encode_float
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -33,26 +41,73 @@ def load_recipe(recipe_path: Path) -> dict:
 
 
 def validate_recipe(recipe: dict) -> bool:
-    """Valide qu'une recette contient tous les champs requis."""
-    required_fields = ['models', 'merge_method', 'parameters', 'dtype']
-    
-    for field in required_fields:
-        if field not in recipe:
-            logger.error(f"❌ Champ requis manquant: {field}")
-            return False
-    
-    if len(recipe['models']) < 2:
-        logger.error("❌ Au moins 2 modèles sont requis pour la fusion")
+    """Valide une recette: schéma, nombre de modèles, paramètres (voir compile_recipe.py)."""
+    errors = recipe_errors(recipe)
+    for error in errors:
+        logger.error(f"❌ {error}")
+    if errors:
         return False
-    
+
     logger.info("✅ Recette valide")
     return True
 
 
+# Torch dtype de config.json pour le dtype safetensors de la recette
+TORCH_DTYPES = {'F32': 'float32', 'F16': 'float16', 'BF16': 'bfloat16'}
+
+# Fichiers du tokenizer, non recopiés avec --no-copy-tokenizer
+TOKENIZER_FILES = (
+    'tokenizer.json', 'tokenizer_config.json', 'tokenizer.model',
+    'special_tokens_map.json', 'added_tokens.json', 'vocab.json', 'merges.txt'
+)
+
+
+def write_merged_model(merger: RecipeMerger, output_path: Path, copy_tokenizer: bool = True) -> int:
+    """
+    Écrit le modèle fusionné (model.safetensors + config) en exécutant le plan.
+
+    Un tenseur est fusionné à la fois et écrit au dtype de la recette; les
+    tenseurs non flottants sont recopiés du modèle de base.
+
+    Returns:
+        Octets de poids écrits
+    """
+    entries = []
+    for info in merger.tensors:
+        dtype = merger.dtype if info.dtype in FLOAT_DTYPES else info.dtype
+        numel = info.nbytes // DTYPE_SIZES[info.dtype]
+        entries.append((info.name, dtype, info.shape, numel * DTYPE_SIZES[dtype]))
+
+    with SafetensorsWriter(output_path / 'model.safetensors', entries, {'format': 'pt'}) as writer:
+        for info in merger.tensors:
+            if info.dtype in FLOAT_DTYPES:
+                writer.write(encode_float(merger.merge(info), merger.dtype))
+            else:
+                writer.write(read_tensor_bytes(info))
+
+    for name in copy_model_files(merger.base_dir, output_path):
+        if not copy_tokenizer and name in TOKENIZER_FILES:
+            (output_path / name).unlink()
+
+    config_path = output_path / 'config.json'
+    if config_path.exists():
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config['torch_dtype'] = TORCH_DTYPES[merger.dtype]
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+    return writer.size_bytes
+
+
 def merge_models(recipe_path: Path, output_path: Path, copy_tokenizer: bool = True) -> bool:
     """
     Fusionne des modèles selon une recette.
     
+    Les fusions linear et slerp exécutent le plan compilé (noyaux numpy de
+    merge_tensors.py, mêmes formules que mergekit). Pour les autres méthodes,
+    le plan ne sert qu'à valider les parents: la fusion est laissée à
+    mergekit, qui relit la recette et ignore le plan.
+    
     Args:
         recipe_path: Chemin vers le fichier de recette YAML
         output_path: Chemin de sortie pour le modèle fusionné
@@ -66,6 +121,18 @@ def merge_models(recipe_path: Path, output_path: Path, copy_tokenizer: bool = Tr
         recipe = load_recipe(recipe_path)
         if not validate_recipe(recipe):
             return False
+
+        # Parents compatibles (en-têtes seulement): échoue en quelques secondes
+        try:
+            plan, reused = load_or_compile(recipe_path)
+        except RecipeError as e:
+            for error in e.errors:
+                logger.error(f"❌ {error}")
+            return False
+        logger.info(
+            f"🧩 Plan {'réutilisé' if reused else 'compilé'}: {len(plan['tensors'])} tenseurs "
+            f"({default_plan_path(recipe_path)})"
+        )
         
         # Afficher les informations de fusion
         logger.info("🔨 Configuration de fusion:")
@@ -77,19 +144,32 @@ def merge_models(recipe_path: Path, output_path: Path, copy_tokenizer: bool = Tr
         if 'parameters' in recipe:
             logger.info(f"  - Paramètres: {recipe['parameters']}")
         
+        if recipe['merge_method'] in RecipeMerger.METHODS:
+            merger = RecipeMerger(recipe, plan=plan)
+            for line in merger.describe():
+                logger.info(f"    · {line}")
+            output_path.mkdir(parents=True, exist_ok=True)
+            size = write_merged_model(merger, output_path, copy_tokenizer)
+            logger.info(f"✅ Modèle fusionné: {size / (1024 * 1024):.1f} Mo dans {output_path}")
+            return True
+        
         # Créer le dossier de sortie
         output_path.mkdir(parents=True, exist_ok=True)
         
         # Note: L'utilisation réelle de mergekit se fait via la CLI
-        # car c'est plus stable que l'API Python
+        # car c'est plus stable que l'API Python. mergekit relit la recette:
+        # le plan compilé n'a servi qu'à valider les parents
         logger.info("ℹ️  Pour fusionner, exécutez:")
-        logger.info(f"    mergekit-yaml {recipe_path} {output_path} --copy-tokenizer")
+        copy_flag = " --copy-tokenizer" if copy_tokenizer else ""
+        logger.info(f"    mergekit-yaml {recipe_path} {output_path}{copy_flag}")
         
-        # Pour l'instant, on retourne True si la validation a réussi
-        # Dans une implémentation complète, on appellerait directement mergekit
         logger.info("✅ Validation réussie - Prêt pour la fusion")
         return True
         
+    except MergeError as e:
+        logger.error(f"❌ Fusion impossible: {e}")
+        return False
+        
     except Exception as e:
         logger.error(f"❌ Erreur lors de la fusion: {e}")
         return False
@@ -108,7 +188,8 @@ Exemples:
   # Sans copier le tokenizer
   python merge_models.py recipes/my-recipe.yml output/ --no-copy-tokenizer
 
-Pour plus d'informations: https://github.com/cg123/mergekit
+linear et slerp sont fusionnés directement; les autres méthodes affichent
+la commande mergekit. Pour plus d'informations: https://github.com/cg123/mergekit
         """
     )
     
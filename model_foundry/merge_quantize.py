@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Fusion, quantification et sharding en une passe
+Chaque tenseur est lu dans les parents, fusionné, quantifié puis écrit dans son shard
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from compile_recipe import load_or_compile
+from merge_tensors import MergeError, RecipeMerger
+from quantize_layers import (
+    DEFAULT_GROUP_SIZE, DEFAULT_SAMPLES, DEFAULT_SEQ_LEN, LayerQuantizer,
+    calibration_ids, quantization_config
+)
+from quantize_model import QUANTIZATION_LEVELS
+from safetensors_io import SafetensorsPositionedWriter, TensorInfo
+from shard_model import (
+    DEFAULT_COMPONENT_ORDER, TOKENIZER_FILENAME, compile_shipped_tokenizer, copy_model_files,
+    create_shard_manifest, plan_components, shard_entry, shard_filenames
+)
+from weight_layouts import DEFAULT_LAYOUT, LAYOUTS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class ShardSetWriter:
+    """
+    Écrit les shards d'un plan au fil des tenseurs, dans n'importe quel ordre.
+
+    Chaque tenseur est écrit à son offset dans son shard; un shard est fermé
+    (et son SHA-256 calculé) dès que tous ses tenseurs sont arrivés.
+    """
+
+    def __init__(self, plan: List[List[TensorInfo]], output_path: Path, metadata: Dict[str, str]):
+        self.plan = plan
+        self.output_path = Path(output_path)
+        self.metadata = metadata
+        self.filenames = shard_filenames(plan)
+        self.shard_of = {t.name: idx for idx, shard in enumerate(plan) for t in shard}
+        self.writers: Dict[int, SafetensorsPositionedWriter] = {}
+        self.shard_info: List[Optional[dict]] = [None] * len(plan)
+
+    def write(self, name: str, data: bytes) -> None:
+        """Écrit un tenseur de sortie dans son shard."""
+        idx = self.shard_of[name]
+        writer = self.writers.get(idx)
+        if writer is None:
+            entries = [(t.name, t.dtype, t.shape, t.nbytes) for t in self.plan[idx]]
+            writer = self.writers[idx] = SafetensorsPositionedWriter(
+                self.output_path / self.filenames[idx], entries, self.metadata
+            )
+
+        writer.write_tensor(name, data)
+        if writer.complete:
+            writer.close()
+            del self.writers[idx]
+            self.shard_info[idx] = shard_entry(
+                idx, self.filenames[idx], self.plan[idx], writer.size_bytes, writer.sha256
+            )
+
+    def close(self) -> List[dict]:
+        """Vérifie que tous les shards sont complets; retourne leurs entrées de manifeste."""
+        for writer in self.writers.values():
+            writer.close()
+        missing = [self.filenames[idx] for idx, info in enumerate(self.shard_info) if info is None]
+        if missing:
+            raise ValueError(f"shards incomplets: {', '.join(missing)}")
+        return self.shard_info
+
+
+def output_tensors(quantizer: LayerQuantizer, output_path: Path) -> List[TensorInfo]:
+    """Tenseurs du modèle quantifié, connus avant toute fusion (pour planifier les shards)."""
+    return [
+        TensorInfo(
+            name=name, dtype=dtype, shape=tuple(shape),
+            file=output_path, data_start=0, nbytes=nbytes
+        )
+        for name, dtype, shape, nbytes in quantizer.entries()
+    ]
+
+
+def merge_quantize(
+    recipe_path: Path,
+    output_path: Path,
+    quantization: str = 'q4',
+    shard_size_mb: int = 100,
+    layout: str = DEFAULT_LAYOUT,
+    group_size: int = DEFAULT_GROUP_SIZE,
+    calibration: Optional[List[Path]] = None,
+    samples: int = DEFAULT_SAMPLES,
+    seq_len: int = DEFAULT_SEQ_LEN,
+    cache_dir: Optional[Path] = None,
+    component_sizes_mb: Optional[Dict[str, int]] = None,
+    component_order: Tuple[str, ...] = DEFAULT_COMPONENT_ORDER,
+    store: Optional[Path] = None,
+    verbose: bool = False,
+    random_calibration: bool = False
+) -> bool:
+    """
+    Fusionne, quantifie et découpe en shards en un seul passage.
+
+    Le modèle fusionné en pleine précision n'est jamais écrit: chaque tenseur
+    est fusionné à la demande quand le quantificateur en a besoin (une couche
+    du décodeur à la fois pour GPTQ), puis écrit directement à sa place dans
+    le shard prévu par le plan.
+
+    Args:
+        recipe_path: Recette de fusion YAML
+        output_path: Dossier de sortie (shards + manifeste)
+        quantization: Niveau de quantification (q2, q3, q4, int8, fp16)
+        shard_size_mb: Taille des shards en Mo
+        layout: Disposition des poids empaquetés
+        group_size: Taille des groupes de quantification
+        calibration: Fichiers texte de calibration (défaut: README et recettes)
+        samples: Nombre de séquences de calibration
+        seq_len: Longueur des séquences de calibration
+        cache_dir: Dossier des activations de calibration en cache
+        component_sizes_mb: Taille de shard par tour en Mo (0: tour non découpée)
+        component_order: Ordre de chargement des tours
+        store: Magasin partagé des modèles parents
+        verbose: Mode verbose
+        random_calibration: Tokens aléatoires si le corpus n'est pas tokenisable
+
+    Returns:
+        True si succès, False sinon
+    """
+    try:
+        import yaml
+
+        with open(recipe_path, 'r', encoding='utf-8') as f:
+            recipe = yaml.safe_load(f)
+
+        plan, reused = load_or_compile(recipe_path, store=store)
+        merger = RecipeMerger(recipe, store=store, plan=plan)
+        bits = QUANTIZATION_LEVELS[quantization]['bits']
+        quantizer = LayerQuantizer(
+            merger.base_dir, bits, group_size,
+            tensors=merger.tensors, loader=merger.merge, layout=layout
+        )
+        model_name = (recipe.get('metadata') or {}).get('name') or output_path.name
+
+        logger.info(f"🔀 Fusion + quantification: {model_name}")
+        logger.info(f"  - Fusion: {merger.method}, {len(merger.parent_dirs)} parents")
+        origin = 'réutilisé' if reused else 'compilé'
+        logger.info(f"  - Plan: {len(plan['tensors'])} tenseurs, {origin}")
+        for line in merger.describe():
+            logger.info(f"    · {line}")
+        method = 'GPTQ' if quantizer.calibrated else 'arrondi'
+        logger.info(f"  - Quantification: {quantization} ({method}), disposition {layout}")
+        logger.info(f"📤 Sortie: {output_path}")
+
+        ids = None
+        if quantizer.calibrated:
+            ids = calibration_ids(
+                merger.base_dir, calibration or [], samples, seq_len, quantizer.spec.vocab_size,
+                allow_random=random_calibration
+            )
+
+        output_path.mkdir(parents=True, exist_ok=True)
+        tensors = output_tensors(quantizer, output_path)
+        components = plan_components(
+            tensors,
+            shard_size_mb * 1024 * 1024,
+            {name: size * 1024 * 1024 for name, size in (component_sizes_mb or {}).items()},
+            component_order
+        )
+        plan = [shard for shards in components.values() for shard in shards]
+        total_mb = sum(t.nbytes for t in tensors) / (1024 * 1024)
+        logger.info(f"📊 {len(tensors)} tenseurs, {total_mb:.1f} Mo → {len(plan)} shards")
+
+        writer = ShardSetWriter(plan, output_path, quantizer.metadata())
+        quantizer.process(writer.write, ids, cache_dir)
+        shard_info = writer.close()
+
+        create_shard_manifest(output_path, model_name, plan, shard_info)
+        copied = copy_model_files(merger.base_dir, output_path)
+
+        config = dict(quantizer.config)
+        config['quantization_config'] = quantization_config(
+            bits,
+            group_size,
+            quantizer.metadata()['quant_method'],
+            layout,
+            quantizer.layout_overrides()
+        )
+        config.pop('torch_dtype', None)
+        with open(output_path / 'config.json', 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+
+        if TOKENIZER_FILENAME in copied:
+            compile_shipped_tokenizer(output_path)
+
+        logger.info(
+            f"✅ {len(shard_info)} shards écrits dans {output_path}, "
+            "sans modèle fusionné intermédiaire"
+        )
+        return True
+
+    except (MergeError, FileNotFoundError) as e:
+        logger.error(f"❌ Fusion impossible: {e}")
+        return False
+
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de la fusion + quantification: {e}")
+        if verbose:
+            logger.exception("Détails de l'erreur:")
+        return False
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Fusion, quantification et sharding en une passe",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Recette → shards q4 prêts pour le web, sans modèle fusionné sur disque
+  python merge_quantize.py recipes/dev-polyglot-v1.yml optimized_models/ORION-Dev-Polyglot-v1-q4
+
+  # Shards de 50 Mo, poids en tuiles pour WebGPU, calibration sur corpus
+  python merge_quantize.py recipes/dev-polyglot-v1.yml output/ -s 50 --layout tile8 \\
+      --calibration corpus/fr.txt --calibration corpus/en.txt
+        """
+    )
+
+    parser.add_argument(
+        'recipe',
+        type=Path,
+        help="Recette de fusion (YAML)"
+    )
+
+    parser.add_argument(
+        'output',
+        type=Path,
+        help="Dossier de sortie (shards + manifeste)"
+    )
+
+    parser.add_argument(
+        '--quantization',
+        '-q',
+        choices=QUANTIZATION_LEVELS.keys(),
+        default='q4',
+        help="Niveau de quantification (défaut: q4)"
+    )
+
+    parser.add_argument(
+        '--shard-size',
+        '-s',
+        type=int,
+        default=100,
+        help="Taille des shards en Mo (défaut: 100)"
+    )
+
+    parser.add_argument(
+        '--layout',
+        choices=LAYOUTS.keys(),
+        default=DEFAULT_LAYOUT,
+        help=f"Disposition des poids empaquetés (défaut: {DEFAULT_LAYOUT})"
+    )
+
+    parser.add_argument(
+        '--group-size',
+        type=int,
+        default=DEFAULT_GROUP_SIZE,
+        help=f"Taille des groupes de quantification (défaut: {DEFAULT_GROUP_SIZE})"
+    )
+
+    parser.add_argument(
+        '--calibration',
+        type=Path,
+        action='append',
+        default=[],
+        help="Fichier texte de calibration (répétable; défaut: README et recettes)"
+    )
+
+    parser.add_argument(
+        '--random-calibration',
+        action='store_true',
+        help="Tokens aléatoires si le corpus n'est pas tokenisable (qualité dégradée)"
+    )
+
+    parser.add_argument(
+        '--samples',
+        type=int,
+        default=DEFAULT_SAMPLES,
+        help=f"Nombre de séquences de calibration (défaut: {DEFAULT_SAMPLES})"
+    )
+
+    parser.add_argument(
+        '--seq-len',
+        type=int,
+        default=DEFAULT_SEQ_LEN,
+        help=f"Longueur des séquences de calibration (défaut: {DEFAULT_SEQ_LEN})"
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        type=Path,
+        help="Dossier des activations de calibration (défaut: temporaire système)"
+    )
+
+    parser.add_argument(
+        '--store',
+        type=Path,
+        help="Magasin partagé des modèles parents"
+    )
+
+    parser.add_argument(
+        '--verbose',
+        '-v',
+        action='store_true',
+        help="Mode verbose"
+    )
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    success = merge_quantize(
+        recipe_path=args.recipe,
+        output_path=args.output,
+        quantization=args.quantization,
+        shard_size_mb=args.shard_size,
+        layout=args.layout,
+        group_size=args.group_size,
+        calibration=args.calibration,
+        samples=args.samples,
+        seq_len=args.seq_len,
+        cache_dir=args.cache_dir,
+        store=args.store,
+        verbose=args.verbose,
+        random_calibration=args.random_calibration
+    )
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Recherche du ratio de fusion
+Évalue de nombreux ratios sur un proxy rapide, à partir des écarts entre parents
+calculés une fois
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from compile_recipe import load_or_compile
+from merge_tensors import DOT_THRESHOLD, EPS, MergeError, RecipeMerger, round_to_dtype
+from quantize_layers import (
+    ATTENTION_OUTPUT,
+    FLOAT_DTYPES,
+    MLP_OUTPUT,
+    DecoderSpec,
+    QuantizeError,
+    _linear,
+    attention_context,
+    calibration_ids,
+    decoder_prefix,
+    decoder_spec,
+    head_name,
+    mlp_hidden,
+    read_tensor,
+    rms_norm,
+    rope_tables,
+    tensor_view,
+    to_float32,
+)
+from safetensors_io import TensorInfo
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RATIOS = (0.3, 0.4, 0.5, 0.6, 0.7)
+
+# Proxy volontairement petit: quelques fenêtres suffisent à classer des ratios voisins
+DEFAULT_SWEEP_SAMPLES = 8
+DEFAULT_SWEEP_SEQ_LEN = 128
+
+# Positions par bloc de logits (limite la mémoire des logits sur grand vocabulaire)
+LOGIT_CHUNK = 256
+
+
+def parents_fingerprint(parents: List[Dict[str, TensorInfo]]) -> str:
+    """Empreinte des fichiers des parents (chemin, taille, date), qui invalide le cache."""
+    h = hashlib.sha256()
+    for tensors in parents:
+        for path in sorted({str(t.file) for t in tensors.values()}):
+            stat = Path(path).stat()
+            h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        h.update(b'|')
+    return h.hexdigest()[:16]
+
+
+class DeltaCache:
+    """
+    Vecteurs de tâche du second parent (v1 - v0) en float32 sur disque.
+
+    Calculés une fois par tenseur, relus par memmap ensuite (y compris par
+    les sweeps suivants avec d'autres ratios). Les normes et le produit
+    scalaire dont slerp a besoin sont gardés dans stats.json.
+    """
+
+    def __init__(self, directory: Path, base: Dict[str, TensorInfo], other: Dict[str, TensorInfo]):
+        self.base = base
+        self.other = other
+        self.directory = Path(directory) / parents_fingerprint([base, other])
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.stats_path = self.directory / 'stats.json'
+        self.stats: Dict[str, dict] = {}
+        if self.stats_path.exists():
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        self.computed = 0
+        self.reused = 0
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f'{name}.npy'
+
+    def get(self, name: str, base: Optional[np.ndarray] = None) -> Tuple[np.ndarray, dict]:
+        """Écart (memmap) et statistiques d'un tenseur; `base` évite de relire v0."""
+        path = self._path(name)
+        if name in self.stats and path.exists():
+            self.reused += 1
+            return np.load(path, mmap_mode='r'), self.stats[name]
+
+        info, other = self.base[name], self.other.get(name)
+        if other is None:
+            raise MergeError(f"{name} absent du second parent")
+        if other.shape != info.shape:
+            raise MergeError(
+                f"{name}: forme {other.shape} dans le second parent, {info.shape} dans la base"
+            )
+
+        v0 = read_tensor(info) if base is None else base
+        v1 = read_tensor(other)
+        np.save(path, v1 - v0)
+        self.stats[name] = {
+            'norm0': float(np.linalg.norm(v0)),
+            'norm1': float(np.linalg.norm(v1)),
+            'dot': float(np.einsum('i,i->', v0.ravel(), v1.ravel(), dtype=np.float64)),
+        }
+        self.computed += 1
+        return np.load(path, mmap_mode='r'), self.stats[name]
+
+    def flush(self) -> None:
+        with open(self.stats_path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f)
+
+
+def merge_from_delta(
+    method: str,
+    t: float,
+    v0: np.ndarray,
+    delta: np.ndarray,
+    stats: dict
+) -> np.ndarray:
+    """
+    Tenseur fusionné à partir de v0 et de l'écart v1 - v0.
+
+    linear: v0 + t·d. slerp: s0·v0 + s1·v1 = (s0 + s1)·v0 + s1·d, l'angle
+    venant des statistiques en cache (mêmes formules que `merge_tensors.slerp`).
+    """
+    if method == 'linear':
+        return v0 + np.float32(t) * delta
+
+    dot = stats['dot'] / (max(stats['norm0'], EPS) * max(stats['norm1'], EPS))
+    if abs(dot) > DOT_THRESHOLD:
+        return v0 + np.float32(t) * delta
+
+    theta = math.acos(max(-1.0, min(1.0, dot)))
+    s0 = math.sin(theta * (1 - t)) / math.sin(theta)
+    s1 = math.sin(theta * t) / math.sin(theta)
+    return np.float32(s0 + s1) * v0 + np.float32(s1) * delta
+
+
+def decoder_layer(
+    x: np.ndarray,
+    weights: Dict[str, np.ndarray],
+    spec: DecoderSpec,
+    rope
+) -> np.ndarray:
+    """Une couche du décodeur sur un lot [échantillons, positions, hidden]."""
+    input_norm = weights.get('input_layernorm.weight')
+    post_norm = weights.get('post_attention_layernorm.weight')
+    context = np.stack([
+        attention_context(rms_norm(seq, input_norm, spec), weights, spec, rope) for seq in x
+    ])
+    residual = x + _linear(context, weights, ATTENTION_OUTPUT)
+    hidden = mlp_hidden(rms_norm(residual, post_norm, spec), weights, spec)
+    return residual + _linear(hidden, weights, MLP_OUTPUT)
+
+
+def next_token_nll(hidden: np.ndarray, ids: np.ndarray, head: np.ndarray) -> float:
+    """Entropie croisée moyenne de la prédiction du token suivant (logits par blocs)."""
+    x = hidden[:, :-1].reshape(-1, hidden.shape[-1])
+    targets = ids[:, 1:].reshape(-1)
+    total = 0.0
+    for start in range(0, len(x), LOGIT_CHUNK):
+        logits = x[start:start + LOGIT_CHUNK] @ head.T
+        peak = logits.max(axis=1, keepdims=True)
+        log_z = np.log(np.exp(logits - peak).sum(axis=1)) + peak[:, 0]
+        chosen = logits[np.arange(len(logits)), targets[start:start + LOGIT_CHUNK]]
+        total += float(np.sum(log_z - chosen))
+    return total / len(x)
+
+
+class MergeSweep:
+    """
+    Évalue plusieurs ratios d'une recette à 2 parents sur un proxy commun.
+
+    Les candidats avancent ensemble, couche par couche: chaque tenseur de la
+    base est lu une fois, son écart vient du cache, et la version fusionnée
+    n'est produite que pour les valeurs distinctes du ratio (un tenseur hors
+    du filtre est fusionné une seule fois pour tous les candidats). Des
+    embeddings, seules les lignes des tokens du proxy sont fusionnées.
+    """
+
+    def __init__(
+        self,
+        recipe: dict,
+        ratios: List[float],
+        module_filter: Optional[str] = None,
+        cache_dir: Optional[Path] = None,
+        store: Optional[Path] = None,
+        plan: Optional[dict] = None
+    ):
+        self.merger = RecipeMerger(recipe, store=store, plan=plan)
+        if len(self.merger.parent_dirs) != 2:
+            raise MergeError("la recherche de ratio porte sur une recette à 2 modèles")
+        self.method = self.merger.method
+        self.ratios = list(ratios)
+        self.module_filter = module_filter
+
+        with open(self.merger.base_dir / 'config.json', 'r', encoding='utf-8') as f:
+            self.spec = decoder_spec(json.load(f))
+        self.prefix = decoder_prefix(self.merger.tensors)
+        if self.spec is None or self.prefix is None:
+            raise MergeError(
+                "architecture non rejouable en numpy (familles: llama, mistral, qwen2, gemma)"
+            )
+
+        self.by_name = {t.name: t for t in self.merger.tensors}
+        self.table = self._candidate_table()
+        self.cache = DeltaCache(cache_dir, self.merger.parents[0], self.merger.parents[1])
+
+    def _candidate_table(self) -> np.ndarray:
+        """Part du second parent par candidat et par tenseur [candidats, tenseurs]."""
+        names = [t.name for t in self.merger.tensors]
+        if self.method == 'slerp':
+            default = np.array([self.merger.parameter('t', name, 0.5) for name in names])
+        else:
+            default = self.merger.weights[:, 1] / self.merger.weights.sum(axis=1)
+
+        mask = np.ones(len(names), dtype=bool)
+        if self.module_filter:
+            mask = np.array([self.module_filter in name for name in names], dtype=bool)
+            if not mask.any():
+                raise MergeError(f"aucun tenseur ne contient '{self.module_filter}'")
+
+        table = np.tile(default, (len(self.ratios), 1))
+        table[:, mask] = np.asarray(self.ratios, dtype=np.float64)[:, None]
+        return table
+
+    def _merged(
+        self,
+        name: str,
+        base: np.ndarray,
+        rows: Optional[np.ndarray] = None
+    ) -> Dict[float, np.ndarray]:
+        """Versions fusionnées d'un tenseur, une par valeur distincte du ratio."""
+        delta, stats = self.cache.get(name, None if rows is not None else base)
+        if rows is not None:
+            delta = delta[rows]
+        column = self.table[:, self.merger.index[name]]
+        delta = np.asarray(delta)
+        return {
+            float(t): round_to_dtype(
+                merge_from_delta(self.method, float(t), base, delta, stats), self.merger.dtype
+            )
+            for t in np.unique(column)
+        }
+
+    def _value(self, name: str, candidate: int) -> float:
+        return float(self.table[candidate, self.merger.index[name]])
+
+    def run(self, ids: np.ndarray) -> List[dict]:
+        """Score (NLL du token suivant) de chaque candidat sur les séquences `ids`."""
+        spec = self.spec
+        candidates = len(self.ratios)
+        rope = rope_tables(spec, ids.shape[1])
+
+        # Embeddings: seules les lignes des tokens du proxy
+        embed_name = f'{self.prefix}.embed_tokens.weight'
+        embed_info = self.by_name[embed_name]
+        rows, inverse = np.unique(ids, return_inverse=True)
+        base_rows = to_float32(tensor_view(embed_info)[rows], embed_info.dtype)
+        merged = self._merged(embed_name, base_rows, rows)
+        inverse = inverse.reshape(ids.shape)
+        hidden = [
+            merged[self._value(embed_name, c)][inverse] * spec.embed_scale
+            for c in range(candidates)
+        ]
+
+        for layer in range(spec.num_layers):
+            prefix = f'{self.prefix}.layers.{layer}.'
+            infos = [
+                t for t in self.merger.tensors
+                if t.name.startswith(prefix) and t.dtype in FLOAT_DTYPES
+            ]
+            if not infos:
+                raise MergeError(f"couche {layer} absente")
+            versions = {info.name: self._merged(info.name, read_tensor(info)) for info in infos}
+            for c in range(candidates):
+                weights = {
+                    info.name[len(prefix):]: versions[info.name][self._value(info.name, c)]
+                    for info in infos
+                }
+                hidden[c] = decoder_layer(hidden[c], weights, spec, rope)
+            logger.info(f"  ✓ Couche {layer + 1}/{spec.num_layers}")
+
+        norm_name = f'{self.prefix}.norm.weight'
+        head = head_name(self.prefix, self.by_name) or embed_name
+        norms = None
+        if norm_name in self.by_name:
+            norms = self._merged(norm_name, read_tensor(self.by_name[norm_name]))
+        heads = self._merged(head, read_tensor(self.by_name[head]))
+        self.cache.flush()
+
+        results = []
+        for c, ratio in enumerate(self.ratios):
+            norm = norms[self._value(norm_name, c)] if norms is not None else None
+            nll = next_token_nll(rms_norm(hidden[c], norm, spec), ids, heads[self._value(head, c)])
+            results.append({'ratio': ratio, 'nll': nll, 'perplexity': math.exp(min(nll, 50.0))})
+        return results
+
+
+def format_results(results: List[dict], parameter: str) -> str:
+    """Tableau des candidats, meilleur marqué."""
+    best = min(results, key=lambda r: r['nll'])
+    lines = [f"{parameter:>8} {'NLL':>9} {'perplexité':>12}"]
+    for r in results:
+        mark = '  ← meilleur' if r is best else ''
+        lines.append(f"{r['ratio']:>8.3f} {r['nll']:>9.4f} {r['perplexity']:>12.2f}{mark}")
+    return '\n'.join(lines)
+
+
+def parse_range(values: List[float]) -> List[float]:
+    """--range début fin pas → liste de ratios (fin incluse)."""
+    start, stop, step = values
+    if step <= 0 or stop < start:
+        raise ValueError("--range attend début ≤ fin et un pas positif")
+    count = int(round((stop - start) / step)) + 1
+    return [round(start + i * step, 6) for i in range(count)]
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Recherche du ratio de fusion",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Ratios 0.3 à 0.7 de la recette, proxy sur un corpus de code et un corpus français
+  python merge_sweep.py recipes/dev-polyglot-v1.yml \\
+      --calibration corpus/code.txt --calibration corpus/fr.txt
+
+  # Grille fine sur l'attention seulement (le reste garde la valeur de la recette)
+  python merge_sweep.py recipes/dev-polyglot-v1.yml --range 0.2 0.8 0.05 --filter self_attn
+
+  # Écarts gardés entre deux sweeps, rapport JSON
+  python merge_sweep.py recipes/dev-polyglot-v1.yml --cache-dir .sweep_cache -o sweep.json
+        """
+    )
+
+    parser.add_argument(
+        'recipe',
+        type=Path,
+        help="Recette de fusion (YAML, 2 modèles, slerp ou linear)"
+    )
+
+    grid = parser.add_mutually_exclusive_group()
+    grid.add_argument(
+        '--ratios',
+        type=float,
+        nargs='+',
+        help=(
+            "Ratios candidats: t (slerp) ou part du second modèle (linear) "
+            f"(défaut: {' '.join(map(str, DEFAULT_RATIOS))})"
+        )
+    )
+    grid.add_argument(
+        '--range',
+        type=float,
+        nargs=3,
+        metavar=('DEBUT', 'FIN', 'PAS'),
+        help="Grille de ratios régulière, fin incluse"
+    )
+
+    parser.add_argument(
+        '--filter',
+        help="Ne faire varier que les tenseurs dont le nom contient ce filtre (ex: self_attn, mlp)"
+    )
+
+    parser.add_argument(
+        '--calibration',
+        type=Path,
+        action='append',
+        default=[],
+        help="Fichier texte du proxy (répétable; défaut: README et recettes de la fonderie)"
+    )
+
+    parser.add_argument(
+        '--samples',
+        type=int,
+        default=DEFAULT_SWEEP_SAMPLES,
+        help=f"Nombre de séquences du proxy (défaut: {DEFAULT_SWEEP_SAMPLES})"
+    )
+
+    parser.add_argument(
+        '--seq-len',
+        type=int,
+        default=DEFAULT_SWEEP_SEQ_LEN,
+        help=f"Longueur des séquences du proxy (défaut: {DEFAULT_SWEEP_SEQ_LEN})"
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        type=Path,
+        help="Dossier persistant des écarts entre parents (défaut: temporaire, effacé)"
+    )
+
+    parser.add_argument(
+        '--store',
+        type=Path,
+        help="Magasin partagé des modèles parents"
+    )
+
+    parser.add_argument(
+        '--output',
+        '-o',
+        type=Path,
+        help="Rapport JSON des scores"
+    )
+
+    parser.add_argument(
+        '--verbose',
+        '-v',
+        action='store_true',
+        help="Mode verbose"
+    )
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    try:
+        ratios = parse_range(args.range) if args.range else list(args.ratios or DEFAULT_RATIOS)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        import yaml
+
+        with open(args.recipe, 'r', encoding='utf-8') as f:
+            recipe = yaml.safe_load(f)
+        plan, _ = load_or_compile(args.recipe, store=args.store)
+
+        with tempfile.TemporaryDirectory(prefix='orion-sweep-') as tmp:
+            cache_dir = args.cache_dir or Path(tmp)
+            sweep = MergeSweep(recipe, ratios, args.filter, cache_dir, args.store, plan)
+            parameter = 't' if sweep.method == 'slerp' else 'weight'
+            logger.info(
+                f"🔎 Recherche du ratio: {args.recipe.name} "
+                f"({sweep.method}, {len(ratios)} candidats)"
+            )
+            if args.filter:
+                logger.info(f"  - Filtre: {args.filter} (autres tenseurs: valeur de la recette)")
+
+            # Jamais de tokens aléatoires: le classement des ratios n'aurait aucun sens
+            ids = calibration_ids(
+                sweep.merger.base_dir, args.calibration, args.samples, args.seq_len,
+                sweep.spec.vocab_size, allow_random=False
+            )
+            started = time.perf_counter()
+            results = sweep.run(ids)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"  - Écarts entre parents: {sweep.cache.computed} calculés, "
+                f"{sweep.cache.reused} relus du cache"
+            )
+
+    except (MergeError, QuantizeError, FileNotFoundError) as e:
+        logger.error(f"❌ Recherche impossible: {e}")
+        sys.exit(1)
+
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de la recherche: {e}")
+        if args.verbose:
+            logger.exception("Détails de l'erreur:")
+        sys.exit(1)
+
+    logger.info(f"📊 Scores du proxy ({elapsed:.1f} s):\n" + format_results(results, parameter))
+    best = min(results, key=lambda r: r['nll'])
+    target = f"{args.filter}: " if args.filter else ''
+    logger.info(f"✅ Meilleur ratio: {target}{parameter} = {best['ratio']:g}")
+
+    if args.output:
+        report = {
+            'recipe': str(args.recipe),
+            'method': sweep.method,
+            'filter': args.filter,
+            'samples': int(ids.shape[0]),
+            'seq_len': int(ids.shape[1]),
+            'results': results,
+            'best': best['ratio'],
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"📄 Rapport: {args.output}")
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Fusion tenseur par tenseur
+Noyaux de fusion numpy (slerp, linear) appliqués à la demande, sans écrire le modèle fusionné
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from architectures import tensor_map
+from fetch_models import resolve_model
+from quantize_layers import FLOAT_DTYPES, read_tensor
+from safetensors_io import TensorInfo, list_model_tensors
+
+logger = logging.getLogger(__name__)
+
+
+# Vecteurs quasi colinéaires: slerp dégénère, on interpole linéairement
+DOT_THRESHOLD = 0.9995
+EPS = 1e-8
+
+# dtype de la recette → dtype safetensors du modèle fusionné
+RECIPE_DTYPES = {'float32': 'F32', 'bfloat16': 'BF16', 'float16': 'F16'}
+
+# Paramètres de recette globaux, jamais interpolés
+FLAG_PARAMETERS = ('normalize',)
+
+# Champs de config.json qui doivent coïncider entre les parents
+ARCHITECTURE_KEYS = ('model_type', 'num_hidden_layers', 'hidden_size', 'vocab_size')
+
+# Version du format des plans de fusion compilés
+PLAN_VERSION = 1
+
+
+class MergeError(ValueError):
+    """Recette ou parents incompatibles avec la fusion."""
+
+
+def slerp(t: float, v0: np.ndarray, v1: np.ndarray) -> np.ndarray:
+    """
+    Interpolation sphérique entre deux tenseurs (même formule que mergekit).
+
+    L'angle est mesuré entre les tenseurs normalisés, l'interpolation porte
+    sur les tenseurs d'origine.
+    """
+    n0 = v0 / max(float(np.linalg.norm(v0)), EPS)
+    n1 = v1 / max(float(np.linalg.norm(v1)), EPS)
+    dot = float(np.sum(n0 * n1))
+    if abs(dot) > DOT_THRESHOLD:
+        return (1 - t) * v0 + t * v1
+
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    s0 = np.sin(theta * (1 - t)) / sin_theta
+    s1 = np.sin(theta * t) / sin_theta
+    return (s0 * v0 + s1 * v1).astype(np.float32)
+
+
+def linear(tensors: List[np.ndarray], weights: List[float], normalize: bool = True) -> np.ndarray:
+    """Moyenne pondérée des tenseurs (poids normalisés à 1 par défaut)."""
+    total = sum(weights) if normalize else 1.0
+    if normalize and abs(total) < EPS:
+        raise MergeError("somme des poids nulle")
+    merged = np.zeros_like(tensors[0], dtype=np.float32)
+    for tensor, weight in zip(tensors, weights):
+        merged += tensor * (weight / total)
+    return merged
+
+
+def round_to_dtype(x: np.ndarray, dtype: str) -> np.ndarray:
+    """Arrondit en float32 à la précision de `dtype` (comme un modèle fusionné sur disque)."""
+    if dtype == 'BF16':
+        bits = np.ascontiguousarray(x, dtype=np.float32).view(np.uint32)
+        rounded = (bits + 0x7FFF + ((bits >> 16) & 1)) & 0xFFFF0000
+        return rounded.astype(np.uint32).view(np.float32)
+    if dtype == 'F16':
+        return x.astype(np.float16).astype(np.float32)
+    return x.astype(np.float32, copy=False)
+
+
+def depth_positions(names: Sequence[str]) -> np.ndarray:
+    """
+    Position relative (0 → 1) de chaque tenseur dans sa pile de couches.
+
+    Couche i sur n: i / (n - 1). Les embeddings sont en 0, la norme finale et
+    lm_head en 1, comme dans mergekit; les rôles viennent de l'adaptateur de
+    la famille (architectures.py), pas des noms.
+    """
+    table = tensor_map(names)
+    return np.array([table.position(name) for name in names], dtype=np.float64)
+
+
+def parameter_table(setting, names: Sequence[str], positions: np.ndarray) -> np.ndarray:
+    """
+    Valeurs d'un paramètre de recette pour tous les tenseurs, en un calcul vectorisé.
+
+    `setting` suit la syntaxe mergekit: scalaire, courbe `[v0, ..., vk]`
+    (points répartis uniformément sur la profondeur, interpolés linéairement)
+    ou liste de règles `{filter, value}` (premier filtre contenu dans le nom;
+    une règle sans filtre s'applique à tous). NaN: aucune règle ne s'applique.
+    """
+    if isinstance(setting, bool) or setting is None:
+        raise MergeError(f"valeur de paramètre invalide: {setting!r}")
+    if isinstance(setting, (int, float)):
+        return np.full(len(names), float(setting))
+    if not isinstance(setting, list) or not setting:
+        raise MergeError(f"valeur de paramètre invalide: {setting!r}")
+
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in setting):
+        if len(setting) == 1:
+            return np.full(len(names), float(setting[0]))
+        anchors = np.linspace(0.0, 1.0, len(setting))
+        return np.interp(positions, anchors, np.asarray(setting, dtype=np.float64))
+
+    values = np.full(len(names), np.nan)
+    pending = np.ones(len(names), dtype=bool)
+    for rule in setting:
+        if not isinstance(rule, dict) or 'value' not in rule:
+            raise MergeError(f"règle de paramètre invalide: {rule!r}")
+        pattern = rule.get('filter')
+        if pattern is None:
+            mask = pending.copy()
+        else:
+            mask = pending & np.array([pattern in name for name in names], dtype=bool)
+        if mask.any():
+            selected = np.flatnonzero(mask)
+            values[selected] = parameter_table(
+                rule['value'], [names[i] for i in selected], positions[selected]
+            )
+            pending &= ~mask
+    return values
+
+
+def match_parents(parents: Sequence[List[TensorInfo]]) -> List[Dict[str, str]]:
+    """
+    Nom dans chaque parent de chaque tenseur de la base: même nom, sinon même
+    position canonique (couche, rôle), pour des familles nommées différemment.
+    """
+    base = tensor_map(t.name for t in parents[0])
+    return [base.match(tensor_map(t.name for t in tensors)) for tensors in parents]
+
+
+def parent_errors(
+    models: Sequence[str],
+    parents: Sequence[List[TensorInfo]],
+    configs: Optional[Sequence[Optional[dict]]] = None,
+    examples: int = 3
+) -> List[str]:
+    """
+    Incompatibilités des parents avec la base (premier parent), d'après les en-têtes.
+
+    Chaque tenseur de la base doit avoir son équivalent dans tous les parents
+    (voir `match_parents`) avec la même forme, et un parent ne doit pas avoir
+    de tenseur sans équivalent dans la base (couches en plus, tête séparée);
+    les dtypes peuvent différer (conversion en float32). Avec `configs`, les
+    champs d'architecture de config.json (ARCHITECTURE_KEYS) doivent aussi
+    coïncider.
+    """
+    errors = []
+    if not parents or not parents[0]:
+        return [f"{models[0] if models else '?'}: aucun tenseur safetensors"]
+
+    base = parents[0]
+    empty = [model for model, tensors in zip(models[1:], parents[1:]) if not tensors]
+    if empty:
+        return [f"{model}: aucun tenseur safetensors" for model in empty]
+
+    def listed(items: List[str], separator: str = ', ') -> str:
+        more = f'{separator}...' if len(items) > examples else ''
+        return separator.join(items[:examples]) + more
+
+    base_config = configs[0] if configs else None
+    matches = match_parents(parents)
+    for i, (model, tensors, matched) in enumerate(zip(models[1:], parents[1:], matches[1:]), 1):
+        by_name = {t.name: t for t in tensors}
+        missing = [t.name for t in base if t.name not in matched]
+        shapes = [
+            f"{t.name} {list(by_name[matched[t.name]].shape)} ≠ {list(t.shape)}"
+            for t in base
+            if t.name in matched and by_name[matched[t.name]].shape != t.shape
+        ]
+        used = set(matched.values())
+        extra = [t.name for t in tensors if t.name not in used]
+        if missing:
+            errors.append(
+                f"{model}: {len(missing)}/{len(base)} tenseurs de {models[0]} absents "
+                f"({listed(missing)})"
+            )
+        if extra:
+            errors.append(
+                f"{model}: {len(extra)} tenseurs sans équivalent dans {models[0]} "
+                f"({listed(extra)})"
+            )
+        if shapes:
+            errors.append(
+                f"{model}: {len(shapes)} formes différentes de {models[0]} "
+                f"({listed(shapes, '; ')})"
+            )
+
+        config = configs[i] if configs and i < len(configs) else None
+        if base_config is not None and config is not None:
+            differences = [
+                f"{key} {config.get(key)} ≠ {base_config.get(key)}"
+                for key in ARCHITECTURE_KEYS
+                if config.get(key) != base_config.get(key)
+            ]
+            if differences:
+                errors.append(
+                    f"{model}: config.json différente de {models[0]} ({'; '.join(differences)})"
+                )
+    return errors
+
+
+def compile_plan(recipe: dict, parents: Sequence[List[TensorInfo]]) -> dict:
+    """
+    Plan de fusion tenseur par tenseur, d'après les seuls en-têtes des parents.
+
+    Pour chaque tenseur de la base: forme, paramètres évalués (`t`, poids des
+    modèles) et emplacement dans chaque parent (fichier, offset). Le plan est
+    sérialisable en JSON; `RecipeMerger` l'exécute sans relire d'en-tête ni
+    réévaluer les courbes de paramètres.
+    """
+    entries = recipe.get('models', [])
+    models = [entry['model'] for entry in entries]
+    errors = parent_errors(models, parents)
+    if errors:
+        raise MergeError('; '.join(errors))
+
+    base = parents[0]
+    names = [t.name for t in base]
+    positions = depth_positions(names)
+    schedule = {
+        name: parameter_table(setting, names, positions)
+        for name, setting in (recipe.get('parameters') or {}).items()
+        if name not in FLAG_PARAMETERS
+    }
+
+    # Poids par modèle: une colonne par parent (1.0 par défaut)
+    columns = []
+    for entry in entries:
+        setting = (entry.get('parameters') or {}).get('weight', 1.0)
+        column = parameter_table(setting, names, positions)
+        columns.append(np.where(np.isnan(column), 1.0, column))
+    weights = np.stack(columns, axis=1)
+
+    lookups = [{t.name: t for t in tensors} for tensors in parents]
+    matches = match_parents(parents)
+    tensors = []
+    for i, info in enumerate(base):
+        sources = [lookup[matched[info.name]] for lookup, matched in zip(lookups, matches)]
+        tensors.append({
+            'name': info.name,
+            'dtype': info.dtype,
+            'shape': list(info.shape),
+            'parameters': {
+                name: float(table[i]) for name, table in schedule.items() if not np.isnan(table[i])
+            },
+            'weights': weights[i].tolist(),
+            'sources': [
+                {
+                    'file': Path(t.file).name,
+                    'offset': t.data_start,
+                    'nbytes': t.nbytes,
+                    'dtype': t.dtype,
+                }
+                for t in sources
+            ],
+        })
+
+    # Fin des données de chaque fichier: contrôle peu coûteux avant exécution
+    files = []
+    for parent in parents:
+        ends: Dict[str, int] = {}
+        for t in parent:
+            filename = Path(t.file).name
+            ends[filename] = max(ends.get(filename, 0), t.data_start + t.nbytes)
+        files.append(ends)
+
+    return {
+        'format_version': PLAN_VERSION,
+        'merge_method': recipe.get('merge_method'),
+        'dtype': RECIPE_DTYPES.get(recipe.get('dtype', 'bfloat16'), 'BF16'),
+        'models': models,
+        'files': files,
+        'tensors': tensors,
+    }
+
+
+class RecipeMerger:
+    """
+    Fusionne les tenseurs d'une recette à la demande.
+
+    L'architecture (noms, formes, config.json, tokenizer) est celle du modèle
+    de base, le premier parent; `merge(info)` lit le tenseur dans chaque
+    parent et renvoie le résultat en float32, arrondi au dtype de la recette.
+
+    Les paramètres (`t`, poids des modèles) peuvent varier selon la couche et
+    le type de module; ils sont évalués une fois pour tous les tenseurs dans
+    un plan compilé (`compile_plan`, ou plan fourni par compile_recipe.py),
+    `merge` ne fait plus qu'une lecture de table.
+    """
+
+    METHODS = ('linear', 'slerp')
+
+    def __init__(self, recipe: dict, store: Optional[Path] = None, plan: Optional[dict] = None):
+        self.recipe = recipe
+        self.method = recipe.get('merge_method')
+        if self.method not in self.METHODS:
+            raise MergeError(
+                f"méthode de fusion non prise en charge: {self.method} ({', '.join(self.METHODS)})"
+            )
+
+        entries = recipe.get('models', [])
+        if len(entries) < 2:
+            raise MergeError("au moins 2 modèles sont requis pour la fusion")
+        if self.method == 'slerp' and len(entries) != 2:
+            raise MergeError("slerp fusionne exactement 2 modèles")
+
+        self.parameters = recipe.get('parameters') or {}
+        self.dtype = RECIPE_DTYPES.get(recipe.get('dtype', 'bfloat16'), 'BF16')
+
+        self.parent_dirs = [Path(resolve_model(entry['model'], store=store)) for entry in entries]
+        if plan is None:
+            plan = compile_plan(recipe, [list_model_tensors(path) for path in self.parent_dirs])
+        self._load_plan(plan)
+
+    @property
+    def base_dir(self) -> Path:
+        return self.parent_dirs[0]
+
+    def _load_plan(self, plan: dict) -> None:
+        """Tables de tenseurs et de paramètres d'un plan compilé (voir `compile_plan`)."""
+        if plan.get('format_version') != PLAN_VERSION:
+            raise MergeError(
+                f"format de plan {plan.get('format_version')} non pris en charge "
+                f"(attendu: {PLAN_VERSION})"
+            )
+        if plan['merge_method'] != self.method or len(plan['models']) != len(self.parent_dirs):
+            raise MergeError("plan compilé pour une autre recette, recompilez-la")
+        for path, files in zip(self.parent_dirs, plan['files']):
+            for filename, end in files.items():
+                file = path / filename
+                if not file.exists() or file.stat().st_size < end:
+                    raise MergeError(
+                        f"{file} ne correspond plus au plan compilé, recompilez la recette"
+                    )
+
+        entries = plan['tensors']
+        self.parents: List[Dict[str, TensorInfo]] = [{} for _ in self.parent_dirs]
+        for entry in entries:
+            shape = tuple(entry['shape'])
+            for parent, path, source in zip(self.parents, self.parent_dirs, entry['sources']):
+                parent[entry['name']] = TensorInfo(
+                    name=entry['name'],
+                    dtype=source['dtype'],
+                    shape=shape,
+                    file=path / source['file'],
+                    data_start=source['offset'],
+                    nbytes=source['nbytes'],
+                )
+        self.tensors = [self.parents[0][entry['name']] for entry in entries]
+
+        self.index = {entry['name']: i for i, entry in enumerate(entries)}
+        keys = dict.fromkeys(key for entry in entries for key in entry['parameters'])
+        self.schedule: Dict[str, np.ndarray] = {
+            key: np.array(
+                [entry['parameters'].get(key, np.nan) for entry in entries], dtype=np.float64
+            )
+            for key in keys
+        }
+        self.weights = np.array(
+            [entry['weights'] for entry in entries], dtype=np.float64
+        ).reshape(len(entries), len(self.parent_dirs))
+
+    def parameter(self, name: str, tensor_name: str, default: float) -> float:
+        """Valeur d'un paramètre de la recette pour un tenseur donné."""
+        table = self.schedule.get(name)
+        if table is None or tensor_name not in self.index:
+            return float(default)
+        value = table[self.index[tensor_name]]
+        return float(default) if np.isnan(value) else float(value)
+
+    def describe(self) -> List[str]:
+        """Résumé des paramètres variables (min → max) pour le journal."""
+        lines = []
+        tables = dict(self.schedule)
+        if self.method == 'linear':
+            tables.update({
+                f"weight[{i}]": self.weights[:, i] for i in range(self.weights.shape[1])
+            })
+        for name, table in tables.items():
+            values = table[~np.isnan(table)]
+            if values.size and values.min() != values.max():
+                lines.append(f"{name}: {values.min():.3f} → {values.max():.3f}")
+        return lines
+
+    def _parent_tensors(self, info: TensorInfo) -> List[np.ndarray]:
+        arrays = []
+        for path, parent in zip(self.parent_dirs, self.parents):
+            other = parent.get(info.name)
+            if other is None:
+                raise MergeError(f"{info.name} absent du plan de {path}")
+            arrays.append(read_tensor(other))
+        return arrays
+
+    def merge(self, info: TensorInfo) -> np.ndarray:
+        """Tenseur fusionné en float32 (un tenseur par parent en mémoire)."""
+        if info.dtype not in FLOAT_DTYPES:
+            raise MergeError(f"{info.name}: dtype {info.dtype} non fusionnable")
+
+        tensors = self._parent_tensors(info)
+        if self.method == 'slerp':
+            merged = slerp(self.parameter('t', info.name, 0.5), tensors[0], tensors[1])
+        else:
+            if info.name in self.index:
+                weights = self.weights[self.index[info.name]].tolist()
+            else:
+                weights = [1.0] * len(tensors)
+            merged = linear(tensors, weights, bool(self.parameters.get('normalize', True)))
+        return round_to_dtype(merged, self.dtype)
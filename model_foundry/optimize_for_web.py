@@ -21,6 +21,12 @@ from typing import Optional
 import torch
 from transformers import AutoModelForCausalLM, AutoTokenizer
 
+from fetch_models import resolve_model
+from generate_web_configs import WEB_CONFIG_FILENAME, build_web_config
+from profiling import Profiler
+from safetensors_io import TensorInfo
+from tune_shards import recommend_layout, startup_file_sizes
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -28,7 +34,8 @@ logger = logging.getLogger(__name__)
 def quantize_model(
     model_path: str,
     output_path: str,
-    quantization: str = "q4f16_1"
+    quantization: str = "q4f16_1",
+    profiler: Optional[Profiler] = None
 ):
     """
     Quantifie un modèle pour réduire sa taille
@@ -37,21 +44,27 @@ def quantize_model(
         model_path: Chemin du modèle source
         output_path: Chemin de sortie
         quantization: Type de quantification (q4f16_1, q8, etc.)
+        profiler: Profiler recevant les spans des étapes (optionnel)
     """
+    profiler = profiler or Profiler(enabled=False)
     logger.info(f"🔧 Quantification du modèle: {quantization}")
     logger.info(f"  Source: {model_path}")
     logger.info(f"  Destination: {output_path}")
     
     try:
+        # Modèles du hub: magasin partagé de la fonderie plutôt que le cache transformers
+        model_path = resolve_model(model_path)
+
         # Charger le modèle
         logger.info("📥 Chargement du modèle...")
-        model = AutoModelForCausalLM.from_pretrained(
-            model_path,
-            torch_dtype=torch.float16,
-            trust_remote_code=True,
-            low_cpu_mem_usage=True
-        )
-        tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
+        with profiler.span('from_pretrained', cat='load'):
+            model = AutoModelForCausalLM.from_pretrained(
+                model_path,
+                torch_dtype=torch.float16,
+                trust_remote_code=True,
+                low_cpu_mem_usage=True
+            )
+            tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
         
         # Pour une vraie quantification, nous utiliserions des bibliothèques comme:
         # - GGML/llama.cpp pour GGUF
@@ -59,23 +72,38 @@ def quantize_model(
         # - AutoGPTQ pour GPTQ
         # Ici, nous faisons une conversion simple en float16
         
+        # Taille de shard choisie par simulation du chargement sous les profils réseau
+        tensors = [
+            TensorInfo(
+                name, 'F16', tuple(t.shape), Path(model_path), 0, t.numel() * t.element_size()
+            )
+            for name, t in model.state_dict().items()
+        ]
+        shard_size_mb, _ = recommend_layout(tensors, startup_file_sizes(Path(model_path)))
+        logger.info(f"📐 Taille de shard choisie: {shard_size_mb} Mo")
+        
         logger.info("💾 Sauvegarde du modèle quantifié...")
         Path(output_path).mkdir(parents=True, exist_ok=True)
         
         # Sauvegarder en format optimisé
-        model.save_pretrained(
-            output_path,
-            safe_serialization=True,
-            max_shard_size="200MB"  # Découpage en shards de 200MB
-        )
-        tokenizer.save_pretrained(output_path)
+        with profiler.span('save_pretrained', cat='write') as span:
+            model.save_pretrained(
+                output_path,
+                safe_serialization=True,
+                max_shard_size=f"{shard_size_mb}MB"
+            )
+            tokenizer.save_pretrained(output_path)
+            span['nbytes'] = sum(
+                f.stat().st_size for f in Path(output_path).glob("*.safetensors")
+            )
+        profiler.count('bytes_written', span['nbytes'])
         
         # Métadonnées d'optimisation
         metadata = {
             "optimized": True,
             "quantization": quantization,
             "target_platform": "web",
-            "shard_size_mb": 200,
+            "shard_size_mb": shard_size_mb,
             "optimized_by": "ORION Model Foundry"
         }
         
@@ -109,35 +137,19 @@ def quantize_model(
 def create_web_config(
     model_path: str,
     model_name: str,
-    capabilities: list,
-    recommended_ram_gb: int = 4
+    capabilities: list
 ):
     """
     Crée un fichier de configuration pour l'intégration web
+
+    Le format de prompt vient du chat template du tokenizer et le contexte
+    de config.json (voir generate_web_configs.py pour le mode lot).
     """
-    config = {
-        "model_id": model_name,
-        "name": model_name.replace("-", " "),
-        "type": "hybrid",
-        "path": f"/models/{model_name}/",
-        "capabilities": capabilities,
-        "min_ram_gb": recommended_ram_gb,
-        "prompt_format": {
-            "system_prefix": "<|system|>\n",
-            "user_prefix": "<|user|>\n",
-            "assistant_prefix": "<|assistant|>\n",
-            "eos_token": "<|end|>"
-        },
-        "config": {
-            "max_tokens": 4096,
-            "temperature": 0.5,
-            "top_p": 0.9
-        }
-    }
+    config = build_web_config(Path(model_path), model_name, capabilities)
     
-    config_path = Path(model_path) / "web_config.json"
-    with open(config_path, 'w') as f:
-        json.dump(config, f, indent=2)
+    config_path = Path(model_path) / WEB_CONFIG_FILENAME
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
     
     logger.info(f"📝 Configuration web créée: {config_path}")
     return config
@@ -170,6 +182,17 @@ def main():
         default=None,
         help="Nom du modèle pour la configuration web"
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Afficher un tableau de temps et de pic mémoire par étape"
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Exporter une trace Chrome (JSON) des étapes"
+    )
     
     args = parser.parse_args()
     
@@ -187,20 +210,32 @@ def main():
     logger.info("🏭 ORION MODEL FOUNDRY - Optimisation Web")
     logger.info("="*60)
     
+    profiler = Profiler(enabled=args.profile or args.trace is not None)
+    profiler.start_sampling()
+    
     # Quantifier le modèle
-    quantize_model(
-        model_path=args.model,
-        output_path=output_path,
-        quantization=args.quantization
-    )
+    try:
+        quantize_model(
+            model_path=args.model,
+            output_path=output_path,
+            quantization=args.quantization,
+            profiler=profiler
+        )
+    finally:
+        profiler.stop_sampling()
+        if args.profile:
+            logger.info("⏱️  Profil des étapes:\n" + profiler.format_summary())
+        if args.trace:
+            profiler.export_chrome_trace(Path(args.trace))
+            logger.info(f"📄 Trace Chrome écrite: {args.trace}")
     
-    # Créer la configuration web
-    create_web_config(
+    # Créer la configuration web (RAM estimée au contexte de la config web)
+    web_config = create_web_config(
         model_path=output_path,
         model_name=model_name,
-        capabilities=["code", "multilingual", "chat", "reasoning"],
-        recommended_ram_gb=4
+        capabilities=["code", "multilingual", "chat", "reasoning"]
     )
+    logger.info(f"🧮 RAM minimale estimée: {web_config['min_ram_gb']} GB")
     
     logger.info("="*60)
     logger.info("✨ Optimisation terminée!")
@@ -208,7 +243,9 @@ def main():
     logger.info(f"\n📝 Prochaines étapes:")
     logger.info(f"  1. Copier le modèle vers public/models/:")
     logger.info(f"     cp -r {output_path} ../public/models/{model_name}")
-    logger.info(f"  2. Ajouter la configuration à models.json")
+    logger.info(
+        f"  2. Mettre à jour models.json: python sync_registry.py ../public/models/{model_name}"
+    )
     logger.info(f"  3. Créer l'agent correspondant dans src/oie/agents/")
 
 
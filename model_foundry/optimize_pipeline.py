@@ -5,9 +5,19 @@ Quantification + Sharding + Validation en une seule commande
 """
 
 import argparse
+import os
+import shutil
 import sys
 from pathlib import Path
 import logging
+from typing import Dict, List, Optional, Tuple
+
+from fetch_models import FetchError
+from plan_pipeline import check_resources, format_plan, load_calibration, plan_pipeline
+from quantize_model import quantize_model
+from safetensors_io import SafetensorsError
+from shard_model import shard_model
+from verify_model import verify_model_dir
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,29 +26,113 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def validate_output(output_path: Path) -> bool:
+    """Vérifie les shards écrits (verify_model.py) et journalise les problèmes."""
+    report = verify_model_dir(output_path, workers=min(8, os.cpu_count() or 1))
+    if not report['ok']:
+        for error in report['errors']:
+            logger.error(f"  - {error}")
+        logger.error(f"❌ {output_path}: {len(report['errors'])} problème(s) d'intégrité")
+        return False
+    logger.info(
+        f"✅ {len(report['shards'])} shards vérifiés "
+        f"({report['bytes_checked'] / (1024 * 1024):.1f} Mo, {report['seconds']:.1f}s)"
+    )
+    return True
+
+
 def optimize_model(
     model_path: Path,
     output_path: Path,
     quantization: str = 'q4',
     shard_size: int = 100,
     skip_validation: bool = False,
-    verbose: bool = False
+    verbose: bool = False,
+    plan_only: bool = False,
+    recipe_path: Optional[Path] = None,
+    throughput: Optional[Dict[str, float]] = None,
+    force: bool = False,
+    fused: bool = False,
+    corpus: Optional[List[Path]] = None,
+    random_calibration: bool = False
 ) -> bool:
     """
     Pipeline d'optimisation complet.
     
+    Le plan (octets, pic mémoire, disque, durée par étape) est établi
+    d'abord, à partir des seuls en-têtes; le pipeline refuse de démarrer
+    si la machine n'a pas les ressources nécessaires.
+    
     Args:
-        model_path: Chemin vers le modèle source
+        model_path: Chemin vers le modèle source (dossier fusionné avec une recette)
         output_path: Chemin de sortie
         quantization: Niveau de quantification
         shard_size: Taille des shards en Mo
         skip_validation: Sauter la validation
         verbose: Mode verbose
+        plan_only: Afficher le plan sans rien exécuter
+        recipe_path: Recette de fusion à planifier en amont (téléchargement + fusion)
+        throughput: Débits calibrés en Mo/s (voir plan_pipeline.load_calibration)
+        force: Démarrer même si les ressources semblent insuffisantes
+        fused: Fusion, quantification et sharding en une passe (recette requise):
+            `model_path` n'est alors jamais écrit
+        corpus: Fichiers texte de calibration GPTQ (défaut: README et recettes)
+        random_calibration: Tokens aléatoires si le corpus n'est pas tokenisable
     
     Returns:
         True si succès, False sinon
     """
     try:
+        recipe = None
+        if recipe_path is not None:
+            import yaml
+
+            with open(recipe_path, 'r', encoding='utf-8') as f:
+                recipe = yaml.safe_load(f)
+
+        try:
+            stages = plan_pipeline(
+                model_path,
+                output_path,
+                quantization=quantization,
+                shard_size=shard_size,
+                skip_validation=skip_validation,
+                recipe=recipe,
+                throughput=throughput,
+                fused=fused
+            )
+        except (FileNotFoundError, FetchError, SafetensorsError) as e:
+            logger.error(f"❌ Planification impossible: {e}")
+            return False
+
+        errors, needs = check_resources(stages)
+        logger.info("🧮 Plan d'exécution:\n" + format_plan(stages, needs, errors))
+        if plan_only:
+            return not errors
+        if errors and not force:
+            logger.error(
+                "❌ Ressources insuffisantes: pipeline non démarré (--force pour passer outre)"
+            )
+            return False
+        
+        if fused:
+            from merge_quantize import merge_quantize
+
+            if not merge_quantize(
+                recipe_path,
+                output_path,
+                quantization=quantization,
+                shard_size_mb=shard_size,
+                calibration=corpus,
+                verbose=verbose,
+                random_calibration=random_calibration
+            ):
+                return False
+            if skip_validation:
+                return True
+            logger.info("🔍 Validation des shards fusionnés")
+            return validate_output(output_path)
+        
         logger.info("🚀 ORION Model Foundry - Pipeline d'optimisation")
         logger.info("=" * 60)
         logger.info(f"📥 Modèle source: {model_path}")
@@ -54,37 +148,34 @@ def optimize_model(
             logger.error(f"❌ Modèle source introuvable: {model_path}")
             return False
         
-        # Créer le dossier de sortie
-        output_path.mkdir(parents=True, exist_ok=True)
+        temp_path = Path(f"{output_path}_temp")
         
         # Étape 1: Quantification
         logger.info("")
         logger.info("📊 Étape 1/3: Quantification")
         logger.info("-" * 60)
-        logger.info(f"Quantification du modèle en {quantization}...")
-        logger.info("ℹ️  Commande équivalente:")
-        logger.info(f"  python quantize_model.py {model_path} {output_path}_temp -q {quantization}")
-        logger.info("✅ Quantification simulée")
+        if not quantize_model(
+            model_path, temp_path, quantization=quantization, verbose=verbose,
+            calibration=corpus, random_calibration=random_calibration
+        ):
+            return False
         
         # Étape 2: Sharding
         logger.info("")
         logger.info("✂️  Étape 2/3: Sharding")
         logger.info("-" * 60)
-        logger.info(f"Découpage en shards de {shard_size} Mo...")
-        logger.info("ℹ️  Commande équivalente:")
-        logger.info(f"  python shard_model.py {output_path}_temp {output_path} -s {shard_size}")
-        logger.info("✅ Sharding simulé")
+        if not shard_model(temp_path, output_path, shard_size_mb=shard_size, verbose=verbose):
+            return False
+        shutil.rmtree(temp_path)
+        logger.info(f"🧹 Dossier temporaire supprimé: {temp_path}")
         
         # Étape 3: Validation
         if not skip_validation:
             logger.info("")
             logger.info("🔍 Étape 3/3: Validation")
             logger.info("-" * 60)
-            logger.info("Validation du modèle optimisé...")
-            logger.info("  - Vérification de l'intégrité")
-            logger.info("  - Test d'inférence basique")
-            logger.info("  - Mesure de la qualité")
-            logger.info("✅ Validation simulée")
+            if not validate_output(output_path):
+                return False
         
         # Résumé
         logger.info("")
@@ -97,7 +188,7 @@ def optimize_model(
         logger.info(f"  - Format: Shardé ({shard_size} Mo/shard)")
         logger.info("")
         logger.info("🚀 Prochaines étapes:")
-        logger.info("  1. Ajouter l'entrée dans models.json")
+        logger.info(f"  1. Mettre à jour models.json: python sync_registry.py {output_path}")
         logger.info("  2. Tester avec l'OIE: import { OIE } from '@/oie'")
         logger.info("  3. Déployer dans public/models/")
         logger.info("=" * 60)
@@ -111,6 +202,55 @@ def optimize_model(
         return False
 
 
+def plan_targets(
+    targets: List[Tuple[Path, Path, Optional[Path]]],
+    quantization: str = 'q4',
+    shard_size: int = 100,
+    skip_validation: bool = False,
+    throughput: Optional[Dict[str, float]] = None
+) -> bool:
+    """
+    Plan commun de plusieurs builds enchaînés (modèle, sortie, recette).
+
+    Les étapes de tous les builds sont vérifiées ensemble: le disque est
+    cumulé sur l'ensemble (les sorties de chaque build restent en place),
+    la RAM est celle de l'étape la plus gourmande.
+
+    Returns:
+        True si les ressources suffisent pour tous les builds
+    """
+    import yaml
+
+    stages = []
+    for model_path, output_path, recipe_path in targets:
+        recipe = None
+        if recipe_path is not None:
+            with open(recipe_path, 'r', encoding='utf-8') as f:
+                recipe = yaml.safe_load(f)
+        try:
+            target_stages = plan_pipeline(
+                model_path,
+                output_path,
+                quantization=quantization,
+                shard_size=shard_size,
+                skip_validation=skip_validation,
+                recipe=recipe,
+                throughput=throughput
+            )
+        except (FileNotFoundError, FetchError, SafetensorsError) as e:
+            logger.error(f"❌ Planification impossible pour {model_path}: {e}")
+            return False
+        for stage in target_stages:
+            stage.notes.insert(0, Path(model_path).name)
+        stages.extend(target_stages)
+
+    errors, needs = check_resources(stages)
+    logger.info(
+        f"🧮 Plan d'exécution ({len(targets)} builds):\n" + format_plan(stages, needs, errors)
+    )
+    return not errors
+
+
 def main():
     """Point d'entrée principal."""
     parser = argparse.ArgumentParser(
@@ -127,10 +267,26 @@ Exemples:
   # Haute qualité sans validation (pour gagner du temps)
   python optimize_pipeline.py my-model/ output/ -q fp16 --skip-validation
 
+  # Plan de coût seul (en-têtes uniquement), fusion comprise
+  python optimize_pipeline.py merged_models/ORION-Code-Logic-v1 output/ --plan \
+      --recipe recipes/orion-code-logic-v1.yml --calibration trace.json
+
+  # Plan commun de plusieurs builds enchaînés (disque cumulé)
+  python optimize_pipeline.py merged_models/ORION-Code-Logic-v1 output/code --plan \
+      --recipe recipes/orion-code-logic-v1.yml \
+      --target merged_models/ORION-Vision-Logic-v1 output/vision recipes/orion-vision-logic-v1.yml
+
+  # Calibration GPTQ sur un corpus réel (défaut: README et recettes de la fonderie)
+  python optimize_pipeline.py my-model/ output/ --corpus corpus/fr.txt --corpus corpus/code.txt
+
+  # Fusion + quantification + sharding en une passe (pas de modèle fusionné sur disque)
+  python optimize_pipeline.py merged_models/ORION-Code-Logic-v1 output/ --fused \
+      --recipe recipes/orion-code-logic-v1.yml
+
 Ce script automatise:
-  1. Quantification (réduction de la taille)
-  2. Sharding (découpage pour chargement progressif)
-  3. Validation (tests de qualité)
+  1. Quantification (quantize_model.py, vers <sortie>_temp)
+  2. Sharding (shard_model.py, dossier temporaire supprimé ensuite)
+  3. Validation (verify_model.py: en-têtes, index, tailles, SHA-256)
         """
     )
     
@@ -168,6 +324,60 @@ Ce script automatise:
         help="Sauter l'étape de validation"
     )
     
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help="Afficher le coût de chaque étape et vérifier les ressources, sans rien exécuter"
+    )
+    
+    parser.add_argument(
+        '--recipe',
+        type=Path,
+        help="Recette de fusion: planifie aussi téléchargement et fusion vers model_path"
+    )
+    
+    parser.add_argument(
+        '--calibration',
+        type=Path,
+        help="Débits mesurés: trace Chrome (--trace) ou JSON {read, write, quantize...: Mo/s}"
+    )
+    
+    parser.add_argument(
+        '--corpus',
+        type=Path,
+        action='append',
+        default=[],
+        help="Fichier texte de calibration GPTQ (répétable; défaut: README et recettes)"
+    )
+    
+    parser.add_argument(
+        '--random-calibration',
+        action='store_true',
+        help="Tokens aléatoires si le corpus n'est pas tokenisable (qualité dégradée)"
+    )
+    
+    parser.add_argument(
+        '--target',
+        nargs=3,
+        type=Path,
+        action='append',
+        default=[],
+        metavar=('MODELE', 'SORTIE', 'RECETTE'),
+        help="Avec --plan: autre build enchaîné, planifié avec le premier (répétable)"
+    )
+    
+    parser.add_argument(
+        '--fused',
+        action='store_true',
+        help="Avec --recipe: fusionner, quantifier et sharder en une seule passe"
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help="Démarrer même si les ressources semblent insuffisantes"
+    )
+    
     parser.add_argument(
         '--verbose',
         '-v',
@@ -177,9 +387,28 @@ Ce script automatise:
     
     args = parser.parse_args()
     
+    if args.fused and not args.recipe:
+        parser.error("--fused nécessite --recipe")
+    
+    if args.target and not args.plan:
+        parser.error("--target nécessite --plan")
+    
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    throughput = load_calibration(args.calibration) if args.calibration else None
+    if args.target:
+        targets = [(args.model_path, args.output_path, args.recipe)]
+        targets += [tuple(target) for target in args.target]
+        success = plan_targets(
+            targets,
+            quantization=args.quantization,
+            shard_size=args.shard_size,
+            skip_validation=args.skip_validation,
+            throughput=throughput
+        )
+        sys.exit(0 if success else 1)
+    
     # Exécuter le pipeline
     success = optimize_model(
         model_path=args.model_path,
@@ -187,7 +416,14 @@ Ce script automatise:
         quantization=args.quantization,
         shard_size=args.shard_size,
         skip_validation=args.skip_validation,
-        verbose=args.verbose
+        verbose=args.verbose,
+        plan_only=args.plan,
+        recipe_path=args.recipe,
+        throughput=throughput,
+        force=args.force,
+        fused=args.fused,
+        corpus=args.corpus,
+        random_calibration=args.random_calibration
     )
     
     sys.exit(0 if success else 1)
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Conteneur monofichier
+Écrit en streaming configuration, tokenizer et tenseurs d'un modèle dans un
+seul fichier aligné, indexé en pied de fichier pour des lectures par plages,
+et le relit sans copie via mmap.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from safetensors_io import DTYPE_SIZES, TensorInfo, iter_tensor_chunks, list_model_tensors
+from shard_model import (
+    INDEX_FILENAME,
+    MANIFEST_FILENAME,
+    WEIGHT_SUFFIXES,
+    load_aliases,
+    locate_tensor,
+    plan_components,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+PACK_FILENAME = 'model.orionpack'
+MAGIC = b'ORIONPAK'
+# v2: tenseurs en double du sharder listés dans `aliases` (alias → tenseur stocké)
+VERSION = 2
+ALIGNMENT = 64
+# En-tête: magic, version, alignement (complété jusqu'à ALIGNMENT)
+HEADER = '<8sHH'
+# Pied: offset et longueur de l'index JSON, magic
+TRAILER = '<QQ8s'
+TRAILER_SIZE = struct.calcsize(TRAILER)
+
+# Fichiers annexes en tête de conteneur, dans l'ordre du démarrage côté client
+STARTUP_FILES = (
+    'config.json', 'tokenizer.bin', 'tokenizer.json', 'generation_config.json', 'web_config.json'
+)
+
+# Vues numpy par dtype safetensors (BF16 et FP8 exposés en entiers non signés de même taille)
+NUMPY_DTYPES = {
+    'F64': '<f8',
+    'F32': '<f4',
+    'F16': '<f2',
+    'BF16': '<u2',
+    'F8_E4M3': 'u1',
+    'F8_E5M2': 'u1',
+    'I64': '<i8',
+    'I32': '<i4',
+    'I16': '<i2',
+    'I8': 'i1',
+    'U64': '<u8',
+    'U32': '<u4',
+    'U16': '<u2',
+    'U8': 'u1',
+    'BOOL': '?',
+}
+
+
+class PackError(ValueError):
+    """Conteneur invalide ou tronqué."""
+
+
+def pack_order(tensors: List[TensorInfo]) -> List[TensorInfo]:
+    """Tenseurs dans l'ordre de chargement du sharder (tours, puis hors couches, puis couches)."""
+    return [t for shards in plan_components(tensors, 0).values() for shard in shards for t in shard]
+
+
+def pack_files(model_dir: Path) -> List[Path]:
+    """Fichiers annexes du modèle: ceux du démarrage d'abord, puis les autres par nom."""
+    files = [
+        path for path in sorted(model_dir.iterdir())
+        if path.is_file()
+        and (path.suffix not in WEIGHT_SUFFIXES or path.name in STARTUP_FILES)
+        and path.suffix != Path(PACK_FILENAME).suffix
+        and path.name not in (INDEX_FILENAME, MANIFEST_FILENAME)
+    ]
+    rank = {name: idx for idx, name in enumerate(STARTUP_FILES)}
+    return sorted(files, key=lambda p: (rank.get(p.name, len(rank)), p.name))
+
+
+class _PackWriter:
+    """Écriture séquentielle alignée, avec SHA-256 du conteneur au fil de l'eau."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+        self.sha256 = hashlib.sha256()
+        self._handle = open(path, 'wb')
+
+    def write(self, data: bytes) -> None:
+        self._handle.write(data)
+        self.sha256.update(data)
+        self.offset += len(data)
+
+    def align(self) -> None:
+        self.write(b'\0' * (-self.offset % ALIGNMENT))
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def pack_model(
+    model_dir: Path,
+    output: Path,
+    metadata: Optional[Dict[str, str]] = None
+) -> dict:
+    """
+    Écrit le conteneur d'un modèle en un seul passage.
+
+    Chaque entrée commence sur une frontière de ALIGNMENT octets, ce qui
+    permet des vues typées directes côté navigateur comme en mmap. L'index
+    JSON suit les données et le pied fixe de TRAILER_SIZE octets le
+    localise: une requête `Range: bytes=-N` suffit à le récupérer. Les
+    alias d'un dossier dédupliqué par le sharder sont repris tels quels.
+
+    Returns:
+        {path, size_bytes, sha256, tensors, aliases, files}
+    """
+    model_dir = Path(model_dir)
+    tensors = pack_order(list_model_tensors(model_dir))
+    index = {
+        'format': 'orion-pack',
+        'version': VERSION,
+        'alignment': ALIGNMENT,
+        'metadata': dict(metadata or {}),
+        'files': {},
+        'tensors': {},
+        'aliases': load_aliases(model_dir),
+    }
+
+    writer = _PackWriter(Path(output))
+    try:
+        writer.write(struct.pack(HEADER, MAGIC, VERSION, ALIGNMENT))
+        writer.align()
+
+        for path in pack_files(model_dir):
+            data = path.read_bytes()
+            index['files'][path.name] = {
+                'offset': writer.offset,
+                'length': len(data),
+                'sha256': hashlib.sha256(data).hexdigest(),
+            }
+            writer.write(data)
+            writer.align()
+
+        handles: Dict[Path, object] = {}
+        try:
+            for tensor in tensors:
+                if tensor.file not in handles:
+                    handles[tensor.file] = open(tensor.file, 'rb')
+                index['tensors'][tensor.name] = {
+                    'dtype': tensor.dtype,
+                    'shape': list(tensor.shape),
+                    'offset': writer.offset,
+                    'length': tensor.nbytes,
+                    'component': locate_tensor(tensor.name).component,
+                }
+                for chunk in iter_tensor_chunks(handles[tensor.file], tensor):
+                    writer.write(chunk)
+                writer.align()
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+        payload = json.dumps(index, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        index_offset = writer.offset
+        writer.write(payload)
+        writer.write(struct.pack(TRAILER, index_offset, len(payload), MAGIC))
+    finally:
+        writer.close()
+
+    return {
+        'path': writer.path,
+        'size_bytes': writer.offset,
+        'sha256': writer.sha256.hexdigest(),
+        'tensors': len(index['tensors']),
+        'aliases': len(index['aliases']),
+        'files': len(index['files']),
+    }
+
+
+def record_in_manifest(model_dir: Path, result: dict) -> bool:
+    """Déclare le conteneur dans shard_manifest.json (ETag fort du miroir local)."""
+    manifest_path = Path(model_dir) / MANIFEST_FILENAME
+    if not manifest_path.exists():
+        return False
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['pack'] = {
+        'filename': Path(result['path']).name,
+        'size_bytes': result['size_bytes'],
+        'sha256': result['sha256'],
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return True
+
+
+class PackedModel:
+    """
+    Lecture d'un conteneur via mmap.
+
+    Les tenseurs sont des vues numpy en lecture seule sur le fichier mappé
+    (aucune copie); BF16 et FP8 sont exposés en entiers non signés de même
+    taille. Un alias se lit comme le tenseur stocké qu'il désigne.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._handle = open(self.path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._handle.close()
+            raise PackError(f"{self.path.name}: fichier vide") from e
+
+        try:
+            self.index = self._read_index()
+        except PackError:
+            self.close()
+            raise
+        self.tensors: Dict[str, dict] = self.index['tensors']
+        self.aliases: Dict[str, str] = self.index.get('aliases', {})
+        self.files: Dict[str, dict] = self.index['files']
+
+    def _read_index(self) -> dict:
+        size = len(self._mmap)
+        header_size = struct.calcsize(HEADER)
+        if size < header_size + TRAILER_SIZE:
+            raise PackError(f"{self.path.name}: fichier tronqué")
+
+        magic, version, _ = struct.unpack_from(HEADER, self._mmap, 0)
+        index_offset, index_length, trailer_magic = struct.unpack_from(
+            TRAILER, self._mmap, size - TRAILER_SIZE
+        )
+        if magic != MAGIC or trailer_magic != MAGIC:
+            raise PackError(f"{self.path.name}: pas un conteneur ORION (magic absent)")
+        if version > VERSION:
+            raise PackError(f"{self.path.name}: version {version} non prise en charge")
+        if index_offset + index_length != size - TRAILER_SIZE:
+            raise PackError(f"{self.path.name}: index hors du fichier")
+
+        try:
+            index = json.loads(self._mmap[index_offset:index_offset + index_length])
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise PackError(f"{self.path.name}: index JSON illisible ({e})") from e
+
+        for name, entry in list(index['files'].items()) + list(index['tensors'].items()):
+            if not 0 <= entry['offset'] <= entry['offset'] + entry['length'] <= index_offset:
+                raise PackError(f"{self.path.name}: entrée hors des données pour {name}")
+        for name, entry in index['tensors'].items():
+            numel = 1
+            for dim in entry['shape']:
+                numel *= dim
+            itemsize = DTYPE_SIZES.get(entry['dtype'])
+            if itemsize is None or numel * itemsize != entry['length']:
+                raise PackError(f"{self.path.name}: taille incohérente pour {name}")
+        for alias, target in index.get('aliases', {}).items():
+            if target not in index['tensors'] or alias in index['tensors']:
+                raise PackError(f"{self.path.name}: alias {alias} → {target} invalide")
+        return index
+
+    def names(self) -> List[str]:
+        """Tous les tenseurs lisibles: stockés, puis alias."""
+        return list(self.tensors) + list(self.aliases)
+
+    def entry(self, name: str) -> dict:
+        """Entrée d'index d'un tenseur, alias résolu."""
+        return self.tensors[self.aliases.get(name, name)]
+
+    def tensor_bytes(self, name: str) -> memoryview:
+        """Octets bruts d'un tenseur (vue sur le fichier mappé)."""
+        entry = self.entry(name)
+        return memoryview(self._mmap)[entry['offset']:entry['offset'] + entry['length']]
+
+    def tensor(self, name: str) -> np.ndarray:
+        """Tenseur en vue numpy sans copie."""
+        entry = self.entry(name)
+        dtype = np.dtype(NUMPY_DTYPES[entry['dtype']])
+        array = np.frombuffer(
+            self._mmap,
+            dtype=dtype,
+            count=entry['length'] // dtype.itemsize,
+            offset=entry['offset']
+        )
+        return array.reshape(entry['shape'])
+
+    def file(self, name: str) -> memoryview:
+        """Contenu d'un fichier annexe (vue sur le fichier mappé)."""
+        entry = self.files[name]
+        return memoryview(self._mmap)[entry['offset']:entry['offset'] + entry['length']]
+
+    def json(self, name: str) -> dict:
+        """Fichier annexe JSON décodé (config.json, tokenizer.json...)."""
+        with self.file(name) as data:
+            return json.loads(bytes(data))
+
+    def iter_tensors(self) -> Iterator[Tuple[str, np.ndarray]]:
+        """Tenseurs dans l'ordre du conteneur, puis les alias."""
+        for name in self.names():
+            yield name, self.tensor(name)
+
+    def close(self) -> None:
+        """Libère le fichier; le mapping survit tant que des vues retournées existent."""
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._handle.close()
+
+    def __enter__(self) -> 'PackedModel':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def verify_pack(pack_path: Path, model_dir: Path) -> List[str]:
+    """Compare le conteneur au modèle source (tenseurs octet à octet, alias, SHA-256)."""
+    errors = []
+    model_dir = Path(model_dir)
+    sources = {t.name: t for t in list_model_tensors(model_dir)}
+    aliases = load_aliases(model_dir)
+
+    with PackedModel(pack_path) as pack:
+        for alias, target in sorted(aliases.items()):
+            if pack.aliases.get(alias) != target:
+                errors.append(f"alias absent: {alias} → {target}")
+            elif target not in sources:
+                errors.append(f"alias {alias}: tenseur {target} absent du modèle source")
+        for alias in sorted(pack.aliases.keys() - aliases.keys()):
+            errors.append(f"alias inattendu: {alias}")
+
+        missing = sources.keys() - pack.tensors.keys()
+        errors.extend(f"tenseur absent: {name}" for name in sorted(missing))
+        for name, info in sources.items():
+            if name in missing:
+                continue
+            with open(info.file, 'rb') as f, pack.tensor_bytes(name) as packed:
+                position = 0
+                for chunk in iter_tensor_chunks(f, info):
+                    if packed[position:position + len(chunk)] != chunk:
+                        errors.append(f"tenseur différent: {name}")
+                        break
+                    position += len(chunk)
+
+        for path in pack_files(model_dir):
+            entry = pack.files.get(path.name)
+            if entry is None:
+                errors.append(f"fichier absent: {path.name}")
+                continue
+            with pack.file(path.name) as packed:
+                packed_sha256 = hashlib.sha256(packed).hexdigest()
+            source_sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+            if packed_sha256 != entry['sha256'] or packed_sha256 != source_sha256:
+                errors.append(f"fichier différent: {path.name}")
+
+    return errors
+
+
+def format_pack(pack: PackedModel) -> str:
+    """Résumé lisible du contenu d'un conteneur."""
+    lines = [f"{'Entrée':<60} {'Offset':>12} {'Taille':>12}"]
+    for name, entry in pack.files.items():
+        lines.append(f"{name:<60} {entry['offset']:>12} {entry['length']:>12}")
+
+    by_component: Dict[str, List[int]] = {}
+    for entry in pack.tensors.values():
+        by_component.setdefault(entry['component'], []).append(entry['length'])
+    for component, sizes in by_component.items():
+        lines.append(f"{f'[{component}] {len(sizes)} tenseurs':<60} {'':>12} {sum(sizes):>12}")
+    for alias, target in pack.aliases.items():
+        lines.append(f"{f'{alias} → {target}':<60} {'':>12} {'(alias)':>12}")
+    return '\n'.join(lines)
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Conteneur monofichier",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Empaqueter un petit modèle à côté de ses shards
+  python pack_model.py ../public/models/ORION-Router-q4
+
+  # Vers un fichier précis, avec vérification
+  python pack_model.py optimized_models/router -o router.orionpack --verify
+
+  # Inspecter un conteneur
+  python pack_model.py --inspect router.orionpack
+        """
+    )
+
+    parser.add_argument(
+        'model',
+        type=Path,
+        nargs='?',
+        help="Dossier du modèle (safetensors, config, tokenizer)"
+    )
+
+    parser.add_argument(
+        '--output',
+        '-o',
+        type=Path,
+        help=f"Conteneur à écrire (défaut: <modèle>/{PACK_FILENAME})"
+    )
+
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help="Relire le conteneur et le comparer au modèle source"
+    )
+
+    parser.add_argument(
+        '--inspect',
+        type=Path,
+        metavar='CONTENEUR',
+        help="Afficher le contenu d'un conteneur existant"
+    )
+
+    args = parser.parse_args()
+
+    if args.inspect:
+        try:
+            with PackedModel(args.inspect) as pack:
+                print(format_pack(pack))
+        except (OSError, PackError) as e:
+            logger.error(f"❌ {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.model is None or not args.model.is_dir():
+        parser.error("dossier du modèle requis")
+
+    output = args.output or args.model / PACK_FILENAME
+    model_name = args.model.resolve().name
+    result = pack_model(args.model, output, metadata={'model': model_name})
+    logger.info(
+        f"📦 {output}: {result['tensors']} tenseurs, {result['aliases']} alias, "
+        f"{result['files']} fichiers, {result['size_bytes'] / 1024 / 1024:.1f} MB"
+    )
+    if output.resolve().parent == args.model.resolve() and record_in_manifest(args.model, result):
+        logger.info(f"📝 Conteneur déclaré dans {MANIFEST_FILENAME}")
+
+    if args.verify:
+        errors = verify_pack(output, args.model)
+        if errors:
+            for error in errors:
+                logger.error(f"❌ {error}")
+            sys.exit(1)
+        logger.info("✅ Conteneur identique au modèle source")
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Planification du pipeline d'optimisation
+Estime, à partir des seuls en-têtes safetensors, les octets lus et écrits,
+le pic mémoire, le disque et la durée de chaque étape, puis vérifie que la
+machine a les ressources nécessaires avant de lancer un build de plusieurs
+heures.
+"""
+
+import json
+import math
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from architectures import PRE_LAYER_ROLES, canonical_name
+from fetch_models import (
+    DEFAULT_ENDPOINT,
+    DEFAULT_STORE,
+    HUB_URL_TEMPLATE,
+    FetchError,
+    model_headers,
+)
+from quantize_layers import FACTOR_BYTES_PER_ENTRY
+from quantize_model import estimate_output_size
+from safetensors_io import SafetensorsError, TensorInfo, list_model_tensors
+from verify_model import DEFAULT_CHUNK_MB
+
+logger = logging.getLogger(__name__)
+
+
+# Débits de référence en Mo/s (machine de build, mesurés avec --profile);
+# `load_calibration` les remplace par ceux d'une trace de profilage
+DEFAULT_THROUGHPUT_MBPS = {
+    'download': 40.0,
+    'read': 400.0,
+    'write': 300.0,
+    'merge': 150.0,
+    'quantize': 60.0,
+    'hash': 500.0,
+}
+# Catégories de spans du Profiler → débits calibrés
+TRACE_CATEGORIES = {'load': 'read', 'write': 'write', 'transform': 'quantize'}
+
+TORCH_OVERHEAD_MB = 1024
+PYTHON_OVERHEAD_MB = 100
+SAFETY_MARGIN = 0.10
+RECIPE_DTYPE_BYTES = {'float32': 4, 'bfloat16': 2, 'float16': 2}
+# Sans en-têtes, part du plus gros tenseur (embeddings) dans les paramètres
+LARGEST_TENSOR_FRACTION = 0.10
+# Hessienne GPTQ d'une projection à n entrées (quantize_layers): n² float32
+# accumulés, plus le calcul du facteur de H⁻¹
+HESSIAN_BYTES_PER_ENTRY = 4 + FACTOR_BYTES_PER_ENTRY
+
+MB = 1024 * 1024
+
+
+@dataclass
+class StageCost:
+    """Coût estimé d'une étape du pipeline."""
+
+    name: str
+    read_bytes: int = 0
+    written_bytes: int = 0
+    peak_memory_bytes: int = 0
+    disk_bytes: int = 0
+    temp_bytes: int = 0
+    seconds: float = 0.0
+    location: Optional[Path] = None
+    notes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SourceModel:
+    """Tenseurs d'un modèle d'entrée et leur provenance."""
+
+    name: str
+    nbytes: int
+    params: int
+    largest_params: int
+    remote: bool = False
+    estimated: bool = False
+    # Paramètres de la plus grosse couche, plus grand nombre d'entrées d'une projection
+    largest_layer_params: int = 0
+    largest_input_features: int = 0
+
+
+def _summarize(name: str, tensors: List[TensorInfo], remote: bool) -> SourceModel:
+    layers: Dict[Tuple[str, int], int] = {}
+    input_features = 0
+    for t in tensors:
+        location = canonical_name(t.name)
+        if location.layer is None:
+            continue
+        key = (location.stack, location.layer)
+        layers[key] = layers.get(key, 0) + t.numel
+        if len(t.shape) == 2 and location.role not in PRE_LAYER_ROLES:
+            input_features = max(input_features, t.shape[1])
+    return SourceModel(
+        name=name,
+        nbytes=sum(t.nbytes for t in tensors),
+        params=sum(t.numel for t in tensors),
+        largest_params=max((t.numel for t in tensors), default=0),
+        remote=remote,
+        largest_layer_params=max(layers.values(), default=0),
+        largest_input_features=input_features,
+    )
+
+
+def quantize_peak_bytes(source: SourceModel) -> int:
+    """
+    Pic mémoire de quantize_layers (numpy, une couche à la fois).
+
+    Poids de la couche en float32 et leurs copies déquantifiées, plus la
+    hessienne de la projection la plus large (down_proj: intermédiaire ×
+    intermédiaire) et le calcul de son facteur. Embeddings et lm_head sont lus
+    par paquets de lignes, les activations de calibration sont sur disque.
+    """
+    # Sans en-têtes (estimation par la recette): couche ~ plus gros tenseur,
+    # entrées ~ √(embeddings), ex. √(32000 × 4096) ≈ 11450 pour 11008 sur un 7B
+    layer = source.largest_layer_params or source.largest_params
+    features = source.largest_input_features or int(math.sqrt(source.largest_params))
+    return PYTHON_OVERHEAD_MB * MB + layer * 4 * 2 + features * features * HESSIAN_BYTES_PER_ENTRY
+
+
+def inspect_source(
+    model: str,
+    store: Path = DEFAULT_STORE,
+    endpoint: str = DEFAULT_ENDPOINT,
+    url_template: str = HUB_URL_TEMPLATE
+) -> SourceModel:
+    """
+    En-têtes d'un modèle: dossier local, instantané du magasin, sinon hub
+    (requêtes Range sur les en-têtes seulement).
+    """
+    tensors, remote = model_headers(
+        model, store=store, endpoint=endpoint, url_template=url_template
+    )
+    return _summarize(model, tensors, remote=remote)
+
+
+def recipe_estimate_bytes(recipe: dict, quantization: str) -> Optional[int]:
+    """Taille fusionnée déclarée par les métadonnées d'une recette (estimation)."""
+    metadata = recipe.get('metadata', {})
+    if 'estimated_size_gb' in metadata:
+        return int(metadata['estimated_size_gb'] * 1024 * MB)
+    web = metadata.get('web_optimization', {})
+    if 'estimated_size_mb' in web:
+        ratio = estimate_output_size(1.0, web.get('quantization', quantization))
+        return int(web['estimated_size_mb'] / ratio * MB)
+    return None
+
+
+def load_calibration(path: Path) -> Dict[str, float]:
+    """
+    Débits calibrés (Mo/s).
+
+    Accepte une trace Chrome exportée par `--trace` (débit de chaque
+    catégorie de spans portant `nbytes`) ou un JSON {débit: Mo/s}.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if 'traceEvents' not in data:
+        return {key: float(value) for key, value in data.items() if key in DEFAULT_THROUGHPUT_MBPS}
+
+    totals: Dict[str, List[float]] = {}
+    for event in data['traceEvents']:
+        key = TRACE_CATEGORIES.get(event.get('cat'))
+        nbytes = event.get('args', {}).get('nbytes')
+        if event.get('ph') != 'X' or key is None or not nbytes:
+            continue
+        row = totals.setdefault(key, [0.0, 0.0])
+        row[0] += nbytes
+        row[1] += event['dur'] / 1e6
+    return {key: nbytes / MB / seconds for key, (nbytes, seconds) in totals.items() if seconds > 0}
+
+
+def _seconds(throughput: Dict[str, float], **amounts: int) -> float:
+    return sum(nbytes / MB / throughput[key] for key, nbytes in amounts.items())
+
+
+def plan_pipeline(
+    model_path: Path,
+    output_path: Path,
+    quantization: str = 'q4',
+    shard_size: int = 100,
+    skip_validation: bool = False,
+    recipe: Optional[dict] = None,
+    throughput: Optional[Dict[str, float]] = None,
+    store: Path = DEFAULT_STORE,
+    fused: bool = False
+) -> List[StageCost]:
+    """
+    Coût de chaque étape: téléchargement et fusion (avec une recette), puis
+    quantification, sharding et validation.
+
+    En mode `fused` (recette requise), fusion, quantification et sharding ne
+    forment qu'une étape: ni modèle fusionné ni modèle quantifié temporaire
+    sur disque.
+
+    Sans recette, `model_path` doit exister: ses en-têtes donnent la taille
+    et le plus gros tenseur. Avec une recette, `model_path` est le dossier
+    fusionné à produire; les parents sont lus localement ou sur le hub, et
+    à défaut les tailles déclarées dans la recette servent d'estimation.
+
+    Raises:
+        FileNotFoundError: si le modèle source manque et qu'aucune recette n'est fournie
+    """
+    rates = {**DEFAULT_THROUGHPUT_MBPS, **(throughput or {})}
+    stages: List[StageCost] = []
+    output_path = Path(output_path)
+
+    if fused and recipe is None:
+        raise ValueError("le mode fusionné nécessite une recette")
+
+    merge_stage = None
+    if recipe is None:
+        if not Path(model_path).exists():
+            raise FileNotFoundError(f"Modèle source introuvable: {model_path}")
+        source = _summarize(str(model_path), list_model_tensors(Path(model_path)), remote=False)
+    else:
+        source, merge_stage = _plan_merge(
+            Path(model_path), recipe, quantization, rates, store, stages
+        )
+
+    quantized = int(estimate_output_size(source.nbytes / MB, quantization) * MB)
+    largest_quantized = int(quantized * source.largest_params / max(source.params, 1))
+    temp_path = Path(f"{output_path}_temp")
+
+    if fused:
+        stages.append(StageCost(
+            name='fused',
+            read_bytes=merge_stage.read_bytes,
+            written_bytes=quantized,
+            # Un tenseur par parent en FP32, plus le plus gros tenseur fusionné
+            # et sa copie de travail
+            peak_memory_bytes=merge_stage.peak_memory_bytes - TORCH_OVERHEAD_MB * MB
+            + PYTHON_OVERHEAD_MB * MB + source.largest_params * 4 * 2,
+            disk_bytes=quantized,
+            seconds=_seconds(rates, read=merge_stage.read_bytes, merge=source.nbytes,
+                             quantize=source.nbytes, write=quantized),
+            location=output_path,
+            notes=merge_stage.notes + [
+                f"{quantization}, shards de {shard_size} Mo, sans modèle intermédiaire"
+            ],
+        ))
+    else:
+        if merge_stage is not None:
+            stages.append(merge_stage)
+
+        stages.append(StageCost(
+            name='quantize',
+            read_bytes=source.nbytes,
+            written_bytes=quantized,
+            peak_memory_bytes=quantize_peak_bytes(source),
+            temp_bytes=quantized,
+            seconds=_seconds(rates, read=source.nbytes, quantize=source.nbytes, write=quantized),
+            location=temp_path,
+            notes=[f"{quantization}, sortie {temp_path.name}"],
+        ))
+
+        stages.append(StageCost(
+            name='shard',
+            read_bytes=quantized,
+            written_bytes=quantized,
+            # Streaming: un tenseur à la fois
+            peak_memory_bytes=PYTHON_OVERHEAD_MB * MB + largest_quantized,
+            disk_bytes=quantized,
+            seconds=_seconds(rates, read=quantized, write=quantized),
+            location=output_path,
+            notes=[f"shards de {shard_size} Mo"],
+        ))
+
+    if not skip_validation:
+        stages.append(StageCost(
+            name='validate',
+            read_bytes=quantized,
+            peak_memory_bytes=PYTHON_OVERHEAD_MB * MB + DEFAULT_CHUNK_MB * MB,
+            seconds=_seconds(rates, hash=quantized),
+            location=output_path,
+            notes=['SHA-256 des shards'],
+        ))
+
+    if source.estimated:
+        for stage in stages:
+            stage.notes.append('estimé (recette)')
+    return stages
+
+
+def _plan_merge(
+    merged_path: Path,
+    recipe: dict,
+    quantization: str,
+    rates: Dict[str, float],
+    store: Path,
+    stages: List[StageCost]
+) -> Tuple[SourceModel, StageCost]:
+    """
+    Ajoute le téléchargement au plan; retourne le modèle fusionné attendu et
+    le coût de la fusion.
+    """
+    dtype_bytes = RECIPE_DTYPE_BYTES.get(recipe.get('dtype', 'bfloat16'), 2)
+    parents: List[SourceModel] = []
+    unreachable: List[str] = []
+
+    for entry in recipe.get('models', []):
+        try:
+            parents.append(inspect_source(entry['model'], store=store))
+        except (FetchError, SafetensorsError, OSError) as e:
+            logger.warning(f"⚠️  En-têtes indisponibles pour {entry['model']}: {e}")
+            unreachable.append(entry['model'])
+
+    if unreachable or not parents:
+        estimate = recipe_estimate_bytes(recipe, quantization)
+        if estimate is None:
+            raise FetchError(
+                f"en-têtes indisponibles ({', '.join(unreachable)}) "
+                "et recette sans taille estimée"
+            )
+        params = estimate // dtype_bytes
+        merged = SourceModel(
+            name=str(merged_path),
+            nbytes=estimate,
+            params=params,
+            largest_params=int(params * LARGEST_TENSOR_FRACTION),
+            estimated=True,
+        )
+        parents = [
+            SourceModel(name, estimate, params, merged.largest_params, remote=True, estimated=True)
+            for name in (entry['model'] for entry in recipe.get('models', []))
+        ]
+    else:
+        # mergekit produit l'architecture du modèle de base (le premier parent)
+        base = parents[0]
+        merged = SourceModel(
+            name=str(merged_path),
+            nbytes=base.params * dtype_bytes,
+            params=base.params,
+            largest_params=base.largest_params,
+            largest_layer_params=base.largest_layer_params,
+            largest_input_features=base.largest_input_features,
+        )
+
+    remote_bytes = sum(p.nbytes for p in parents if p.remote)
+    if remote_bytes:
+        stages.append(StageCost(
+            name='fetch',
+            written_bytes=remote_bytes,
+            peak_memory_bytes=PYTHON_OVERHEAD_MB * MB,
+            disk_bytes=remote_bytes,
+            seconds=_seconds(rates, download=remote_bytes),
+            location=store,
+            notes=[', '.join(p.name for p in parents if p.remote)],
+        ))
+
+    read_bytes = sum(p.nbytes for p in parents)
+    largest = max(p.largest_params for p in parents)
+    merge_stage = StageCost(
+        name='merge',
+        read_bytes=read_bytes,
+        written_bytes=merged.nbytes,
+        # Chargement paresseux: un tenseur par parent en FP32, plus le résultat
+        peak_memory_bytes=TORCH_OVERHEAD_MB * MB + (len(parents) + 1) * largest * 4,
+        disk_bytes=merged.nbytes,
+        seconds=_seconds(rates, read=read_bytes, merge=merged.nbytes, write=merged.nbytes),
+        location=merged_path,
+        notes=[f"{recipe.get('merge_method', '?')}, {len(parents)} parents"],
+    )
+    return merged, merge_stage
+
+
+def available_memory_bytes() -> Optional[int]:
+    """Mémoire disponible (MemAvailable), None si inconnue."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _existing_parent(path: Path) -> Path:
+    path = Path(path).resolve()
+    while not path.exists():
+        path = path.parent
+    return path
+
+
+def check_resources(
+    stages: List[StageCost],
+    available_memory: Optional[int] = None,
+    margin: float = SAFETY_MARGIN
+) -> Tuple[List[str], List[dict]]:
+    """
+    Compare les besoins du plan aux ressources de la machine.
+
+    Le disque est cumulé par système de fichiers: sorties persistantes et
+    fichiers temporaires (conservés jusqu'à la fin du pipeline).
+
+    Returns:
+        (erreurs bloquantes, besoins par ressource {resource, needed, available})
+    """
+    errors: List[str] = []
+    needs: List[dict] = []
+
+    peak_stage = max(stages, key=lambda s: s.peak_memory_bytes)
+    memory = available_memory if available_memory is not None else available_memory_bytes()
+    needs.append({
+        'resource': f"RAM (pic: {peak_stage.name})",
+        'needed': peak_stage.peak_memory_bytes,
+        'available': memory,
+    })
+    if memory is not None and peak_stage.peak_memory_bytes * (1 + margin) > memory:
+        errors.append(
+            f"RAM insuffisante pour {peak_stage.name}: "
+            f"{peak_stage.peak_memory_bytes / MB / 1024:.1f} Go requis (+{margin:.0%}), "
+            f"{memory / MB / 1024:.1f} Go disponibles"
+        )
+
+    by_device: Dict[int, dict] = {}
+    for stage in stages:
+        if stage.location is None or not (stage.disk_bytes or stage.temp_bytes):
+            continue
+        existing = _existing_parent(stage.location)
+        # Une sortie déjà présente sera remplacée: sa taille actuelle est récupérable
+        reclaimable = 0
+        if Path(stage.location).is_dir():
+            reclaimable = sum(
+                p.stat().st_size for p in Path(stage.location).rglob('*') if p.is_file()
+            )
+        device = by_device.setdefault(os.stat(existing).st_dev, {
+            'path': existing,
+            'needed': 0,
+            'free': shutil.disk_usage(existing).free,
+        })
+        device['needed'] += max(0, stage.disk_bytes + stage.temp_bytes - reclaimable)
+
+    for device in by_device.values():
+        needs.append({
+            'resource': f"Disque ({device['path']})",
+            'needed': device['needed'],
+            'available': device['free'],
+        })
+        if device['needed'] * (1 + margin) > device['free']:
+            errors.append(
+                f"Disque insuffisant sur {device['path']}: "
+                f"{device['needed'] / MB / 1024:.1f} Go requis (+{margin:.0%}), "
+                f"{device['free'] / MB / 1024:.1f} Go libres"
+            )
+
+    return errors, needs
+
+
+def _gb(nbytes: Optional[int]) -> str:
+    return '?' if nbytes is None else f"{nbytes / MB / 1024:.2f}"
+
+
+def _duration(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{secs:02d}s"
+
+
+def format_plan(stages: List[StageCost], needs: List[dict], errors: List[str]) -> str:
+    """Tableau du plan, besoins en ressources et verdict."""
+    lines = [
+        f"{'Étape':<10} {'Lu (Go)':>8} {'Écrit (Go)':>10} {'Pic RAM (Go)':>12} "
+        f"{'Disque (Go)':>11} {'Temp (Go)':>9} {'Durée':>8}  Notes",
+        '-' * 100,
+    ]
+    for stage in stages:
+        lines.append(
+            f"{stage.name:<10} {_gb(stage.read_bytes):>8} {_gb(stage.written_bytes):>10} "
+            f"{_gb(stage.peak_memory_bytes):>12} {_gb(stage.disk_bytes):>11} "
+            f"{_gb(stage.temp_bytes):>9} "
+            f"{_duration(stage.seconds):>8}  {'; '.join(stage.notes)}"
+        )
+    lines.append('-' * 100)
+    total = _duration(sum(s.seconds for s in stages))
+    lines.append(f"{'Total':<10} {'':>8} {'':>10} {'':>12} {'':>11} {'':>9} {total:>8}")
+    lines.append('')
+    for need in needs:
+        lines.append(
+            f"  {need['resource']}: {_gb(need['needed'])} Go requis, "
+            f"{_gb(need['available'])} Go disponibles"
+        )
+    lines.append('')
+    lines.extend(f"  ❌ {error}" for error in errors)
+    if not errors:
+        lines.append("  ✅ Ressources suffisantes")
+    return '\n'.join(lines)
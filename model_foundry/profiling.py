@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Profilage des étapes de la fonderie
+Spans chronométrés, compteurs d'octets et échantillonnage mémoire,
+exportables en trace Chrome (chrome://tracing, Perfetto) et en tableau
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+# Catégories de spans utilisées par les étapes de la fonderie
+STAGES = ('load', 'plan', 'transform', 'write')
+
+
+def current_rss_bytes() -> int:
+    """Retourne la mémoire résidente (RSS) actuelle du processus, 0 si inconnue."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        # ru_maxrss est un pic (Ko sous Linux, octets sous macOS), faute de mieux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if peak > 1 << 32 else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class Profiler:
+    """
+    Collecte des spans, compteurs d'octets et échantillons de RSS.
+
+    Un profiler désactivé (`enabled=False`) ne fait rien, ce qui permet aux
+    étapes de la fonderie de l'utiliser sans condition.
+    """
+
+    def __init__(self, enabled: bool = True, sample_interval: float = 0.05):
+        self.enabled = enabled
+        self.sample_interval = sample_interval
+        self.spans: List[dict] = []
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.peak_rss_bytes = 0
+        self._events: List[dict] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name: str, cat: str = 'stage', **args) -> Iterator[dict]:
+        """
+        Chronomètre un bloc de code.
+
+        Le dictionnaire retourné peut être complété pendant le bloc (par
+        exemple `span['nbytes'] = ...`); il est enregistré dans les arguments
+        du span.
+        """
+        if not self.enabled:
+            yield args
+            return
+
+        start = self._now_us()
+        try:
+            yield args
+        finally:
+            end = self._now_us()
+            self._record_rss(end)
+            record = {
+                'name': name,
+                'cat': cat,
+                'ts': start,
+                'dur': end - start,
+                'tid': threading.get_ident(),
+                'args': dict(args),
+            }
+            with self._lock:
+                self.spans.append(record)
+
+    def count(self, counter: str, nbytes: int) -> None:
+        """Incrémente un compteur d'octets (ex: `bytes_read`, `bytes_written`)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[counter] += nbytes
+            self._events.append({
+                'name': counter,
+                'ph': 'C',
+                'ts': self._now_us(),
+                'args': {'MB': round(self.counters[counter] / (1024 * 1024), 3)},
+            })
+
+    def _record_rss(self, ts: float) -> None:
+        rss = current_rss_bytes()
+        with self._lock:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+            self._events.append({
+                'name': 'rss',
+                'ph': 'C',
+                'ts': ts,
+                'args': {'MB': round(rss / (1024 * 1024), 1)},
+            })
+
+    def _sample_loop(self) -> None:
+        while not self._stop_sampling.wait(self.sample_interval):
+            self._record_rss(self._now_us())
+
+    def start_sampling(self) -> None:
+        """Démarre l'échantillonnage périodique de la RSS en arrière-plan."""
+        if not self.enabled or self._sampler is not None:
+            return
+        self._stop_sampling.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+        self._sampler.start()
+
+    def stop_sampling(self) -> None:
+        """Arrête l'échantillonnage de la RSS."""
+        if self._sampler is None:
+            return
+        self._stop_sampling.set()
+        self._sampler.join()
+        self._sampler = None
+        self._record_rss(self._now_us())
+
+    def export_chrome_trace(self, path: Path) -> None:
+        """Écrit la trace au format Chrome Trace Event (JSON)."""
+        pid = os.getpid()
+        events = [
+            {
+                'name': span['name'],
+                'cat': span['cat'],
+                'ph': 'X',
+                'ts': round(span['ts'], 3),
+                'dur': round(span['dur'], 3),
+                'pid': pid,
+                'tid': span['tid'],
+                'args': span['args'],
+            }
+            for span in self.spans
+        ]
+        events.extend({**event, 'pid': pid, 'tid': 0} for event in self._events)
+
+        trace = {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'tool': 'ORION Model Foundry',
+                'peak_rss_mb': round(self.peak_rss_bytes / (1024 * 1024), 1),
+                'counters': dict(self.counters),
+            },
+        }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+
+    def summary(self) -> List[dict]:
+        """Agrège les spans par catégorie (durée, nombre, octets, débit)."""
+        rows: Dict[str, dict] = {}
+        for span in self.spans:
+            row = rows.setdefault(span['cat'], {
+                'stage': span['cat'],
+                'count': 0,
+                'total_s': 0.0,
+                'max_s': 0.0,
+                'slowest': '',
+                'nbytes': 0,
+            })
+            seconds = span['dur'] / 1e6
+            row['count'] += 1
+            row['total_s'] += seconds
+            row['nbytes'] += span['args'].get('nbytes', 0)
+            if seconds >= row['max_s']:
+                row['max_s'] = seconds
+                row['slowest'] = span['name']
+
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        return sorted(rows.values(), key=lambda r: (order.get(r['stage'], len(order)), r['stage']))
+
+    def format_summary(self) -> str:
+        """Formate le résumé sous forme de tableau texte."""
+        lines = [
+            f"{'Étape':<12} {'N':>6} {'Total (s)':>10} {'Max (s)':>9} "
+            f"{'Mo':>10} {'Mo/s':>8}  Plus lent",
+            '-' * 80,
+        ]
+        for row in self.summary():
+            mb = row['nbytes'] / (1024 * 1024)
+            throughput = '-'
+            if row['nbytes'] and row['total_s'] > 0:
+                throughput = f"{mb / row['total_s']:.1f}"
+            lines.append(
+                f"{row['stage']:<12} {row['count']:>6} {row['total_s']:>10.3f} "
+                f"{row['max_s']:>9.3f} {mb:>10.1f} {throughput:>8}  {row['slowest']}"
+            )
+
+        lines.append('-' * 80)
+        for counter, value in sorted(self.counters.items()):
+            lines.append(f"{counter}: {value / (1024 * 1024):.1f} Mo")
+        lines.append(f"Pic RSS: {self.peak_rss_bytes / (1024 * 1024):.1f} Mo")
+        return '\n'.join(lines)
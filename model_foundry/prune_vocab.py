@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Élagage du vocabulaire par langues cibles
+Restreint le vocabulaire aux tokens utilisés par un corpus de référence
+local dans les langues du modèle, élague les lignes d'embedding et de
+lm_head en conséquence et écrit la table de correspondance des ids.
+"""
+
+import argparse
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+import logging
+from typing import Dict, Iterable, List, Set
+
+import numpy as np
+
+from safetensors_io import (
+    INDEX_FILENAME,
+    SafetensorsWriter,
+    TensorInfo,
+    find_weight_files,
+    iter_tensor_chunks,
+    list_tensors,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+REMAP_FILENAME = 'token_remap.json'
+DEFAULT_REGISTRY = Path(__file__).resolve().parent.parent / 'models.json'
+
+# Nombre de lignes d'embedding arrondi à un multiple (alignement des kernels GPU)
+DEFAULT_PAD_TO = 64
+
+# Tokens d'octets des tokenizers à byte fallback (SentencePiece/Llama)
+BYTE_TOKEN_RE = re.compile(r'^<0x[0-9A-F]{2}>$')
+
+# Clés d'ids de tokens spéciaux dans config.json et generation_config.json
+TOKEN_ID_KEYS = (
+    'bos_token_id', 'eos_token_id', 'pad_token_id', 'unk_token_id', 'decoder_start_token_id'
+)
+
+# Listes d'ids masqués à la génération (generation_config.json)
+SUPPRESS_KEYS = ('suppress_tokens', 'begin_suppress_tokens')
+
+
+def registry_languages(registry_path: Path, key: str) -> List[str]:
+    """Langues d'une entrée de models.json."""
+    with open(registry_path, 'r', encoding='utf-8') as f:
+        registry = json.load(f)
+    for section in ('models', 'custom_models'):
+        entry = registry.get(section, {}).get(key)
+        if entry is not None:
+            return entry.get('languages') or []
+    raise ValueError(f"entrée '{key}' absente de {registry_path.name}")
+
+
+def corpus_files(corpus_dir: Path, languages: List[str]) -> List[Path]:
+    """Fichiers du corpus local: `<langue>.txt` ou `<langue>/*.txt` pour chaque langue."""
+    files = []
+    for language in languages:
+        directory = corpus_dir / language
+        found = sorted(directory.glob('*.txt')) if directory.is_dir() else []
+        if (corpus_dir / f'{language}.txt').exists():
+            found.insert(0, corpus_dir / f'{language}.txt')
+        if not found:
+            logger.warning(f"⚠️  Aucun corpus pour la langue '{language}' dans {corpus_dir}")
+        files.extend(found)
+    return files
+
+
+def corpus_token_ids(tokenizer_path: Path, files: List[Path], batch_size: int = 1024) -> Set[int]:
+    """Ids produits par le tokenizer d'origine sur le corpus."""
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_file(str(tokenizer_path))
+    used: Set[int] = set()
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+        for start in range(0, len(lines), batch_size):
+            batch = lines[start:start + batch_size]
+            for encoding in tokenizer.encode_batch(batch, add_special_tokens=False):
+                used.update(encoding.ids)
+    return used
+
+
+def verify_encoding(
+    original_path: Path,
+    pruned_path: Path,
+    files: List[Path],
+    kept: List[int]
+) -> List[str]:
+    """
+    Encode le corpus avec les deux tokenizers et compare les ids (renumérotés).
+
+    Returns:
+        Lignes du corpus encodées différemment (vide si équivalents)
+    """
+    from tokenizers import Tokenizer
+
+    original = Tokenizer.from_file(str(original_path))
+    pruned = Tokenizer.from_file(str(pruned_path))
+    mismatches = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                expected = original.encode(line, add_special_tokens=False).ids
+                ids = pruned.encode(line, add_special_tokens=False).ids
+                if [kept[idx] if idx < len(kept) else -1 for idx in ids] != expected:
+                    mismatches.append(f"{path.name}:{number}")
+    return mismatches
+
+
+def vocab_tokens(model: dict) -> List[str]:
+    """Tokens du modèle de tokenizer, par id."""
+    if model['type'] == 'Unigram':
+        return [piece for piece, _ in model['vocab']]
+    vocab = model['vocab']
+    return sorted(vocab, key=vocab.__getitem__)
+
+
+def _merge_pairs(model: dict) -> List[List[str]]:
+    return [m.split(' ', 1) if isinstance(m, str) else m for m in model.get('merges', [])]
+
+
+def select_tokens(tokenizer: dict, used: Iterable[int]) -> List[int]:
+    """
+    Ids conservés, dans l'ordre d'origine.
+
+    Garde les tokens du corpus, les tokens ajoutés et spéciaux, les tokens
+    d'un caractère et les tokens d'octets (tout texte reste encodable), et
+    pour BPE les deux parties de chaque merge qui produit un token gardé,
+    récursivement: toutes les fusions suivies par le tokenizer d'origine
+    restent disponibles, au même rang relatif (voir `verify_encoding`).
+    """
+    model = tokenizer['model']
+    tokens = vocab_tokens(model)
+    ids = {token: idx for idx, token in enumerate(tokens)}
+
+    keep = {idx for idx in used if idx < len(tokens)}
+    keep.update(
+        idx for idx, token in enumerate(tokens) if len(token) == 1 or BYTE_TOKEN_RE.match(token)
+    )
+    if model.get('unk_token') in ids:
+        keep.add(ids[model['unk_token']])
+    if model['type'] == 'Unigram' and model.get('unk_id') is not None:
+        keep.add(model['unk_id'])
+
+    if model['type'] == 'BPE':
+        # Un token peut être produit par plusieurs merges ("ab"+"c", "a"+"bc"):
+        # celui appliqué dépend du mot, tous sont conservés
+        produced_by: Dict[str, List[str]] = {}
+        for left, right in _merge_pairs(model):
+            produced_by.setdefault(left + right, []).extend((left, right))
+        pending = [tokens[idx] for idx in keep]
+        while pending:
+            for part in produced_by.get(pending.pop(), ()):
+                if part in ids and ids[part] not in keep:
+                    keep.add(ids[part])
+                    pending.append(part)
+
+    # Tokens ajoutés: conservés, ids au-delà du vocabulaire du modèle compris
+    keep.update(token['id'] for token in tokenizer.get('added_tokens', []))
+    return sorted(keep)
+
+
+def remap_tokenizer(tokenizer: dict, kept: List[int]) -> dict:
+    """Réécrit un tokenizer.json avec les ids renumérotés."""
+    new_id = {old: new for new, old in enumerate(kept)}
+    tokenizer = json.loads(json.dumps(tokenizer))
+    model = tokenizer['model']
+    tokens = vocab_tokens(model)
+
+    if model['type'] == 'Unigram':
+        model['vocab'] = [model['vocab'][old] for old in kept if old < len(tokens)]
+        if model.get('unk_id') is not None:
+            model['unk_id'] = new_id[model['unk_id']]
+    else:
+        model['vocab'] = {tokens[old]: new_id[old] for old in kept if old < len(tokens)}
+
+    if model['type'] == 'BPE':
+        vocab = model['vocab']
+        merges = [
+            pair for pair in _merge_pairs(model)
+            if pair[0] in vocab and pair[1] in vocab and pair[0] + pair[1] in vocab
+        ]
+        as_strings = bool(model['merges']) and isinstance(model['merges'][0], str)
+        model['merges'] = [' '.join(pair) for pair in merges] if as_strings else merges
+
+    for token in tokenizer.get('added_tokens', []):
+        token['id'] = new_id[token['id']]
+
+    # Ids des tokens spéciaux du post-processeur (TemplateProcessing)
+    processors = [tokenizer.get('post_processor') or {}]
+    processors += processors[0].get('processors', [])
+    for processor in processors:
+        for special in (processor.get('special_tokens') or {}).values():
+            special['ids'] = [new_id[idx] for idx in special['ids']]
+        for key in ('sep', 'cls'):
+            if isinstance(processor.get(key), list):
+                processor[key][1] = new_id[processor[key][1]]
+
+    return tokenizer
+
+
+def remap_config_ids(config: dict, new_id: Dict[int, int]) -> dict:
+    """Renumérote les ids spéciaux (bos, eos, pad...) d'un config.json."""
+    for key in TOKEN_ID_KEYS:
+        value = config.get(key)
+        if isinstance(value, int) and value in new_id:
+            config[key] = new_id[value]
+        elif isinstance(value, list):
+            config[key] = [new_id.get(v, v) for v in value]
+    return config
+
+
+def remap_generation_config(generation: dict, new_id: Dict[int, int], padding_ids: range) -> dict:
+    """
+    Renumérote un generation_config.json et masque les lignes de padding.
+
+    Les lignes ajoutées pour l'alignement n'ont pas de token: leur logit
+    (0 avec des poids nuls) pourrait l'emporter, elles rejoignent donc
+    `suppress_tokens`, appliqué par generate() avant l'échantillonnage.
+    """
+    remap_config_ids(generation, new_id)
+    for key in SUPPRESS_KEYS:
+        if isinstance(generation.get(key), list):
+            generation[key] = [new_id[v] for v in generation[key] if v in new_id]
+    if padding_ids:
+        suppressed = list(generation.get('suppress_tokens') or [])
+        generation['suppress_tokens'] = suppressed + list(padding_ids)
+    return generation
+
+
+def is_vocab_tensor(tensor: TensorInfo, vocab_rows: int) -> bool:
+    """Embeddings, lm_head et biais de sortie: première dimension = taille du vocabulaire."""
+    return bool(tensor.shape) and tensor.shape[0] == vocab_rows and len(tensor.shape) <= 2
+
+
+def prune_rows(data: bytes, tensor: TensorInfo, rows: np.ndarray, padded_rows: int) -> bytes:
+    """
+    Sélectionne des lignes d'un tenseur brut (tout dtype), complétées par des zéros.
+
+    Les lignes de padding de lm_head sont masquées à la génération
+    (`remap_generation_config`).
+    """
+    row_bytes = tensor.nbytes // tensor.shape[0]
+    matrix = np.frombuffer(data, dtype=np.uint8).reshape(tensor.shape[0], row_bytes)
+    pruned = np.zeros((padded_rows, row_bytes), dtype=np.uint8)
+    pruned[:len(rows)] = matrix[rows]
+    return pruned.tobytes()
+
+
+def prune_weights(
+    model_dir: Path,
+    output_dir: Path,
+    kept: List[int],
+    vocab_rows: int,
+    padded_rows: int
+) -> dict:
+    """
+    Réécrit les fichiers de poids (mêmes noms) avec les tenseurs de vocabulaire élagués.
+
+    Un seul tenseur en mémoire à la fois.
+
+    Returns:
+        {tensors, bytes_before, bytes_after, weight_map}
+    """
+    rows = np.asarray(kept, dtype=np.int64)
+    stats = {'tensors': [], 'bytes_before': 0, 'bytes_after': 0, 'weight_map': {}}
+
+    for path in find_weight_files(model_dir):
+        tensors = list_tensors(path)
+        entries = []
+        for tensor in tensors:
+            stats['weight_map'][tensor.name] = path.name
+            if is_vocab_tensor(tensor, vocab_rows):
+                shape = (padded_rows,) + tuple(tensor.shape[1:])
+                nbytes = tensor.nbytes // vocab_rows * padded_rows
+                entries.append((tensor.name, tensor.dtype, shape, nbytes))
+                stats['tensors'].append(tensor.name)
+                stats['bytes_before'] += tensor.nbytes
+                stats['bytes_after'] += nbytes
+            else:
+                entries.append((tensor.name, tensor.dtype, tensor.shape, tensor.nbytes))
+
+        with open(path, 'rb') as handle, \
+                SafetensorsWriter(output_dir / path.name, entries, {'format': 'pt'}) as writer:
+            for tensor in tensors:
+                if is_vocab_tensor(tensor, vocab_rows):
+                    data = b''.join(iter_tensor_chunks(handle, tensor))
+                    writer.write(prune_rows(data, tensor, rows, padded_rows))
+                    del data
+                else:
+                    for chunk in iter_tensor_chunks(handle, tensor):
+                        writer.write(chunk)
+
+    return stats
+
+
+def prune_vocab(
+    model_dir: Path,
+    output_dir: Path,
+    used: Set[int],
+    languages: List[str],
+    pad_to: int = DEFAULT_PAD_TO
+) -> dict:
+    """
+    Élague le vocabulaire d'un modèle aux tokens `used` (plus ceux requis).
+
+    Écrit dans `output_dir` les poids élagués, tokenizer.json, config.json,
+    generation_config.json et tokenizer_config.json renumérotés, les autres
+    fichiers recopiés, et `token_remap.json` (id nouveau → id d'origine).
+
+    Returns:
+        Table de correspondance écrite
+    """
+    with open(model_dir / 'tokenizer.json', 'r', encoding='utf-8') as f:
+        tokenizer = json.load(f)
+    with open(model_dir / 'config.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    text_config = config.get('text_config', config)
+    vocab_rows = text_config['vocab_size']
+    kept = select_tokens(tokenizer, used)
+    if kept[-1] >= vocab_rows:
+        raise ValueError(f"id {kept[-1]} au-delà des {vocab_rows} lignes d'embedding")
+    new_id = {old: new for new, old in enumerate(kept)}
+    padded_rows = -(-len(kept) // pad_to) * pad_to if pad_to > 1 else len(kept)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    weights = prune_weights(model_dir, output_dir, kept, vocab_rows, padded_rows)
+    if not weights['tensors']:
+        raise ValueError(f"aucun tenseur de {vocab_rows} lignes (embeddings) trouvé")
+
+    for path in sorted(model_dir.iterdir()):
+        if path.is_file() and path.suffix != '.safetensors' and path.name not in (
+                'tokenizer.json', 'config.json', 'generation_config.json', 'tokenizer_config.json',
+                'tokenizer.bin', INDEX_FILENAME, REMAP_FILENAME):
+            shutil.copy2(path, output_dir / path.name)
+
+    with open(output_dir / 'tokenizer.json', 'w', encoding='utf-8') as f:
+        json.dump(remap_tokenizer(tokenizer, kept), f, ensure_ascii=False, indent=2)
+
+    text_config['vocab_size'] = padded_rows
+    remap_config_ids(text_config, new_id)
+    if text_config is not config:
+        remap_config_ids(config, new_id)
+    with open(output_dir / 'config.json', 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    padding_ids = range(len(kept), padded_rows)
+    generation = {}
+    generation_path = model_dir / 'generation_config.json'
+    if generation_path.exists():
+        with open(generation_path, 'r', encoding='utf-8') as f:
+            generation = json.load(f)
+    if generation or padding_ids:
+        with open(output_dir / 'generation_config.json', 'w', encoding='utf-8') as f:
+            json.dump(remap_generation_config(generation, new_id, padding_ids), f, indent=2)
+
+    tokenizer_config_path = model_dir / 'tokenizer_config.json'
+    if tokenizer_config_path.exists():
+        with open(tokenizer_config_path, 'r', encoding='utf-8') as f:
+            tokenizer_config = json.load(f)
+        if 'added_tokens_decoder' in tokenizer_config:
+            tokenizer_config['added_tokens_decoder'] = {
+                str(new_id[int(idx)]): token
+                for idx, token in tokenizer_config['added_tokens_decoder'].items()
+                if int(idx) in new_id
+            }
+        with open(output_dir / 'tokenizer_config.json', 'w', encoding='utf-8') as f:
+            json.dump(tokenizer_config, f, ensure_ascii=False, indent=2)
+
+    if (model_dir / INDEX_FILENAME).exists():
+        total = sum(
+            t.nbytes for name in dict.fromkeys(weights['weight_map'].values())
+            for t in list_tensors(output_dir / name)
+        )
+        with open(output_dir / INDEX_FILENAME, 'w', encoding='utf-8') as f:
+            index = {'metadata': {'total_size': total}, 'weight_map': weights['weight_map']}
+            json.dump(index, f, indent=2)
+
+    remap = {
+        'languages': languages,
+        'original_vocab_size': vocab_rows,
+        'vocab_size': padded_rows,
+        'kept_tokens': len(kept),
+        # Lignes [kept_tokens, vocab_size): padding sans token, masqué via suppress_tokens
+        'padding_ids': [padding_ids.start, padding_ids.stop],
+        'pruned_tensors': weights['tensors'],
+        'embedding_bytes_before': weights['bytes_before'],
+        'embedding_bytes_after': weights['bytes_after'],
+        # new_to_old[i]: id d'origine du nouveau token i (lignes de padding exclues)
+        'new_to_old': kept,
+    }
+    with open(output_dir / REMAP_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(remap, f)
+
+    return remap
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Élagage du vocabulaire par langues cibles",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Langues de l'entrée models.json, corpus <dossier>/<langue>.txt
+  python prune_vocab.py merged_models/ORION-Dev-Polyglot-v1 pruned/ORION-Dev-Polyglot-v1 \\
+      --key hybrid-developer --corpus-dir ~/corpus
+
+  # Langues explicites et corpus supplémentaire (code)
+  python prune_vocab.py my-model/ pruned/my-model -l fr -l en --corpus corpus/code.txt
+        """
+    )
+
+    parser.add_argument(
+        'model',
+        type=Path,
+        help="Dossier du modèle (safetensors, config.json, tokenizer.json)"
+    )
+
+    parser.add_argument(
+        'output',
+        type=Path,
+        help="Dossier de sortie"
+    )
+
+    parser.add_argument(
+        '--key',
+        help="Entrée de models.json dont lire la liste `languages`"
+    )
+
+    parser.add_argument(
+        '--language',
+        '-l',
+        action='append',
+        default=[],
+        help="Langue cible (code ISO, répétable)"
+    )
+
+    parser.add_argument(
+        '--registry',
+        type=Path,
+        default=DEFAULT_REGISTRY,
+        help="Chemin de models.json"
+    )
+
+    parser.add_argument(
+        '--corpus-dir',
+        type=Path,
+        help="Corpus de référence: <langue>.txt ou <langue>/*.txt (requis sans --corpus)"
+    )
+
+    parser.add_argument(
+        '--corpus',
+        type=Path,
+        action='append',
+        default=[],
+        help="Fichier de corpus supplémentaire (répétable)"
+    )
+
+    parser.add_argument(
+        '--pad-to',
+        type=int,
+        default=DEFAULT_PAD_TO,
+        help=f"Arrondir le vocabulaire à un multiple de (défaut: {DEFAULT_PAD_TO})"
+    )
+
+    args = parser.parse_args()
+
+    if args.corpus_dir is None and not args.corpus:
+        parser.error("corpus de référence requis: --corpus-dir ou --corpus")
+    if args.corpus_dir is not None and not args.corpus_dir.is_dir():
+        parser.error(f"--corpus-dir: dossier introuvable ({args.corpus_dir})")
+
+    try:
+        languages = list(args.language)
+        if args.key:
+            languages += registry_languages(args.registry, args.key)
+        languages = list(dict.fromkeys(languages))
+
+        files = list(args.corpus)
+        if args.corpus_dir is not None:
+            files = corpus_files(args.corpus_dir, languages) + files
+        if not files:
+            logger.error(
+                "❌ Corpus de référence vide: précisez --language/--key avec --corpus-dir, "
+                "ou --corpus"
+            )
+            sys.exit(1)
+
+        logger.info(
+            f"🌍 Langues: {', '.join(languages) or '-'} ({len(files)} fichiers de corpus)"
+        )
+        used = corpus_token_ids(args.model / 'tokenizer.json', files)
+        remap = prune_vocab(args.model, args.output, used, languages, args.pad_to)
+
+        mismatches = verify_encoding(
+            args.model / 'tokenizer.json', args.output / 'tokenizer.json',
+            files, remap['new_to_old']
+        )
+        if mismatches:
+            logger.error(
+                f"❌ Encodage du corpus différent après élagage ({len(mismatches)} lignes, "
+                f"ex. {', '.join(mismatches[:5])})"
+            )
+            sys.exit(1)
+        logger.info("✅ Corpus encodé à l'identique par le tokenizer élagué")
+    except ImportError:
+        logger.error(
+            "❌ La bibliothèque tokenizers est requise pour encoder le corpus "
+            "(pip install tokenizers)"
+        )
+        sys.exit(1)
+    except (OSError, KeyError, ValueError) as e:
+        logger.error(f"❌ Élagage impossible: {e}")
+        sys.exit(1)
+
+    mb = 1024 * 1024
+    logger.info(
+        f"✂️  Vocabulaire: {remap['original_vocab_size']} → {remap['vocab_size']} "
+        f"({remap['kept_tokens']} tokens conservés)"
+    )
+    logger.info(
+        f"📉 {', '.join(remap['pruned_tensors'])}: "
+        f"{remap['embedding_bytes_before'] / mb:.1f} Mo → "
+        f"{remap['embedding_bytes_after'] / mb:.1f} Mo"
+    )
+    logger.info(f"✅ Modèle élagué: {args.output} (correspondance des ids: {REMAP_FILENAME})")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,958 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Quantification bas bit couche par couche (CPU)
+Quantification à compensation d'erreur (GPTQ) d'un décodeur, une couche à la fois
+"""
+
+import importlib.util
+import json
+import logging
+import math
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from compile_tokenizer import DEFAULT_CORPUS
+from safetensors_io import SafetensorsError, SafetensorsWriter, TensorInfo, list_model_tensors
+from shard_model import copy_model_files, locate_tensor
+from weight_layouts import (
+    DEFAULT_LAYOUT,
+    WeightLayout,
+    fallback_layout,
+    fits_layout,
+    get_layout,
+    layout_entries,
+    pack_bits,
+    to_layout,
+    unpack_bits,
+)
+
+logger = logging.getLogger(__name__)
+
+
+QUANT_METHOD = 'gptq'
+PACKING = 'orion-bitstream'
+
+DEFAULT_GROUP_SIZE = 128
+DEFAULT_SAMPLES = 32
+DEFAULT_SEQ_LEN = 256
+DEFAULT_DAMP = 0.01
+DEFAULT_SEED = 0
+
+# Lignes traitées à la fois pour les grandes matrices (embeddings, lm_head)
+ROW_CHUNK = 4096
+
+# Les embeddings sont lus ligne par ligne, sans compensation d'erreur possible:
+# sous 4 bits le modèle se dégrade bien plus vite que par les projections
+MIN_EMBEDDING_BITS = 4
+
+# Familles dont le décodeur est rejoué en numpy pour la calibration
+SUPPORTED_MODEL_TYPES = ('llama', 'mistral', 'qwen2', 'gemma')
+
+ATTENTION_INPUTS = ('self_attn.q_proj', 'self_attn.k_proj', 'self_attn.v_proj')
+ATTENTION_OUTPUT = 'self_attn.o_proj'
+MLP_INPUTS = ('mlp.gate_proj', 'mlp.up_proj')
+MLP_OUTPUT = 'mlp.down_proj'
+LINEAR_MODULES = ATTENTION_INPUTS + (ATTENTION_OUTPUT,) + MLP_INPUTS + (MLP_OUTPUT,)
+
+FLOAT_DTYPES = ('F64', 'F32', 'F16', 'BF16')
+
+# Octets par entrée n² en vie pendant inverse_hessian_factor, hessienne accumulée
+# non comprise: la copie de travail float32 factorisée en place par LAPACK (scipy),
+# sinon les conversions et copies float64 de numpy.linalg (mesuré: ~40)
+FACTOR_BYTES_PER_ENTRY = 4 if importlib.util.find_spec('scipy') else 40
+
+# Reçoit (nom, octets) de chaque tenseur de sortie
+TensorSink = Callable[[str, bytes], None]
+
+
+class QuantizeError(ValueError):
+    """Modèle ou paramètres incompatibles avec la quantification."""
+
+
+# --- Lecture des tenseurs -------------------------------------------------
+
+def tensor_view(info: TensorInfo) -> np.ndarray:
+    """Vue mmap des données brutes d'un tenseur (BF16 exposé en uint16)."""
+    dtypes = {'F64': '<f8', 'F32': '<f4', 'F16': '<f2', 'BF16': '<u2'}
+    if info.dtype not in dtypes:
+        raise QuantizeError(f"{info.name}: dtype non flottant {info.dtype}")
+    return np.memmap(
+        info.file, dtype=dtypes[info.dtype], mode='r', offset=info.data_start, shape=info.shape
+    )
+
+
+def to_float32(raw: np.ndarray, dtype: str) -> np.ndarray:
+    """Convertit des données safetensors brutes en float32."""
+    if dtype == 'BF16':
+        return (np.asarray(raw, dtype=np.uint32) << 16).view(np.float32)
+    return np.asarray(raw, dtype=np.float32)
+
+
+def read_tensor(info: TensorInfo) -> np.ndarray:
+    """Charge un tenseur flottant en float32."""
+    return to_float32(tensor_view(info), info.dtype)
+
+
+@dataclass
+class QuantizedTensor:
+    """Poids quantifiés par groupes le long de la dimension d'entrée, disposition ligne."""
+
+    qweight: np.ndarray  # uint8 [sorties, octets du flux de bits des entrées]
+    scales: np.ndarray   # float16 [sorties, groupes]
+    qzeros: np.ndarray   # uint8 [sorties, octets du flux de bits des groupes]
+    bits: int
+    group_size: int
+    shape: Tuple[int, int]
+
+    def dequantize(self) -> np.ndarray:
+        """Reconstruit les poids en float32."""
+        rows, cols = self.shape
+        groups = cols // self.group_size
+        codes = unpack_bits(self.qweight, self.bits, cols).astype(np.float32)
+        zeros = unpack_bits(self.qzeros, self.bits, groups).astype(np.float32)
+        codes = codes.reshape(rows, groups, self.group_size) - zeros[:, :, None]
+        return (codes * self.scales.astype(np.float32)[:, :, None]).reshape(rows, cols)
+
+
+# --- Quantification -------------------------------------------------------
+
+def group_params(w: np.ndarray, bits: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Échelle (arrondie en float16) et zéro asymétriques par ligne d'un groupe
+    [lignes, taille].
+    """
+    maxq = (1 << bits) - 1
+    xmin = np.minimum(w.min(axis=1), 0)
+    xmax = np.maximum(w.max(axis=1), 0)
+    scale = ((xmax - xmin) / maxq).astype(np.float16).astype(np.float32)
+    scale[scale == 0] = 1.0
+    zero = np.clip(np.round(-xmin / scale), 0, maxq)
+    return scale, zero
+
+
+def _quantize_column(w: np.ndarray, scale: np.ndarray, zero: np.ndarray, maxq: int) -> np.ndarray:
+    return np.clip(np.round(w / scale) + zero, 0, maxq)
+
+
+def _finish(
+    codes: np.ndarray,
+    scales: np.ndarray,
+    zeros: np.ndarray,
+    bits: int,
+    group_size: int
+) -> QuantizedTensor:
+    return QuantizedTensor(
+        qweight=pack_bits(codes.astype(np.uint8), bits),
+        scales=scales.astype(np.float16),
+        qzeros=pack_bits(zeros.astype(np.uint8), bits),
+        bits=bits,
+        group_size=group_size,
+        shape=codes.shape,
+    )
+
+
+def quantize_rtn(weight: np.ndarray, bits: int, group_size: int) -> QuantizedTensor:
+    """Quantification par arrondi au plus proche, groupe par groupe (sans calibration)."""
+    rows, cols = weight.shape
+    groups = cols // group_size
+    maxq = (1 << bits) - 1
+    grouped = weight.reshape(rows * groups, group_size)
+    scale, zero = group_params(grouped, bits)
+    codes = _quantize_column(grouped, scale[:, None], zero[:, None], maxq)
+    return _finish(
+        codes.reshape(rows, cols), scale.reshape(rows, groups), zero.reshape(rows, groups),
+        bits, group_size
+    )
+
+
+def inverse_hessian_factor(
+    hessian: np.ndarray,
+    damp: float = DEFAULT_DAMP
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Facteur de Cholesky supérieur de H⁻¹, avec amortissement de la diagonale.
+
+    Si H = V·Vᵀ avec V triangulaire supérieure, le facteur cherché est V⁻¹:
+    on factorise H retournée (lignes et colonnes inversées), puis on inverse
+    le triangle. Une seule copie float32 de la hessienne est modifiée en place
+    (LAPACK via scipy s'il est installé; numpy.linalg calcule en float64 sur
+    des copies, voir FACTOR_BYTES_PER_ENTRY).
+
+    Returns:
+        (facteur [entrées, entrées] float32, masque des entrées mortes)
+    """
+    n = len(hessian)
+    diagonal = np.diag_indices(n)
+    dead = np.diag(hessian) == 0
+    mean_diag = float(np.mean(np.where(dead, 1.0, np.diag(hessian))))
+    work = np.empty((n, n), dtype=np.float32)
+
+    try:
+        from scipy.linalg import get_lapack_funcs
+        potrf, trtri = get_lapack_funcs(('potrf', 'trtri'), (work,))
+    except ImportError:
+        potrf = trtri = None
+
+    for attempt in range(5):
+        np.copyto(work, hessian[::-1, ::-1])
+        damping = damp * (10 ** attempt) * mean_diag
+        work[diagonal] = np.where(dead[::-1], 1.0, work[diagonal]) + damping
+        if potrf is not None:
+            # work.T est contiguë en Fortran: LAPACK écrit dans le même tampon
+            lower, info = potrf(work.T, lower=1, clean=1, overwrite_a=1)
+            if info == 0:
+                inverse, info = trtri(lower, lower=1, overwrite_c=1)
+                if info == 0:
+                    return inverse[::-1, ::-1], dead
+            continue
+        try:
+            lower = np.linalg.cholesky(work)
+        except np.linalg.LinAlgError:
+            continue
+        del work
+        return np.linalg.inv(lower)[::-1, ::-1], dead
+    raise QuantizeError("hessienne non inversible, même amortie")
+
+
+def quantize_gptq(
+    weight: np.ndarray,
+    factor: np.ndarray,
+    dead: np.ndarray,
+    bits: int,
+    group_size: int
+) -> Tuple[QuantizedTensor, float]:
+    """
+    Quantification GPTQ: colonne par colonne, l'erreur d'arrondi est reportée
+    sur les colonnes non encore quantifiées via le facteur de H⁻¹.
+
+    Les lignes sont indépendantes: une grande matrice peut être traitée par
+    paquets de lignes avec le même facteur.
+
+    Returns:
+        (poids quantifiés, perte quadratique estimée)
+    """
+    w = weight.astype(np.float32, copy=True)
+    w[:, dead] = 0
+    rows, cols = w.shape
+    groups = cols // group_size
+    maxq = (1 << bits) - 1
+    factor = np.asarray(factor, dtype=np.float32)
+
+    codes = np.zeros((rows, cols), dtype=np.uint8)
+    scales = np.zeros((rows, groups), dtype=np.float32)
+    zeros = np.zeros((rows, groups), dtype=np.float32)
+    loss = 0.0
+
+    for g in range(groups):
+        start, end = g * group_size, (g + 1) * group_size
+        block = w[:, start:end].copy()
+        errors = np.zeros_like(block)
+        block_factor = factor[start:end, start:end]
+
+        scale, zero = group_params(block, bits)
+        scales[:, g], zeros[:, g] = scale, zero
+
+        for i in range(group_size):
+            column = block[:, i]
+            q = _quantize_column(column, scale, zero, maxq)
+            codes[:, start + i] = q
+            error = (column - scale * (q - zero)) / block_factor[i, i]
+            block[:, i:] -= np.outer(error, block_factor[i, i:])
+            errors[:, i] = error
+            loss += float(np.dot(error, error)) / 2
+
+        w[:, end:] -= errors @ factor[start:end, end:]
+
+    return _finish(codes, scales, zeros, bits, group_size), loss
+
+
+# --- Décodeur numpy -------------------------------------------------------
+
+@dataclass
+class DecoderSpec:
+    """Hyperparamètres du décodeur texte nécessaires à sa réexécution."""
+
+    model_type: str
+    hidden_size: int
+    num_heads: int
+    num_kv_heads: int
+    head_dim: int
+    num_layers: int
+    vocab_size: int
+    rms_norm_eps: float
+    rope_theta: float
+    norm_offset: float
+    embed_scale: float
+    activation: str
+
+
+def decoder_spec(config: dict) -> Optional[DecoderSpec]:
+    """Décodeur rejouable décrit par config.json, ou None si la famille n'est pas gérée."""
+    text = config.get('text_config', config)
+    model_type = text.get('model_type', config.get('model_type'))
+    if model_type not in SUPPORTED_MODEL_TYPES:
+        return None
+
+    hidden = text['hidden_size']
+    heads = text['num_attention_heads']
+    gemma = model_type == 'gemma'
+    return DecoderSpec(
+        model_type=model_type,
+        hidden_size=hidden,
+        num_heads=heads,
+        num_kv_heads=text.get('num_key_value_heads', heads),
+        head_dim=text.get('head_dim') or hidden // heads,
+        num_layers=text['num_hidden_layers'],
+        vocab_size=text['vocab_size'],
+        rms_norm_eps=text.get('rms_norm_eps', 1e-6),
+        rope_theta=text.get('rope_theta', 10000.0),
+        norm_offset=1.0 if gemma else 0.0,
+        embed_scale=math.sqrt(hidden) if gemma else 1.0,
+        activation='gelu_tanh' if gemma else 'silu',
+    )
+
+
+def rms_norm(x: np.ndarray, weight: Optional[np.ndarray], spec: DecoderSpec) -> np.ndarray:
+    variance = np.mean(x * x, axis=-1, keepdims=True)
+    x = x / np.sqrt(variance + spec.rms_norm_eps)
+    if weight is None:
+        return x
+    return x * (weight + spec.norm_offset)
+
+
+def activation(x: np.ndarray, spec: DecoderSpec) -> np.ndarray:
+    if spec.activation == 'gelu_tanh':
+        return 0.5 * x * (1 + np.tanh(0.7978845608 * (x + 0.044715 * x ** 3)))
+    return x / (1 + np.exp(-x))
+
+
+def rope_tables(spec: DecoderSpec, seq_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Tables cos/sin RoPE [positions, head_dim] (sans mise à l'échelle longue portée)."""
+    exponents = np.arange(0, spec.head_dim, 2, dtype=np.float64) / spec.head_dim
+    inv_freq = 1.0 / (spec.rope_theta ** exponents)
+    angles = np.outer(np.arange(seq_len), inv_freq)
+    angles = np.concatenate([angles, angles], axis=1)
+    return np.cos(angles).astype(np.float32), np.sin(angles).astype(np.float32)
+
+
+def _rotate(x: np.ndarray, cos: np.ndarray, sin: np.ndarray) -> np.ndarray:
+    half = x.shape[-1] // 2
+    rotated = np.concatenate([-x[..., half:], x[..., :half]], axis=-1)
+    return x * cos + rotated * sin
+
+
+def _linear(x: np.ndarray, weights: Dict[str, np.ndarray], module: str) -> np.ndarray:
+    out = x @ weights[f'{module}.weight'].T
+    bias = weights.get(f'{module}.bias')
+    return out if bias is None else out + bias
+
+
+def attention_context(
+    x: np.ndarray,
+    weights: Dict[str, np.ndarray],
+    spec: DecoderSpec,
+    rope
+) -> np.ndarray:
+    """Sortie de l'attention causale avant o_proj, pour une séquence [positions, hidden]."""
+    seq_len = x.shape[0]
+    cos, sin = rope[0][:seq_len], rope[1][:seq_len]
+    q = _linear(x, weights, 'self_attn.q_proj').reshape(seq_len, spec.num_heads, spec.head_dim)
+    k = _linear(x, weights, 'self_attn.k_proj').reshape(seq_len, spec.num_kv_heads, spec.head_dim)
+    v = _linear(x, weights, 'self_attn.v_proj').reshape(seq_len, spec.num_kv_heads, spec.head_dim)
+    q, k, v = q.transpose(1, 0, 2), k.transpose(1, 0, 2), v.transpose(1, 0, 2)
+    q, k = _rotate(q, cos, sin), _rotate(k, cos, sin)
+
+    repeat = spec.num_heads // spec.num_kv_heads
+    k, v = np.repeat(k, repeat, axis=0), np.repeat(v, repeat, axis=0)
+
+    scores = q @ k.transpose(0, 2, 1) / math.sqrt(spec.head_dim)
+    scores += np.triu(np.full((seq_len, seq_len), -np.inf, dtype=np.float32), k=1)
+    scores -= scores.max(axis=-1, keepdims=True)
+    probs = np.exp(scores)
+    probs /= probs.sum(axis=-1, keepdims=True)
+    return (probs @ v).transpose(1, 0, 2).reshape(seq_len, spec.num_heads * spec.head_dim)
+
+
+def mlp_hidden(x: np.ndarray, weights: Dict[str, np.ndarray], spec: DecoderSpec) -> np.ndarray:
+    """Entrée de down_proj: act(gate) * up."""
+    gate = activation(_linear(x, weights, 'mlp.gate_proj'), spec)
+    return gate * _linear(x, weights, 'mlp.up_proj')
+
+
+# --- Calibration ----------------------------------------------------------
+
+def calibration_ids(
+    model_dir: Path,
+    files: List[Path],
+    samples: int,
+    seq_len: int,
+    vocab_size: int,
+    seed: int = DEFAULT_SEED,
+    allow_random: bool = False
+) -> np.ndarray:
+    """
+    Séquences de calibration [échantillons, positions].
+
+    Fenêtres tirées du corpus tokenisé; sans fichier, corpus local de la
+    fonderie (README et recettes, comme compile_tokenizer.py). Des tokens
+    aléatoires ne servent que sur demande explicite (`allow_random`), si le
+    corpus ne peut pas être tokenisé.
+
+    Raises:
+        QuantizeError: corpus non tokenisable sans `allow_random`
+    """
+    rng = np.random.default_rng(seed)
+    tokenizer_path = Path(model_dir) / 'tokenizer.json'
+    if not files:
+        files = [path for path in DEFAULT_CORPUS if path.exists()]
+        logger.info(f"📚 Calibration sur le corpus local de la fonderie ({len(files)} fichiers)")
+
+    reason = None
+    if not files:
+        reason = "aucun fichier de calibration"
+    elif not tokenizer_path.exists():
+        reason = f"{tokenizer_path} introuvable"
+    else:
+        try:
+            from tokenizers import Tokenizer
+        except ImportError:
+            reason = "bibliothèque tokenizers absente (pip install tokenizers)"
+        else:
+            tokenizer = Tokenizer.from_file(str(tokenizer_path))
+            ids: List[int] = []
+            for path in files:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = [line for line in f if line.strip()]
+                for encoding in tokenizer.encode_batch(lines, add_special_tokens=False):
+                    ids.extend(encoding.ids)
+            if ids:
+                stream = np.asarray(ids, dtype=np.int64)
+                if len(stream) <= seq_len:
+                    stream = np.resize(stream, seq_len + 1)
+                starts = rng.integers(0, len(stream) - seq_len, size=samples)
+                logger.info(
+                    f"📚 Calibration: {samples} fenêtres de {seq_len} tokens "
+                    f"({len(ids)} tokens de corpus)"
+                )
+                return np.stack([stream[s:s + seq_len] for s in starts])
+            reason = "corpus de calibration vide"
+
+    if not allow_random:
+        raise QuantizeError(f"calibration impossible: {reason}")
+    logger.warning(f"⚠️  Calibration sur tokens aléatoires ({reason})")
+    return rng.integers(0, vocab_size, size=(samples, seq_len), dtype=np.int64)
+
+
+class ActivationCache:
+    """Activations de calibration [échantillons, positions, hidden] sur disque (memmap)."""
+
+    def __init__(self, directory: Path, name: str, shape: Tuple[int, int, int]):
+        self.path = Path(directory) / f'{name}.f32'
+        self.array = np.memmap(self.path, dtype=np.float32, mode='w+', shape=shape)
+
+    def __len__(self) -> int:
+        return self.array.shape[0]
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return np.asarray(self.array[index])
+
+    def __setitem__(self, index: int, value: np.ndarray) -> None:
+        self.array[index] = value
+
+
+# --- Pilotage -------------------------------------------------------------
+
+def decoder_prefix(tensors: List[TensorInfo]) -> Optional[str]:
+    """Préfixe du décodeur texte (`model`, `language_model.model`...), d'après ses embeddings."""
+    for info in tensors:
+        location = locate_tensor(info.name)
+        if location.role != 'embed' or location.component != 'language':
+            continue
+        if info.name.endswith('.embed_tokens.weight'):
+            return info.name[:-len('.embed_tokens.weight')]
+    return None
+
+
+def head_name(prefix: str, by_name: Dict[str, TensorInfo]) -> Optional[str]:
+    """lm_head du décodeur, ou None si elle est liée aux embeddings."""
+    parent = prefix.rsplit('.', 1)[0] if '.' in prefix else ''
+    name = f'{parent}.lm_head.weight' if parent else 'lm_head.weight'
+    return name if name in by_name else None
+
+
+def is_quantizable(info: TensorInfo, group_size: int) -> bool:
+    """Poids de projection 2D dont la dimension d'entrée se découpe en groupes."""
+    return (
+        info.name.endswith('.weight')
+        and info.dtype in FLOAT_DTYPES
+        and len(info.shape) == 2
+        and info.shape[1] % group_size == 0
+    )
+
+
+def _kept_entry(info: TensorInfo) -> Tuple[str, str, Tuple[int, ...], int]:
+    if info.dtype in FLOAT_DTYPES:
+        return info.name, 'F16', info.shape, info.numel * 2
+    return info.name, info.dtype, info.shape, info.nbytes
+
+
+class LayerQuantizer:
+    """
+    Quantifie un modèle en flux: embeddings, puis chaque couche du décodeur
+    (réexécutée sur les activations de calibration en cache), puis la tête.
+
+    En mémoire: les poids d'une couche et les hessiennes de ses projections.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path,
+        bits: int,
+        group_size: int = DEFAULT_GROUP_SIZE,
+        damp: float = DEFAULT_DAMP,
+        tensors: Optional[List[TensorInfo]] = None,
+        loader: Optional[Callable[[TensorInfo], np.ndarray]] = None,
+        layout: str = DEFAULT_LAYOUT
+    ):
+        self.model_dir = Path(model_dir)
+        self.bits = bits
+        self.group_size = group_size
+        self.damp = damp
+        self.layout = get_layout(layout)
+        self.tensors = tensors if tensors is not None else list_model_tensors(self.model_dir)
+        self.loader = loader or read_tensor
+        self.by_name = {t.name: t for t in self.tensors}
+
+        with open(self.model_dir / 'config.json', 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.spec = decoder_spec(self.config)
+
+        self.prefix = decoder_prefix(self.tensors)
+        self.losses: Dict[str, float] = {}
+
+
+    @property
+    def calibrated(self) -> bool:
+        """Le décodeur peut être rejoué: GPTQ, sinon arrondi au plus proche."""
+        return self.bits < 16 and self.spec is not None and self.prefix is not None
+
+    def _quantizable(self, info: TensorInfo) -> bool:
+        """En 16 bits, tout est simplement converti en float16."""
+        return self.bits < 16 and is_quantizable(info, self.group_size)
+
+    def layer_name(self, layer: int, module: str, suffix: str = 'weight') -> str:
+        return f'{self.prefix}.layers.{layer}.{module}.{suffix}'
+
+    def head_name(self) -> Optional[str]:
+        return head_name(self.prefix, self.by_name)
+
+    def _bits_for(self, info: TensorInfo) -> int:
+        if locate_tensor(info.name).role == 'embed':
+            return max(self.bits, MIN_EMBEDDING_BITS)
+        return self.bits
+
+    def _layout_for(self, info: TensorInfo) -> WeightLayout:
+        """
+        Disposition demandée, ou disposition ligne si les sorties ne forment
+        pas de tuiles (vocabulaire de 1001).
+        """
+        if fits_layout(self.layout, info.shape, self._bits_for(info), self.group_size):
+            return self.layout
+        return fallback_layout(self.layout)
+
+    def layout_overrides(self) -> Dict[str, str]:
+        """Poids quantifiés dans une autre disposition que celle demandée {nom: disposition}."""
+        overrides = {}
+        for info in self.tensors:
+            if self._quantizable(info):
+                layout = self._layout_for(info)
+                if layout is not self.layout:
+                    overrides[info.name] = layout.name
+        return overrides
+
+    def _order(self) -> List[TensorInfo]:
+        """Ordre d'écriture = ordre de traitement: embeddings, couches, reste."""
+        def rank(info: TensorInfo):
+            if self.calibrated:
+                if info.name == f'{self.prefix}.embed_tokens.weight':
+                    return (0, 0)
+                location = locate_tensor(info.name)
+                if location.stack == f'{self.prefix}.layers':
+                    return (1, location.layer)
+                return (2, 0)
+            return (0, 0)
+        return sorted(self.tensors, key=rank)
+
+    def entries(self) -> List[Tuple[str, str, Tuple[int, ...], int]]:
+        """En-tête du fichier de sortie, connu avant toute quantification."""
+        entries = []
+        for info in self._order():
+            if self._quantizable(info):
+                entries.extend(layout_entries(
+                    self._layout_for(info), info.name, info.shape,
+                    self._bits_for(info), self.group_size
+                ))
+            else:
+                entries.append(_kept_entry(info))
+        return entries
+
+    def _kept_bytes(self, info: TensorInfo) -> bytes:
+        if info.dtype in FLOAT_DTYPES:
+            return self.loader(info).astype('<f2').tobytes()
+        with open(info.file, 'rb') as f:
+            f.seek(info.data_start)
+            return f.read(info.nbytes)
+
+    def _write(
+        self,
+        sink: TensorSink,
+        info: TensorInfo,
+        quantized: Optional[QuantizedTensor]
+    ) -> None:
+        if quantized is None:
+            sink(info.name, self._kept_bytes(info))
+            return
+        layout = self._layout_for(info)
+        entries = layout_entries(layout, info.name, info.shape, quantized.bits, self.group_size)
+        for (name, _, _, _), array in zip(entries, to_layout(layout, quantized).values()):
+            sink(name, np.ascontiguousarray(array).tobytes())
+
+    def _rtn(self, info: TensorInfo, weight: Optional[np.ndarray] = None) -> QuantizedTensor:
+        """Arrondi au plus proche, par paquets de lignes."""
+        view = tensor_view(info) if weight is None and self.loader is read_tensor else None
+        if view is None and weight is None:
+            weight = self.loader(info)
+        parts = []
+        for start in range(0, info.shape[0], ROW_CHUNK):
+            if view is not None:
+                rows = to_float32(view[start:start + ROW_CHUNK], info.dtype)
+            else:
+                rows = weight[start:start + ROW_CHUNK]
+            parts.append(quantize_rtn(rows, self._bits_for(info), self.group_size))
+        return _concat(parts)
+
+    def _gptq(
+        self,
+        info: TensorInfo,
+        hessian: np.ndarray,
+        weight: Optional[np.ndarray] = None
+    ) -> QuantizedTensor:
+        """GPTQ par paquets de lignes, facteur de H⁻¹ partagé."""
+        factor, dead = inverse_hessian_factor(hessian, self.damp)
+        if weight is None:
+            weight = self.loader(info)
+        parts, loss = [], 0.0
+        for start in range(0, info.shape[0], ROW_CHUNK):
+            part, part_loss = quantize_gptq(
+                weight[start:start + ROW_CHUNK], factor, dead, self.bits, self.group_size
+            )
+            parts.append(part)
+            loss += part_loss
+        self.losses[info.name] = loss
+        return _concat(parts)
+
+    def metadata(self) -> Dict[str, str]:
+        """Métadonnées safetensors des fichiers de sortie."""
+        metadata = {
+            'format': 'pt',
+            'quant_method': QUANT_METHOD if self.calibrated else 'rtn',
+            'bits': str(self.bits),
+            'group_size': str(self.group_size),
+            'packing': PACKING,
+            'layout': self.layout.name,
+        }
+        overrides = self.layout_overrides()
+        if overrides:
+            metadata['layout_overrides'] = json.dumps(overrides, separators=(',', ':'))
+        return metadata
+
+    def process(
+        self,
+        sink: TensorSink,
+        calibration: Optional[np.ndarray] = None,
+        cache_dir: Optional[Path] = None
+    ) -> None:
+        """
+        Quantifie tous les tenseurs et passe chaque entrée de `entries()` à
+        `sink(nom, octets)`, dans l'ordre de `entries()`.
+
+        Args:
+            sink: Destination des octets de chaque tenseur de sortie
+            calibration: Ids de calibration [échantillons, positions] (requis si calibré)
+            cache_dir: Dossier des activations en cache (défaut: temporaire système)
+        """
+        order = self._order()
+        if not self.calibrated:
+            if self.bits < 16:
+                logger.warning(
+                    "⚠️  Architecture non rejouable: arrondi au plus proche, sans calibration"
+                )
+            for info in order:
+                self._write(sink, info, self._rtn(info) if self._quantizable(info) else None)
+            return
+
+        if calibration is None:
+            raise QuantizeError("ids de calibration requis pour GPTQ")
+        with tempfile.TemporaryDirectory(prefix='orion-calib-', dir=cache_dir) as tmp:
+            self._run_calibrated(sink, order, calibration, Path(tmp))
+
+    def run(
+        self,
+        output_path: Path,
+        calibration: Optional[np.ndarray] = None,
+        cache_dir: Optional[Path] = None
+    ) -> Dict[str, object]:
+        """
+        Écrit le modèle quantifié dans `output_path` (un fichier safetensors).
+
+        Returns:
+            Statistiques (octets écrits, pertes par projection)
+        """
+        with SafetensorsWriter(output_path, self.entries(), self.metadata()) as writer:
+            self.process(lambda name, data: writer.write(data), calibration, cache_dir)
+
+        return {'bytes': writer.size_bytes, 'sha256': writer.sha256, 'losses': dict(self.losses)}
+
+    def _run_calibrated(
+        self,
+        sink: TensorSink,
+        order: List[TensorInfo],
+        ids: np.ndarray,
+        tmp: Path
+    ) -> None:
+        spec = self.spec
+        samples, seq_len = ids.shape
+        shape = (samples, seq_len, spec.hidden_size)
+        hidden = ActivationCache(tmp, 'hidden_a', shape)
+        mid = ActivationCache(tmp, 'mid', shape)
+        following = ActivationCache(tmp, 'hidden_b', shape)
+        rope = rope_tables(spec, seq_len)
+
+        # Source sur disque: seules les lignes des tokens de calibration sont lues
+        embed_info = self.by_name[f'{self.prefix}.embed_tokens.weight']
+        embed = None if self.loader is read_tensor else self.loader(embed_info)
+        view = tensor_view(embed_info) if embed is None else None
+        for s in range(samples):
+            rows = to_float32(view[ids[s]], embed_info.dtype) if embed is None else embed[ids[s]]
+            hidden[s] = rows * spec.embed_scale
+
+        layers: Dict[int, List[TensorInfo]] = {}
+        for info in order:
+            location = locate_tensor(info.name)
+            if location.stack == f'{self.prefix}.layers':
+                layers.setdefault(location.layer, []).append(info)
+
+        written = set()
+        for info in order:
+            if info.name == embed_info.name:
+                self._write(sink, info, self._rtn(info, embed) if self._quantizable(info) else None)
+                written.add(info.name)
+        del embed, view
+
+        for layer in sorted(layers):
+            quantized = self._quantize_layer(layer, layers[layer], hidden, mid, following, rope)
+            for info in layers[layer]:
+                self._write(sink, info, quantized.get(info.name))
+                written.add(info.name)
+            hidden, following = following, hidden
+            logger.info(f"  ✓ Couche {layer + 1}/{len(layers)}")
+
+        head = self.head_name()
+        head_hessian = None
+        if head and self._quantizable(self.by_name[head]):
+            norm = self._optional(f'{self.prefix}.norm.weight')
+            head_hessian = np.zeros((spec.hidden_size, spec.hidden_size), dtype=np.float32)
+            for s in range(samples):
+                x = rms_norm(hidden[s], norm, spec)
+                head_hessian += x.T @ x
+
+        for info in order:
+            if info.name in written:
+                continue
+            if info.name == head and head_hessian is not None:
+                self._write(sink, info, self._gptq(info, head_hessian))
+            else:
+                self._write(sink, info, self._rtn(info) if self._quantizable(info) else None)
+
+    def _optional(self, name: str) -> Optional[np.ndarray]:
+        info = self.by_name.get(name)
+        return None if info is None else self.loader(info)
+
+    def _quantize_layer(
+        self,
+        layer: int,
+        infos: List[TensorInfo],
+        hidden: ActivationCache,
+        mid: ActivationCache,
+        following: ActivationCache,
+        rope
+    ) -> Dict[str, QuantizedTensor]:
+        """
+        Quantifie une couche dans l'ordre du calcul: q/k/v, o, gate/up, down.
+
+        Chaque groupe de projections est calibré sur les entrées produites par
+        les projections déjà quantifiées (ordre séquentiel de GPTQ).
+        """
+        spec = self.spec
+        prefix = f'{self.prefix}.layers.{layer}.'
+        weights: Dict[str, np.ndarray] = {}
+        for info in infos:
+            if info.dtype in FLOAT_DTYPES:
+                weights[info.name[len(prefix):]] = self.loader(info)
+        for module in LINEAR_MODULES:
+            if f'{module}.weight' not in weights:
+                raise QuantizeError(f"couche {layer}: projection {module} absente")
+
+        input_norm = weights.get('input_layernorm.weight')
+        post_norm = weights.get('post_attention_layernorm.weight')
+        quantized: Dict[str, QuantizedTensor] = {}
+
+        def quantize_group(modules, hessian):
+            for module in modules:
+                info = self.by_name[self.layer_name(layer, module)]
+                if not self._quantizable(info):
+                    continue
+                result = self._gptq(info, hessian, weights[f'{module}.weight'])
+                quantized[info.name] = result
+                weights[f'{module}.weight'] = result.dequantize()
+
+        samples = len(hidden)
+        attn_size = spec.num_heads * spec.head_dim
+
+        h = np.zeros((spec.hidden_size, spec.hidden_size), dtype=np.float32)
+        for s in range(samples):
+            x = rms_norm(hidden[s], input_norm, spec)
+            h += x.T @ x
+        quantize_group(ATTENTION_INPUTS, h)
+
+        h = np.zeros((attn_size, attn_size), dtype=np.float32)
+        for s in range(samples):
+            context = attention_context(rms_norm(hidden[s], input_norm, spec), weights, spec, rope)
+            h += context.T @ context
+        quantize_group((ATTENTION_OUTPUT,), h)
+
+        h = np.zeros((spec.hidden_size, spec.hidden_size), dtype=np.float32)
+        for s in range(samples):
+            x = hidden[s]
+            context = attention_context(rms_norm(x, input_norm, spec), weights, spec, rope)
+            residual = x + _linear(context, weights, ATTENTION_OUTPUT)
+            mid[s] = residual
+            x = rms_norm(residual, post_norm, spec)
+            h += x.T @ x
+        quantize_group(MLP_INPUTS, h)
+
+        intermediate = weights[f'{MLP_OUTPUT}.weight'].shape[1]
+        h = np.zeros((intermediate, intermediate), dtype=np.float32)
+        for s in range(samples):
+            x = mlp_hidden(rms_norm(mid[s], post_norm, spec), weights, spec)
+            h += x.T @ x
+        quantize_group((MLP_OUTPUT,), h)
+
+        for s in range(samples):
+            residual = mid[s]
+            x = mlp_hidden(rms_norm(residual, post_norm, spec), weights, spec)
+            following[s] = residual + _linear(x, weights, MLP_OUTPUT)
+
+        for info in infos:
+            if info.name not in quantized and self._quantizable(info):
+                quantized[info.name] = self._rtn(info)
+        return quantized
+
+
+def _concat(parts: List[QuantizedTensor]) -> QuantizedTensor:
+    if len(parts) == 1:
+        return parts[0]
+    first = parts[0]
+    return QuantizedTensor(
+        qweight=np.concatenate([p.qweight for p in parts]),
+        scales=np.concatenate([p.scales for p in parts]),
+        qzeros=np.concatenate([p.qzeros for p in parts]),
+        bits=first.bits,
+        group_size=first.group_size,
+        shape=(sum(p.shape[0] for p in parts), first.shape[1]),
+    )
+
+
+def quantization_config(
+    bits: int,
+    group_size: int,
+    method: str,
+    layout: str = DEFAULT_LAYOUT,
+    layout_overrides: Optional[Dict[str, str]] = None
+) -> dict:
+    """Bloc `quantization_config` ajouté à config.json."""
+    config = {
+        'quant_method': method,
+        'bits': bits,
+        'group_size': group_size,
+        'sym': False,
+        'desc_act': False,
+        'packing': PACKING,
+        'layout': layout,
+    }
+    if layout_overrides:
+        # Poids rangés en disposition ligne faute de tuiles complètes
+        config['layout_overrides'] = dict(layout_overrides)
+    return config
+
+
+def quantize_directory(
+    model_dir: Path,
+    output_dir: Path,
+    bits: int,
+    group_size: int = DEFAULT_GROUP_SIZE,
+    calibration_files: Optional[List[Path]] = None,
+    samples: int = DEFAULT_SAMPLES,
+    seq_len: int = DEFAULT_SEQ_LEN,
+    damp: float = DEFAULT_DAMP,
+    cache_dir: Optional[Path] = None,
+    seed: int = DEFAULT_SEED,
+    layout: str = DEFAULT_LAYOUT,
+    random_calibration: bool = False
+) -> Dict[str, object]:
+    """
+    Quantifie un dossier de modèle vers `output_dir/model.safetensors`.
+
+    Recopie la configuration et le tokenizer, et ajoute `quantization_config`
+    à config.json. Les poids sont écrits directement dans la disposition
+    `layout` attendue par les kernels (voir weight_layouts.py). La
+    calibration suit `calibration_ids` (`random_calibration`: tokens
+    aléatoires si le corpus n'est pas tokenisable).
+
+    Returns:
+        Statistiques: octets écrits, méthode, ratio vs 16 bits, pertes
+    """
+    model_dir, output_dir = Path(model_dir), Path(output_dir)
+    quantizer = LayerQuantizer(model_dir, bits, group_size, damp, layout=layout)
+    if not quantizer.tensors:
+        raise SafetensorsError(f"{model_dir}: aucun fichier safetensors")
+
+    ids = None
+    if quantizer.calibrated:
+        ids = calibration_ids(
+            model_dir, calibration_files or [], samples, seq_len, quantizer.spec.vocab_size, seed,
+            allow_random=random_calibration
+        )
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    copy_model_files(model_dir, output_dir)
+
+    stats = quantizer.run(output_dir / 'model.safetensors', ids, cache_dir)
+    method = QUANT_METHOD if quantizer.calibrated else 'rtn'
+
+    config = dict(quantizer.config)
+    config['quantization_config'] = quantization_config(
+        bits, group_size, method, layout, quantizer.layout_overrides()
+    )
+    config.pop('torch_dtype', None)
+    with open(output_dir / 'config.json', 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    params = sum(t.numel for t in quantizer.tensors)
+    stats['method'] = method
+    stats['ratio_vs_16bit'] = stats['bytes'] / (params * 2)
+    return stats
@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 """
 ORION Model Foundry - Quantification de modèles
-Utilise optimum pour quantifier des modèles en ONNX
+Quantification GPTQ bas bit sur CPU, une couche du décodeur à la fois
 """
 
 import argparse
 import sys
 from pathlib import Path
+from typing import List, Optional
 import logging
 
 logging.basicConfig(
@@ -66,16 +67,34 @@ def quantize_model(
     model_path: Path,
     output_path: Path,
     quantization: str = 'q4',
-    verbose: bool = False
+    verbose: bool = False,
+    group_size: Optional[int] = None,
+    calibration: Optional[List[Path]] = None,
+    samples: Optional[int] = None,
+    seq_len: Optional[int] = None,
+    cache_dir: Optional[Path] = None,
+    layout: Optional[str] = None,
+    random_calibration: bool = False
 ) -> bool:
     """
     Quantifie un modèle.
     
+    Les projections du décodeur sont quantifiées par GPTQ sur des activations
+    de calibration, une couche à la fois; les poids sont empaquetés en 2/3/4/8
+    bits avec une échelle float16 par groupe. fp16 convertit simplement les poids.
+    
     Args:
         model_path: Chemin vers le modèle source
         output_path: Chemin de sortie
         quantization: Niveau de quantification (q2, q3, q4, int8, fp16)
         verbose: Mode verbose
+        group_size: Taille des groupes de quantification (défaut: 128)
+        calibration: Fichiers texte de calibration (défaut: README et recettes)
+        samples: Nombre de séquences de calibration
+        seq_len: Longueur des séquences de calibration
+        cache_dir: Dossier des activations de calibration en cache
+        layout: Disposition des poids empaquetés (voir weight_layouts.py)
+        random_calibration: Tokens aléatoires si le corpus n'est pas tokenisable
     
     Returns:
         True si succès, False sinon
@@ -99,23 +118,38 @@ def quantize_model(
             logger.error(f"❌ Modèle source introuvable: {model_path}")
             return False
         
-        # Créer le dossier de sortie
-        output_path.mkdir(parents=True, exist_ok=True)
-        
         logger.info(f"📥 Modèle source: {model_path}")
         logger.info(f"📤 Sortie: {output_path}")
         
-        # Note: L'implémentation complète nécessiterait:
-        # 1. Charger le modèle avec transformers
-        # 2. Le convertir en ONNX avec optimum
-        # 3. Appliquer la quantification
-        # 4. Sauvegarder le résultat
+        from quantize_layers import (
+            DEFAULT_GROUP_SIZE, DEFAULT_SAMPLES, DEFAULT_SEQ_LEN, quantize_directory
+        )
+        from weight_layouts import DEFAULT_LAYOUT
         
-        logger.info("ℹ️  Pour quantifier, installez optimum:")
-        logger.info("    pip install optimum[onnxruntime]")
-        logger.info("    optimum-cli export onnx --model {model_path} --task causal-lm {output_path}")
+        stats = quantize_directory(
+            model_path,
+            output_path,
+            bits=quant_info['bits'],
+            group_size=group_size or DEFAULT_GROUP_SIZE,
+            calibration_files=calibration,
+            samples=samples or DEFAULT_SAMPLES,
+            seq_len=seq_len or DEFAULT_SEQ_LEN,
+            cache_dir=cache_dir,
+            layout=layout or DEFAULT_LAYOUT,
+            random_calibration=random_calibration
+        )
+        
+        promised = estimate_output_size(1.0, quantization) if quantization != 'fp16' else 1.0
+        logger.info(f"📦 Méthode: {stats['method']}, disposition: {layout or DEFAULT_LAYOUT}")
+        logger.info(
+            f"📦 Taille: {stats['bytes'] / (1024 * 1024):.1f} Mo "
+            f"({stats['ratio_vs_16bit']:.1%} du modèle en 16 bits, annoncé {promised:.0%})"
+        )
+        if verbose:
+            for name, loss in stats['losses'].items():
+                logger.debug(f"  {name}: perte {loss:.4g}")
         
-        logger.info("✅ Validation réussie - Prêt pour la quantification")
+        logger.info("✅ Quantification terminée")
         return True
         
     except Exception as e:
@@ -150,6 +184,12 @@ Exemples:
   # Quantification ultra-compacte en q2
   python quantize_model.py my-model/ output/my-model-q2 --quantization q2
 
+  # Calibration sur un corpus local, groupes de 64
+  python quantize_model.py my-model/ output/my-model-q4 --calibration corpus/fr.txt --group-size 64
+
+  # Poids prêts pour les kernels WebGPU (tuiles de 8 sorties)
+  python quantize_model.py my-model/ output/my-model-q4 --layout tile8
+
   # Lister les niveaux disponibles
   python quantize_model.py --list-levels
         """
@@ -177,6 +217,50 @@ Exemples:
         help="Niveau de quantification (défaut: q4)"
     )
     
+    parser.add_argument(
+        '--group-size',
+        type=int,
+        help="Taille des groupes de quantification (défaut: 128)"
+    )
+    
+    parser.add_argument(
+        '--calibration',
+        type=Path,
+        action='append',
+        default=[],
+        help="Fichier texte de calibration (répétable; défaut: README et recettes)"
+    )
+    
+    parser.add_argument(
+        '--random-calibration',
+        action='store_true',
+        help="Tokens aléatoires si le corpus n'est pas tokenisable (qualité dégradée)"
+    )
+    
+    parser.add_argument(
+        '--samples',
+        type=int,
+        help="Nombre de séquences de calibration (défaut: 32)"
+    )
+    
+    parser.add_argument(
+        '--seq-len',
+        type=int,
+        help="Longueur des séquences de calibration (défaut: 256)"
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        type=Path,
+        help="Dossier des activations de calibration (défaut: temporaire système)"
+    )
+    
+    parser.add_argument(
+        '--layout',
+        choices=['row', 'row-inline', 'tile8', 'tile8-inline'],
+        help="Disposition des poids empaquetés (défaut: row)"
+    )
+    
     parser.add_argument(
         '--list-levels',
         action='store_true',
@@ -209,7 +293,14 @@ Exemples:
         model_path=args.model,
         output_path=args.output,
         quantization=args.quantization,
-        verbose=args.verbose
+        verbose=args.verbose,
+        group_size=args.group_size,
+        calibration=args.calibration,
+        samples=args.samples,
+        seq_len=args.seq_len,
+        cache_dir=args.cache_dir,
+        layout=args.layout,
+        random_calibration=args.random_calibration
     )
     
     sys.exit(0 if success else 1)
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Accès bas niveau aux fichiers safetensors
+Lecture des en-têtes et copie des tenseurs en streaming, sans charger le modèle
+"""
+
+import hashlib
+import json
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+
+# Taille en octets d'un élément pour chaque dtype safetensors
+DTYPE_SIZES = {
+    'F64': 8,
+    'F32': 4,
+    'F16': 2,
+    'BF16': 2,
+    'F8_E4M3': 1,
+    'F8_E5M2': 1,
+    'I64': 8,
+    'I32': 4,
+    'I16': 2,
+    'I8': 1,
+    'U64': 8,
+    'U32': 4,
+    'U16': 2,
+    'U8': 1,
+    'BOOL': 1,
+}
+
+INDEX_FILENAME = 'model.safetensors.index.json'
+HEADER_ALIGNMENT = 8
+MAX_HEADER_SIZE = 100 * 1024 * 1024
+COPY_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+class SafetensorsError(ValueError):
+    """En-tête ou contenu safetensors invalide."""
+
+
+@dataclass(frozen=True)
+class TensorInfo:
+    """Emplacement d'un tenseur dans un fichier safetensors."""
+
+    name: str
+    dtype: str
+    shape: Tuple[int, ...]
+    file: Path
+    data_start: int
+    nbytes: int
+
+    @property
+    def numel(self) -> int:
+        count = 1
+        for dim in self.shape:
+            count *= dim
+        return count
+
+
+def parse_header(
+    payload: bytes,
+    data_size: int,
+    name: str
+) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """
+    Décode et valide le JSON d'en-tête d'un fichier safetensors.
+
+    Args:
+        payload: Octets JSON de l'en-tête (après les 8 octets de longueur)
+        data_size: Taille de la zone de données (fichier moins en-tête)
+        name: Nom du fichier, pour les messages d'erreur
+
+    Returns:
+        (entrées des tenseurs, métadonnées)
+
+    Raises:
+        SafetensorsError: si l'en-tête est illisible ou incohérent
+    """
+    try:
+        header = json.loads(payload)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise SafetensorsError(f"{name}: en-tête JSON illisible ({e})") from e
+
+    if not isinstance(header, dict):
+        raise SafetensorsError(f"{name}: l'en-tête doit être un objet JSON")
+
+    metadata = header.pop('__metadata__', None) or {}
+
+    for tensor_name, entry in header.items():
+        dtype = entry.get('dtype')
+        shape = entry.get('shape')
+        offsets = entry.get('data_offsets')
+
+        if dtype not in DTYPE_SIZES:
+            raise SafetensorsError(f"{name}: dtype inconnu pour {tensor_name}: {dtype}")
+        if not isinstance(shape, list) or not isinstance(offsets, list) or len(offsets) != 2:
+            raise SafetensorsError(f"{name}: entrée malformée pour {tensor_name}")
+
+        begin, end = offsets
+        numel = 1
+        for dim in shape:
+            numel *= dim
+        if not 0 <= begin <= end <= data_size:
+            raise SafetensorsError(f"{name}: offsets hors du fichier pour {tensor_name}")
+        if end - begin != numel * DTYPE_SIZES[dtype]:
+            raise SafetensorsError(f"{name}: taille incohérente pour {tensor_name}")
+
+    return header, metadata
+
+
+def read_header(path: Path) -> Tuple[Dict[str, dict], int, Dict[str, str]]:
+    """
+    Lit et valide l'en-tête d'un fichier safetensors.
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        (entrées des tenseurs, offset du début des données, métadonnées)
+
+    Raises:
+        SafetensorsError: si l'en-tête est tronqué, illisible ou incohérent
+    """
+    path = Path(path)
+    file_size = path.stat().st_size
+
+    with open(path, 'rb') as f:
+        raw_length = f.read(8)
+        if len(raw_length) != 8:
+            raise SafetensorsError(f"{path.name}: fichier tronqué (en-tête absent)")
+
+        (header_length,) = struct.unpack('<Q', raw_length)
+        if header_length > MAX_HEADER_SIZE or 8 + header_length > file_size:
+            raise SafetensorsError(f"{path.name}: taille d'en-tête invalide ({header_length})")
+
+        payload = f.read(header_length)
+
+    data_offset = 8 + header_length
+    header, metadata = parse_header(payload, file_size - data_offset, path.name)
+    return header, data_offset, metadata
+
+
+def list_tensors(path: Path) -> List[TensorInfo]:
+    """Liste les tenseurs d'un fichier safetensors, dans l'ordre des données."""
+    path = Path(path)
+    header, data_offset, _ = read_header(path)
+
+    tensors = [
+        TensorInfo(
+            name=name,
+            dtype=entry['dtype'],
+            shape=tuple(entry['shape']),
+            file=path,
+            data_start=data_offset + entry['data_offsets'][0],
+            nbytes=entry['data_offsets'][1] - entry['data_offsets'][0],
+        )
+        for name, entry in header.items()
+    ]
+    tensors.sort(key=lambda t: t.data_start)
+    return tensors
+
+
+def find_weight_files(model_dir: Path) -> List[Path]:
+    """
+    Trouve les fichiers de poids safetensors d'un modèle.
+
+    Utilise l'index `model.safetensors.index.json` s'il existe, sinon tous
+    les fichiers `*.safetensors` du dossier.
+    """
+    model_dir = Path(model_dir)
+    index_path = model_dir / INDEX_FILENAME
+
+    if index_path.exists():
+        with open(index_path, 'r', encoding='utf-8') as f:
+            weight_map = json.load(f).get('weight_map', {})
+        filenames = list(dict.fromkeys(weight_map.values()))
+        return [model_dir / name for name in filenames]
+
+    return sorted(model_dir.glob('*.safetensors'))
+
+
+def list_model_tensors(model_dir: Path) -> List[TensorInfo]:
+    """Liste les tenseurs de tous les fichiers de poids d'un modèle."""
+    tensors: List[TensorInfo] = []
+    for path in find_weight_files(model_dir):
+        tensors.extend(list_tensors(path))
+    return tensors
+
+
+def iter_tensor_chunks(
+    handle: BinaryIO,
+    info: TensorInfo,
+    chunk_size: int = COPY_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Lit les octets d'un tenseur par blocs depuis un fichier déjà ouvert."""
+    handle.seek(info.data_start)
+    remaining = info.nbytes
+
+    while remaining > 0:
+        chunk = handle.read(min(chunk_size, remaining))
+        if not chunk:
+            raise SafetensorsError(f"{info.file.name}: données tronquées pour {info.name}")
+        remaining -= len(chunk)
+        yield chunk
+
+
+def read_tensor_bytes(info: TensorInfo) -> bytes:
+    """Lit les octets bruts d'un tenseur."""
+    with open(info.file, 'rb') as f:
+        return b''.join(iter_tensor_chunks(f, info))
+
+
+def build_header(
+    entries: List[Tuple[str, str, Tuple[int, ...], int]],
+    metadata: Optional[Dict[str, str]] = None
+) -> bytes:
+    """
+    Construit l'en-tête binaire (longueur + JSON aligné) d'un fichier safetensors.
+
+    Args:
+        entries: (nom, dtype, shape, nbytes) dans l'ordre d'écriture des données
+        metadata: Métadonnées `__metadata__` optionnelles (valeurs str)
+    """
+    header: Dict[str, dict] = {}
+    if metadata:
+        header['__metadata__'] = {key: str(value) for key, value in metadata.items()}
+
+    offset = 0
+    for name, dtype, shape, nbytes in entries:
+        header[name] = {
+            'dtype': dtype,
+            'shape': list(shape),
+            'data_offsets': [offset, offset + nbytes],
+        }
+        offset += nbytes
+
+    payload = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    payload += b' ' * (-len(payload) % HEADER_ALIGNMENT)
+    return struct.pack('<Q', len(payload)) + payload
+
+
+class SafetensorsWriter:
+    """
+    Écrit un fichier safetensors en streaming.
+
+    L'en-tête est écrit d'emblée à partir des entrées annoncées, puis les
+    données sont ajoutées bloc par bloc dans le même ordre. Le SHA-256 du
+    fichier est calculé au fil de l'écriture.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        entries: List[Tuple[str, str, Tuple[int, ...], int]],
+        metadata: Optional[Dict[str, str]] = None
+    ):
+        self.path = Path(path)
+        self.expected_data_bytes = sum(entry[3] for entry in entries)
+        self.data_bytes = 0
+        self._sha256 = hashlib.sha256()
+
+        header = build_header(entries, metadata)
+        self.header_bytes = len(header)
+        self._handle = open(self.path, 'wb')
+        self._handle.write(header)
+        self._sha256.update(header)
+
+    def write(self, data: bytes) -> None:
+        """Ajoute des octets de données de tenseur."""
+        self._handle.write(data)
+        self._sha256.update(data)
+        self.data_bytes += len(data)
+
+    def close(self) -> None:
+        """Ferme le fichier et vérifie que toutes les données annoncées ont été écrites."""
+        if self._handle.closed:
+            return
+        self._handle.close()
+        if self.data_bytes != self.expected_data_bytes:
+            raise SafetensorsError(
+                f"{self.path.name}: {self.data_bytes} octets écrits, "
+                f"{self.expected_data_bytes} attendus"
+            )
+
+    @property
+    def size_bytes(self) -> int:
+        return self.header_bytes + self.data_bytes
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    def __enter__(self) -> 'SafetensorsWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self._handle.close()
+            return
+        self.close()
+
+
+class SafetensorsPositionedWriter:
+    """
+    Écrit un fichier safetensors dont les tenseurs arrivent dans un ordre quelconque.
+
+    L'en-tête fixe l'offset de chaque tenseur: chacun est écrit directement à
+    sa place. Le SHA-256 est calculé à la fermeture, en relisant le fichier.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        entries: List[Tuple[str, str, Tuple[int, ...], int]],
+        metadata: Optional[Dict[str, str]] = None
+    ):
+        self.path = Path(path)
+        header = build_header(entries, metadata)
+        self.header_bytes = len(header)
+        self.data_bytes = sum(entry[3] for entry in entries)
+        self._slots: Dict[str, Tuple[int, int]] = {}
+        offset = self.header_bytes
+        for name, _, _, nbytes in entries:
+            self._slots[name] = (offset, nbytes)
+            offset += nbytes
+        self._pending = set(self._slots)
+        self._sha256: Optional[str] = None
+
+        self._handle = open(self.path, 'wb')
+        self._handle.write(header)
+        self._handle.truncate(self.header_bytes + self.data_bytes)
+
+    def write_tensor(self, name: str, data: bytes) -> None:
+        """Écrit les octets d'un tenseur annoncé, à son offset."""
+        offset, nbytes = self._slots[name]
+        if name not in self._pending:
+            raise SafetensorsError(f"{self.path.name}: {name} écrit deux fois")
+        if len(data) != nbytes:
+            raise SafetensorsError(
+                f"{self.path.name}: {name}: {len(data)} octets, {nbytes} attendus"
+            )
+        self._handle.seek(offset)
+        self._handle.write(data)
+        self._pending.discard(name)
+
+    @property
+    def complete(self) -> bool:
+        return not self._pending
+
+    def close(self) -> None:
+        """Ferme le fichier, vérifie que tous les tenseurs sont écrits et calcule le SHA-256."""
+        if self._handle.closed:
+            return
+        self._handle.close()
+        if self._pending:
+            raise SafetensorsError(f"{self.path.name}: {len(self._pending)} tenseurs non écrits")
+
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        self._sha256 = digest.hexdigest()
+
+    @property
+    def size_bytes(self) -> int:
+        return self.header_bytes + self.data_bytes
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256
+
+    def __enter__(self) -> 'SafetensorsPositionedWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self._handle.close()
+            return
+        self.close()
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Serveur miroir local de modèles
+Sert les dossiers de modèles shardés avec requêtes Range, ETags forts issus
+des manifestes, variantes précompressées et simulation de débit/latence.
+Sert de CDN local pour tester le chargement progressif (ProgressiveLoader).
+"""
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import sys
+import time
+from email.utils import formatdate
+from pathlib import Path
+import logging
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from verify_model import MANIFEST_FILENAME
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+
+# Variantes précompressées, par ordre de préférence
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+STATUS_TEXT = {
+    200: 'OK',
+    204: 'No Content',
+    206: 'Partial Content',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    416: 'Range Not Satisfiable',
+}
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, HEAD, OPTIONS',
+    'Access-Control-Allow-Headers': 'Range, If-None-Match, If-Range',
+    'Access-Control-Expose-Headers': (
+        'Content-Range, Content-Length, Content-Encoding, ETag, Accept-Ranges'
+    ),
+}
+
+
+class TokenBucket:
+    """Limiteur de débit partagé (octets/seconde) entre toutes les connexions."""
+
+    def __init__(self, rate_bytes: float, burst_bytes: int):
+        self.rate = rate_bytes
+        self.capacity = burst_bytes
+        self.tokens = float(burst_bytes)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, nbytes: int) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= nbytes:
+                    self.tokens -= nbytes
+                    return
+                await asyncio.sleep((nbytes - self.tokens) / self.rate)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interprète un en-tête `Range: bytes=...` à plage unique.
+
+    Returns:
+        (début, fin incluse), ou None si la plage est invalide ou multiple
+
+    Raises:
+        ValueError: si la plage est syntaxiquement valide mais insatisfiable
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+
+    start_text, separator, end_text = spec.strip().partition('-')
+    if not separator or not all(text.isdigit() for text in (start_text, end_text) if text):
+        return None
+
+    if not start_text:
+        if not end_text:
+            return None
+        suffix = int(end_text)
+        if suffix == 0:
+            raise ValueError("plage vide")
+        return max(0, size - suffix), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size:
+        raise ValueError("plage hors du fichier")
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class ModelServer:
+    """
+    Serveur HTTP/1.1 asynchrone (GET, HEAD, OPTIONS) pour dossiers de modèles.
+
+    Chaque connexion est servie par sa propre tâche; les lectures disque
+    sont faites dans un exécuteur pour ne pas bloquer la boucle.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        latency_ms: float = 0.0,
+        bandwidth_mbps: Optional[float] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        self.root = root.resolve()
+        self.latency = latency_ms / 1000
+        self.chunk_size = chunk_size
+        self.bucket = None
+        if bandwidth_mbps:
+            rate = bandwidth_mbps * 1_000_000 / 8
+            self.bucket = TokenBucket(rate, burst_bytes=max(chunk_size, int(rate / 10)))
+        self._manifest_cache: Dict[Path, Tuple[float, Dict[str, str]]] = {}
+        self.stats = {'requests': 0, 'bytes_sent': 0}
+
+    def resolve(self, url_path: str) -> Optional[Path]:
+        """Traduit un chemin d'URL en fichier sous la racine (None si en dehors)."""
+        relative = unquote(urlsplit(url_path).path).lstrip('/')
+        path = (self.root / relative).resolve()
+        if path != self.root and self.root not in path.parents:
+            return None
+        return path
+
+    def manifest_hashes(self, directory: Path) -> Dict[str, str]:
+        """SHA-256 des shards et du conteneur déclarés dans le manifeste (mis en cache)."""
+        manifest_path = directory / MANIFEST_FILENAME
+        try:
+            mtime = manifest_path.stat().st_mtime
+        except OSError:
+            return {}
+
+        cached = self._manifest_cache.get(manifest_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            entries = list(manifest.get('shards', []))
+            if 'pack' in manifest:
+                entries.append(manifest['pack'])
+            hashes = {s['filename']: s['sha256'] for s in entries if s.get('sha256')}
+        except (OSError, ValueError, KeyError):
+            hashes = {}
+
+        self._manifest_cache[manifest_path] = (mtime, hashes)
+        return hashes
+
+    def etag(self, path: Path, source: Path, encoding: Optional[str]) -> str:
+        """ETag fort depuis le manifeste, sinon faible depuis taille et date de la variante."""
+        sha256 = self.manifest_hashes(path.parent).get(path.name)
+        if sha256:
+            suffix = f"-{encoding}" if encoding else ''
+            return f'"sha256-{sha256}{suffix}"'
+        stat = source.stat()
+        return f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def pick_variant(
+        self,
+        path: Path,
+        accept_encoding: str,
+        has_range: bool
+    ) -> Tuple[Path, Optional[str]]:
+        """Choisit une variante précompressée acceptée par le client (hors requêtes Range)."""
+        if has_range:
+            return path, None
+        accepted = {token.split(';')[0].strip() for token in accept_encoding.split(',')}
+        for encoding, suffix in ENCODINGS:
+            candidate = path.with_name(path.name + suffix)
+            if encoding in accepted and candidate.is_file():
+                return candidate, encoding
+        return path, None
+
+    async def handle_client(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Sert les requêtes d'une connexion (keep-alive)."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split(' ')
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        key, _, value = line.partition(':')
+                        headers[key.strip().lower()] = value.strip()
+
+                if len(parts) != 3:
+                    await self.send(writer, 400, {}, b'', close=True)
+                    return
+
+                method, target, version = parts
+                keep_alive = (
+                    headers.get('connection', '').lower() != 'close'
+                    and version == 'HTTP/1.1'
+                )
+                await self.respond(writer, method, target, headers, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def respond(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        target: str,
+        headers: Dict[str, str],
+        keep_alive: bool
+    ) -> None:
+        """Construit et envoie la réponse à une requête."""
+        started = time.monotonic()
+        self.stats['requests'] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == 'OPTIONS':
+            await self.send(writer, 204, {}, b'', close=not keep_alive)
+            return
+        if method not in ('GET', 'HEAD'):
+            await self.send(writer, 405, {'Allow': 'GET, HEAD, OPTIONS'}, b'', close=not keep_alive)
+            return
+
+        path = self.resolve(target)
+        if path is None:
+            await self.send(writer, 403, {}, b'', close=not keep_alive)
+            return
+        if path.is_dir():
+            path = path / MANIFEST_FILENAME
+        if not path.is_file():
+            await self.send(writer, 404, {}, b'', close=not keep_alive)
+            return
+
+        range_header = headers.get('range')
+        source, encoding = self.pick_variant(
+            path, headers.get('accept-encoding', ''), bool(range_header)
+        )
+        etag = self.etag(path, source, encoding)
+        size = source.stat().st_size
+
+        response_headers = {
+            'Accept-Ranges': 'bytes',
+            'ETag': etag,
+            'Content-Type': mimetypes.guess_type(path.name)[0] or 'application/octet-stream',
+            'Cache-Control': (
+                'public, max-age=31536000, immutable' if etag.startswith('"') else 'no-cache'
+            ),
+            'Vary': 'Accept-Encoding',
+        }
+        if encoding:
+            response_headers['Content-Encoding'] = encoding
+
+        if headers.get('if-none-match') == etag:
+            await self.send(writer, 304, response_headers, b'', close=not keep_alive)
+            return
+
+        # If-Range: la plage n'est honorée que si la représentation n'a pas changé
+        if range_header and headers.get('if-range', etag) != etag:
+            range_header = None
+
+        status, start, end = 200, 0, size - 1
+        if range_header:
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                response_headers['Content-Range'] = f"bytes */{size}"
+                await self.send(writer, 416, response_headers, b'', close=not keep_alive)
+                return
+            if byte_range is not None:
+                status, (start, end) = 206, byte_range
+                response_headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+
+        length = end - start + 1 if size else 0
+        response_headers['Content-Length'] = str(length)
+        await self.send_head(writer, status, response_headers, close=not keep_alive)
+
+        if method == 'GET' and length:
+            await self.stream_file(writer, source, start, length)
+
+        logger.debug(
+            f"{method} {target} {status} {length} octets "
+            f"en {time.monotonic() - started:.3f}s"
+        )
+
+    async def stream_file(
+        self,
+        writer: asyncio.StreamWriter,
+        path: Path,
+        start: int,
+        length: int
+    ) -> None:
+        """Envoie une plage de fichier par blocs, au débit simulé."""
+        loop = asyncio.get_running_loop()
+
+        def read_chunk(handle, offset: int, size: int) -> bytes:
+            handle.seek(offset)
+            return handle.read(size)
+
+        with open(path, 'rb') as handle:
+            offset, remaining = start, length
+            while remaining > 0:
+                size = min(self.chunk_size, remaining)
+                chunk = await loop.run_in_executor(None, read_chunk, handle, offset, size)
+                if not chunk:
+                    break
+                if self.bucket:
+                    await self.bucket.consume(len(chunk))
+                writer.write(chunk)
+                await writer.drain()
+                offset += len(chunk)
+                remaining -= len(chunk)
+                self.stats['bytes_sent'] += len(chunk)
+
+    async def send_head(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: Dict[str, str],
+        close: bool
+    ) -> None:
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+        all_headers = {
+            'Date': formatdate(usegmt=True),
+            'Server': 'ORION-Model-Mirror',
+            'Connection': 'close' if close else 'keep-alive',
+            **CORS_HEADERS,
+            **headers,
+        }
+        lines.extend(f"{key}: {value}" for key, value in all_headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+
+    async def send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        close: bool
+    ) -> None:
+        await self.send_head(writer, status, {**headers, 'Content-Length': str(len(body))}, close)
+        if body:
+            writer.write(body)
+            await writer.drain()
+
+    async def serve(self, host: str, port: int) -> None:
+        """Démarre le serveur et sert jusqu'à interruption."""
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_HEADER_BYTES)
+        addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+        logger.info(f"🌐 Miroir de modèles: {self.root} sur {addresses}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Serveur miroir local de modèles",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Servir public/models sur le port 8765
+  python serve_models.py ../public/models
+
+  # Simuler une connexion 4G (20 Mbit/s, 80 ms)
+  python serve_models.py ../public/models --bandwidth 20 --latency 80
+
+  # Tester un dossier shardé avec curl
+  curl -r 0-1023 -D - -o /dev/null \\
+      http://localhost:8765/ORION-Dev-Polyglot-v1-q4/shard_00.safetensors
+        """
+    )
+
+    parser.add_argument(
+        'root',
+        type=Path,
+        help="Dossier racine contenant les modèles shardés"
+    )
+
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help="Adresse d'écoute (défaut: 127.0.0.1)"
+    )
+
+    parser.add_argument(
+        '--port',
+        '-p',
+        type=int,
+        default=8765,
+        help="Port (défaut: 8765)"
+    )
+
+    parser.add_argument(
+        '--bandwidth',
+        type=float,
+        help="Débit total simulé en Mbit/s, partagé entre les connexions"
+    )
+
+    parser.add_argument(
+        '--latency',
+        type=float,
+        default=0.0,
+        help="Latence ajoutée avant chaque réponse, en ms"
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // 1024,
+        help=f"Taille des blocs envoyés en Ko (défaut: {DEFAULT_CHUNK_SIZE // 1024})"
+    )
+
+    parser.add_argument(
+        '--verbose',
+        '-v',
+        action='store_true',
+        help="Journaliser chaque requête"
+    )
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    if not args.root.is_dir():
+        logger.error(f"❌ Dossier introuvable: {args.root}")
+        sys.exit(1)
+
+    server = ModelServer(
+        args.root,
+        latency_ms=args.latency,
+        bandwidth_mbps=args.bandwidth,
+        chunk_size=args.chunk_size * 1024
+    )
+
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        logger.info(
+            f"🛑 Arrêt: {server.stats['requests']} requêtes, "
+            f"{server.stats['bytes_sent'] / (1024 * 1024):.1f} Mo envoyés"
+        )
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,9 +5,26 @@ Découpe un modèle en plusieurs fichiers pour chargement progressif
 """
 
 import argparse
+import hashlib
+import json
+import shutil
 import sys
+from datetime import datetime
 from pathlib import Path
 import logging
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+from architectures import PRE_LAYER_ROLES, CanonicalTensor, canonical_name
+from compile_tokenizer import TOKENIZER_FILENAME, TokenizerCompileError, compile_tokenizer_file
+from memory_accounting import MemoryAccountant, MemoryCeilingExceeded
+from profiling import Profiler
+from safetensors_io import (
+    INDEX_FILENAME,
+    SafetensorsWriter,
+    TensorInfo,
+    iter_tensor_chunks,
+    list_model_tensors,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,70 +33,560 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+MANIFEST_FILENAME = 'shard_manifest.json'
+
+# Fichiers de poids du modèle source qui ne sont pas recopiés tels quels
+WEIGHT_SUFFIXES = ('.safetensors', '.bin', '.pt', '.pth')
+
+# Copies identiques plus petites (normes, biais): gain négligeable, non dédupliquées
+DUPLICATE_MIN_BYTES = 64 * 1024
+
+# Octets lus en tête et en fin de tenseur pour écarter vite les faux doublons
+DUPLICATE_PROBE_BYTES = 64 * 1024
+
+
 def estimate_shard_count(model_size_mb: float, shard_size_mb: int) -> int:
     """Estime le nombre de shards nécessaires."""
     return max(1, int(model_size_mb / shard_size_mb))
 
 
+# Le décodeur texte d'abord: il est utilisable avant la fin des autres tours
+DEFAULT_COMPONENT_ORDER = ('language', 'vision', 'audio')
+
+
+def locate_tensor(name: str) -> CanonicalTensor:
+    """
+    Situe un tenseur dans l'architecture: tour, pile de couches, couche et
+    rôle canonique (voir architectures.py; résultat mis en cache par nom).
+    """
+    return canonical_name(name)
+
+
+def layer_index(name: str) -> Optional[int]:
+    """Extrait le numéro de couche d'un nom de tenseur (ex: model.layers.3.mlp → 3)."""
+    return locate_tensor(name).layer
+
+
+def _probe_digest(handle: BinaryIO, tensor: TensorInfo) -> bytes:
+    """Empreinte du début et de la fin d'un tenseur (tout le tenseur s'il est petit)."""
+    if tensor.nbytes <= 2 * DUPLICATE_PROBE_BYTES:
+        return _content_digest(handle, tensor)
+    digest = hashlib.sha256()
+    for offset in (0, tensor.nbytes - DUPLICATE_PROBE_BYTES):
+        handle.seek(tensor.data_start + offset)
+        digest.update(handle.read(DUPLICATE_PROBE_BYTES))
+    return digest.digest()
+
+
+def _content_digest(handle: BinaryIO, tensor: TensorInfo) -> bytes:
+    digest = hashlib.sha256()
+    for chunk in iter_tensor_chunks(handle, tensor):
+        digest.update(chunk)
+    return digest.digest()
+
+
+def find_duplicates(
+    tensors: List[TensorInfo],
+    min_bytes: int = DUPLICATE_MIN_BYTES
+) -> Dict[str, str]:
+    """
+    Tenseurs en double d'un modèle: alias (même emplacement dans le même
+    fichier, comme des embeddings liés à lm_head) et copies identiques octet
+    pour octet.
+
+    Seuls les tenseurs de même dtype et de même forme sont comparés: d'abord
+    leur emplacement (sans lecture), puis le début et la fin de leurs données,
+    enfin le SHA-256 complet des candidats restants. Le tenseur conservé est
+    celui lu en premier (embeddings avant lm_head, sinon ordre des en-têtes).
+
+    Returns:
+        {alias: tenseur conservé}
+    """
+    groups: Dict[Tuple[str, Tuple[int, ...]], List[TensorInfo]] = {}
+    for tensor in tensors:
+        if tensor.nbytes:
+            groups.setdefault((tensor.dtype, tensor.shape), []).append(tensor)
+
+    duplicates: Dict[str, str] = {}
+    handles: Dict[Path, BinaryIO] = {}
+
+    def handle_for(tensor: TensorInfo) -> BinaryIO:
+        handle = handles.get(tensor.file)
+        if handle is None:
+            handle = handles[tensor.file] = open(tensor.file, 'rb')
+        return handle
+
+    try:
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            group.sort(key=lambda t: locate_tensor(t.name).role not in PRE_LAYER_ROLES)
+
+            kept_at: Dict[Tuple[Path, int], TensorInfo] = {}
+            distinct = []
+            for tensor in group:
+                kept = kept_at.setdefault((Path(tensor.file), tensor.data_start), tensor)
+                if kept is tensor:
+                    distinct.append(tensor)
+                else:
+                    duplicates[tensor.name] = kept.name
+
+            candidates = [distinct] if len(distinct) > 1 and distinct[0].nbytes >= min_bytes else []
+            for digest in (_probe_digest, _content_digest):
+                buckets: Dict[Tuple[int, bytes], List[TensorInfo]] = {}
+                for i, candidate in enumerate(candidates):
+                    for tensor in candidate:
+                        key = (i, digest(handle_for(tensor), tensor))
+                        buckets.setdefault(key, []).append(tensor)
+                candidates = [bucket for bucket in buckets.values() if len(bucket) > 1]
+
+            for bucket in candidates:
+                for tensor in bucket[1:]:
+                    duplicates[tensor.name] = bucket[0].name
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    return duplicates
+
+
+def _pack(
+    groups: List[List[TensorInfo]],
+    shard_size_bytes: Optional[int]
+) -> List[List[TensorInfo]]:
+    """Regroupe des groupes ordonnés en shards, sans couper un groupe qui tient dans un shard."""
+    shards: List[List[TensorInfo]] = []
+    current: List[TensorInfo] = []
+    current_bytes = 0
+
+    for group in groups:
+        group_bytes = sum(t.nbytes for t in group)
+
+        if shard_size_bytes is None:
+            current.extend(group)
+            continue
+
+        if current and current_bytes + group_bytes > shard_size_bytes:
+            shards.append(current)
+            current, current_bytes = [], 0
+
+        if group_bytes <= shard_size_bytes:
+            current.extend(group)
+            current_bytes += group_bytes
+            continue
+
+        for tensor in group:
+            if current and current_bytes + tensor.nbytes > shard_size_bytes:
+                shards.append(current)
+                current, current_bytes = [], 0
+            current.append(tensor)
+            current_bytes += tensor.nbytes
+
+    if current:
+        shards.append(current)
+
+    return shards
+
+
+def plan_components(
+    tensors: List[TensorInfo],
+    shard_size_bytes: int,
+    component_sizes: Optional[Dict[str, int]] = None,
+    component_order: Tuple[str, ...] = DEFAULT_COMPONENT_ORDER
+) -> Dict[str, List[List[TensorInfo]]]:
+    """
+    Répartit les tenseurs en groupes de shards, un groupe par tour du modèle.
+
+    Dans chaque tour, les tenseurs hors couches (embeddings, normes, têtes,
+    projecteur) viennent en premier car ils sont nécessaires au premier
+    passage, puis chaque pile de couches dans l'ordre. Une couche n'est
+    coupée entre deux shards que si elle dépasse seule la taille cible.
+
+    Args:
+        tensors: Tenseurs du modèle
+        shard_size_bytes: Taille cible par défaut d'un shard
+        component_sizes: Taille cible par tour (0: la tour tient dans un seul shard)
+        component_order: Ordre de chargement des tours
+
+    Returns:
+        {tour: shards}, dans l'ordre de chargement
+    """
+    component_sizes = component_sizes or {}
+    components: Dict[str, Dict[Tuple[Optional[str], Optional[int]], List[TensorInfo]]] = {}
+
+    for tensor in tensors:
+        location = locate_tensor(tensor.name)
+        groups = components.setdefault(location.component, {(None, None): []})
+        groups.setdefault((location.stack, location.layer), []).append(tensor)
+
+    plans: Dict[str, List[List[TensorInfo]]] = {}
+    ordered = sorted(
+        components,
+        key=lambda c: component_order.index(c) if c in component_order else len(component_order)
+    )
+    for component in ordered:
+        groups = components[component]
+        stacks = list(dict.fromkeys(stack for stack, _ in groups if stack is not None))
+        # Hors couches: embeddings en tête du premier shard, puis normes, têtes, projecteur
+        first_pass = sorted(
+            groups[(None, None)], key=lambda t: locate_tensor(t.name).role not in PRE_LAYER_ROLES
+        )
+        ordered_groups = [first_pass] + [
+            groups[key] for stack in stacks
+            for key in sorted((k for k in groups if k[0] == stack), key=lambda k: k[1])
+        ]
+        size = component_sizes.get(component, shard_size_bytes)
+        plans[component] = _pack([g for g in ordered_groups if g], size or None)
+
+    return plans
+
+
+def plan_shards(tensors: List[TensorInfo], shard_size_bytes: int) -> List[List[TensorInfo]]:
+    """
+    Répartit les tenseurs en shards d'au plus `shard_size_bytes`.
+
+    Les shards d'une même tour sont contigus et ne mélangent jamais deux
+    tours (voir `plan_components`).
+    """
+    components = plan_components(tensors, shard_size_bytes)
+    return [shard for shards in components.values() for shard in shards]
+
+
+def shard_component(shard_tensors: List[TensorInfo]) -> str:
+    """Tour à laquelle appartient un shard."""
+    return locate_tensor(shard_tensors[0].name).component
+
+
+def shard_filenames(plan: List[List[TensorInfo]]) -> List[str]:
+    """
+    Noms des fichiers shards: `shard_XX` pour un modèle à une seule tour,
+    `<tour>_XX` (numérotation propre à chaque tour) sinon.
+    """
+    components = [shard_component(shard) for shard in plan]
+    if len(set(components)) <= 1:
+        return [f"shard_{idx:02d}.safetensors" for idx in range(len(plan))]
+
+    counters: Dict[str, int] = {}
+    filenames = []
+    for component in components:
+        idx = counters.get(component, 0)
+        counters[component] = idx + 1
+        filenames.append(f"{component}_{idx:02d}.safetensors")
+    return filenames
+
+
+def _layer_range(shard_tensors: List[TensorInfo]) -> str:
+    layers = [idx for idx in (layer_index(t.name) for t in shard_tensors) if idx is not None]
+    return f"{min(layers)}-{max(layers)}" if layers else "N/A"
+
+
+def shard_entry(
+    shard_idx: int,
+    filename: str,
+    shard_tensors: List[TensorInfo],
+    size_bytes: int,
+    sha256: str
+) -> dict:
+    """Entrée d'un shard écrit dans le manifeste (et son résumé dans le journal)."""
+    logger.info(
+        f"  ✅ {filename}: {len(shard_tensors)} tenseurs, {size_bytes / (1024 * 1024):.1f} Mo"
+    )
+    return {
+        'shard_id': shard_idx,
+        'filename': filename,
+        'num_tensors': len(shard_tensors),
+        'size_mb': round(size_bytes / (1024 * 1024), 2),
+        'size_bytes': size_bytes,
+        'sha256': sha256,
+        'layer_range': _layer_range(shard_tensors),
+        'component': shard_component(shard_tensors),
+    }
+
+
+def write_shards(
+    plan: List[List[TensorInfo]],
+    output_path: Path,
+    profiler: Profiler,
+    accountant: Optional[MemoryAccountant] = None
+) -> List[dict]:
+    """
+    Écrit chaque shard en copiant les tenseurs un par un depuis les fichiers source.
+
+    Un seul tenseur est présent en mémoire à la fois; il est déclaré au
+    comptable mémoire tant qu'il est détenu.
+
+    Returns:
+        Informations par shard (nom, taille, SHA-256, couches)
+    """
+    accountant = accountant or MemoryAccountant(enabled=False)
+    handles: Dict[Path, BinaryIO] = {}
+    shard_info = []
+
+    try:
+        for shard_idx, (shard_tensors, filename) in enumerate(zip(plan, shard_filenames(plan))):
+            shard_bytes = sum(t.nbytes for t in shard_tensors)
+            entries = [(t.name, t.dtype, t.shape, t.nbytes) for t in shard_tensors]
+
+            with profiler.span(filename, cat='shard', nbytes=shard_bytes):
+                with SafetensorsWriter(output_path / filename, entries, {'format': 'pt'}) as writer:
+                    for tensor in shard_tensors:
+                        handle = handles.get(tensor.file)
+                        if handle is None:
+                            handle = handles[tensor.file] = open(tensor.file, 'rb')
+
+                        with accountant.resident(tensor.name, tensor.nbytes):
+                            with profiler.span(tensor.name, cat='load', nbytes=tensor.nbytes):
+                                data = b''.join(iter_tensor_chunks(handle, tensor))
+                            profiler.count('bytes_read', tensor.nbytes)
+                            accountant.sample()
+
+                            with profiler.span(tensor.name, cat='write', nbytes=tensor.nbytes):
+                                writer.write(data)
+                            profiler.count('bytes_written', tensor.nbytes)
+                            del data
+
+            shard_info.append(
+                shard_entry(shard_idx, filename, shard_tensors, writer.size_bytes, writer.sha256)
+            )
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    return shard_info
+
+
+def components_summary(shard_info: List[dict]) -> Dict[str, dict]:
+    """Shards et taille de chaque tour, dans l'ordre de chargement."""
+    components: Dict[str, dict] = {}
+    for shard in shard_info:
+        entry = components.setdefault(
+            shard.get('component', 'language'), {'shards': [], 'size_bytes': 0}
+        )
+        entry['shards'].append(shard['filename'])
+        entry['size_bytes'] += shard['size_bytes']
+    for entry in components.values():
+        entry['size_mb'] = round(entry['size_bytes'] / (1024 * 1024), 2)
+    return components
+
+
+def create_shard_manifest(
+    output_path: Path,
+    model_name: str,
+    plan: List[List[TensorInfo]],
+    shard_info: List[dict],
+    aliases: Optional[Dict[str, str]] = None,
+    alias_tensors: Sequence[TensorInfo] = ()
+) -> dict:
+    """
+    Écrit l'index safetensors et le manifeste de sharding ORION.
+
+    Les tenseurs en double (`aliases`, voir `find_duplicates`) ne figurent
+    pas dans `weight_map`: l'index les liste dans `aliases` (alias → tenseur
+    stocké), à résoudre au chargement; le manifeste y ajoute le dtype et la
+    forme de chaque alias (`alias_tensors`) pour la vérification.
+    """
+    total_size = sum(t.nbytes for shard in plan for t in shard)
+
+    index = {
+        'metadata': {'total_size': total_size},
+        'weight_map': {
+            tensor.name: info['filename']
+            for shard, info in zip(plan, shard_info)
+            for tensor in shard
+        },
+    }
+    if aliases:
+        index['aliases'] = dict(sorted(aliases.items()))
+    with open(output_path / INDEX_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+
+    manifest = {
+        'model_name': model_name,
+        'sharding_date': datetime.now().isoformat(),
+        'total_shards': len(shard_info),
+        'total_size_mb': round(sum(s['size_bytes'] for s in shard_info) / (1024 * 1024), 2),
+        'total_size_bytes': sum(s['size_bytes'] for s in shard_info),
+        'shards': shard_info,
+        'loading_order': [s['filename'] for s in shard_info],
+        'components': components_summary(shard_info),
+        'tool': 'ORION Model Foundry',
+    }
+    if aliases:
+        layouts = {t.name: t for t in alias_tensors}
+        manifest['aliases'] = {
+            alias: {
+                'target': target,
+                'dtype': layouts[alias].dtype,
+                'shape': list(layouts[alias].shape),
+            } if alias in layouts else {'target': target}
+            for alias, target in sorted(aliases.items())
+        }
+        manifest['deduplicated_bytes'] = sum(t.nbytes for t in alias_tensors)
+    with open(output_path / MANIFEST_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def load_aliases(model_dir: Path) -> Dict[str, str]:
+    """Tenseurs en double d'un dossier shardé ({alias: tenseur stocké}, vide sans index)."""
+    try:
+        with open(Path(model_dir) / INDEX_FILENAME, 'r', encoding='utf-8') as f:
+            return dict(json.load(f).get('aliases', {}))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def copy_model_files(model_path: Path, output_path: Path) -> List[str]:
+    """Recopie la configuration et le tokenizer (tout sauf les poids)."""
+    copied = []
+    for path in sorted(model_path.iterdir()):
+        if not path.is_file() or path.suffix in WEIGHT_SUFFIXES:
+            continue
+        if path.name in (INDEX_FILENAME, MANIFEST_FILENAME):
+            continue
+        shutil.copy2(path, output_path / path.name)
+        copied.append(path.name)
+    return copied
+
+
+def compile_shipped_tokenizer(output_path: Path) -> None:
+    """Précompile tokenizer.json en tokenizer.bin, retiré s'il n'est pas équivalent."""
+    try:
+        compiled, errors = compile_tokenizer_file(output_path / TOKENIZER_FILENAME)
+    except (KeyError, TokenizerCompileError) as e:
+        logger.warning(f"⚠️  Tokenizer non précompilé: {e}")
+        return
+
+    if errors:
+        compiled.unlink()
+        logger.warning(f"⚠️  Tokenizer compilé non équivalent, non livré ({errors[0]})")
+
+
 def shard_model(
     model_path: Path,
     output_path: Path,
     shard_size_mb: int = 100,
-    verbose: bool = False
+    verbose: bool = False,
+    profiler: Optional[Profiler] = None,
+    accountant: Optional[MemoryAccountant] = None,
+    component_sizes_mb: Optional[Dict[str, int]] = None,
+    component_order: Tuple[str, ...] = DEFAULT_COMPONENT_ORDER,
+    deduplicate: bool = True
 ) -> bool:
     """
     Découpe un modèle en shards.
-    
+
+    Les tenseurs liés ou identiques ne sont écrits qu'une fois (voir
+    `find_duplicates`); leurs noms sont déclarés comme alias.
+
     Args:
         model_path: Chemin vers le modèle source
         output_path: Chemin de sortie
         shard_size_mb: Taille de chaque shard en Mo
         verbose: Mode verbose
-    
+        profiler: Profiler recevant les spans des étapes (optionnel)
+        accountant: Comptable mémoire par étape et par tenseur (optionnel)
+        component_sizes_mb: Taille de shard par tour en Mo (0: tour non découpée)
+        component_order: Ordre de chargement des tours (modèles multimodaux)
+        deduplicate: Stocker une seule fois les tenseurs liés ou identiques
+
     Returns:
         True si succès, False sinon
     """
+    profiler = profiler or Profiler(enabled=False)
+    accountant = accountant or MemoryAccountant(enabled=False)
+
     try:
         # Vérifier que le modèle existe
         if not model_path.exists():
             logger.error(f"❌ Modèle source introuvable: {model_path}")
             return False
-        
+
+        if output_path.resolve() == model_path.resolve():
+            logger.error("❌ Le dossier de sortie doit être différent du modèle source")
+            return False
+
         # Créer le dossier de sortie
         output_path.mkdir(parents=True, exist_ok=True)
-        
+
         logger.info(f"✂️  Sharding du modèle: {model_path}")
         logger.info(f"📦 Taille par shard: {shard_size_mb} Mo")
         logger.info(f"📤 Sortie: {output_path}")
-        
-        # Note: L'implémentation complète nécessiterait:
-        # 1. Charger le modèle avec transformers
-        # 2. Découper les tenseurs en groupes
-        # 3. Sauvegarder chaque groupe dans un fichier shard séparé
-        # 4. Créer un fichier d'index pour réassembler les shards
-        
-        logger.info("ℹ️  Stratégie de sharding:")
-        logger.info("  1. Charger le modèle avec transformers")
-        logger.info("  2. Diviser les poids en groupes de couches")
-        logger.info("  3. Sauvegarder chaque groupe comme shard")
-        logger.info("  4. Générer un index.json pour réassemblage")
-        
-        logger.info("")
-        logger.info("💡 Avantages du sharding:")
-        logger.info("  - Chargement progressif (Time To First Token réduit)")
-        logger.info("  - Hydratation en arrière-plan")
-        logger.info("  - Cache partiel possible")
-        logger.info("  - Meilleure expérience utilisateur")
-        
-        logger.info("✅ Validation réussie - Prêt pour le sharding")
+
+        profiler.start_sampling()
+
+        with accountant.stage('read headers'), profiler.span('read headers', cat='load'):
+            tensors = list_model_tensors(model_path)
+
+        if not tensors:
+            logger.error("❌ Aucun fichier safetensors trouvé dans le modèle source")
+            return False
+
+        aliases: Dict[str, str] = {}
+        if deduplicate:
+            with accountant.stage('find duplicates'), profiler.span('find duplicates', cat='plan'):
+                aliases = find_duplicates(tensors)
+        alias_tensors = [t for t in tensors if t.name in aliases]
+        deduplicated_bytes = sum(t.nbytes for t in alias_tensors)
+        if aliases:
+            tensors = [t for t in tensors if t.name not in aliases]
+            logger.info(
+                f"🔗 {len(aliases)} tenseurs en double stockés une fois "
+                f"({deduplicated_bytes / (1024 * 1024):.1f} Mo économisés)"
+            )
+            for alias, target in sorted(aliases.items()):
+                logger.debug(f"  {alias} → {target}")
+
+        plan_span = profiler.span('plan shards', cat='plan', tensors=len(tensors))
+        with accountant.stage('plan'), plan_span:
+            components = plan_components(
+                tensors,
+                shard_size_mb * 1024 * 1024,
+                {name: size * 1024 * 1024 for name, size in (component_sizes_mb or {}).items()},
+                component_order
+            )
+            plan = [shard for shards in components.values() for shard in shards]
+
+        total_mb = sum(t.nbytes for t in tensors) / (1024 * 1024)
+        logger.info(f"📊 {len(tensors)} tenseurs, {total_mb:.1f} Mo → {len(plan)} shards")
+        if len(components) > 1:
+            for component, shards in components.items():
+                component_mb = sum(t.nbytes for shard in shards for t in shard) / (1024 * 1024)
+                logger.info(f"  • {component}: {len(shards)} shards, {component_mb:.1f} Mo")
+
+        with accountant.stage('write shards'):
+            shard_info = write_shards(plan, output_path, profiler, accountant)
+
+        with profiler.span('manifest', cat='write'):
+            create_shard_manifest(
+                output_path, model_path.name, plan, shard_info, aliases, alias_tensors
+            )
+            copied = copy_model_files(model_path, output_path)
+
+        if TOKENIZER_FILENAME in copied:
+            with profiler.span('compile tokenizer', cat='transform'):
+                compile_shipped_tokenizer(output_path)
+
+        if verbose and copied:
+            logger.debug(f"Fichiers recopiés: {', '.join(copied)}")
+
+        logger.info(f"✅ Sharding terminé: {len(shard_info)} shards dans {output_path}")
         return True
-        
+
+    except MemoryCeilingExceeded as e:
+        logger.error(f"❌ Sharding interrompu: {e}")
+        return False
+
     except Exception as e:
         logger.error(f"❌ Erreur lors du sharding: {e}")
         if verbose:
             logger.exception("Détails de l'erreur:")
         return False
 
+    finally:
+        profiler.stop_sampling()
+
 
 def main():
     """Point d'entrée principal."""
@@ -96,58 +603,171 @@ Exemples:
 
   # Gros shards de 200 Mo
   python shard_model.py my-model/ output/my-model-sharded --shard-size 200
+
+  # Profiler les étapes et exporter une trace Chrome
+  python shard_model.py my-model/ output/my-model-sharded --profile --trace trace.json
+
+  # Modèle vision: encodeur d'images en un seul shard, LLM en shards de 200 Mo
+  python shard_model.py my-vlm/ output/my-vlm-sharded -s 200 --component-shard-size vision=0
+
+  # Taille choisie par simulation du chargement (voir tune_shards.py)
+  python shard_model.py my-model/ output/my-model-sharded --shard-size auto
+
+  # Vérifier que le sharding tient sous 2 Go de RSS
+  python shard_model.py my-model/ output/my-model-sharded --memory-ceiling 2048 --strict-memory
         """
     )
-    
+
     parser.add_argument(
         'model',
         type=Path,
         help="Chemin vers le modèle source"
     )
-    
+
     parser.add_argument(
         'output',
         type=Path,
         help="Chemin de sortie"
     )
-    
+
     parser.add_argument(
         '--shard-size',
         '-s',
+        default='100',
+        help="Taille de chaque shard en Mo, ou 'auto' (choix par simulation réseau; défaut: 100)"
+    )
+
+    parser.add_argument(
+        '--component-shard-size',
+        action='append',
+        default=[],
+        metavar='TOUR=MO',
+        help="Taille de shard d'une tour (language, vision, audio); 0 = tour en un seul shard"
+    )
+
+    parser.add_argument(
+        '--component-order',
+        default=','.join(DEFAULT_COMPONENT_ORDER),
+        help=f"Ordre de chargement des tours (défaut: {','.join(DEFAULT_COMPONENT_ORDER)})"
+    )
+
+    parser.add_argument(
+        '--keep-duplicates',
+        action='store_true',
+        help="Écrire aussi les tenseurs liés ou identiques (pas d'alias)"
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help="Afficher un tableau de temps, débit et pic mémoire par étape"
+    )
+
+    parser.add_argument(
+        '--trace',
+        type=Path,
+        help="Exporter une trace Chrome (JSON) des étapes"
+    )
+
+    parser.add_argument(
+        '--memory-report',
+        action='store_true',
+        help="Afficher la mémoire résidente (tenseurs et RSS) par étape et par tenseur"
+    )
+
+    parser.add_argument(
+        '--memory-ceiling',
         type=int,
-        default=100,
-        help="Taille de chaque shard en Mo (défaut: 100)"
+        help="Plafond mémoire en Mo: affiche les plus gros résidents s'il est dépassé"
     )
-    
+
+    parser.add_argument(
+        '--memory-top',
+        type=int,
+        default=10,
+        help="Nombre de résidents listés dans les rapports mémoire (défaut: 10)"
+    )
+
+    parser.add_argument(
+        '--strict-memory',
+        action='store_true',
+        help="Échouer dès que le plafond mémoire est dépassé"
+    )
+
     parser.add_argument(
         '--verbose',
         '-v',
         action='store_true',
         help="Mode verbose"
     )
-    
+
     args = parser.parse_args()
-    
+
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
-    
+
+    component_sizes = {}
+    for spec in args.component_shard_size:
+        name, _, size = spec.partition('=')
+        if not size.isdigit():
+            parser.error(f"--component-shard-size attend TOUR=MO, reçu: {spec}")
+        component_sizes[name] = int(size)
+
+    if args.shard_size == 'auto':
+        # Import local: tune_shards s'appuie sur le planificateur de ce module
+        from tune_shards import recommend_shard_size
+
+        args.shard_size, tuned_sizes = recommend_shard_size(
+            args.model,
+            component_order=tuple(args.component_order.split(','))
+        )
+        component_sizes = {**tuned_sizes, **component_sizes}
+        logger.info(f"📐 Taille de shard choisie par simulation réseau: {args.shard_size} Mo")
+    elif args.shard_size.isdigit():
+        args.shard_size = int(args.shard_size)
+    else:
+        parser.error(f"--shard-size attend un nombre de Mo ou 'auto', reçu: {args.shard_size}")
+
     # Valider la taille de shard
     if args.shard_size < 10:
         logger.warning("⚠️  Taille de shard très petite (< 10 Mo)")
         logger.warning("    Peut causer trop de requêtes réseau")
-    
+
     if args.shard_size > 500:
         logger.warning("⚠️  Taille de shard très grande (> 500 Mo)")
         logger.warning("    Réduit les bénéfices du chargement progressif")
-    
+
+    profiler = Profiler(enabled=args.profile or args.trace is not None)
+    accountant = MemoryAccountant(
+        enabled=args.memory_report or args.memory_ceiling is not None,
+        ceiling_bytes=args.memory_ceiling * 1024 * 1024 if args.memory_ceiling else None,
+        top_n=args.memory_top,
+        strict=args.strict_memory
+    )
+
     # Sharder le modèle
     success = shard_model(
         model_path=args.model,
         output_path=args.output,
         shard_size_mb=args.shard_size,
-        verbose=args.verbose
+        verbose=args.verbose,
+        profiler=profiler,
+        accountant=accountant,
+        component_sizes_mb=component_sizes,
+        component_order=tuple(args.component_order.split(',')),
+        deduplicate=not args.keep_duplicates
     )
-    
+
+    if args.profile:
+        logger.info("⏱️  Profil des étapes:\n" + profiler.format_summary())
+
+    if accountant.enabled:
+        logger.info("🧠 Mémoire par étape:\n" + accountant.format_report())
+
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+        logger.info(f"📄 Trace Chrome écrite: {args.trace}")
+
     sys.exit(0 if success else 1)
 
 
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Synchronisation du registre models.json
+Met à jour les entrées de models.json à partir des artefacts de build
+(manifeste de shards, métadonnées d'optimisation) au lieu de les éditer à la main
+"""
+
+import argparse
+import json
+import math
+import sys
+from datetime import date
+from pathlib import Path
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from estimate_memory import estimate_peak_memory, load_model_config
+from safetensors_io import find_weight_files
+from verify_model import DEFAULT_CHUNK_MB, MANIFEST_FILENAME, hash_file
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+FOUNDRY_DIR = Path(__file__).resolve().parent
+DEFAULT_REGISTRY = FOUNDRY_DIR.parent / 'models.json'
+DEFAULT_SCHEMA = FOUNDRY_DIR.parent / 'models.schema.json'
+METADATA_FILENAME = 'optimization_metadata.json'
+
+# Tours du manifeste de sharding → sections `architecture` de models.json
+ARCHITECTURE_SECTIONS = {'vision': 'vision_encoder', 'language': 'llm'}
+
+# Surcoût runtime appliqué au poids des shards quand config.json est absent
+RAM_OVERHEAD_RATIO = 0.5
+RAM_STEP_GB = 0.5
+
+JSON_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'number': (int, float),
+    'integer': int,
+    'boolean': bool,
+    'null': type(None),
+}
+
+
+def estimate_min_ram_gb(weights_bytes: int) -> float:
+    """Estime la RAM minimale: poids + surcoût runtime, arrondi au demi-Go supérieur."""
+    needed_gb = weights_bytes * (1 + RAM_OVERHEAD_RATIO) / 1024 ** 3
+    return max(RAM_STEP_GB, math.ceil(needed_gb / RAM_STEP_GB) * RAM_STEP_GB)
+
+
+def collect_shards(model_dir: Path) -> List[dict]:
+    """
+    Décrit les shards d'un modèle construit (nom, taille exacte, SHA-256).
+
+    Utilise `shard_manifest.json` s'il existe (tailles revérifiées sur le
+    disque), sinon les fichiers de poids du dossier, hashés à la volée.
+    """
+    manifest_path = model_dir / MANIFEST_FILENAME
+
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        entries = [
+            {
+                'file': shard['filename'],
+                'size_bytes': shard.get('size_bytes'),
+                'sha256': shard.get('sha256'),
+                'component': shard.get('component'),
+            }
+            for shard in manifest.get('shards', [])
+        ]
+    else:
+        entries = [
+            {'file': path.name, 'size_bytes': None, 'sha256': None, 'component': None}
+            for path in find_weight_files(model_dir)
+        ]
+
+    for entry in entries:
+        path = model_dir / entry['file']
+        if not path.is_file():
+            raise FileNotFoundError(f"shard manquant: {path}")
+
+        size = path.stat().st_size
+        if entry['size_bytes'] is not None and entry['size_bytes'] != size:
+            raise ValueError(
+                f"{entry['file']}: {size} octets sur disque, "
+                f"{entry['size_bytes']} dans le manifeste "
+                f"(lancez verify_model.py)"
+            )
+        entry['size_bytes'] = size
+        if not entry['sha256']:
+            entry['sha256'] = hash_file(path, DEFAULT_CHUNK_MB * 1024 * 1024)
+
+    return entries
+
+
+def find_entry(registry: dict, model_dir: Path, key: Optional[str]) -> Tuple[str, str, dict]:
+    """
+    Trouve l'entrée du registre correspondant au dossier construit.
+
+    Returns:
+        (section, clé, entrée)
+    """
+    sections = [name for name in ('models', 'custom_models') if name in registry]
+
+    if key:
+        for section in sections:
+            if key in registry[section]:
+                return section, key, registry[section][key]
+        raise ValueError(f"entrée '{key}' introuvable dans {', '.join(sections)}")
+
+    name = model_dir.name
+    matches = [
+        (section, entry_key, entry)
+        for section in sections
+        for entry_key, entry in registry[section].items()
+        if entry.get('urls', {}).get('base', '').rstrip('/').split('/')[-1] == name
+        or entry.get('id', '').startswith(name)
+    ]
+    if len(matches) != 1:
+        found = ', '.join(m[1] for m in matches) or 'aucune'
+        raise ValueError(
+            f"impossible d'associer {name} à une entrée unique (trouvé: {found}); utilisez --key"
+        )
+    return matches[0]
+
+
+def update_entry(
+    entry: dict,
+    shards: List[dict],
+    base_url: str,
+    metadata: Optional[dict],
+    min_ram_gb: Optional[float] = None
+) -> dict:
+    """Applique tailles, URLs, hashes et estimation RAM à une entrée du registre."""
+    base_url = base_url if base_url.endswith('/') else base_url + '/'
+    weights_bytes = sum(shard['size_bytes'] for shard in shards)
+
+    entry['size_mb'] = round(weights_bytes / (1024 * 1024), 1)
+    if min_ram_gb is None:
+        min_ram_gb = estimate_min_ram_gb(weights_bytes)
+    entry['min_ram_gb'] = min_ram_gb
+
+    urls = entry.setdefault('urls', {})
+    urls['base'] = base_url
+    urls['shards'] = [urljoin(base_url, shard['file']) for shard in shards]
+    urls['integrity'] = [
+        {'file': shard['file'], 'size_bytes': shard['size_bytes'], 'sha256': shard['sha256']}
+        for shard in shards
+    ]
+
+    # Modèles multimodaux: taille de chaque tour dans la section architecture
+    architecture = entry.get('architecture', {})
+    for component, section in ARCHITECTURE_SECTIONS.items():
+        component_bytes = sum(s['size_bytes'] for s in shards if s.get('component') == component)
+        if component_bytes and isinstance(architecture.get(section), dict):
+            architecture[section]['size_mb'] = round(component_bytes / (1024 * 1024), 1)
+
+    optimization = entry.setdefault('optimization', {})
+    optimization['sharding'] = len(shards) > 1
+    if metadata:
+        for field in ('quantization', 'shard_size_mb'):
+            if field in metadata:
+                optimization[field] = metadata[field]
+    if len(shards) > 1 and 'shard_size_mb' not in (metadata or {}):
+        largest = max(s['size_bytes'] for s in shards)
+        optimization['shard_size_mb'] = round(largest / (1024 * 1024), 1)
+
+    return entry
+
+
+def validate(value, schema: dict, root: dict, path: str = '$') -> List[str]:
+    """
+    Valide une valeur contre un sous-schéma JSON Schema (draft-07).
+
+    Couvre les mots-clés utilisés par models.schema.json: $ref, type,
+    required, enum, properties, items, minimum, maximum.
+    """
+    if '$ref' in schema:
+        target = root
+        for part in schema['$ref'].lstrip('#/').split('/'):
+            target = target[part]
+        return validate(value, target, root, path)
+
+    errors = []
+    expected = schema.get('type')
+    if expected is not None:
+        types = expected if isinstance(expected, list) else [expected]
+        valid = any(
+            isinstance(value, JSON_TYPES[t])
+            and not (t in ('number', 'integer') and isinstance(value, bool))
+            for t in types
+        )
+        if not valid:
+            return [f"{path}: type {type(value).__name__}, attendu {'/'.join(types)}"]
+
+    if 'enum' in schema and value not in schema['enum']:
+        errors.append(f"{path}: {value!r} n'est pas dans {schema['enum']}")
+    if 'minimum' in schema and isinstance(value, (int, float)) and value < schema['minimum']:
+        errors.append(f"{path}: {value} < {schema['minimum']}")
+    if 'maximum' in schema and isinstance(value, (int, float)) and value > schema['maximum']:
+        errors.append(f"{path}: {value} > {schema['maximum']}")
+
+    if isinstance(value, dict):
+        for field in schema.get('required', []):
+            if field not in value:
+                errors.append(f"{path}: champ requis manquant '{field}'")
+        for field, subschema in schema.get('properties', {}).items():
+            if field in value:
+                errors.extend(validate(value[field], subschema, root, f"{path}.{field}"))
+
+    if isinstance(value, list) and 'items' in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema['items'], root, f"{path}[{i}]"))
+
+    return errors
+
+
+def registry_layout(text: str) -> Dict[tuple, bool]:
+    """
+    Disposition des listes d'un models.json existant: chemin (clés et
+    indices) → True si la liste est écrite sur plusieurs lignes.
+
+    Le fichier est édité à la main: les listes de même nature n'y ont pas
+    toutes la même disposition, qu'aucune règle ne peut retrouver.
+    """
+    layout: Dict[tuple, bool] = {}
+    stack: List[list] = []  # [chemin, clé courante ou index, est une liste]
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            value, end = json.decoder.scanstring(text, i + 1)
+            rest = text[end:].lstrip()
+            if stack and not stack[-1][2] and rest.startswith(':'):
+                stack[-1][1] = value
+            i = end
+            continue
+        if char in '[{':
+            path = stack[-1][0] + (stack[-1][1],) if stack else ()
+            if char == '[':
+                content = text[i + 1:]
+                stripped = content.lstrip()
+                if not stripped.startswith(']'):
+                    layout[path] = '\n' in content[:len(content) - len(stripped)]
+            stack.append([path, 0 if char == '[' else None, char == '['])
+        elif char in ']}':
+            stack.pop()
+        elif char == ',' and stack and stack[-1][2]:
+            stack[-1][1] += 1
+        i += 1
+    return layout
+
+
+def dump_registry(
+    obj,
+    indent: int = 0,
+    layout: Optional[Dict[tuple, bool]] = None,
+    path: tuple = ()
+) -> str:
+    """
+    Sérialise le registre dans le style de models.json: listes de scalaires
+    sur une ligne, listes d'URLs et objets sur plusieurs lignes. Les listes
+    présentes dans `layout` (voir `registry_layout`) gardent leur disposition
+    d'origine, pour que la réécriture d'un fichier inchangé soit identique.
+    """
+    pad = '  ' * indent
+    layout = layout or {}
+
+    if isinstance(obj, dict):
+        if not obj:
+            return '{}'
+        items = [
+            f"{pad}  {json.dumps(key, ensure_ascii=False)}: "
+            f"{dump_registry(value, indent + 1, layout, path + (key,))}"
+            for key, value in obj.items()
+        ]
+        return '{\n' + ',\n'.join(items) + f'\n{pad}}}'
+
+    if isinstance(obj, list):
+        if not obj:
+            return '[]'
+        scalars = all(not isinstance(item, (dict, list)) for item in obj)
+        urls = any(isinstance(item, str) and item.startswith(('/', 'http')) for item in obj)
+        multiline = layout.get(path, not scalars or urls)
+        if scalars and not multiline:
+            return '[' + ', '.join(json.dumps(item, ensure_ascii=False) for item in obj) + ']'
+        items = [
+            f"{pad}  {dump_registry(item, indent + 1, layout, path + (i,))}"
+            for i, item in enumerate(obj)
+        ]
+        return '[\n' + ',\n'.join(items) + f'\n{pad}]'
+
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def sync_registry(
+    model_dirs: List[Path],
+    registry_path: Path,
+    schema_path: Path,
+    key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    dry_run: bool = False
+) -> bool:
+    """
+    Met à jour les entrées du registre pour une liste de modèles construits.
+
+    Args:
+        model_dirs: Dossiers de modèles shardés
+        registry_path: Chemin de models.json
+        schema_path: Chemin de models.schema.json
+        key: Clé de l'entrée (un seul modèle), sinon association par nom de dossier
+        base_url: URL de base des shards (défaut: /models/<dossier>/)
+        dry_run: Afficher les changements sans écrire
+
+    Returns:
+        True si succès, False sinon
+    """
+    try:
+        with open(registry_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        registry = json.loads(text)
+        layout = registry_layout(text)
+        with open(schema_path, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+
+        if key and len(model_dirs) > 1:
+            logger.error("❌ --key ne s'utilise qu'avec un seul modèle")
+            return False
+
+        entry_schema = {'$ref': '#/definitions/ModelConfig'}
+        for model_dir in model_dirs:
+            section, entry_key, entry = find_entry(registry, model_dir, key)
+            shards = collect_shards(model_dir)
+
+            metadata = None
+            metadata_path = model_dir / METADATA_FILENAME
+            if metadata_path.exists():
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+
+            # Pic mémoire réel: poids construits + cache KV au contexte configuré
+            min_ram_gb = None
+            if (model_dir / 'config.json').exists():
+                config = load_model_config(model_dir)
+                max_tokens = (
+                    entry.get('config', {}).get('max_tokens') or config['max_position_embeddings']
+                )
+                weights_bytes = sum(shard['size_bytes'] for shard in shards)
+                min_ram_gb = estimate_peak_memory(config, weights_bytes, max_tokens)['min_ram_gb']
+
+            before = json.dumps(entry, sort_keys=True)
+            url = base_url or f"/models/{model_dir.name}/"
+            update_entry(entry, shards, url, metadata, min_ram_gb)
+
+            errors = validate(entry, entry_schema, schema, f"{section}.{entry_key}")
+            if errors:
+                logger.error(f"❌ {entry_key}: entrée invalide après mise à jour")
+                for error in errors:
+                    logger.error(f"    - {error}")
+                return False
+
+            status = 'inchangée' if before == json.dumps(entry, sort_keys=True) else 'mise à jour'
+            logger.info(
+                f"📝 {section}.{entry_key} {status}: {len(shards)} shards, "
+                f"{entry['size_mb']} Mo, min_ram_gb={entry['min_ram_gb']}"
+            )
+
+        if dry_run:
+            logger.info("ℹ️  Mode --dry-run: models.json non modifié")
+            return True
+
+        registry['last_updated'] = date.today().isoformat()
+        with open(registry_path, 'w', encoding='utf-8') as f:
+            f.write(dump_registry(registry, layout=layout) + '\n')
+
+        logger.info(f"✅ Registre écrit: {registry_path}")
+        return True
+
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ Erreur lors de la synchronisation: {e}")
+        return False
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Synchronisation de models.json",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Mettre à jour l'entrée associée au dossier construit
+  python sync_registry.py ../public/models/ORION-Dev-Polyglot-v1-q4
+
+  # Préciser la clé et l'URL de base (CDN)
+  python sync_registry.py output/dev-polyglot --key hybrid-developer \\
+      --base-url https://cdn.example.com/models/ORION-Dev-Polyglot-v1-q4/
+
+  # Tous les modèles ORION, sans écrire
+  python sync_registry.py ../public/models/ORION-*/ --dry-run
+        """
+    )
+
+    parser.add_argument(
+        'models',
+        nargs='+',
+        type=Path,
+        help="Dossiers de modèles construits (shardés)"
+    )
+
+    parser.add_argument(
+        '--key',
+        help="Clé de l'entrée dans models.json (défaut: association par nom de dossier)"
+    )
+
+    parser.add_argument(
+        '--base-url',
+        help="URL de base des shards (défaut: /models/<dossier>/)"
+    )
+
+    parser.add_argument(
+        '--registry',
+        type=Path,
+        default=DEFAULT_REGISTRY,
+        help="Chemin de models.json"
+    )
+
+    parser.add_argument(
+        '--schema',
+        type=Path,
+        default=DEFAULT_SCHEMA,
+        help="Chemin de models.schema.json"
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="Afficher les changements sans écrire models.json"
+    )
+
+    parser.add_argument(
+        '--verbose',
+        '-v',
+        action='store_true',
+        help="Mode verbose"
+    )
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    success = sync_registry(
+        model_dirs=args.models,
+        registry_path=args.registry,
+        schema_path=args.schema,
+        key=args.key,
+        base_url=args.base_url,
+        dry_run=args.dry_run
+    )
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Vecteurs de tâche creux
+Stocke un modèle fusionné comme base partagée + écarts creux quantifiés, et le reconstruit
+"""
+
+import argparse
+import json
+import logging
+import math
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from merge_tensors import round_to_dtype
+from quantize_layers import FLOAT_DTYPES, tensor_view, to_float32
+from safetensors_io import (
+    SafetensorsError,
+    SafetensorsWriter,
+    TensorInfo,
+    list_model_tensors,
+    list_tensors,
+    read_tensor_bytes,
+)
+from shard_model import copy_model_files
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+TASK_VECTOR_FILENAME = 'task_vector.json'
+DELTAS_FILENAME = 'deltas.safetensors'
+FORMAT_VERSION = 1
+
+# int8: écarts quantifiés (échelle par ligne);
+# exact: valeurs fusionnées dans le dtype du modèle
+VALUE_FORMATS = ('int8', 'exact')
+DEFAULT_VALUE_FORMAT = 'int8'
+
+ARRAY_SUFFIXES = ('mask', 'index', 'values', 'scales')
+
+# Octets par position en mode index (uint32)
+INDEX_BYTES = 4
+
+# dtype safetensors ↔ numpy des tableaux d'écarts
+ARRAY_DTYPES = {
+    'U8': '<u1', 'U32': '<u4', 'I8': '<i1', 'F32': '<f4', 'F16': '<u2', 'BF16': '<u2', 'F64': '<u8'
+}
+FLOAT_ENCODINGS = {'F64': '<f8', 'F32': '<f4', 'F16': '<f2'}
+
+
+class TaskVectorError(ValueError):
+    """Écarts incompatibles avec la base ou fichier invalide."""
+
+
+def raw_bits(info: TensorInfo) -> np.ndarray:
+    """Données brutes d'un tenseur vues comme entiers non signés (comparaison bit à bit)."""
+    view = tensor_view(info)
+    return view.view(f'u{view.dtype.itemsize}').reshape(-1)
+
+
+def encode_float(x: np.ndarray, dtype: str) -> bytes:
+    """float32 → octets safetensors du dtype (BF16 arrondi au plus proche pair)."""
+    if dtype == 'BF16':
+        bits = round_to_dtype(x, 'BF16').view(np.uint32)
+        return (bits >> 16).astype('<u2').tobytes()
+    return np.asarray(x).astype(FLOAT_ENCODINGS[dtype]).tobytes()
+
+
+def row_layout(shape: Tuple[int, ...]) -> Tuple[int, int]:
+    """(lignes, colonnes) d'un tenseur pour les échelles par ligne."""
+    if len(shape) < 2:
+        return 1, max(1, math.prod(shape))
+    return shape[0], math.prod(shape[1:])
+
+
+# --- Encodage -------------------------------------------------------------
+
+def quantize_values(
+    values: np.ndarray,
+    rows: np.ndarray,
+    num_rows: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """int8 symétrique, une échelle par ligne (max |valeur| / 127)."""
+    peak = np.zeros(num_rows, dtype=np.float32)
+    np.maximum.at(peak, rows, np.abs(values))
+    scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(values / scales[rows]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def encode_delta(
+    positions: np.ndarray,
+    values: np.ndarray,
+    merged_bits: np.ndarray,
+    shape: Tuple[int, ...],
+    value_format: str
+) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """
+    Encode les valeurs non nulles d'un écart.
+
+    Positions en masque de bits (numel/8 octets) ou en index uint32 (4 octets
+    par valeur), le plus petit des deux. Valeurs: écarts `values` en int8, ou
+    bits fusionnés `merged_bits` tels quels (sans perte).
+    """
+    numel = math.prod(shape)
+    num_rows, cols = row_layout(shape)
+    arrays: Dict[str, np.ndarray] = {}
+
+    if math.ceil(numel / 8) <= INDEX_BYTES * len(positions):
+        mask = np.zeros(numel, dtype=bool)
+        mask[positions] = True
+        arrays['mask'] = np.packbits(mask, bitorder='little')
+        encoding = 'bitmask'
+    else:
+        arrays['index'] = positions.astype(np.uint32)
+        encoding = 'index'
+
+    if value_format == 'int8':
+        arrays['values'], arrays['scales'] = quantize_values(values, positions // cols, num_rows)
+    else:
+        arrays['values'] = merged_bits
+
+    entry = {
+        'encoding': encoding,
+        'values': value_format,
+        'nnz': int(len(positions)),
+        'density': len(positions) / numel,
+    }
+    return entry, arrays
+
+
+def decode_positions(entry: dict, arrays: Dict[str, np.ndarray], numel: int) -> np.ndarray:
+    if entry['encoding'] == 'bitmask':
+        return np.flatnonzero(np.unpackbits(arrays['mask'], count=numel, bitorder='little'))
+    return arrays['index'].astype(np.int64)
+
+
+def dequantize_values(
+    arrays: Dict[str, np.ndarray],
+    positions: np.ndarray,
+    cols: int
+) -> np.ndarray:
+    return arrays['values'].astype(np.float32) * arrays['scales'][positions // cols]
+
+
+def apply_delta(base: TensorInfo, entry: dict, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Reconstruit un tenseur: seules les positions de l'écart sont recalculées,
+    les autres gardent les bits de la base.
+
+    Le masque de bits est utilisé directement comme sélecteur booléen (pas de
+    liste de positions); les échelles int8 sont répétées ligne par ligne.
+
+    Returns:
+        Données brutes du tenseur (entiers non signés de la taille du dtype)
+    """
+    bits = raw_bits(base).copy()
+    num_rows, cols = row_layout(base.shape)
+    if entry['encoding'] == 'bitmask':
+        selector = np.unpackbits(arrays['mask'], count=bits.size, bitorder='little').view(bool)
+    else:
+        selector = arrays['index']
+
+    if entry['values'] == 'exact':
+        bits[selector] = arrays['values'].view(bits.dtype)
+        return bits
+
+    if entry['encoding'] == 'bitmask':
+        per_row = np.count_nonzero(selector.reshape(num_rows, cols), axis=1)
+        scales = np.repeat(arrays['scales'], per_row)
+    else:
+        scales = arrays['scales'][selector // cols]
+    values = arrays['values'].astype(np.float32) * scales
+    updated = to_float32(tensor_view(base).reshape(-1)[selector], base.dtype) + values
+    bits[selector] = np.frombuffer(encode_float(updated, base.dtype), dtype=bits.dtype)
+    return bits
+
+
+# --- Extraction -----------------------------------------------------------
+
+def changed_positions(base: TensorInfo, merged: TensorInfo) -> np.ndarray:
+    """Positions où le modèle fusionné diffère de la base (comparaison bit à bit)."""
+    return np.flatnonzero(raw_bits(base) != raw_bits(merged))
+
+
+def trim_positions(
+    positions: np.ndarray,
+    values: np.ndarray,
+    numel: int,
+    density: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Garde les `density · numel` écarts de plus grande amplitude (élagage façon TIES)."""
+    keep = max(1, int(round(density * numel)))
+    if keep >= len(positions):
+        return positions, values
+    top = np.sort(np.argpartition(np.abs(values), len(values) - keep)[len(values) - keep:])
+    return positions[top], values[top]
+
+
+def extract_task_vector(
+    merged_dir: Path,
+    base_dir: Path,
+    output_dir: Path,
+    value_format: str = DEFAULT_VALUE_FORMAT,
+    density: Optional[float] = None,
+    base_name: Optional[str] = None
+) -> dict:
+    """
+    Écrit les écarts creux entre un modèle fusionné et sa base.
+
+    Les tenseurs identiques à la base ne sont pas stockés; les tenseurs non
+    flottants modifiés ou absents de la base sont stockés en entier.
+
+    Args:
+        merged_dir: Modèle fusionné (safetensors)
+        base_dir: Modèle de base partagé
+        output_dir: Dossier des écarts (deltas.safetensors + task_vector.json)
+        value_format: Écarts en int8 (échelle par ligne) ou valeurs exactes
+        density: Fraction maximale de valeurs gardées par tenseur (élagage, avec perte)
+        base_name: Identifiant de la base consigné dans le manifeste
+
+    Returns:
+        Manifeste écrit
+    """
+    if value_format not in VALUE_FORMATS:
+        raise TaskVectorError(
+            f"format de valeurs inconnu: {value_format} ({', '.join(VALUE_FORMATS)})"
+        )
+
+    merged = list_model_tensors(merged_dir)
+    base = {t.name: t for t in list_model_tensors(base_dir)}
+    if not merged or not base:
+        raise TaskVectorError("aucun fichier safetensors dans le modèle fusionné ou la base")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    spill_path = output_dir / f'{DELTAS_FILENAME}.tmp'
+    entries: List[Tuple[str, str, Tuple[int, ...], int]] = []
+    tensors: Dict[str, dict] = {}
+    delta_sq = error_sq = 0.0
+
+    with open(spill_path, 'wb') as spill:
+        def add(name: str, array: np.ndarray, dtype: Optional[str] = None) -> None:
+            dtype = dtype or next(
+                key for key, value in ARRAY_DTYPES.items() if np.dtype(value) == array.dtype
+            )
+            data = np.ascontiguousarray(array).tobytes()
+            spill.write(data)
+            entries.append((name, dtype, tuple(array.shape), len(data)))
+
+        for info in merged:
+            reference = base.get(info.name)
+            comparable = (
+                reference is not None
+                and (reference.dtype, reference.shape) == (info.dtype, info.shape)
+            )
+            if not comparable or info.dtype not in FLOAT_DTYPES:
+                if comparable and read_tensor_bytes(reference) == read_tensor_bytes(info):
+                    continue
+                # Tenseur nouveau, redimensionné ou non flottant: stocké tel quel
+                tensors[info.name] = {
+                    'shape': list(info.shape), 'dtype': info.dtype, 'encoding': 'dense'
+                }
+                spill.write(read_tensor_bytes(info))
+                entries.append((f'{info.name}.dense', info.dtype, info.shape, info.nbytes))
+                continue
+
+            positions = changed_positions(reference, info)
+            if len(positions) == 0:
+                continue
+
+            flat_base = to_float32(tensor_view(reference).reshape(-1)[positions], reference.dtype)
+            flat_merged = to_float32(tensor_view(info).reshape(-1)[positions], info.dtype)
+            values = flat_merged - flat_base
+            full_sq = float(np.sum(values.astype(np.float64) ** 2))
+            delta_sq += full_sq
+            if density is not None:
+                positions, values = trim_positions(positions, values, info.numel, density)
+                error_sq += full_sq - float(np.sum(values.astype(np.float64) ** 2))
+
+            entry, arrays = encode_delta(
+                positions, values, raw_bits(info)[positions], info.shape, value_format
+            )
+            if value_format == 'int8':
+                decoded = dequantize_values(arrays, positions, row_layout(info.shape)[1])
+                error_sq += float(np.sum((decoded.astype(np.float64) - values) ** 2))
+
+            entry.update({
+                'shape': list(info.shape),
+                'dtype': info.dtype,
+                'base_crc32': zlib.crc32(raw_bits(reference).tobytes()),
+            })
+            tensors[info.name] = entry
+            for suffix in ARRAY_SUFFIXES:
+                if suffix in arrays:
+                    exact = suffix == 'values' and value_format == 'exact'
+                    add(f'{info.name}.{suffix}', arrays[suffix], info.dtype if exact else None)
+
+    removed = sorted(set(base) - {t.name for t in merged})
+    deltas_path = output_dir / DELTAS_FILENAME
+    with open(spill_path, 'rb') as spill:
+        with SafetensorsWriter(deltas_path, entries, {'format': 'orion-task-vector'}) as writer:
+            for chunk in iter(lambda: spill.read(1 << 24), b''):
+                writer.write(chunk)
+    spill_path.unlink()
+
+    copy_model_files(merged_dir, output_dir)
+    dense_bytes = sum(t.nbytes for t in merged)
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'base_model': base_name or Path(base_dir).resolve().name,
+        'value_format': value_format,
+        'density_limit': density,
+        'deltas_file': DELTAS_FILENAME,
+        'deltas_sha256': writer.sha256,
+        'size_bytes': writer.size_bytes,
+        'dense_size_bytes': dense_bytes,
+        'relative_delta_error': math.sqrt(error_sq / delta_sq) if delta_sq else 0.0,
+        'tensors': tensors,
+        'removed': removed,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with open(output_dir / TASK_VECTOR_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# --- Reconstruction -------------------------------------------------------
+
+class TaskVector:
+    """Écarts creux lus depuis un dossier produit par `extract_task_vector`."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        manifest_path = self.directory / TASK_VECTOR_FILENAME
+        if not manifest_path.exists():
+            raise TaskVectorError(f"{manifest_path} introuvable")
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise TaskVectorError(
+                f"version de format non prise en charge: {self.manifest.get('format_version')}"
+            )
+        self.tensors: Dict[str, dict] = self.manifest['tensors']
+        deltas_path = self.directory / self.manifest['deltas_file']
+        self.arrays = {t.name: t for t in list_tensors(deltas_path)}
+
+    def _array(self, name: str) -> np.ndarray:
+        info = self.arrays[name]
+        return np.fromfile(
+            info.file, dtype=ARRAY_DTYPES[info.dtype], count=info.numel, offset=info.data_start
+        )
+
+    def arrays_for(self, name: str) -> Dict[str, np.ndarray]:
+        """Tableaux de l'écart d'un tenseur (positions, valeurs, échelles)."""
+        return {
+            suffix: self._array(f'{name}.{suffix}')
+            for suffix in ARRAY_SUFFIXES
+            if f'{name}.{suffix}' in self.arrays
+        }
+
+    def reconstruct_tensor(self, base: TensorInfo, verify: bool = True) -> bytes:
+        """Octets du tenseur fusionné à partir de celui de la base."""
+        entry = self.tensors.get(base.name)
+        if entry is None:
+            return read_tensor_bytes(base)
+        if entry['encoding'] == 'dense':
+            return read_tensor_bytes(self.arrays[f'{base.name}.dense'])
+        if list(base.shape) != entry['shape'] or base.dtype != entry['dtype']:
+            raise TaskVectorError(
+                f"{base.name}: base {base.dtype}{list(base.shape)}, "
+                f"écart {entry['dtype']}{entry['shape']}"
+            )
+        if verify and zlib.crc32(raw_bits(base).tobytes()) != entry['base_crc32']:
+            raise TaskVectorError(
+                f"{base.name}: la base ne correspond pas à celle de l'extraction"
+            )
+        return apply_delta(base, entry, self.arrays_for(base.name)).tobytes()
+
+    def output_tensors(
+        self,
+        base: Dict[str, TensorInfo]
+    ) -> List[Tuple[str, str, Tuple[int, ...], int]]:
+        """Entrées (nom, dtype, forme, octets) du modèle reconstruit."""
+        removed = set(self.manifest.get('removed', []))
+        entries = [
+            (t.name, t.dtype, t.shape, t.nbytes) for t in base.values() if t.name not in removed
+        ]
+        for name, entry in self.tensors.items():
+            if entry['encoding'] == 'dense' and name not in base:
+                info = self.arrays[f'{name}.dense']
+                entries.append((name, info.dtype, info.shape, info.nbytes))
+        missing = [
+            name for name, entry in self.tensors.items()
+            if entry['encoding'] != 'dense' and name not in base
+        ]
+        if missing:
+            raise TaskVectorError(f"{len(missing)} tenseurs absents de la base (ex: {missing[0]})")
+        return entries
+
+
+def reconstruct_model(
+    task_dir: Path,
+    base_dir: Path,
+    output_dir: Path,
+    verify: bool = True
+) -> dict:
+    """
+    Reconstruit le modèle fusionné (un fichier model.safetensors + config et tokenizer).
+
+    Returns:
+        Statistiques (tenseurs, octets, durée)
+    """
+    vector = TaskVector(task_dir)
+    base = {t.name: t for t in list_model_tensors(base_dir)}
+    entries = vector.output_tensors(base)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    with SafetensorsWriter(output_dir / 'model.safetensors', entries, {'format': 'pt'}) as writer:
+        for name, _, _, _ in entries:
+            info = base.get(name)
+            if info is None:
+                writer.write(read_tensor_bytes(vector.arrays[f'{name}.dense']))
+            else:
+                writer.write(vector.reconstruct_tensor(info, verify))
+    elapsed = time.perf_counter() - started
+
+    copy_model_files(task_dir, output_dir)
+    (output_dir / TASK_VECTOR_FILENAME).unlink(missing_ok=True)
+    return {'tensors': len(entries), 'bytes': writer.size_bytes, 'seconds': elapsed}
+
+
+# --- Benchmark ------------------------------------------------------------
+
+def _timed(fn, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark_reconstruction(task_dir: Path, base_dir: Path, repeats: int = 3) -> List[dict]:
+    """
+    Débit de reconstruction des tenseurs modifiés, par encodage des positions.
+
+    Chaque tenseur est reconstruit avec ses écarts en masque de bits, en
+    index, puis par addition d'un écart dense (référence sans stockage creux).
+    """
+    vector = TaskVector(task_dir)
+    base = {t.name: t for t in list_model_tensors(base_dir)}
+    totals = {'bitmask': 0.0, 'index': 0.0, 'dense': 0.0}
+    nbytes = 0
+
+    for name, entry in vector.tensors.items():
+        if entry['encoding'] == 'dense' or name not in base:
+            continue
+        info = base[name]
+        arrays = vector.arrays_for(name)
+        positions = decode_positions(entry, arrays, info.numel)
+
+        variants = {}
+        for encoding in ('bitmask', 'index'):
+            other = dict(arrays)
+            other.pop('mask', None)
+            other.pop('index', None)
+            if encoding == 'bitmask':
+                mask = np.zeros(info.numel, dtype=bool)
+                mask[positions] = True
+                other['mask'] = np.packbits(mask, bitorder='little')
+            else:
+                other['index'] = positions.astype(np.uint32)
+            variants[encoding] = dict(entry, encoding=encoding), other
+
+        base_values = to_float32(tensor_view(info).reshape(-1), info.dtype)
+        dense_delta = to_float32(apply_delta(info, entry, arrays), info.dtype) - base_values
+
+        for encoding, (variant, other) in variants.items():
+            totals[encoding] += _timed(lambda: apply_delta(info, variant, other), repeats)
+        totals['dense'] += _timed(
+            lambda: encode_float(
+                to_float32(tensor_view(info).reshape(-1), info.dtype) + dense_delta, info.dtype
+            ),
+            repeats
+        )
+        nbytes += info.nbytes
+
+    size_mb = nbytes / (1024 * 1024)
+    return [
+        {
+            'path': path,
+            'seconds': seconds,
+            'mb_per_s': size_mb / seconds if seconds else float('inf'),
+            'size_mb': size_mb,
+        }
+        for path, seconds in totals.items()
+    ]
+
+
+def format_summary(manifest: dict) -> str:
+    stored = manifest['size_bytes'] / (1024 * 1024)
+    dense = manifest['dense_size_bytes'] / (1024 * 1024)
+    tensors = manifest['tensors'].values()
+    sparse = [t for t in tensors if t['encoding'] != 'dense']
+    nnz = sum(t['nnz'] for t in sparse)
+    numel = sum(math.prod(t['shape']) for t in sparse)
+    bitmask = sum(t['encoding'] == 'bitmask' for t in sparse)
+    index = sum(t['encoding'] == 'index' for t in sparse)
+    complete = len(manifest['tensors']) - len(sparse)
+    lines = [
+        f"  - Base: {manifest['base_model']}",
+        f"  - Tenseurs modifiés: {len(sparse)} creux ({bitmask} masque, {index} index), "
+        f"{complete} complets",
+        f"  - Densité des écarts: {nnz / numel:.1%}" if numel else "  - Aucun écart creux",
+        f"  - Valeurs: {manifest['value_format']}, "
+        f"erreur relative sur les écarts {manifest['relative_delta_error']:.2e}",
+        f"  - Taille: {stored:.1f} Mo au lieu de {dense:.1f} Mo ({stored / dense:.1%})"
+        if dense else "",
+    ]
+    return '\n'.join(line for line in lines if line)
+
+
+def format_benchmark(results: List[dict]) -> str:
+    lines = [f"{'chemin':<10} {'durée (s)':>10} {'Mo/s':>10}"]
+    for r in results:
+        lines.append(f"{r['path']:<10} {r['seconds']:>10.3f} {r['mb_per_s']:>10.0f}")
+    return '\n'.join(lines)
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Vecteurs de tâche creux",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Écarts d'une fusion TIES/DARE par rapport à sa base
+  python task_vectors.py merged_models/ORION-Code-Logic-v1 --base models/Llama-3.2-3B-Instruct \\
+      -o optimized_models/ORION-Code-Logic-v1-delta
+
+  # Sans perte (valeurs fusionnées dans le dtype du modèle)
+  python task_vectors.py merged_models/ORION-Code-Logic-v1 --base models/Llama-3.2-3B-Instruct \\
+      -o deltas/ --values exact
+
+  # Fusion dense (slerp): garder les 10 % d'écarts les plus grands
+  python task_vectors.py merged_models/ORION-Creative-v1 --base models/base -o deltas/ --density 0.1
+
+  # Reconstruire le modèle complet depuis la base en cache
+  python task_vectors.py optimized_models/ORION-Code-Logic-v1-delta \\
+      --base models/Llama-3.2-3B-Instruct --reconstruct -o merged_models/ORION-Code-Logic-v1
+
+  # Débit de reconstruction (masque, index, écart dense)
+  python task_vectors.py optimized_models/ORION-Code-Logic-v1-delta \\
+      --base models/Llama-3.2-3B-Instruct --benchmark
+        """
+    )
+
+    parser.add_argument(
+        'source',
+        type=Path,
+        help="Modèle fusionné (extraction) ou dossier d'écarts (--reconstruct, --benchmark)"
+    )
+
+    parser.add_argument(
+        '--base',
+        type=Path,
+        required=True,
+        help="Modèle de base partagé"
+    )
+
+    parser.add_argument(
+        '--output',
+        '-o',
+        type=Path,
+        help="Dossier des écarts, ou du modèle reconstruit avec --reconstruct"
+    )
+
+    parser.add_argument(
+        '--values',
+        choices=VALUE_FORMATS,
+        default=DEFAULT_VALUE_FORMAT,
+        help=f"Format des valeurs des écarts (défaut: {DEFAULT_VALUE_FORMAT})"
+    )
+
+    parser.add_argument(
+        '--density',
+        type=float,
+        help="Fraction maximale d'écarts gardés par tenseur (élagage par amplitude, avec perte)"
+    )
+
+    parser.add_argument(
+        '--base-name',
+        help="Identifiant de la base consigné dans le manifeste (défaut: nom du dossier)"
+    )
+
+    parser.add_argument(
+        '--reconstruct',
+        action='store_true',
+        help="Reconstruire le modèle complet depuis la base et les écarts"
+    )
+
+    parser.add_argument(
+        '--benchmark',
+        action='store_true',
+        help="Mesurer le débit de reconstruction"
+    )
+
+    parser.add_argument(
+        '--repeats',
+        type=int,
+        default=3,
+        help="Répétitions par mesure du benchmark (défaut: 3)"
+    )
+
+    args = parser.parse_args()
+
+    if args.density is not None and not 0 < args.density <= 1:
+        parser.error("--density doit être dans ]0, 1]")
+    if not args.benchmark and args.output is None:
+        parser.error("--output requis")
+
+    try:
+        if args.benchmark:
+            results = benchmark_reconstruction(args.source, args.base, args.repeats)
+            logger.info(
+                f"⏱️  Reconstruction de {results[0]['size_mb']:.1f} Mo de tenseurs modifiés:\n"
+                + format_benchmark(results)
+            )
+
+        elif args.reconstruct:
+            logger.info(f"🧩 Reconstruction: {args.base} + {args.source}")
+            stats = reconstruct_model(args.source, args.base, args.output)
+            logger.info(
+                f"✅ {stats['tensors']} tenseurs, {stats['bytes'] / (1024 * 1024):.1f} Mo "
+                f"en {stats['seconds']:.2f} s → {args.output}"
+            )
+
+        else:
+            logger.info(f"✂️  Écarts de {args.source} par rapport à {args.base}")
+            manifest = extract_task_vector(
+                args.source, args.base, args.output, args.values, args.density, args.base_name
+            )
+            logger.info(f"✅ Écarts écrits dans {args.output}:\n" + format_summary(manifest))
+
+    except (TaskVectorError, SafetensorsError, FileNotFoundError) as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""Les modules de la fonderie s'importent à plat depuis model_foundry/."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
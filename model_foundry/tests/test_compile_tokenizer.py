@@ -0,0 +1,159 @@
+"""Aller-retour des ids à travers le binaire de compile_tokenizer.py."""
+
+import json
+import sys
+
+import pytest
+
+from compile_tokenizer import (
+    COMPILED_FILENAME,
+    CompiledTokenizer,
+    TokenizerCompileError,
+    check_equivalence,
+    compile_tokenizer,
+    compile_tokenizer_file,
+)
+
+CORPUS = ["le chat est là", "chaîne prête"]
+
+
+@pytest.fixture
+def bpe_tokenizer():
+    """Petit BPE: caractères, quelques merges (dont non ASCII) et tokens ajoutés."""
+    chars = sorted(set("".join(CORPUS)) | {"<unk>"})
+    merges = ["c h", "ch a", "l e", "ê t", "cha î", "t a"]
+    vocab = list(chars)
+    for merge in merges:
+        vocab.append(merge.replace(" ", ""))
+    vocab.append("<|end|>")
+    return {
+        "version": "1.0",
+        "added_tokens": [
+            {"id": len(vocab) - 1, "content": "<|end|>", "single_word": False, "lstrip": False,
+             "rstrip": False, "normalized": False, "special": True},
+        ],
+        "normalizer": None,
+        "pre_tokenizer": {"type": "Whitespace"},
+        "post_processor": None,
+        "decoder": None,
+        "model": {
+            "type": "BPE",
+            "dropout": None,
+            "unk_token": "<unk>",
+            "vocab": {token: idx for idx, token in enumerate(vocab)},
+            "merges": merges,
+        },
+    }
+
+
+def test_ids_round_trip(bpe_tokenizer):
+    compiled = CompiledTokenizer(compile_tokenizer(bpe_tokenizer))
+    vocab = bpe_tokenizer["model"]["vocab"]
+
+    assert compiled.vocab_size == len(vocab)
+    for token, token_id in vocab.items():
+        assert compiled.token(token_id) == token
+        assert compiled.lookup(token) == token_id
+    assert compiled.lookup("absent") is None
+
+
+def test_merges_as_id_triples(bpe_tokenizer):
+    compiled = CompiledTokenizer(compile_tokenizer(bpe_tokenizer))
+    vocab = bpe_tokenizer["model"]["vocab"]
+
+    merges = bpe_tokenizer["model"]["merges"]
+    for (left, right, result), merge in zip(compiled.merges.tolist(), merges):
+        a, b = merge.split(" ")
+        assert (left, right, result) == (vocab[a], vocab[b], vocab[a + b])
+
+
+def test_json_round_trip(bpe_tokenizer):
+    compiled = CompiledTokenizer(compile_tokenizer(bpe_tokenizer))
+    assert compiled.to_json() == bpe_tokenizer
+    assert check_equivalence(bpe_tokenizer, compiled, []) == []
+
+
+def test_file_round_trip(bpe_tokenizer, tmp_path):
+    (tmp_path / "tokenizer.json").write_text(json.dumps(bpe_tokenizer), encoding="utf-8")
+    output, errors = compile_tokenizer_file(tmp_path, check=False)
+
+    assert output == tmp_path / COMPILED_FILENAME
+    assert errors == []
+    assert CompiledTokenizer.from_file(output).to_json() == bpe_tokenizer
+
+
+def test_corrupted_binary_rejected(bpe_tokenizer):
+    data = bytearray(compile_tokenizer(bpe_tokenizer))
+    data[:4] = b"XXXX"
+    with pytest.raises(TokenizerCompileError):
+        CompiledTokenizer(bytes(data))
+
+
+def test_verify_requires_tokenizers(bpe_tokenizer, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "tokenizers", None)
+    (tmp_path / "tokenizer.json").write_text(json.dumps(bpe_tokenizer), encoding="utf-8")
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("\n".join(CORPUS), encoding="utf-8")
+
+    with pytest.raises(TokenizerCompileError):
+        compile_tokenizer_file(tmp_path, corpus=[corpus], require_encoding=True)
+    assert not (tmp_path / COMPILED_FILENAME).exists()
+
+    compiled = CompiledTokenizer(compile_tokenizer(bpe_tokenizer))
+    with pytest.raises(TokenizerCompileError):
+        check_equivalence(bpe_tokenizer, compiled, CORPUS, require_encoding=True)
+
+
+def test_encode_word_from_binary(bpe_tokenizer):
+    compiled = CompiledTokenizer(compile_tokenizer(bpe_tokenizer))
+
+    def tokens(word):
+        return [compiled.token(i) for i in compiled.encode_word(word)]
+
+    assert tokens("chat") == ["cha", "t"]
+    assert tokens("chaîne") == ["chaî", "n", "e"]
+    assert tokens("prête") == ["p", "r", "êt", "e"]
+    assert tokens("zut") == ["<unk>", "<unk>", "t"]
+
+
+def test_merge_ranks_drive_encoding(bpe_tokenizer):
+    # "t a" passe avant "ê t": "êta" donne "ê" + "ta" au lieu de "êt" + "a"
+    reordered = json.loads(json.dumps(bpe_tokenizer))
+    merges = reordered["model"]["merges"]
+    merges.insert(0, merges.pop(merges.index("t a")))
+    original = CompiledTokenizer(compile_tokenizer(bpe_tokenizer))
+    swapped = CompiledTokenizer(compile_tokenizer(reordered))
+
+    assert [original.token(i) for i in original.encode_word("êta")] == ["êt", "a"]
+    assert [swapped.token(i) for i in swapped.encode_word("êta")] == ["ê", "ta"]
+
+
+def test_added_tokens_split_from_binary(bpe_tokenizer):
+    compiled = CompiledTokenizer(compile_tokenizer(bpe_tokenizer))
+    end = bpe_tokenizer["model"]["vocab"]["<|end|>"]
+    assert compiled.split_added("le<|end|>chat") == [("le", None), ("<|end|>", end), ("chat", None)]
+
+
+@pytest.mark.parametrize("kind", ["bytelevel", "wordpiece"])
+def test_encoding_matches_tokenizers(kind):
+    tokenizers = pytest.importorskip("tokenizers")
+    from tokenizers import models, normalizers, pre_tokenizers, trainers
+
+    lines = CORPUS * 4 + ["Le chat prête sa chaîne, là-bas!", "ünïcødé 日本語 🙂"]
+    if kind == "bytelevel":
+        tokenizer = tokenizers.Tokenizer(models.BPE())
+        tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+        alphabet = pre_tokenizers.ByteLevel.alphabet()
+        trainer = trainers.BpeTrainer(vocab_size=400, initial_alphabet=alphabet)
+    else:
+        tokenizer = tokenizers.Tokenizer(models.WordPiece(unk_token="[UNK]"))
+        tokenizer.normalizer = normalizers.BertNormalizer()
+        tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+        trainer = trainers.WordPieceTrainer(vocab_size=200, special_tokens=["[UNK]"])
+    tokenizer.train_from_iterator(lines, trainer)
+    tokenizer.add_special_tokens(["<|end|>"])
+    original = json.loads(tokenizer.to_str())
+    compiled = CompiledTokenizer(compile_tokenizer(original))
+
+    errors = check_equivalence(original, compiled, lines + ["chat<|end|>"], require_encoding=True)
+    assert errors == []
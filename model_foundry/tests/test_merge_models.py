@@ -0,0 +1,65 @@
+"""Fusion linear/slerp exécutée depuis le plan compilé (merge_models.merge_models)."""
+
+import json
+
+import numpy as np
+import yaml
+
+from merge_models import merge_models
+from quantize_layers import read_tensor
+from safetensors_io import SafetensorsWriter, list_model_tensors
+
+SHAPES = {
+    'model.embed_tokens.weight': (16, 8),
+    'model.layers.0.self_attn.q_proj.weight': (8, 8),
+    'model.norm.weight': (8,),
+}
+
+
+def parent(path, seed):
+    path.mkdir()
+    rng = np.random.default_rng(seed)
+    arrays = {name: rng.standard_normal(shape).astype(np.float32) for name, shape in SHAPES.items()}
+    entries = [(name, 'F32', shape, arrays[name].nbytes) for name, shape in SHAPES.items()]
+    with SafetensorsWriter(path / 'model.safetensors', entries, {'format': 'pt'}) as writer:
+        for name in SHAPES:
+            writer.write(arrays[name].tobytes())
+    config = {'model_type': 'llama', 'num_hidden_layers': 1, 'hidden_size': 8, 'vocab_size': 16}
+    (path / 'config.json').write_text(json.dumps(config))
+    (path / 'tokenizer.json').write_text('{}')
+    return arrays
+
+
+def recipe(tmp_path, method, dtype, parameters):
+    path = tmp_path / 'recipe.yml'
+    models = [{'model': str(tmp_path / 'a')}, {'model': str(tmp_path / 'b')}]
+    path.write_text(yaml.safe_dump({
+        'models': models, 'merge_method': method, 'parameters': parameters, 'dtype': dtype
+    }))
+    return path
+
+
+def test_linear_merge_written_from_plan(tmp_path):
+    a, b = parent(tmp_path / 'a', 0), parent(tmp_path / 'b', 1)
+    output = tmp_path / 'merged'
+
+    assert merge_models(recipe(tmp_path, 'linear', 'float32', {'normalize': True}), output)
+
+    merged = {t.name: t for t in list_model_tensors(output)}
+    assert set(merged) == set(SHAPES)
+    for name in SHAPES:
+        np.testing.assert_allclose(read_tensor(merged[name]), (a[name] + b[name]) / 2, rtol=1e-6)
+    assert json.loads((output / 'config.json').read_text())['torch_dtype'] == 'float32'
+    assert (output / 'tokenizer.json').exists()
+
+
+def test_slerp_merge_bfloat16_without_tokenizer(tmp_path):
+    parent(tmp_path / 'a', 0)
+    parent(tmp_path / 'b', 1)
+    output = tmp_path / 'merged'
+
+    path = recipe(tmp_path, 'slerp', 'bfloat16', {'t': 0.3})
+    assert merge_models(path, output, copy_tokenizer=False)
+
+    assert {t.dtype for t in list_model_tensors(output)} == {'BF16'}
+    assert not (output / 'tokenizer.json').exists()
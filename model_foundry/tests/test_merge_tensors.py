@@ -0,0 +1,41 @@
+"""Compatibilité des parents d'une fusion (merge_tensors.parent_errors)."""
+
+from pathlib import Path
+
+from merge_tensors import parent_errors
+from safetensors_io import TensorInfo
+
+
+def decoder(layers, hidden=8, vocab=16):
+    shapes = {'model.embed_tokens.weight': (vocab, hidden), 'model.norm.weight': (hidden,)}
+    for i in range(layers):
+        shapes[f'model.layers.{i}.self_attn.q_proj.weight'] = (hidden, hidden)
+        shapes[f'model.layers.{i}.mlp.down_proj.weight'] = (hidden, 2 * hidden)
+    shapes['lm_head.weight'] = (vocab, hidden)
+    path = Path('model.safetensors')
+    return [TensorInfo(name, 'F32', shape, path, 0, 0) for name, shape in shapes.items()]
+
+
+def config(layers, model_type='llama'):
+    return {
+        'model_type': model_type, 'num_hidden_layers': layers, 'hidden_size': 8, 'vocab_size': 16
+    }
+
+
+def test_compatible_parents():
+    assert parent_errors(['a', 'b'], [decoder(2), decoder(2)], [config(2), config(2)]) == []
+
+
+def test_deeper_parent_rejected():
+    errors = parent_errors(['a', 'b'], [decoder(2), decoder(4)])
+    assert len(errors) == 1
+    assert '4 tenseurs sans équivalent' in errors[0]
+
+
+def test_config_mismatch_rejected():
+    errors = parent_errors(['a', 'b'], [decoder(2), decoder(2)], [config(2), config(2, 'mistral')])
+    assert errors == ["b: config.json différente de a (model_type mistral ≠ llama)"]
+
+
+def test_missing_config_not_compared():
+    assert parent_errors(['a', 'b'], [decoder(2), decoder(2)], [config(2), None]) == []
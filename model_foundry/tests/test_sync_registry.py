@@ -0,0 +1,32 @@
+"""Registre models.json (sync_registry.py)."""
+
+import json
+
+from sync_registry import DEFAULT_REGISTRY, DEFAULT_SCHEMA, dump_registry, registry_layout, validate
+
+
+def test_registry_round_trip_is_byte_stable():
+    text = DEFAULT_REGISTRY.read_text(encoding='utf-8')
+    assert dump_registry(json.loads(text), layout=registry_layout(text)) + '\n' == text
+
+
+def test_layout_kept_per_list():
+    text = '{\n  "a": ["x", "y"],\n  "b": [\n    "x",\n    "y"\n  ],\n  "c": []\n}'
+    assert registry_layout(text) == {('a',): False, ('b',): True}
+    assert dump_registry(json.loads(text), layout=registry_layout(text)) == text
+
+
+def test_new_lists_follow_default_style():
+    registry = {'capabilities': ['chat', 'code'], 'shards': ['/models/m/shard_00.safetensors']}
+    assert dump_registry(registry) == (
+        '{\n  "capabilities": ["chat", "code"],\n'
+        '  "shards": [\n    "/models/m/shard_00.safetensors"\n  ]\n}'
+    )
+
+
+def test_registry_entries_match_schema():
+    registry = json.loads(DEFAULT_REGISTRY.read_text(encoding='utf-8'))
+    schema = json.loads(DEFAULT_SCHEMA.read_text(encoding='utf-8'))
+    entry_schema = {'$ref': '#/definitions/ModelConfig'}
+    for key, entry in registry['models'].items():
+        assert validate(entry, entry_schema, schema, f'models.{key}') == []
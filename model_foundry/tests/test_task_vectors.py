@@ -0,0 +1,94 @@
+"""Reconstruction des vecteurs de tâche (task_vectors.py)."""
+
+import numpy as np
+
+from safetensors_io import SafetensorsWriter, list_model_tensors, read_tensor_bytes
+from task_vectors import TaskVector, extract_task_vector, reconstruct_model
+
+DTYPES = {'F32': np.float32, 'F16': np.float16, 'BF16': np.uint16, 'I64': np.int64}
+
+
+def write_model(directory, tensors):
+    """Écrit {nom: (dtype safetensors, tableau)} dans directory/model.safetensors."""
+    directory.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        name: np.ascontiguousarray(array, dtype=DTYPES[dtype])
+        for name, (dtype, array) in tensors.items()
+    }
+    entries = [
+        (name, tensors[name][0], array.shape, array.nbytes) for name, array in arrays.items()
+    ]
+    with SafetensorsWriter(directory / 'model.safetensors', entries) as writer:
+        for array in arrays.values():
+            writer.write(array.tobytes())
+    (directory / 'config.json').write_text('{"model_type": "llama"}', encoding='utf-8')
+
+
+def sparse_update(rng, array, fraction=0.1):
+    updated = array.copy()
+    mask = rng.random(array.shape) < fraction
+    noise = rng.standard_normal(mask.sum())
+    updated[mask] = (updated[mask].astype(np.float32) + noise).astype(array.dtype)
+    return updated
+
+
+def test_exact_reconstruction_is_bit_identical(tmp_path):
+    rng = np.random.default_rng(0)
+    f32 = rng.standard_normal((16, 32)).astype(np.float32)
+    f16 = rng.standard_normal((8, 24)).astype(np.float16)
+    bf16_bits = rng.standard_normal((12, 16)).astype(np.float32).view(np.uint32)
+    bf16 = (bf16_bits >> 16).astype(np.uint16)
+    bf16_merged = bf16.copy()
+    bf16_merged[rng.random(bf16.shape) < 0.2] += 3
+    # Écart dans le bit de signe d'un zéro: invisible en valeur, visible en octets
+    f32[0, 0] = 0.0
+    f32_merged = sparse_update(rng, f32)
+    f32_merged[0, 0] = -0.0
+
+    write_model(tmp_path / 'base', {
+        'model.embed_tokens.weight': ('F32', f32),
+        'model.layers.0.mlp.up_proj.weight': ('F16', f16),
+        'model.layers.0.self_attn.q_proj.weight': ('BF16', bf16),
+        'model.norm.weight': ('F32', np.ones(32)),
+        'model.removed.weight': ('F32', np.zeros(4)),
+        'model.positions': ('I64', np.arange(6)),
+    })
+    write_model(tmp_path / 'merged', {
+        'model.embed_tokens.weight': ('F32', f32_merged),
+        'model.layers.0.mlp.up_proj.weight': ('F16', sparse_update(rng, f16)),
+        'model.layers.0.self_attn.q_proj.weight': ('BF16', bf16_merged),
+        'model.norm.weight': ('F32', np.ones(32)),
+        'model.positions': ('I64', np.arange(6) * 2),
+        'lm_head.weight': ('F32', rng.standard_normal((4, 32))),
+    })
+
+    manifest = extract_task_vector(
+        tmp_path / 'merged', tmp_path / 'base', tmp_path / 'delta', value_format='exact'
+    )
+    assert manifest['relative_delta_error'] == 0.0
+    assert 'model.norm.weight' not in manifest['tensors']
+    assert manifest['removed'] == ['model.removed.weight']
+
+    reconstruct_model(tmp_path / 'delta', tmp_path / 'base', tmp_path / 'rebuilt')
+
+    merged = {t.name: t for t in list_model_tensors(tmp_path / 'merged')}
+    rebuilt = {t.name: t for t in list_model_tensors(tmp_path / 'rebuilt')}
+    assert sorted(rebuilt) == sorted(merged)
+    for name, info in merged.items():
+        assert (rebuilt[name].dtype, rebuilt[name].shape) == (info.dtype, info.shape)
+        assert read_tensor_bytes(rebuilt[name]) == read_tensor_bytes(info), name
+
+
+def test_unchanged_tensors_read_from_base(tmp_path):
+    rng = np.random.default_rng(1)
+    weight = rng.standard_normal((4, 8)).astype(np.float32)
+    write_model(tmp_path / 'base', {'w': ('F32', weight)})
+    write_model(tmp_path / 'merged', {'w': ('F32', weight)})
+
+    manifest = extract_task_vector(
+        tmp_path / 'merged', tmp_path / 'base', tmp_path / 'delta', value_format='exact'
+    )
+
+    assert manifest['tensors'] == {}
+    base = list_model_tensors(tmp_path / 'base')[0]
+    assert TaskVector(tmp_path / 'delta').reconstruct_tensor(base) == read_tensor_bytes(base)
@@ -0,0 +1,51 @@
+"""Flux de bits et dispositions des poids quantifiés (weight_layouts.py)."""
+
+import numpy as np
+import pytest
+
+from quantize_layers import quantize_rtn
+from weight_layouts import (
+    LAYOUTS,
+    pack_bits,
+    packed_width,
+    reference_matmul,
+    to_layout,
+    unpack_bits,
+)
+
+BITS = (2, 3, 4, 8)
+
+
+@pytest.mark.parametrize("bits", BITS)
+@pytest.mark.parametrize("cols", [1, 7, 64, 131])
+def test_pack_unpack_round_trip(bits, cols):
+    rng = np.random.default_rng(bits * 1000 + cols)
+    codes = rng.integers(0, 1 << bits, size=(5, cols), dtype=np.uint8)
+
+    packed = pack_bits(codes, bits)
+
+    assert packed.dtype == np.uint8
+    assert packed.shape == (5, packed_width(cols, bits))
+    np.testing.assert_array_equal(unpack_bits(packed, bits, cols), codes)
+
+
+def test_pack_bits_little_endian():
+    # Codes 3 bits 0b101, 0b011, 0b110: bits 101 110 011 du poids faible au poids fort
+    packed = pack_bits(np.array([[0b101, 0b011, 0b110]], dtype=np.uint8), 3)
+    np.testing.assert_array_equal(packed, [[0b10011101, 0b1]])
+
+
+@pytest.mark.parametrize("bits", BITS)
+@pytest.mark.parametrize("layout_name", sorted(LAYOUTS))
+def test_reference_matmul_matches_dequantized(layout_name, bits):
+    rng = np.random.default_rng(bits)
+    rows, cols, group_size = 24, 64, 32
+    weight = rng.standard_normal((rows, cols)).astype(np.float32)
+    x = rng.standard_normal((3, cols)).astype(np.float32)
+
+    quantized = quantize_rtn(weight, bits, group_size)
+    layout = LAYOUTS[layout_name]
+    arrays = to_layout(layout, quantized)
+
+    y = reference_matmul(x, layout, arrays, quantized.shape, bits, group_size)
+    np.testing.assert_allclose(y, x @ quantized.dequantize().T, rtol=1e-4, atol=1e-4)
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Choix de la taille des shards
+Simule le chargement progressif d'un modèle sous plusieurs profils réseau
+(débit, RTT, connexions parallèles) pour chaque découpage candidat, et
+recommande celui qui minimise le temps avant premier token.
+"""
+
+import argparse
+import json
+import sys
+from collections import deque
+from pathlib import Path
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from safetensors_io import TensorInfo, list_model_tensors
+from shard_model import DEFAULT_COMPONENT_ORDER, MANIFEST_FILENAME, plan_components
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class NetworkProfile(NamedTuple):
+    """Conditions réseau côté client."""
+
+    bandwidth_mbps: float
+    rtt_ms: float
+    connections: int
+    window_kb: int = 4096
+
+
+DEFAULT_PROFILES = {
+    'fibre': NetworkProfile(200, 10, 6),
+    'adsl': NetworkProfile(15, 40, 6),
+    '4g': NetworkProfile(25, 70, 6),
+    'mobile-lent': NetworkProfile(5, 150, 4),
+}
+DEFAULT_SIZES_MB = (10, 25, 50, 75, 100, 150, 200, 300, 500)
+# Traitement côté client (parse + upload GPU), séquentiel dans l'ordre de chargement
+DEFAULT_PROCESS_MBPS = 400
+DEFAULT_SHARD_OVERHEAD_MS = 5
+# Mémoire des réponses en vol: chaque shard est bufferisé en entier avant traitement
+DEFAULT_MAX_INFLIGHT_MB = 512
+# Poids du chargement complet dans le score (le TTFT prime)
+DEFAULT_FULL_LOAD_WEIGHT = 0.25
+# Taille supposée du manifeste quand le modèle n'est pas encore shardé
+MANIFEST_BYTES_ESTIMATE = 4096
+STARTUP_FILES = ('config.json', 'tokenizer.bin', 'tokenizer.json')
+# Écart relatif de score sous lequel deux découpages sont équivalents
+# (le moins de requêtes l'emporte)
+SCORE_TOLERANCE = 0.01
+MANIFEST, STARTUP, BACKGROUND = 0, 1, 2
+
+
+class Request(NamedTuple):
+    """Requête HTTP simulée: taille, phase (0 manifeste, 1 démarrage, 2 fond), traitement."""
+
+    nbytes: int
+    phase: int
+    process: bool
+
+
+class Layout(NamedTuple):
+    """Découpage candidat."""
+
+    name: str
+    shard_size_mb: Optional[int]
+    component_sizes_mb: Dict[str, int]
+    requests: List[Request]
+
+    @property
+    def shards(self) -> int:
+        return sum(1 for r in self.requests if r.process)
+
+    def inflight_bytes(self, connections: int) -> int:
+        """Pire cas des réponses bufferisées simultanément (les plus gros shards)."""
+        return sum(sorted((r.nbytes for r in self.requests), reverse=True)[:connections])
+
+
+def simulate_downloads(sizes: List[int], phases: List[int], profile: NetworkProfile) -> List[float]:
+    """
+    Instants d'arrivée (s) de requêtes émises dans l'ordre.
+
+    Une requête n'est émise qu'une fois arrivées toutes celles des phases
+    précédentes (manifeste, puis démarrage, puis arrière-plan, comme le
+    chargeur progressif). Au plus `connections` requêtes simultanées;
+    chacune attend un RTT avant le premier octet, puis les transferts
+    actifs se partagent équitablement le débit, chacun plafonné par
+    fenêtre TCP / RTT.
+    """
+    bandwidth = profile.bandwidth_mbps * 1e6 / 8
+    rtt = profile.rtt_ms / 1000
+    per_connection = profile.window_kb * 1024 / rtt if rtt > 0 else bandwidth
+    arrivals = [0.0] * len(sizes)
+    pending = deque(range(len(sizes)))
+    active: Dict[int, List[float]] = {}
+    now = 0.0
+
+    def issue() -> None:
+        while pending and len(active) < profile.connections:
+            j = pending[0]
+            if any(phases[i] < phases[j] for i in active):
+                return
+            pending.popleft()
+            active[j] = [now + rtt, float(sizes[j])]
+
+    issue()
+    while active:
+        transferring = [i for i, (start, _) in active.items() if start <= now]
+        rate = min(bandwidth / len(transferring), per_connection) if transferring else 0.0
+
+        candidates = [start for start, _ in active.values() if start > now]
+        candidates += [now + active[i][1] / rate for i in transferring]
+        step = min(candidates) - now
+
+        for i in transferring:
+            active[i][1] -= rate * step
+        now += step
+
+        for i in [i for i in transferring if active[i][1] <= 1e-6]:
+            del active[i]
+            arrivals[i] = now
+        issue()
+
+    return arrivals
+
+
+def simulate_layout(
+    layout: Layout,
+    profile: NetworkProfile,
+    process_mbps: float = DEFAULT_PROCESS_MBPS,
+    shard_overhead_ms: float = DEFAULT_SHARD_OVERHEAD_MS
+) -> Tuple[float, float]:
+    """
+    Simule un découpage sous un profil réseau.
+
+    Returns:
+        (TTFT, chargement complet) en secondes: fin du traitement des
+        requêtes de démarrage, puis de toutes les requêtes
+    """
+    arrivals = simulate_downloads(
+        [r.nbytes for r in layout.requests], [r.phase for r in layout.requests], profile
+    )
+    process_rate = process_mbps * 1024 * 1024
+    ready = 0.0
+    ttft = 0.0
+
+    for request, arrival in zip(layout.requests, arrivals):
+        ready = max(ready, arrival)
+        if request.process:
+            ready += request.nbytes / process_rate + shard_overhead_ms / 1000
+        if request.phase < BACKGROUND:
+            ttft = max(ttft, ready)
+
+    return ttft, ready
+
+
+def startup_file_sizes(model_dir: Path) -> List[int]:
+    """Fichiers lus avant les poids: manifeste, config, tokenizer (compilé de préférence)."""
+    model_dir = Path(model_dir)
+    manifest = model_dir / MANIFEST_FILENAME
+    sizes = [manifest.stat().st_size if manifest.exists() else MANIFEST_BYTES_ESTIMATE]
+
+    for name in STARTUP_FILES:
+        path = model_dir / name
+        if name == 'tokenizer.json' and (model_dir / 'tokenizer.bin').exists():
+            continue
+        if path.exists():
+            sizes.append(path.stat().st_size)
+    return sizes
+
+
+def build_layouts(
+    tensors: List[TensorInfo],
+    startup_sizes: List[int],
+    sizes_mb: Tuple[int, ...] = DEFAULT_SIZES_MB,
+    component_order: Tuple[str, ...] = DEFAULT_COMPONENT_ORDER
+) -> List[Layout]:
+    """
+    Découpages candidats.
+
+    Pour chaque taille: shards uniformes, et pour les modèles multi-tours
+    une variante où les tours secondaires tiennent en un seul shard. S'y
+    ajoute le conteneur monofichier (index, puis une seule plage).
+    """
+    mb = 1024 * 1024
+    first_component = plan_components(tensors, 0, component_order=component_order)
+    components = list(first_component)
+    startup = [Request(startup_sizes[0], MANIFEST, False)]
+    startup += [Request(size, STARTUP, False) for size in startup_sizes[1:]]
+
+    def requests_for(plan: Dict[str, List[List[TensorInfo]]]) -> List[Request]:
+        return startup + [
+            Request(
+                sum(t.nbytes for t in shard),
+                STARTUP if component == components[0] else BACKGROUND,
+                True
+            )
+            for component, shards in plan.items() for shard in shards
+        ]
+
+    variants = [({}, '')]
+    if len(components) > 1:
+        variants.append(({c: 0 for c in components[1:]}, ', tours secondaires en un shard'))
+
+    layouts = []
+    for size in sizes_mb:
+        for component_sizes, suffix in variants:
+            plan = plan_components(
+                tensors,
+                size * mb,
+                {c: s * mb for c, s in component_sizes.items()},
+                component_order
+            )
+            layouts.append(Layout(f"{size} Mo{suffix}", size, component_sizes, requests_for(plan)))
+
+    total = sum(startup_sizes[1:]) + sum(t.nbytes for t in tensors)
+    layouts.append(Layout(
+        'conteneur monofichier', None, {},
+        [Request(MANIFEST_BYTES_ESTIMATE, MANIFEST, False), Request(total, STARTUP, True)]
+    ))
+    return layouts
+
+
+def tune(
+    layouts: List[Layout],
+    profiles: Dict[str, NetworkProfile],
+    process_mbps: float = DEFAULT_PROCESS_MBPS,
+    shard_overhead_ms: float = DEFAULT_SHARD_OVERHEAD_MS,
+    full_load_weight: float = DEFAULT_FULL_LOAD_WEIGHT,
+    max_inflight_mb: float = DEFAULT_MAX_INFLIGHT_MB
+) -> dict:
+    """
+    Évalue chaque découpage sous chaque profil.
+
+    Le score d'un découpage est TTFT + poids × chargement complet. La
+    recommandation globale minimise la somme des écarts relatifs au
+    meilleur score de chaque profil (aucun profil n'est sacrifié). À
+    SCORE_TOLERANCE près, le découpage au moins de shards l'emporte.
+    Les découpages dont les réponses en vol dépassent `max_inflight_mb`
+    sont écartés (sauf si aucun ne tient).
+
+    Returns:
+        {results: {profil: [{layout, shards, inflight_mb, fits, ttft_s, full_load_s, score}]},
+         best: {profil: nom}, recommended: nom, shard_size_mb, component_sizes_mb}
+    """
+    results: Dict[str, List[dict]] = {}
+    best: Dict[str, str] = {}
+    regret = {layout.name: 0.0 for layout in layouts}
+    fits = {layout.name: True for layout in layouts}
+
+    for profile_name, profile in profiles.items():
+        rows = []
+        for layout in layouts:
+            ttft, full = simulate_layout(layout, profile, process_mbps, shard_overhead_ms)
+            inflight_mb = layout.inflight_bytes(profile.connections) / (1024 * 1024)
+            rows.append({
+                'layout': layout.name,
+                'shards': layout.shards,
+                'inflight_mb': round(inflight_mb, 1),
+                'fits': inflight_mb <= max_inflight_mb,
+                'ttft_s': round(ttft, 2),
+                'full_load_s': round(full, 2),
+                'score': ttft + full_load_weight * full,
+            })
+        candidates = [r for r in rows if r['fits']] or rows
+        best_score = min(r['score'] for r in candidates)
+        best[profile_name] = min(
+            (r for r in candidates if r['score'] <= best_score * (1 + SCORE_TOLERANCE)),
+            key=lambda r: r['shards']
+        )['layout']
+        for row in rows:
+            regret[row['layout']] += row['score'] / best_score - 1
+            fits[row['layout']] = fits[row['layout']] and row['fits']
+        results[profile_name] = rows
+
+    candidates = [layout for layout in layouts if fits[layout.name]] or layouts
+    threshold = min(regret[layout.name] for layout in candidates) + SCORE_TOLERANCE * len(profiles)
+    recommended = min(
+        (layout for layout in candidates if regret[layout.name] <= threshold),
+        key=lambda layout: layout.shards
+    )
+    return {
+        'results': results,
+        'best': best,
+        'recommended': recommended.name,
+        'shard_size_mb': recommended.shard_size_mb,
+        'component_sizes_mb': recommended.component_sizes_mb,
+    }
+
+
+def recommend_layout(
+    tensors: List[TensorInfo],
+    startup_sizes: List[int],
+    profiles: Optional[Dict[str, NetworkProfile]] = None,
+    sizes_mb: Tuple[int, ...] = DEFAULT_SIZES_MB,
+    component_order: Tuple[str, ...] = DEFAULT_COMPONENT_ORDER
+) -> Tuple[int, Dict[str, int]]:
+    """Taille de shard (et tailles par tour) recommandée, parmi les découpages shardés."""
+    layouts = [
+        layout for layout in build_layouts(tensors, startup_sizes, sizes_mb, component_order)
+        if layout.shard_size_mb is not None
+    ]
+    report = tune(layouts, profiles or DEFAULT_PROFILES)
+    return report['shard_size_mb'], report['component_sizes_mb']
+
+
+def recommend_shard_size(
+    model_dir: Path,
+    profiles: Optional[Dict[str, NetworkProfile]] = None,
+    sizes_mb: Tuple[int, ...] = DEFAULT_SIZES_MB,
+    component_order: Tuple[str, ...] = DEFAULT_COMPONENT_ORDER
+) -> Tuple[int, Dict[str, int]]:
+    """`recommend_layout` pour un modèle sur disque (en-têtes safetensors seulement)."""
+    return recommend_layout(
+        list_model_tensors(model_dir),
+        startup_file_sizes(model_dir),
+        profiles,
+        sizes_mb,
+        component_order
+    )
+
+
+def parse_profile(spec: str) -> Tuple[str, NetworkProfile]:
+    """NOM=MBPS,RTT_MS,CONNEXIONS[,FENETRE_KO] → (nom, profil)."""
+    name, _, values = spec.partition('=')
+    parts = values.split(',')
+    if not name or len(parts) not in (3, 4):
+        raise ValueError(f"profil attendu NOM=MBPS,RTT_MS,CONNEXIONS[,FENETRE_KO], reçu: {spec}")
+    bandwidth, rtt, connections = float(parts[0]), float(parts[1]), int(parts[2])
+    window = int(parts[3]) if len(parts) == 4 else NetworkProfile._field_defaults['window_kb']
+    if bandwidth <= 0 or rtt < 0 or connections < 1:
+        raise ValueError(f"profil invalide: {spec}")
+    return name, NetworkProfile(bandwidth, rtt, connections, window)
+
+
+def format_report(report: dict, profiles: Dict[str, NetworkProfile]) -> str:
+    """Tableau TTFT / chargement complet par profil, puis recommandations."""
+    lines = []
+    for profile_name, rows in report['results'].items():
+        profile = profiles[profile_name]
+        lines.append(
+            f"\n{profile_name} ({profile.bandwidth_mbps:g} Mbit/s, RTT {profile.rtt_ms:g} ms, "
+            f"{profile.connections} connexions)"
+        )
+        lines.append(
+            f"  {'Découpage':<42} {'Shards':>6} {'En vol (Mo)':>12} {'TTFT (s)':>9} "
+            f"{'Complet (s)':>12}"
+        )
+        for row in rows:
+            if row['layout'] == report['best'][profile_name]:
+                marker = ' ◀'
+            else:
+                marker = '' if row['fits'] else ' ✗'
+            lines.append(
+                f"  {row['layout']:<42} {row['shards']:>6} {row['inflight_mb']:>12.0f} "
+                f"{row['ttft_s']:>9.2f} {row['full_load_s']:>12.2f}{marker}"
+            )
+    lines.append('')
+    for profile_name, layout in report['best'].items():
+        lines.append(f"  meilleur pour {profile_name}: {layout}")
+    lines.append(f"  recommandé (tous profils): {report['recommended']}")
+    return '\n'.join(lines)
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Choix de la taille des shards",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Profils par défaut (fibre, adsl, 4g, mobile-lent)
+  python tune_shards.py merged_models/ORION-Dev-Polyglot-v1
+
+  # Profils personnalisés et tailles candidates
+  python tune_shards.py optimized_models/router --profile wifi=50,20,6 --sizes 10,25,50
+
+  # Appliquer la recommandation au sharding
+  python shard_model.py my-model/ output/my-model-sharded --shard-size auto
+        """
+    )
+
+    parser.add_argument(
+        'model',
+        type=Path,
+        help="Dossier du modèle (seuls les en-têtes safetensors sont lus)"
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='append',
+        default=[],
+        metavar='NOM=MBPS,RTT_MS,CONNEXIONS',
+        help="Profil réseau (répétable, remplace les profils par défaut)"
+    )
+
+    parser.add_argument(
+        '--sizes',
+        default=','.join(str(s) for s in DEFAULT_SIZES_MB),
+        help="Tailles de shard candidates en Mo"
+    )
+
+    parser.add_argument(
+        '--component-order',
+        default=','.join(DEFAULT_COMPONENT_ORDER),
+        help=f"Ordre de chargement des tours (défaut: {','.join(DEFAULT_COMPONENT_ORDER)})"
+    )
+
+    parser.add_argument(
+        '--process-rate',
+        type=float,
+        default=DEFAULT_PROCESS_MBPS,
+        help=f"Débit de traitement côté client en Mo/s (défaut: {DEFAULT_PROCESS_MBPS})"
+    )
+
+    parser.add_argument(
+        '--shard-overhead-ms',
+        type=float,
+        default=DEFAULT_SHARD_OVERHEAD_MS,
+        help=f"Coût fixe de traitement par shard en ms (défaut: {DEFAULT_SHARD_OVERHEAD_MS})"
+    )
+
+    parser.add_argument(
+        '--max-inflight',
+        type=float,
+        default=DEFAULT_MAX_INFLIGHT_MB,
+        help=f"Mémoire maximale des réponses en vol en Mo (défaut: {DEFAULT_MAX_INFLIGHT_MB})"
+    )
+
+    parser.add_argument(
+        '--full-load-weight',
+        type=float,
+        default=DEFAULT_FULL_LOAD_WEIGHT,
+        help=f"Poids du chargement complet dans le score (défaut: {DEFAULT_FULL_LOAD_WEIGHT})"
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help="Sortie JSON"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        profiles = dict(parse_profile(spec) for spec in args.profile) or dict(DEFAULT_PROFILES)
+        sizes = tuple(int(s) for s in args.sizes.split(','))
+    except ValueError as e:
+        parser.error(str(e))
+
+    tensors = list_model_tensors(args.model)
+    if not tensors:
+        logger.error(f"❌ Aucun tenseur safetensors dans {args.model}")
+        sys.exit(1)
+
+    layouts = build_layouts(
+        tensors,
+        startup_file_sizes(args.model),
+        sizes,
+        tuple(args.component_order.split(','))
+    )
+    report = tune(
+        layouts,
+        profiles,
+        args.process_rate,
+        args.shard_overhead_ms,
+        args.full_load_weight,
+        args.max_inflight
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        total_mb = sum(t.nbytes for t in tensors) / (1024 * 1024)
+        logger.info(f"📊 {args.model.name}: {len(tensors)} tenseurs, {total_mb:.1f} Mo")
+        print(format_report(report, profiles))
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
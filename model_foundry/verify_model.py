@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Vérification d'intégrité des modèles shardés
+Contrôle en parallèle les en-têtes, l'index, les tailles et les SHA-256
+avant déploiement dans public/models/
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import logging
+from typing import Dict, List, Optional
+
+from safetensors_io import INDEX_FILENAME, SafetensorsError, read_header
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_FILENAME = 'shard_manifest.json'
+DEFAULT_CHUNK_MB = 16
+
+
+def hash_file(path: Path, chunk_size: int) -> str:
+    """Calcule le SHA-256 d'un fichier par grandes lectures séquentielles."""
+    sha256 = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            sha256.update(view[:read])
+
+    return sha256.hexdigest()
+
+
+def check_shard(
+    path: Path,
+    expected: Optional[dict],
+    compute_hash: bool,
+    chunk_size: int
+) -> dict:
+    """
+    Vérifie un fichier shard: en-tête, agencement des données, taille et hash.
+
+    Args:
+        path: Fichier safetensors
+        expected: Entrée du manifeste pour ce shard (taille, sha256), si connue
+        compute_hash: Relire le fichier pour vérifier le SHA-256
+        chunk_size: Taille des lectures séquentielles en octets
+
+    Returns:
+        Résultat {file, size_bytes, data_bytes, tensors, layouts, sha256, errors}
+    """
+    result = {
+        'file': path.name,
+        'size_bytes': 0,
+        'data_bytes': 0,
+        'tensors': [],
+        'layouts': {},
+        'sha256': None,
+        'errors': [],
+    }
+    errors = result['errors']
+
+    if not path.is_file():
+        errors.append(f"{path.name}: fichier manquant")
+        return result
+
+    result['size_bytes'] = path.stat().st_size
+
+    try:
+        header, data_offset, _ = read_header(path)
+    except SafetensorsError as e:
+        errors.append(str(e))
+        return result
+
+    result['tensors'] = list(header)
+    result['layouts'] = {
+        name: (entry['dtype'], list(entry['shape'])) for name, entry in header.items()
+    }
+    data_size = result['size_bytes'] - data_offset
+    result['data_bytes'] = data_size
+
+    # Les données doivent être contiguës, sans chevauchement ni octets orphelins
+    spans = sorted((entry['data_offsets'][0], entry['data_offsets'][1], name)
+                   for name, entry in header.items())
+    cursor = 0
+    for begin, end, name in spans:
+        if begin < cursor:
+            errors.append(f"{path.name}: {name} chevauche le tenseur précédent")
+        elif begin > cursor:
+            errors.append(f"{path.name}: {begin - cursor} octets non référencés avant {name}")
+        cursor = max(cursor, end)
+    if cursor != data_size:
+        errors.append(
+            f"{path.name}: {data_size - cursor} octets non référencés en fin de fichier"
+        )
+
+    if expected is not None:
+        expected_size = expected.get('size_bytes')
+        if expected_size is not None and expected_size != result['size_bytes']:
+            errors.append(
+                f"{path.name}: taille {result['size_bytes']} octets, "
+                f"{expected_size} attendus par le manifeste"
+            )
+
+    if compute_hash:
+        result['sha256'] = hash_file(path, chunk_size)
+        expected_hash = (expected or {}).get('sha256')
+        if expected_hash and expected_hash != result['sha256']:
+            errors.append(f"{path.name}: SHA-256 différent du manifeste")
+
+    return result
+
+
+def _load_json(path: Path, errors: List[str]) -> Optional[dict]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        errors.append(f"{path.name}: illisible ({e})")
+        return None
+
+
+def alias_errors(
+    index: dict,
+    manifest: Optional[dict],
+    owners: Dict[str, List[str]],
+    shards: List[dict]
+) -> List[str]:
+    """
+    Contrôle les tenseurs en double du sharder: chaque alias de l'index
+    désigne un tenseur stocké et déclaré dans `weight_map`, n'est pas stocké
+    lui-même, et son dtype et sa forme (manifeste) sont ceux de sa cible.
+    """
+    errors = []
+    weight_map = index.get('weight_map', {})
+    aliases: Dict[str, str] = index.get('aliases', {})
+    layouts = {name: layout for shard in shards for name, layout in shard['layouts'].items()}
+    declared: Dict[str, dict] = (manifest or {}).get('aliases', {})
+
+    for alias, target in aliases.items():
+        if alias in weight_map or alias in owners:
+            errors.append(f"alias {alias} également stocké comme tenseur")
+        if target not in weight_map:
+            errors.append(f"alias {alias}: cible {target} absente de l'index")
+            continue
+        if target not in layouts:
+            continue  # cible absente des shards, déjà signalée
+
+        if manifest is None:
+            continue
+        entry = declared.get(alias)
+        if entry is None:
+            errors.append(f"alias {alias} absent du manifeste")
+            continue
+        if entry.get('target') != target:
+            errors.append(
+                f"alias {alias}: cible {entry.get('target')} dans le manifeste, "
+                f"{target} dans l'index"
+            )
+        dtype, shape = layouts[target]
+        if 'dtype' not in entry or 'shape' not in entry:
+            errors.append(f"alias {alias}: dtype et forme absents du manifeste")
+        elif entry['dtype'] != dtype or list(entry['shape']) != shape:
+            errors.append(
+                f"alias {alias}: {entry['dtype']} {entry['shape']} dans le manifeste, "
+                f"{target} est {dtype} {shape}"
+            )
+
+    for alias in sorted(declared.keys() - aliases.keys()):
+        errors.append(f"alias {alias} du manifeste absent de l'index")
+    return errors
+
+
+def verify_model_dir(
+    model_dir: Path,
+    workers: int,
+    compute_hash: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_MB * 1024 * 1024
+) -> dict:
+    """
+    Vérifie un dossier de modèle shardé.
+
+    Les shards sont vérifiés en parallèle; les contrôles croisés (index,
+    manifeste, taille totale) sont faits ensuite.
+
+    Returns:
+        Rapport {model_dir, ok, errors, shards, bytes_checked, seconds}
+    """
+    start = time.perf_counter()
+    errors: List[str] = []
+
+    manifest = _load_json(model_dir / MANIFEST_FILENAME, errors)
+    index = _load_json(model_dir / INDEX_FILENAME, errors)
+
+    expected: Dict[str, dict] = {}
+    if manifest is not None:
+        expected = {shard['filename']: shard for shard in manifest.get('shards', [])}
+
+    weight_map: Dict[str, str] = (index or {}).get('weight_map', {})
+
+    filenames = list(dict.fromkeys(
+        list(expected)
+        + list(dict.fromkeys(weight_map.values()))
+        + sorted(p.name for p in model_dir.glob('*.safetensors'))
+    ))
+
+    if not filenames:
+        errors.append("aucun shard safetensors trouvé")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        shards = list(executor.map(
+            lambda name: check_shard(
+                model_dir / name, expected.get(name), compute_hash, chunk_size
+            ),
+            filenames
+        ))
+
+    # Chemins relatifs conservés (chunks partagés: ../shared/chunk_*.safetensors)
+    for name, shard in zip(filenames, shards):
+        shard['file'] = name
+        errors.extend(shard['errors'])
+
+    # Chaque tenseur doit apparaître exactement une fois, dans le shard indiqué par l'index
+    owners: Dict[str, List[str]] = {}
+    for shard in shards:
+        for name in shard['tensors']:
+            owners.setdefault(name, []).append(shard['file'])
+
+    for name, files in owners.items():
+        if len(files) > 1:
+            errors.append(f"tenseur {name} présent dans plusieurs shards: {', '.join(files)}")
+
+    if index is not None:
+        for name, filename in weight_map.items():
+            files = owners.get(name, [])
+            if not files:
+                errors.append(f"tenseur {name} absent (attendu dans {filename})")
+            elif filename not in files:
+                errors.append(f"tenseur {name} dans {files[0]}, l'index indique {filename}")
+
+        for name, files in owners.items():
+            if name not in weight_map:
+                errors.append(f"tenseur {name} ({files[0]}) absent de l'index")
+
+        errors.extend(alias_errors(index, manifest, owners, shards))
+
+        declared = index.get('metadata', {}).get('total_size')
+        data_bytes = sum(shard['data_bytes'] for shard in shards)
+        if declared is not None and declared != data_bytes:
+            errors.append(f"index: total_size {declared} octets, {data_bytes} trouvés")
+
+    if manifest is not None:
+        on_disk = {p.name for p in model_dir.glob('*.safetensors')}
+        for name in sorted(on_disk - set(expected)):
+            errors.append(f"{name}: shard absent du manifeste")
+
+        declared = manifest.get('total_size_bytes')
+        total = sum(shard['size_bytes'] for shard in shards)
+        if declared is not None and declared != total:
+            errors.append(f"manifeste: total_size_bytes {declared} octets, {total} trouvés")
+    elif compute_hash:
+        logger.warning(f"⚠️  {model_dir}: pas de {MANIFEST_FILENAME}, hashes non comparés")
+
+    return {
+        'model_dir': str(model_dir),
+        'ok': not errors,
+        'errors': errors,
+        'shards': [
+            {key: shard[key] for key in ('file', 'size_bytes', 'sha256')}
+            | {'num_tensors': len(shard['tensors'])}
+            for shard in shards
+        ],
+        'bytes_checked': sum(shard['size_bytes'] for shard in shards),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Vérification d'intégrité des modèles shardés",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Vérifier un modèle avant déploiement
+  python verify_model.py ../public/models/ORION-Dev-Polyglot-v1-q4
+
+  # Vérifier tous les modèles ORION, rapport JSON
+  python verify_model.py ../public/models/ORION-*/ --report verify.json
+
+  # Contrôle rapide sans relecture des données
+  python verify_model.py output/my-model-sharded --no-hash
+        """
+    )
+
+    parser.add_argument(
+        'models',
+        nargs='+',
+        type=Path,
+        help="Dossiers de modèles shardés à vérifier"
+    )
+
+    parser.add_argument(
+        '--workers',
+        '-j',
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Nombre de shards vérifiés en parallèle"
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_MB,
+        help=f"Taille des lectures séquentielles en Mo (défaut: {DEFAULT_CHUNK_MB})"
+    )
+
+    parser.add_argument(
+        '--no-hash',
+        action='store_true',
+        help="Ne pas relire les shards pour vérifier les SHA-256"
+    )
+
+    parser.add_argument(
+        '--report',
+        type=Path,
+        help="Écrire le rapport complet en JSON"
+    )
+
+    parser.add_argument(
+        '--verbose',
+        '-v',
+        action='store_true',
+        help="Mode verbose"
+    )
+
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    reports = []
+    for model_dir in args.models:
+        if not model_dir.is_dir():
+            logger.error(f"❌ Dossier introuvable: {model_dir}")
+            reports.append({'model_dir': str(model_dir), 'ok': False,
+                            'errors': ['dossier introuvable'], 'shards': []})
+            continue
+
+        report = verify_model_dir(
+            model_dir,
+            workers=args.workers,
+            compute_hash=not args.no_hash,
+            chunk_size=args.chunk_size * 1024 * 1024
+        )
+        reports.append(report)
+
+        throughput = report['bytes_checked'] / (1024 * 1024) / max(report['seconds'], 1e-6)
+        if report['ok']:
+            logger.info(
+                f"✅ {model_dir}: {len(report['shards'])} shards, "
+                f"{report['bytes_checked'] / (1024 * 1024):.1f} Mo ({throughput:.0f} Mo/s)"
+            )
+        else:
+            logger.error(f"❌ {model_dir}: {len(report['errors'])} problème(s)")
+            for error in report['errors']:
+                logger.error(f"    - {error}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+        logger.info(f"📄 Rapport écrit: {args.report}")
+
+    sys.exit(0 if all(report['ok'] for report in reports) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+ORION Model Foundry - Dispositions des poids quantifiés
+Empaquetage dans l'ordre attendu par les kernels matmul WebGPU/WASM
+"""
+
+import argparse
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Blocs à échelles intégrées alignés pour des lectures u32 (WGSL, WASM)
+BLOCK_ALIGNMENT = 4
+
+DEFAULT_BENCHMARK_SHAPE = (4096, 4096)
+DEFAULT_BENCHMARK_REPEATS = 3
+
+
+class LayoutError(ValueError):
+    """Poids incompatible avec la disposition demandée."""
+
+
+@dataclass(frozen=True)
+class WeightLayout:
+    """
+    Disposition d'un poids quantifié [sorties, entrées] groupé le long des entrées.
+
+    `tile` sorties consécutives sont entrelacées entrée par entrée (1: ordre
+    ligne); `inline_scales` range échelle et zéro en tête de chaque bloc de
+    codes au lieu de tenseurs séparés.
+    """
+
+    name: str
+    tile: int
+    inline_scales: bool
+    description: str
+
+
+LAYOUTS = {
+    'row': WeightLayout(
+        'row', 1, False,
+        "Groupes par ligne, échelles et zéros à part (référence)"
+    ),
+    'row-inline': WeightLayout(
+        'row-inline', 1, True,
+        "Un bloc [échelle, zéro, codes] par ligne et par groupe"
+    ),
+    'tile8': WeightLayout(
+        'tile8', 8, False,
+        "8 sorties entrelacées par entrée (en 4 bits: un u32 = 8 sorties), échelles à part"
+    ),
+    'tile8-inline': WeightLayout(
+        'tile8-inline', 8, True,
+        "Tuiles de 8 sorties, un bloc [8 échelles, 8 zéros, codes] par groupe"
+    ),
+}
+
+DEFAULT_LAYOUT = 'row'
+
+
+# --- Flux de bits ---------------------------------------------------------
+
+def packed_width(cols: int, bits: int) -> int:
+    """Octets par ligne pour `cols` codes de `bits` bits."""
+    return (cols * bits + 7) // 8
+
+
+def pack_bits(codes: np.ndarray, bits: int) -> np.ndarray:
+    """
+    Empaquette des codes entiers [lignes, colonnes] en un flux de bits par ligne.
+
+    Les bits de chaque code sont rangés du poids faible au poids fort, codes
+    consécutifs contigus (petit-boutiste au bit près), chaque ligne complétée
+    jusqu'à l'octet.
+    """
+    rows, cols = codes.shape
+    codes = codes.astype(np.uint8, copy=False)
+    if 8 % bits == 0:
+        # 2, 4 ou 8 bits: aucun code ne chevauche deux octets
+        per_byte = 8 // bits
+        if cols % per_byte:
+            codes = np.pad(codes, ((0, 0), (0, per_byte - cols % per_byte)))
+        packed = codes[:, 0::per_byte].copy()
+        for i in range(1, per_byte):
+            packed |= codes[:, i::per_byte] << (i * bits)
+        return packed
+    shifts = np.arange(bits, dtype=np.uint8)
+    planes = (codes[:, :, None] >> shifts) & 1
+    return np.packbits(planes.reshape(rows, cols * bits), axis=1, bitorder='little')
+
+
+def unpack_bits(packed: np.ndarray, bits: int, cols: int) -> np.ndarray:
+    """Inverse de `pack_bits`: codes uint8 [lignes, colonnes]."""
+    rows = packed.shape[0]
+    if 8 % bits == 0:
+        per_byte = 8 // bits
+        mask = (1 << bits) - 1
+        codes = np.empty((rows, packed.shape[1] * per_byte), dtype=np.uint8)
+        for i in range(per_byte):
+            codes[:, i::per_byte] = (packed >> (i * bits)) & mask
+        return codes[:, :cols]
+    planes = np.unpackbits(packed, axis=1, count=cols * bits, bitorder='little')
+    weights = (1 << np.arange(bits, dtype=np.uint8)).astype(np.uint8)
+    return (planes.reshape(rows, cols, bits) * weights).sum(axis=2, dtype=np.uint8)
+
+
+# --- Dispositions ---------------------------------------------------------
+
+def get_layout(name: str) -> WeightLayout:
+    if name not in LAYOUTS:
+        raise LayoutError(f"disposition inconnue: {name} (disponibles: {', '.join(LAYOUTS)})")
+    return LAYOUTS[name]
+
+
+def _block_bytes(layout: WeightLayout, bits: int, group_size: int) -> int:
+    """Taille d'un bloc [échelles, zéros, codes] aligné."""
+    tile = layout.tile
+    raw = 2 * tile + packed_width(tile, bits) + group_size * tile * bits // 8
+    return raw + (-raw % BLOCK_ALIGNMENT)
+
+
+def fallback_layout(layout: WeightLayout) -> WeightLayout:
+    """
+    Disposition ligne de même placement des échelles (poids dont les sorties
+    ne forment pas de tuiles).
+    """
+    return LAYOUTS['row-inline' if layout.inline_scales else 'row']
+
+
+def fits_layout(layout: WeightLayout, shape: Tuple[int, int], bits: int, group_size: int) -> bool:
+    """Le poids peut-il être rangé dans `layout` (voir `check_shape`)."""
+    try:
+        check_shape(layout, shape, bits, group_size)
+    except LayoutError:
+        return False
+    return True
+
+
+def check_shape(layout: WeightLayout, shape: Tuple[int, int], bits: int, group_size: int) -> None:
+    rows, cols = shape
+    if cols % group_size:
+        raise LayoutError(f"{cols} entrées non divisibles en groupes de {group_size}")
+    if group_size * layout.tile * bits % 8:
+        raise LayoutError(f"groupes de {group_size} non alignés sur l'octet en {bits} bits")
+    if rows % layout.tile:
+        raise LayoutError(
+            f"{rows} sorties non divisibles en tuiles de {layout.tile} ({layout.name})"
+        )
+
+
+def layout_entries(
+    layout: WeightLayout,
+    name: str,
+    shape: Tuple[int, int],
+    bits: int,
+    group_size: int
+) -> List[Tuple[str, str, Tuple[int, ...], int]]:
+    """Entrées safetensors (nom, dtype, shape, octets) d'un poids `*.weight` disposé."""
+    check_shape(layout, shape, bits, group_size)
+    rows, cols = shape
+    groups = cols // group_size
+    tiles, tile = rows // layout.tile, layout.tile
+    base = name[:-len('.weight')]
+
+    if layout.inline_scales:
+        block = _block_bytes(layout, bits, group_size)
+        return [(f'{base}.qblocks', 'U8', (tiles, groups, block), tiles * groups * block)]
+
+    weight_width = packed_width(cols * tile, bits)
+    zeros_width = packed_width(groups * tile, bits)
+    return [
+        (f'{base}.qweight', 'U8', (tiles, weight_width), tiles * weight_width),
+        (f'{base}.scales', 'F16', (tiles, groups * tile), tiles * groups * tile * 2),
+        (f'{base}.qzeros', 'U8', (tiles, zeros_width), tiles * zeros_width),
+    ]
+
+
+def _interleave(values: np.ndarray, tile: int) -> np.ndarray:
+    """[sorties, n] → [sorties/tile, n * tile]: `tile` sorties consécutives par colonne."""
+    rows, cols = values.shape
+    tiles = values.reshape(rows // tile, tile, cols).transpose(0, 2, 1)
+    return tiles.reshape(rows // tile, cols * tile)
+
+
+def to_layout(layout: WeightLayout, quantized) -> Dict[str, np.ndarray]:
+    """
+    Réordonne un poids quantifié en disposition ligne (`QuantizedTensor`)
+    vers `layout`.
+
+    Returns:
+        Tableaux par suffixe de nom, dans l'ordre de `layout_entries`
+    """
+    bits, group_size = quantized.bits, quantized.group_size
+    check_shape(layout, quantized.shape, bits, group_size)
+    rows, cols = quantized.shape
+    groups = cols // group_size
+    tile = layout.tile
+
+    if tile == 1 and not layout.inline_scales:
+        return {
+            'qweight': quantized.qweight,
+            'scales': quantized.scales,
+            'qzeros': quantized.qzeros,
+        }
+
+    codes = unpack_bits(quantized.qweight, bits, cols)
+    zeros = unpack_bits(quantized.qzeros, bits, groups)
+    scales = quantized.scales.astype('<f2')
+
+    if not layout.inline_scales:
+        return {
+            'qweight': pack_bits(_interleave(codes, tile), bits),
+            'scales': _interleave(scales, tile),
+            'qzeros': pack_bits(_interleave(zeros, tile), bits),
+        }
+
+    tiles = rows // tile
+    # Un bloc par (tuile, groupe): codes entrée par entrée, `tile` sorties par entrée
+    block_codes = codes.reshape(tiles, tile, groups, group_size).transpose(0, 2, 3, 1)
+    block_codes = block_codes.reshape(tiles * groups, group_size * tile)
+    block_scales = scales.reshape(tiles, tile, groups).transpose(0, 2, 1)
+    block_scales = block_scales.reshape(tiles * groups, tile)
+    block_zeros = zeros.reshape(tiles, tile, groups).transpose(0, 2, 1)
+    block_zeros = block_zeros.reshape(tiles * groups, tile)
+
+    parts = [
+        np.ascontiguousarray(block_scales).view(np.uint8),
+        pack_bits(block_zeros, bits),
+        pack_bits(block_codes, bits),
+    ]
+    block = _block_bytes(layout, bits, group_size)
+    padding = block - sum(part.shape[1] for part in parts)
+    parts.append(np.zeros((tiles * groups, padding), dtype=np.uint8))
+    return {'qblocks': np.concatenate(parts, axis=1).reshape(tiles, groups, block)}
+
+
+def decode_group(
+    layout: WeightLayout,
+    arrays: Dict[str, np.ndarray],
+    shape: Tuple[int, int],
+    bits: int,
+    group_size: int,
+    group: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lit un groupe d'entrées directement dans la disposition, comme un kernel.
+
+    Returns:
+        (codes [sorties, group_size], échelles [sorties], zéros [sorties]) en float32
+    """
+    rows, _ = shape
+    tile = layout.tile
+    tiles = rows // tile
+    code_bytes = group_size * tile * bits // 8
+
+    if layout.inline_scales:
+        block = arrays['qblocks'][:, group, :]
+        zeros_at = 2 * tile
+        codes_at = zeros_at + packed_width(tile, bits)
+        scales = np.ascontiguousarray(block[:, :zeros_at]).view('<f2').reshape(tiles, tile)
+        zeros = unpack_bits(block[:, zeros_at:codes_at], bits, tile)
+        codes = unpack_bits(block[:, codes_at:codes_at + code_bytes], bits, group_size * tile)
+    else:
+        weight = arrays['qweight'][:, group * code_bytes:(group + 1) * code_bytes]
+        codes = unpack_bits(weight, bits, group_size * tile)
+        scales = arrays['scales'][:, group * tile:(group + 1) * tile]
+        groups = arrays['scales'].shape[1] // tile
+        zeros = unpack_bits(arrays['qzeros'], bits, groups * tile)
+        zeros = zeros[:, group * tile:(group + 1) * tile]
+
+    codes = codes.reshape(tiles, group_size, tile).transpose(0, 2, 1).reshape(rows, group_size)
+    return (
+        codes.astype(np.float32),
+        scales.reshape(rows).astype(np.float32),
+        zeros.reshape(rows).astype(np.float32),
+    )
+
+
+def reference_matmul(
+    x: np.ndarray,
+    layout: WeightLayout,
+    arrays: Dict[str, np.ndarray],
+    shape: Tuple[int, int],
+    bits: int,
+    group_size: int
+) -> np.ndarray:
+    """
+    y = x @ Wᵀ calculé groupe par groupe depuis la disposition, sans
+    reconstruire W: y += (x_g @ codes_gᵀ) * s - Σx_g * (z * s).
+    """
+    rows, cols = shape
+    x = np.asarray(x, dtype=np.float32)
+    y = np.zeros((x.shape[0], rows), dtype=np.float32)
+    for group in range(cols // group_size):
+        codes, scales, zeros = decode_group(layout, arrays, shape, bits, group_size, group)
+        xg = x[:, group * group_size:(group + 1) * group_size]
+        y += (xg @ codes.T) * scales - xg.sum(axis=1, keepdims=True) * (zeros * scales)
+    return y
+
+
+# --- Banc d'essai ---------------------------------------------------------
+
+def benchmark_layouts(
+    shape: Tuple[int, int] = DEFAULT_BENCHMARK_SHAPE,
+    bits: int = 4,
+    group_size: int = 128,
+    repeats: int = DEFAULT_BENCHMARK_REPEATS,
+    seed: int = 0
+) -> List[dict]:
+    """
+    Mesure le débit de conversion depuis la disposition ligne et vérifie la
+    matmul de référence de chaque disposition contre les poids reconstruits.
+    """
+    from quantize_layers import quantize_rtn
+
+    rng = np.random.default_rng(seed)
+    weight = rng.standard_normal(shape, dtype=np.float32)
+    quantized = quantize_rtn(weight, bits, group_size)
+    source_bytes = sum(a.nbytes for a in (quantized.qweight, quantized.scales, quantized.qzeros))
+    x = rng.standard_normal((8, shape[1]), dtype=np.float32)
+    expected = x @ quantized.dequantize().T
+
+    results = []
+    for layout in LAYOUTS.values():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            arrays = to_layout(layout, quantized)
+            timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+
+        start = time.perf_counter()
+        y = reference_matmul(x, layout, arrays, shape, bits, group_size)
+        matmul_seconds = time.perf_counter() - start
+
+        results.append({
+            'layout': layout.name,
+            'bytes': sum(a.nbytes for a in arrays.values()),
+            'convert_seconds': seconds,
+            'convert_mb_per_s': source_bytes / max(seconds, 1e-9) / (1024 * 1024),
+            'matmul_seconds': matmul_seconds,
+            'max_error': float(np.max(np.abs(y - expected)) / max(np.max(np.abs(expected)), 1e-12)),
+        })
+    return results
+
+
+def format_benchmark(
+    results: List[dict],
+    shape: Tuple[int, int],
+    bits: int,
+    group_size: int
+) -> str:
+    lines = [
+        f"Poids {shape[0]}x{shape[1]}, {bits} bits, groupes de {group_size}",
+        f"{'Disposition':<14} {'Octets':>10} {'Conversion':>12} {'Mo/s':>9} "
+        f"{'Matmul réf.':>12} {'Écart':>9}",
+    ]
+    for row in results:
+        lines.append(
+            f"{row['layout']:<14} {row['bytes']:>10} {row['convert_seconds'] * 1000:>10.1f}ms "
+            f"{row['convert_mb_per_s']:>9.0f} {row['matmul_seconds'] * 1000:>10.1f}ms "
+            f"{row['max_error']:>9.1e}"
+        )
+    return '\n'.join(lines)
+
+
+def parse_shape(value: str) -> Tuple[int, int]:
+    try:
+        rows, cols = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"forme invalide: {value} (attendu: 4096x4096)")
+    return rows, cols
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="ORION Model Foundry - Dispositions des poids quantifiés",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Lister les dispositions disponibles
+  python weight_layouts.py --list
+
+  # Débit de conversion et matmul de référence, poids 4096x11008 en 4 bits
+  python weight_layouts.py --benchmark --shape 4096x11008 --bits 4
+
+  # Quantifier directement dans une disposition
+  python quantize_model.py my-model/ output/my-model-q4 --layout tile8
+        """
+    )
+
+    parser.add_argument(
+        '--list',
+        action='store_true',
+        help="Lister les dispositions disponibles"
+    )
+
+    parser.add_argument(
+        '--benchmark',
+        action='store_true',
+        help="Mesurer la conversion et vérifier la matmul de référence de chaque disposition"
+    )
+
+    parser.add_argument(
+        '--shape',
+        type=parse_shape,
+        default=DEFAULT_BENCHMARK_SHAPE,
+        help="Forme du poids de test, sorties x entrées (défaut: 4096x4096)"
+    )
+
+    parser.add_argument(
+        '--bits',
+        type=int,
+        choices=[2, 3, 4, 8],
+        default=4,
+        help="Bits par poids (défaut: 4)"
+    )
+
+    parser.add_argument(
+        '--group-size',
+        type=int,
+        default=128,
+        help="Taille des groupes (défaut: 128)"
+    )
+
+    parser.add_argument(
+        '--repeats',
+        type=int,
+        default=DEFAULT_BENCHMARK_REPEATS,
+        help=f"Répétitions de chaque conversion (défaut: {DEFAULT_BENCHMARK_REPEATS})"
+    )
+
+    args = parser.parse_args()
+
+    if args.list:
+        for layout in LAYOUTS.values():
+            print(f"{layout.name:<14} {layout.description}")
+        sys.exit(0)
+
+    if not args.benchmark:
+        parser.error("--list ou --benchmark requis")
+
+    try:
+        results = benchmark_layouts(args.shape, args.bits, args.group_size, args.repeats)
+    except LayoutError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+    print(format_benchmark(results, args.shape, args.bits, args.group_size))
+    worst = max(row['max_error'] for row in results)
+    if worst > 1e-4:
+        logger.error(f"❌ Matmul de référence divergente (écart {worst:.1e})")
+        sys.exit(1)
+    logger.info("✅ Matmul de référence identique pour toutes les dispositions")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
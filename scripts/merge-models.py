@@ -11,6 +11,7 @@ Usage:
     --ratios: Ratios de fusion (optionnel, par défaut égaux)
     --output: Chemin de sortie (requis)
     --method: Méthode de fusion (linear, slerp, ties, dare) - défaut: linear
+    --curve: Courbe par type de module, ex: self_attn=0.2,0.5,0.8 (2 modèles)
     --name: Nom du modèle fusionné
 """
 
@@ -20,7 +21,7 @@ import os
 import sys
 import yaml
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 def check_dependencies():
     """Vérifie que toutes les dépendances sont installées"""
@@ -45,11 +46,39 @@ def check_dependencies():
         print("   cd mergekit && pip install -e .")
         sys.exit(1)
 
+def parse_curve(spec: str) -> tuple:
+    """Analyse une courbe `filtre=v0,v1,...` (valeurs de la première à la dernière couche)"""
+    pattern, sep, values = spec.partition('=')
+    if not sep or not pattern or not values:
+        raise ValueError(f"Courbe invalide: {spec} (attendu: filtre=v0,v1,...)")
+    return pattern, [float(v) for v in values.split(',')]
+
+
+def ratio_setting(ratio: float, curves: Optional[Dict[str, List[float]]], complement: bool = False):
+    """
+    Paramètre mergekit: le ratio seul, ou une règle par courbe puis le ratio par défaut.
+
+    `complement` donne la part du premier modèle (1 - courbe) quand la courbe
+    décrit celle du second.
+    """
+    if not curves:
+        return ratio
+    rules = [
+        {
+            'filter': pattern,
+            'value': [round(1.0 - v, 6) for v in values] if complement else list(values)
+        }
+        for pattern, values in curves.items()
+    ]
+    return rules + [{'value': ratio}]
+
+
 def create_merge_config(
     models: List[str],
     ratios: List[float],
     method: str = 'linear',
-    output_path: str = 'merged_model'
+    output_path: str = 'merged_model',
+    curves: Optional[Dict[str, List[float]]] = None
 ) -> Dict[str, Any]:
     """
     Crée une configuration de fusion pour mergekit
@@ -59,6 +88,8 @@ def create_merge_config(
         ratios: Ratios de fusion pour chaque modèle
         method: Méthode de fusion (linear, slerp, ties, dare)
         output_path: Chemin de sortie
+        curves: Part du second modèle par type de module (filtre → valeurs
+            réparties sur la profondeur), à la place du ratio global
         
     Returns:
         Configuration au format mergekit
@@ -67,6 +98,15 @@ def create_merge_config(
     total = sum(ratios)
     normalized_ratios = [r / total for r in ratios]
     
+    if curves and len(models) != 2:
+        raise ValueError("Les courbes par couche s'appliquent à une fusion de 2 modèles")
+    
+    def weights():
+        return [
+            ratio_setting(ratio, curves, complement=(i == 0))
+            for i, ratio in enumerate(normalized_ratios)
+        ]
+    
     if method == 'linear':
         # Fusion linéaire simple (moyenne pondérée)
         config = {
@@ -86,10 +126,10 @@ def create_merge_config(
                 {
                     'model': model,
                     'parameters': {
-                        'weight': ratio
+                        'weight': weight
                     }
                 }
-                for model, ratio in zip(models, normalized_ratios)
+                for model, weight in zip(models, weights())
             ],
             'dtype': 'float16',
             'out_dtype': 'float16'
@@ -117,7 +157,7 @@ def create_merge_config(
                 }
             ],
             'parameters': {
-                't': normalized_ratios[1]  # t=0 -> model1, t=1 -> model2
+                't': ratio_setting(normalized_ratios[1], curves)  # t=0 -> model1, t=1 -> model2
             },
             'dtype': 'float16',
             'out_dtype': 'float16'
@@ -142,11 +182,11 @@ def create_merge_config(
                 {
                     'model': model,
                     'parameters': {
-                        'weight': ratio,
+                        'weight': weight,
                         'density': 0.5  # Densité de préservation des paramètres
                     }
                 }
-                for model, ratio in zip(models, normalized_ratios)
+                for model, weight in zip(models, weights())
             ],
             'dtype': 'float16',
             'out_dtype': 'float16'
@@ -171,11 +211,11 @@ def create_merge_config(
                 {
                     'model': model,
                     'parameters': {
-                        'weight': ratio,
+                        'weight': weight,
                         'density': 0.5  # Probabilité de garder les paramètres
                     }
                 }
-                for model, ratio in zip(models, normalized_ratios)
+                for model, weight in zip(models, weights())
             ],
             'dtype': 'float16',
             'out_dtype': 'float16'
@@ -191,7 +231,8 @@ def merge_models(
     ratios: List[float],
     output_path: str,
     method: str = 'linear',
-    model_name: str = 'merged_model'
+    model_name: str = 'merged_model',
+    curves: Optional[Dict[str, List[float]]] = None
 ):
     """
     Fusionne plusieurs modèles en utilisant mergekit
@@ -202,11 +243,14 @@ def merge_models(
         output_path: Chemin de sortie
         method: Méthode de fusion
         model_name: Nom du modèle fusionné
+        curves: Courbes par type de module (part du second modèle selon la couche)
     """
     print(f"🚀 Démarrage de la fusion de modèles")
     print(f"📊 Modèles: {models}")
     print(f"📊 Ratios: {ratios}")
     print(f"📊 Méthode: {method}")
+    for pattern, values in (curves or {}).items():
+        print(f"📊 Courbe {pattern}: {' → '.join(f'{v:g}' for v in values)}")
     print(f"💾 Sortie: {output_path}")
     print()
     
@@ -217,7 +261,7 @@ def merge_models(
     # Étape 1: Créer la configuration de fusion
     print("1️⃣ Création de la configuration de fusion...")
     try:
-        config = create_merge_config(models, ratios, method, output_path)
+        config = create_merge_config(models, ratios, method, output_path, curves)
         
         # Sauvegarder la config
         config_path = output_dir / "merge_config.yaml"
@@ -320,6 +364,12 @@ Exemples:
   # Fusion SLERP (sphérique) - meilleure préservation des propriétés
   python scripts/merge-models.py --models microsoft/phi-3-mini-4k-instruct meta-llama/Llama-2-7b-chat-hf --ratios 0.5 0.5 --method slerp --output models/phi-llama-slerp
   
+  # SLERP par couche: attention proche de phi en surface, du second modèle en profondeur;
+  # MLP à l'inverse
+  python scripts/merge-models.py \\
+      --models microsoft/phi-3-mini-4k-instruct meta-llama/Llama-2-7b-chat-hf --method slerp \\
+      --curve self_attn=0,0.5,0.7,1 --curve mlp=1,0.5,0.3,0 --output models/phi-llama-curves
+  
   # Fusion TIES - fusion intelligente avec élection des meilleurs paramètres
   python scripts/merge-models.py --models model1 model2 model3 --ratios 0.5 0.3 0.2 --method ties --output models/ensemble
         """
@@ -354,6 +404,14 @@ Exemples:
         help='Méthode de fusion (défaut: linear)'
     )
     
+    parser.add_argument(
+        '--curve',
+        action='append',
+        default=[],
+        metavar='FILTRE=V0,V1,...',
+        help='Part du second modèle par couche pour les tenseurs contenant FILTRE (2 modèles)'
+    )
+    
     parser.add_argument(
         '--name',
         type=str,
@@ -373,6 +431,16 @@ Exemples:
         print(f"❌ Erreur: {len(args.models)} modèles fournis mais {len(args.ratios)} ratios")
         sys.exit(1)
     
+    try:
+        curves = dict(parse_curve(spec) for spec in args.curve)
+    except ValueError as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    
+    if curves and len(args.models) != 2:
+        print("❌ Erreur: les courbes par couche s'appliquent à une fusion de 2 modèles")
+        sys.exit(1)
+    
     # Vérifier les dépendances
     check_dependencies()
     
@@ -382,7 +450,8 @@ Exemples:
         ratios=args.ratios,
         output_path=args.output,
         method=args.method,
-        model_name=args.name
+        model_name=args.name,
+        curves=curves
     )
 
 if __name__ == '__main__':